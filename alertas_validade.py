@@ -0,0 +1,187 @@
+"""
+Expiry alert engine for Integre+ application.
+Buckets products by days until expiry ("vencidos", "até 7 dias", ...) from
+a single range scan on idx_produtos_validade. Only products inside the alert
+horizon are cached; product writes refresh their entry by primary key, so the
+catalogue is only reloaded when the day changes or another connection (a
+second terminal, servidor.py) has committed since the cache was last checked.
+"""
+import logging
+import threading
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import get_config
+from database import execute_query, get_connection
+from datas import FORMATO_DATA
+import queries
+
+logger = logging.getLogger(__name__)
+
+class MotorValidade:
+    """Cache of products expiring within the configured horizon"""
+
+    def __init__(self, faixas: Optional[Sequence[int]] = None):
+        self._faixas_fixas = faixas
+        self._lock = threading.Lock()
+        self._itens: Dict[int, Dict[str, Any]] = {}
+        self._referencia: Optional[date] = None
+        self._limite: Optional[str] = None
+        self._ordem: Optional[List[Dict[str, Any]]] = None
+        # data_version seen by each connection when the cache was last known
+        # current; the pragma is per connection, so one entry per thread
+        self._versoes: Dict[Any, int] = {}
+
+    @property
+    def faixas(self) -> List[int]:
+        """Bucket upper bounds in days, ascending"""
+        return sorted(self._faixas_fixas or get_config()['alertas']['faixas_dias'])
+
+    @staticmethod
+    def _versao_dados():
+        """The calling thread's connection and its PRAGMA data_version"""
+        with get_connection() as conn:
+            return conn, conn.execute(queries.VERSAO_DADOS).fetchone()[0]
+
+    def recarregar(self):
+        """Rebuild the cache with one range scan up to the horizon"""
+        # Read the version first: a commit landing during the scan then
+        # forces one more reload instead of being missed
+        conn, versao = self._versao_dados()
+        referencia = date.today()
+        limite = (referencia + timedelta(days=self.faixas[-1] + 1)).strftime(FORMATO_DATA)
+        linhas = execute_query(queries.PRODUTOS_VENCENDO_ATE, (limite,), fetch=True) or []
+        with self._lock:
+            self._itens = {linha['id']: linha for linha in linhas}
+            self._ordem = linhas
+            self._referencia = referencia
+            self._limite = limite
+            self._versoes[conn] = versao
+        logger.debug(f"Cache de validade recarregado: {len(linhas)} produtos até {limite}")
+
+    def _garantir_atual(self):
+        """Reload on a new day or after commits made by other connections"""
+        if self._referencia != date.today():
+            self.recarregar()
+            return
+        conn, versao = self._versao_dados()
+        if self._versoes.get(conn) != versao:
+            logger.debug("Banco alterado por outra conexão; recarregando cache de validade")
+            self.recarregar()
+
+    def invalidar(self):
+        """Force a reload on the next read, e.g. after a bulk import"""
+        with self._lock:
+            self._referencia = None
+            self._itens = {}
+            self._ordem = None
+            self._versoes = {}
+
+    def produto_alterado(self, produto_id: int):
+        """Refresh one product after an insert or update"""
+        if self._referencia is None:
+            return
+        resultado = execute_query(queries.PRODUTOS_VALIDADE_POR_ID, (produto_id,), fetch=True)
+        with self._lock:
+            linha = resultado[0] if resultado else None
+            if linha and linha['quantidade'] > 0 and linha['validade'] < self._limite:
+                self._itens[produto_id] = linha
+            else:
+                self._itens.pop(produto_id, None)
+            self._ordem = None
+
+    def estoque_alterado(self, produto_id: int):
+        """Refresh a product after a stock decrement, only if it is being tracked"""
+        if produto_id in self._itens:
+            self.produto_alterado(produto_id)
+
+    def produto_removido(self, produto_id: int):
+        """Drop a deleted product from the cache"""
+        with self._lock:
+            if self._itens.pop(produto_id, None) is not None:
+                self._ordem = None
+
+    def _ordenados(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._ordem is None:
+                self._ordem = sorted(self._itens.values(), key=lambda item: item['validade'])
+            return self._ordem
+
+    def resumo(self) -> List[Dict[str, Any]]:
+        """
+        Return the alert buckets, most urgent first.
+        Each bucket has 'rotulo', 'ate_dias' (None for expired), 'produtos'
+        (count), 'unidades' (stock at risk) and 'itens' ordered by expiry.
+        Boundaries are ISO strings, so bucketing is a bisect per bucket.
+        """
+        self._garantir_atual()
+        itens = self._ordenados()
+        validades = [item['validade'] for item in itens]
+        limites = [self._referencia.strftime(FORMATO_DATA)] + [
+            (self._referencia + timedelta(days=dias + 1)).strftime(FORMATO_DATA) for dias in self.faixas
+        ]
+        rotulos = [('Vencidos', None)] + [(f"Vencem em até {dias} dias", dias) for dias in self.faixas]
+        resultado = []
+        inicio = 0
+        for (rotulo, ate_dias), limite in zip(rotulos, limites):
+            fim = bisect_left(validades, limite, inicio)
+            fatia = itens[inicio:fim]
+            resultado.append({
+                'rotulo': rotulo,
+                'ate_dias': ate_dias,
+                'produtos': len(fatia),
+                'unidades': sum(item['quantidade'] for item in fatia),
+                'itens': fatia,
+            })
+            inicio = fim
+        return resultado
+
+    def vencendo_em(self, dias: int) -> List[Dict[str, Any]]:
+        """Products with stock expiring from today up to 'dias' days ahead"""
+        self._garantir_atual()
+        if dias > self.faixas[-1]:
+            limite = (self._referencia + timedelta(days=dias + 1)).strftime(FORMATO_DATA)
+            linhas = execute_query(queries.PRODUTOS_VENCENDO_ATE, (limite,), fetch=True) or []
+        else:
+            linhas = self._ordenados()
+        hoje_iso = self._referencia.strftime(FORMATO_DATA)
+        limite = (self._referencia + timedelta(days=dias + 1)).strftime(FORMATO_DATA)
+        return [linha for linha in linhas if hoje_iso <= linha['validade'] < limite]
+
+    def mensagem_alerta(self) -> Optional[str]:
+        """Short text for notifications, or None when nothing is expiring"""
+        faixas = self.resumo()
+        partes = [f"{faixas[0]['produtos']} produto(s) vencido(s)"] if faixas[0]['produtos'] else []
+        if faixas[1]['produtos']:
+            partes.append(f"{faixas[1]['produtos']} vencendo em até {faixas[1]['ate_dias']} dias")
+        return ', '.join(partes) if partes else None
+
+# Global engine instance
+motor_validade = MotorValidade()
+
+def agendar_alertas(root, notificar, intervalo_ms: Optional[int] = None):
+    """
+    Run the alert check now and then periodically on the Tk event loop.
+
+    Args:
+        root: Tk widget used for scheduling (after)
+        notificar: Callable receiving the alert message
+        intervalo_ms: Period between checks (defaults to the configured one)
+    """
+    intervalo_ms = intervalo_ms or get_config()['alertas']['intervalo_minutos'] * 60 * 1000
+
+    def verificar():
+        try:
+            mensagem = motor_validade.mensagem_alerta()
+            if mensagem:
+                notificar(mensagem)
+        except Exception as e:
+            logger.error(f"Erro ao verificar validades: {e}")
+        try:
+            root.after(intervalo_ms, verificar)
+        except Exception:
+            # Window closed: stop rescheduling
+            pass
+
+    root.after(0, verificar)
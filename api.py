@@ -0,0 +1,426 @@
+"""
+HTTP/JSON API for Integre+ application.
+Headless access to products, clients, sales and reports for web
+storefronts, handheld scanners and integrations, built on the same data
+functions the windows use (produtos, clientes, vendas, relatorios) and on
+the standard library only.
+
+- Connections are served by a fixed pool of API_CONFIG['trabalhadores']
+  threads. Each worker keeps its persistent SQLite connection (see
+  database.get_connection), so the worker pool is the connection pool: no
+  request opens a connection, and the number of connections is bounded
+- POST /api/login returns a session token (see autenticacao and sessao);
+  every other route needs 'Authorization: Bearer <token>' and the route's
+  permission, checked in memory
+- Listings are keyset pages: ?apos=<last id>&limite=N. The response carries
+  'proximo', the value of 'apos' for the next page (null on the last one)
+- GET responses carry a weak ETag; a request whose If-None-Match matches
+  gets 304 and no body. Bodies of API_CONFIG['gzip_minimo'] bytes or more
+  are gzipped when the client accepts it
+
+Usage: python api.py [porta]
+"""
+import gzip
+import hashlib
+import json
+import logging
+import math
+import re
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import autenticacao
+import clientes
+from config import get_config
+from database import DatabaseError
+import produtos
+import relatorios
+from sessao import Sessao, sessoes
+import vendas
+
+logger = logging.getLogger(__name__)
+
+# Route access besides a permission name
+PUBLICA = None      # no session needed
+LOGADO = ''         # any valid session
+
+class ErroAPI(Exception):
+    """Request refused with an HTTP status and a message for the client"""
+
+    def __init__(self, status: int, mensagem: str, cabecalhos: Optional[Dict[str, str]] = None):
+        super().__init__(mensagem)
+        self.status = status
+        self.cabecalhos = cabecalhos or {}
+
+class Requisicao(NamedTuple):
+    sessao: Optional[Sessao]
+    params: Dict[str, List[str]]     # query string (parse_qs)
+    corpo: Any                       # decoded JSON body, or None
+    terminal: str                    # client address
+
+# ================= PARÂMETROS =================
+
+def _inteiro(params: Dict[str, List[str]], nome: str, padrao: int,
+             minimo: int = 0, maximo: Optional[int] = None) -> int:
+    valor = params.get(nome, [''])[0]
+    if not valor:
+        return padrao
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ErroAPI(400, f"Parâmetro inválido: {nome}")
+    if numero < minimo or (maximo is not None and numero > maximo):
+        raise ErroAPI(400, f"Parâmetro fora do intervalo: {nome}")
+    return numero
+
+def _texto(params: Dict[str, List[str]], nome: str) -> str:
+    return params.get(nome, [''])[0]
+
+def _pagina(params: Dict[str, List[str]], buscar: Callable[[int, int], List[Dict]]) -> Dict:
+    """One keyset page: buscar(apos, limite) returns rows in id order"""
+    config = get_config()['api']
+    limite = _inteiro(params, 'limite', config['pagina'], 1, config['pagina_maxima'])
+    itens = buscar(_inteiro(params, 'apos', 0), limite)
+    return {'itens': itens, 'proximo': itens[-1]['id'] if len(itens) == limite else None}
+
+# ================= ROTAS =================
+
+def _login(req: Requisicao):
+    dados = req.corpo if isinstance(req.corpo, dict) else {}
+    username, senha = dados.get('username'), dados.get('senha')
+    if not isinstance(username, str) or not isinstance(senha, str):
+        raise ErroAPI(400, "Informe 'username' e 'senha'")
+    resultado = autenticacao.autenticar(username, senha, req.terminal)
+    if resultado.situacao == autenticacao.LIMITADO:
+        raise ErroAPI(429, "Muitas tentativas. Aguarde para tentar novamente.",
+                      {'Retry-After': str(math.ceil(resultado.espera))})
+    if resultado.situacao in (autenticacao.BLOQUEADO, autenticacao.BLOQUEADO_AGORA):
+        raise ErroAPI(403, "Conta bloqueada. Procure o administrador.")
+    if not resultado.ok:
+        raise ErroAPI(401, "Usuário ou senha inválidos")
+    sessao = sessoes.abrir(resultado.usuario)
+    return 200, {'token': sessao.token, 'username': sessao.username, 'papel': sessao.papel,
+                 'permissoes': sorted(sessao.permissoes),
+                 'expira_em_segundos': round(sessao.expira_em - sessao.criada_em)}
+
+def _logout(req: Requisicao):
+    sessoes.encerrar(req.sessao)
+    return 204, None
+
+def _listar_produtos(req: Requisicao):
+    nome = _texto(req.params, 'nome')
+    return 200, _pagina(req.params, lambda apos, limite: produtos.pagina_produtos(apos, limite, nome))
+
+def _obter_produto(req: Requisicao, produto_id: str):
+    produto = produtos.buscar_produto(int(produto_id))
+    if produto is None:
+        raise ErroAPI(404, "Produto não encontrado")
+    produto.pop('imagem', None)
+    return 200, produto
+
+def _listar_clientes(req: Requisicao):
+    termo = _texto(req.params, 'busca')
+    return 200, _pagina(req.params, lambda apos, limite: clientes.pagina_clientes(apos, limite, termo))
+
+def _listar_vendas(req: Requisicao):
+    return 200, _pagina(req.params, vendas.pagina_vendas)
+
+def _registrar_venda(req: Requisicao):
+    dados = req.corpo if isinstance(req.corpo, dict) else {}
+    produto_id, quantidade = dados.get('produto_id'), dados.get('quantidade')
+    cliente_id = dados.get('cliente_id')
+    forma_pagamento = dados.get('forma_pagamento', 'Dinheiro')
+    if (type(produto_id) is not int or type(quantidade) is not int or quantidade <= 0
+            or (cliente_id is not None and type(cliente_id) is not int)
+            or not isinstance(forma_pagamento, str)):
+        raise ErroAPI(400, "Informe 'produto_id' e 'quantidade' (inteiros, quantidade > 0)")
+    produto = produtos.buscar_produto(produto_id)
+    if produto is None:
+        raise ErroAPI(404, "Produto não encontrado")
+    # Sold at the catalog price: clients of the API cannot set prices
+    mensagem = vendas.registrar_venda(produto_id, quantidade, produto['preco'], cliente_id,
+                                      forma_pagamento, sessao=req.sessao)
+    if mensagem == "Estoque insuficiente.":
+        raise ErroAPI(409, mensagem)
+    if mensagem.startswith("Permissão negada"):
+        raise ErroAPI(403, mensagem)
+    if mensagem.startswith("Erro"):
+        raise ErroAPI(500, mensagem)
+    return 201, {'mensagem': mensagem, 'total': produto['preco'] * quantidade}
+
+def _relatorio_categorias(req: Requisicao):
+    dias = _inteiro(req.params, 'dias', 30, 1)
+    try:
+        resumo = relatorios.resumo_por_categoria(_texto(req.params, 'inicio') or None,
+                                                 _texto(req.params, 'fim') or None, dias)
+    except ValueError:
+        raise ErroAPI(400, "Datas inválidas (use AAAA-MM-DD)")
+    return 200, {'itens': resumo}
+
+def _relatorio_vendas(req: Requisicao):
+    try:
+        serie = relatorios.obter_vendas_por_periodo(_texto(req.params, 'inicio') or None,
+                                                    _texto(req.params, 'fim') or None)
+    except ValueError:
+        raise ErroAPI(400, "Datas inválidas (use AAAA-MM-DD)")
+    return 200, {'itens': [{'dia': dia, 'total': total} for dia, total in serie]}
+
+class Rota(NamedTuple):
+    metodo: str
+    padrao: re.Pattern
+    permissao: Optional[str]         # PUBLICA, LOGADO or a permission name
+    funcao: Callable
+
+ROTAS = [Rota(metodo, re.compile(padrao + '$'), permissao, funcao) for metodo, padrao, permissao, funcao in (
+    ('POST', r'/api/login', PUBLICA, _login),
+    ('POST', r'/api/logout', LOGADO, _logout),
+    ('GET', r'/api/produtos', 'produtos', _listar_produtos),
+    ('GET', r'/api/produtos/(\d+)', 'produtos', _obter_produto),
+    ('GET', r'/api/clientes', 'clientes', _listar_clientes),
+    ('GET', r'/api/vendas', 'vendas', _listar_vendas),
+    ('POST', r'/api/vendas', 'vendas', _registrar_venda),
+    ('GET', r'/api/relatorios/categorias', 'relatorios', _relatorio_categorias),
+    ('GET', r'/api/relatorios/vendas', 'relatorios', _relatorio_vendas),
+)]
+
+def _rota(metodo: str, caminho: str) -> Tuple[Rota, Tuple[str, ...]]:
+    permitidos = []
+    for rota in ROTAS:
+        encontrada = rota.padrao.match(caminho)
+        if encontrada:
+            if rota.metodo == metodo:
+                return rota, encontrada.groups()
+            permitidos.append(rota.metodo)
+    if permitidos:
+        raise ErroAPI(405, "Método não permitido", {'Allow': ', '.join(permitidos)})
+    raise ErroAPI(404, "Rota não encontrada")
+
+# ================= HTTP =================
+
+def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match"""
+    if not if_none_match:
+        return False
+    marcas = [marca.strip() for marca in if_none_match.split(',')]
+    return '*' in marcas or etag.removeprefix('W/') in (marca.removeprefix('W/') for marca in marcas)
+
+def _aceita_gzip(accept_encoding: str) -> bool:
+    for parte in accept_encoding.split(','):
+        nome, _, parametros = parte.partition(';')
+        if nome.strip().lower() == 'gzip':
+            qualidade = parametros.replace(' ', '').removeprefix('q=')
+            try:
+                return not parametros or float(qualidade) > 0
+            except ValueError:
+                return False
+    return False
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    """One client connection (kept alive across requests)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'IntegrePlus'
+    # Headers and body go out in two writes; with Nagle on, the body waits
+    # for the client's delayed ACK (~40 ms per keep-alive request)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.timeout = get_config()['api']['requisicao_segundos']
+        self._primeira = True
+        super().setup()
+
+    def handle_one_request(self):
+        # A keep-alive connection holds a pool worker while it waits, so
+        # between requests the wait is the shorter ociosidade_segundos
+        if self._primeira:
+            self._primeira = False
+        else:
+            self.connection.settimeout(get_config()['api']['ociosidade_segundos'])
+        super().handle_one_request()
+
+    def parse_request(self):
+        # The request line arrived: headers and body get the full timeout
+        self.connection.settimeout(self.timeout)
+        return super().parse_request()
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def _atender(self, metodo: str):
+        inicio = time.perf_counter()
+        url = urlsplit(self.path)
+        cabecalhos: Dict[str, str] = {}
+        try:
+            # The body is read first so the connection stays usable whatever the outcome
+            corpo = self._ler_corpo() if metodo == 'POST' else None
+            rota, argumentos = _rota(metodo, url.path)
+            requisicao = Requisicao(self._sessao(rota.permissao), parse_qs(url.query),
+                                    corpo, self.client_address[0])
+            status, resposta = rota.funcao(requisicao, *argumentos)
+        except ErroAPI as e:
+            status, resposta, cabecalhos = e.status, {'erro': str(e)}, e.cabecalhos
+        except DatabaseError:
+            logger.exception(f"Erro de banco de dados em {metodo} {url.path}")
+            status, resposta = 503, {'erro': "Banco de dados indisponível"}
+        except Exception:
+            logger.exception(f"Erro em {metodo} {url.path}")
+            status, resposta = 500, {'erro': "Erro interno"}
+        self._responder(status, resposta, cabecalhos, com_etag=metodo == 'GET' and status == 200)
+        logger.debug(f"{metodo} {self.path} {status}", extra={
+            'latency_ms': round((time.perf_counter() - inicio) * 1000, 3)})
+
+    def _ler_corpo(self) -> Any:
+        try:
+            tamanho = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self.close_connection = True
+            raise ErroAPI(400, "Content-Length inválido")
+        if tamanho > get_config()['api']['corpo_maximo']:
+            # Not read, so the connection cannot be reused
+            self.close_connection = True
+            raise ErroAPI(413, "Corpo da requisição muito grande")
+        dados = self.rfile.read(tamanho) if tamanho > 0 else b''
+        if not dados:
+            return None
+        try:
+            return json.loads(dados)
+        except ValueError:
+            raise ErroAPI(400, "JSON inválido")
+
+    def _sessao(self, permissao: Optional[str]) -> Optional[Sessao]:
+        if permissao is PUBLICA:
+            return None
+        tipo, _, token = self.headers.get('Authorization', '').partition(' ')
+        sessao = sessoes.por_token(token.strip()) if tipo.lower() == 'bearer' else None
+        if sessao is None:
+            raise ErroAPI(401, "Faça login e envie 'Authorization: Bearer <token>'",
+                          {'WWW-Authenticate': 'Bearer'})
+        if permissao and not sessoes.pode(sessao, permissao):
+            raise ErroAPI(403, f"Permissão negada: {permissao}")
+        return sessao
+
+    def _responder(self, status: int, resposta: Any, cabecalhos: Dict[str, str], com_etag: bool):
+        config = get_config()['api']
+        corpo = b'' if resposta is None else json.dumps(
+            resposta, ensure_ascii=False, default=str, separators=(',', ':')).encode('utf-8')
+        cabecalhos = dict(cabecalhos, Vary='Accept-Encoding, Authorization')
+        if com_etag:
+            etag = f'W/"{hashlib.blake2b(corpo, digest_size=12).hexdigest()}"'
+            cabecalhos.update({'ETag': etag, 'Cache-Control': 'private, no-cache'})
+            if _etag_confere(self.headers.get('If-None-Match'), etag):
+                status, corpo = 304, b''
+        if len(corpo) >= config['gzip_minimo'] and _aceita_gzip(self.headers.get('Accept-Encoding', '')):
+            corpo = gzip.compress(corpo, compresslevel=5)
+            cabecalhos['Content-Encoding'] = 'gzip'
+
+        self.send_response(status)
+        if self.server.conexoes_na_fila():
+            # Every worker is busy: free this one for a waiting client
+            self.send_header('Connection', 'close')
+        if corpo:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if status not in (204, 304):
+            self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        # Requests are logged by _atender; this only sees protocol errors
+        logger.debug(f"{self.address_string()} {format % args}")
+
+class PoolDeTrabalhadoresMixin:
+    """
+    socketserver mix-in handing each connection to a fixed pool of worker
+    threads (self.trabalhadores, set by the subclass). Each worker keeps its
+    persistent database connection, whereas a thread per connection would
+    open, and leave behind, a new one every time.
+    """
+
+    request_queue_size = 128
+    trabalhadores: ThreadPoolExecutor
+
+    def __init__(self, *args, **kwargs):
+        self._abertas = set()
+        self._na_fila = 0
+        self._abertas_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        with self._abertas_lock:
+            self._abertas.add(request)
+            self._na_fila += 1
+        self.trabalhadores.submit(self._processar, request, client_address)
+
+    def conexoes_na_fila(self) -> int:
+        """Accepted connections still waiting for a free worker"""
+        with self._abertas_lock:
+            return self._na_fila
+
+    def _processar(self, request, client_address):
+        with self._abertas_lock:
+            self._na_fila -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._abertas_lock:
+                self._abertas.discard(request)
+            self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        logger.exception(f"Erro na conexão de {client_address[0]}")
+
+    def server_close(self):
+        super().server_close()
+        # Wake workers blocked reading from idle clients, then wait for them
+        with self._abertas_lock:
+            abertas = list(self._abertas)
+        for request in abertas:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.trabalhadores.shutdown(wait=True, cancel_futures=True)
+
+class ServidorAPI(PoolDeTrabalhadoresMixin, HTTPServer):
+    """HTTP server on a pool of API_CONFIG['trabalhadores'] threads"""
+
+    def __init__(self, endereco: Tuple[str, int], trabalhadores: Optional[int] = None):
+        super().__init__(endereco, ManipuladorAPI)
+        self.trabalhadores = ThreadPoolExecutor(
+            max_workers=trabalhadores or get_config()['api']['trabalhadores'], thread_name_prefix='api')
+
+def criar_servidor(host: Optional[str] = None, porta: Optional[int] = None,
+                   trabalhadores: Optional[int] = None) -> ServidorAPI:
+    """Bound server (porta 0 picks a free port; see server_address)"""
+    config = get_config()['api']
+    return ServidorAPI((host or config['host'], config['porta'] if porta is None else porta), trabalhadores)
+
+def servir(host: Optional[str] = None, porta: Optional[int] = None):
+    """Serve until interrupted"""
+    servidor = criar_servidor(host, porta)
+    host, porta = servidor.server_address[:2]
+    logger.info(f"API do Integre+ em http://{host}:{porta}/api")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    from bootstrap import inicializar_aplicacao
+    inicializar_aplicacao()
+    servir(porta=int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,86 @@
+"""
+Authentication service for Integre+ application.
+The single implementation of a login attempt, shared by the login window
+and clientes.autenticar_usuario. Each attempt costs at most one SELECT and
+one UPDATE:
+
+- over the failed-attempt limit for the terminal: refused with no query
+  and no bcrypt (see limitador_login)
+- unknown or blocked user: the SELECT only
+- right password: the SELECT and one UPDATE (last login, counter reset and,
+  if the cost changed, the new hash)
+- wrong password: the SELECT; the failure is counted in memory and written
+  in the limiter's next batch, except the one that reaches
+  AUTENTICACAO_CONFIG['bloquear_apos'], which blocks the account with one
+  UPDATE and closes its sessions
+"""
+import logging
+from typing import Dict, NamedTuple, Optional
+
+from config import get_config
+from database import execute_query
+from datas import agora
+from limitador_login import limitador
+import queries
+import senhas
+from sessao import sessoes
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of an attempt
+OK = 'ok'
+INVALIDO = 'invalido'            # unknown user or wrong password
+BLOQUEADO = 'bloqueado'          # account was already blocked
+BLOQUEADO_AGORA = 'bloqueado_agora'  # this failure blocked the account
+LIMITADO = 'limitado'            # too many recent failures from this terminal
+
+class ResultadoAutenticacao(NamedTuple):
+    situacao: str
+    usuario: Optional[Dict] = None   # id, username, email, permissao, ultimo_login (previous)
+    espera: float = 0.0              # seconds to wait when LIMITADO
+
+    @property
+    def ok(self) -> bool:
+        return self.situacao == OK
+
+def autenticar(username: str, senha: str, terminal: Optional[str] = None) -> ResultadoAutenticacao:
+    """
+    Check one login attempt.
+
+    Args:
+        username: Login name
+        senha: Password typed
+        terminal: Terminal the attempt comes from (default: this machine)
+
+    Returns:
+        ResultadoAutenticacao; 'usuario' is set (without the hash) only when ok
+    """
+    if not limitador.permitido(username, terminal):
+        return ResultadoAutenticacao(LIMITADO, espera=limitador.tempo_restante(username, terminal))
+
+    linhas = execute_query(queries.USUARIOS_AUTENTICAR, (username,), fetch=True)
+    if not linhas:
+        limitador.registrar_falha(username, terminal, persistir=False)
+        return ResultadoAutenticacao(INVALIDO)
+    usuario = linhas[0]
+    if usuario['bloqueado']:
+        return ResultadoAutenticacao(BLOQUEADO)
+
+    valida, novo_hash = senhas.verificar_e_atualizar(senha, usuario.pop('senha'))
+    tentativas = usuario.pop('tentativas_login') or 0
+    del usuario['bloqueado']
+
+    if valida:
+        execute_query(queries.USUARIOS_LOGIN_OK, (agora(), novo_hash, usuario['id']))
+        limitador.registrar_sucesso(username, terminal)
+        return ResultadoAutenticacao(OK, usuario)
+
+    # Counted atomically, so concurrent failures from several terminals
+    # cannot all see the same total
+    tentativas += limitador.registrar_falha(username, terminal)
+    if tentativas >= get_config()['autenticacao']['bloquear_apos']:
+        execute_query(queries.USUARIOS_BLOQUEAR, (limitador.descartar_pendentes(username), usuario['id']))
+        sessoes.invalidar_usuario(usuario['id'])
+        logger.warning(f"Conta bloqueada após {tentativas} tentativas: {username}")
+        return ResultadoAutenticacao(BLOQUEADO_AGORA)
+    return ResultadoAutenticacao(INVALIDO)
@@ -0,0 +1,160 @@
+"""
+Load test for the HTTP/JSON API.
+Starts a local instance (api.criar_servidor) on a scratch database with
+'produtos' products, then runs 'clientes' keep-alive clients for 'segundos'
+seconds. Each client logs in and loops over a mix of requests: product
+pages (revalidated with If-None-Match), single products, a sales page and a
+sale. Prints requests/s, latency percentiles per kind of request, the share
+answered with 304 and the bytes saved by gzip.
+
+Usage: python benchmark_api.py [clientes] [segundos] [produtos]
+"""
+import gzip
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import config
+
+SENHA = 'Senha@123'
+
+def preparar_banco(caminho: str, produtos: int):
+    config.DB_CONFIG['name'] = caminho
+    config.AUTENTICACAO_CONFIG['bcrypt_rounds'] = 4
+    config.AUTENTICACAO_CONFIG['calibracao'] = os.path.join(os.path.dirname(caminho), 'calibracao.json')
+    from bootstrap import garantir_schema
+    import clientes
+    from database import transaction
+    import queries
+    garantir_schema()
+    clientes.cadastrar_usuario('loja', SENHA, 'loja@integre.com', 'Gerente')
+    momento = '2024-01-01 00:00:00'
+    with transaction() as conn:
+        conn.executemany(queries.PRODUTOS_INSERIR, [
+            (f'Produto {i}', 1_000_000, 100 + i, '2030-01-01', f'Categoria {i % 20}', f'789{i:010d}',
+             None, None, momento, momento)
+            for i in range(produtos)])
+
+class ClienteCarga:
+    """One storefront/scanner: a keep-alive connection and its ETag cache"""
+
+    def __init__(self, endereco, produtos: int, semente: int):
+        self.conexao = http.client.HTTPConnection(*endereco, timeout=30)
+        self.produtos = produtos
+        self.acaso = random.Random(semente)
+        self.etags = {}
+        self.token = None
+
+    def entrar(self, username: str, senha: str):
+        self.conexao.request('POST', '/api/login', body=json.dumps({'username': username, 'senha': senha}).encode())
+        self.token = json.loads(self.conexao.getresponse().read())['token']
+
+    def pedir(self, metodo, caminho, corpo=None):
+        cabecalhos = {'Accept-Encoding': 'gzip'}
+        if self.token:
+            cabecalhos['Authorization'] = f'Bearer {self.token}'
+        if metodo == 'GET' and caminho in self.etags:
+            cabecalhos['If-None-Match'] = self.etags[caminho]
+        self.conexao.request(metodo, caminho, body=json.dumps(corpo).encode() if corpo else None,
+                             headers=cabecalhos)
+        resposta = self.conexao.getresponse()
+        bruto = resposta.read()
+        if resposta.getheader('ETag'):
+            self.etags[caminho] = resposta.getheader('ETag')
+        tamanho = len(bruto)
+        if resposta.getheader('Content-Encoding') == 'gzip':
+            bruto = gzip.decompress(bruto)
+        return resposta.status, tamanho, len(bruto)
+
+    def proxima(self):
+        """(kind, method, path, body) of the next request in the mix"""
+        sorteio = self.acaso.random()
+        if sorteio < 0.4:
+            pagina = self.acaso.randrange(max(1, self.produtos // 100))
+            return 'pagina de produtos', 'GET', f'/api/produtos?apos={pagina * 100}&limite=100', None
+        if sorteio < 0.8:
+            return 'produto', 'GET', f'/api/produtos/{self.acaso.randint(1, self.produtos)}', None
+        if sorteio < 0.9:
+            return 'pagina de vendas', 'GET', '/api/vendas?limite=50', None
+        corpo = {'produto_id': self.acaso.randint(1, self.produtos), 'quantidade': 1}
+        return 'venda', 'POST', '/api/vendas', corpo
+
+def main():
+    argumentos = sys.argv[1:]
+    clientes_carga = int(argumentos[0]) if argumentos else 8
+    segundos = float(argumentos[1]) if len(argumentos) > 1 else 5
+    produtos = int(argumentos[2]) if len(argumentos) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_banco(os.path.join(tmp, 'bench.db'), produtos)
+        import api
+        import database
+        servidor = api.criar_servidor('127.0.0.1', 0, trabalhadores=max(clientes_carga, 4))
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+        latencias = defaultdict(list)
+        contagem = defaultdict(int)
+        bytes_enviados = bytes_originais = 0
+        lock = threading.Lock()
+        barreira = threading.Barrier(clientes_carga + 1)
+        parar = threading.Event()
+
+        def carga(n):
+            nonlocal bytes_enviados, bytes_originais
+            cliente = ClienteCarga(servidor.server_address[:2], produtos, n)
+            cliente.entrar('loja', SENHA)
+            barreira.wait()
+            proprias, status_vistos = defaultdict(list), defaultdict(int)
+            enviados = originais = 0
+            while not parar.is_set():
+                tipo, metodo, caminho, corpo = cliente.proxima()
+                inicio = time.perf_counter()
+                status, tamanho, original = cliente.pedir(metodo, caminho, corpo)
+                proprias[tipo].append((time.perf_counter() - inicio) * 1000)
+                status_vistos[status] += 1
+                enviados += tamanho
+                originais += original
+            with lock:
+                for tipo, tempos in proprias.items():
+                    latencias[tipo] += tempos
+                for status, vezes in status_vistos.items():
+                    contagem[status] += vezes
+                bytes_enviados += enviados
+                bytes_originais += originais
+            cliente.conexao.close()
+
+        threads = [threading.Thread(target=carga, args=(n,)) for n in range(clientes_carga)]
+        for thread in threads:
+            thread.start()
+        barreira.wait()
+        inicio = time.perf_counter()
+        time.sleep(segundos)
+        parar.set()
+        for thread in threads:
+            thread.join()
+        decorrido = time.perf_counter() - inicio
+        servidor.shutdown()
+        servidor.server_close()
+        database.close_connections()
+
+    total = sum(contagem.values())
+    print(f"{clientes_carga} clientes, {segundos:.0f} s, {produtos} produtos: "
+          f"{total} requisições ({total / decorrido:.0f} req/s)")
+    for tipo, tempos in sorted(latencias.items()):
+        tempos.sort()
+        p99 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))]
+        print(f"  {tipo:<20} {len(tempos):7d}  mediana {statistics.median(tempos):7.2f} ms  p99 {p99:7.2f} ms")
+    print(f"  status: {dict(sorted(contagem.items()))} ({contagem[304] / max(total, 1):.0%} respondidas com 304)")
+    if bytes_originais:
+        print(f"  gzip: {bytes_enviados / 1024:.0f} KiB enviados de {bytes_originais / 1024:.0f} KiB "
+              f"({1 - bytes_enviados / bytes_originais:.0%} economizados)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark for the authentication service.
+For each kind of attempt (success, wrong password, unknown user, blocked
+account, throttled terminal) prints the statements sent to SQLite and the
+median latency of autenticacao.autenticar, then the throughput of
+simultaneous logins from several terminals. The bcrypt cost defaults to the
+minimum so the numbers show the database work; pass a cost to include
+realistic hashing.
+
+Usage: python benchmark_autenticacao.py [repeticoes] [custo] [terminais]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import config
+
+SENHA = 'Senha@123'
+
+def preparar_banco(caminho: str, custo: int, usuarios: int):
+    config.DB_CONFIG['name'] = caminho
+    config.AUTENTICACAO_CONFIG['bcrypt_rounds'] = custo
+    config.AUTENTICACAO_CONFIG['calibracao'] = os.path.join(os.path.dirname(caminho), 'calibracao.json')
+    from bootstrap import garantir_schema
+    import clientes
+    garantir_schema()
+    for i in range(usuarios):
+        clientes.cadastrar_usuario(f'caixa{i}', SENHA, f'caixa{i}@integre.com')
+    clientes.bloquear_usuario(usuarios)  # the last one (ids start at 1)
+
+def medir(rotulo: str, tentativa, repeticoes: int):
+    from database import get_connection
+    comandos = []
+    with get_connection() as conn:
+        conn.set_trace_callback(comandos.append)
+        tentativa(0)
+        conn.set_trace_callback(None)
+    leituras = sum(c.lstrip().upper().startswith('SELECT') for c in comandos)
+    escritas = sum(c.lstrip().upper().startswith(('UPDATE', 'INSERT')) for c in comandos)
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        tentativa(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"  {rotulo:<26} {leituras} SELECT, {escritas} UPDATE  {statistics.median(tempos):8.3f} ms")
+
+def main():
+    argumentos = sys.argv[1:]
+    repeticoes = int(argumentos[0]) if argumentos else 200
+    custo = int(argumentos[1]) if len(argumentos) > 1 else 4
+    terminais = int(argumentos[2]) if len(argumentos) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_banco(os.path.join(tmp, 'bench.db'), custo, terminais + 2)
+        import autenticacao
+        import database
+        from limitador_login import limitador
+        limitador.intervalo_flush = 3600
+        bloqueado = f'caixa{terminais + 1}'
+
+        print(f"Custo bcrypt {custo}, {repeticoes} tentativas por cenário")
+        medir("login correto", lambda i: autenticacao.autenticar('caixa0', SENHA, f't{i}'), repeticoes)
+        medir("usuário inexistente", lambda i: autenticacao.autenticar(f'x{i}', SENHA, f't{i}'), repeticoes)
+        medir("conta bloqueada", lambda i: autenticacao.autenticar(bloqueado, SENHA, f't{i}'), repeticoes)
+        # A new terminal per attempt keeps the limiter out of the way; the
+        # account counter is reset each time so it never blocks
+        def senha_errada(i):
+            autenticacao.autenticar('caixa1', 'errada', f't{i}')
+            limitador.descartar_pendentes('caixa1')
+        medir("senha errada", senha_errada, repeticoes)
+        for _ in range(limitador.tentativas):
+            autenticacao.autenticar('fantasma', 'x', 'terminal-limitado')
+        medir("terminal limitado", lambda i: autenticacao.autenticar('fantasma', 'x', 'terminal-limitado'),
+              repeticoes)
+
+        por_terminal = max(1, repeticoes // terminais)
+        barreira = threading.Barrier(terminais + 1)
+        erros = []
+
+        def terminal(n):
+            barreira.wait()
+            for _ in range(por_terminal):
+                if not autenticacao.autenticar(f'caixa{n}', SENHA, f'terminal{n}').ok:
+                    erros.append(n)
+
+        threads = [threading.Thread(target=terminal, args=(n,)) for n in range(terminais)]
+        for thread in threads:
+            thread.start()
+        barreira.wait()
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        decorrido = time.perf_counter() - inicio
+        total = por_terminal * terminais
+        print(f"\n{terminais} terminais simultâneos: {total} logins em {decorrido:.2f} s "
+              f"({total / decorrido:.0f} logins/s, {len(erros)} recusados)")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
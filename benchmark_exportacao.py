@@ -0,0 +1,92 @@
+"""
+Benchmark for the streaming export.
+Fills a scratch database with N sales and exports them to CSV, gzip CSV and
+XLSX. Each export runs in a fresh process that reports its time and peak
+resident memory (ru_maxrss) above the baseline after imports; the peak
+should stay flat as N grows, since only one page of rows is held at a time.
+For contrast, --pandas N measures loading N sales into a DataFrame, which is
+what the old exports did before calling to_excel.
+
+Usage: python benchmark_exportacao.py [vendas] [formatos] [--pandas N]
+  e.g. python benchmark_exportacao.py 5000000 csv,csv.gz,xlsx --pandas 1000000
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import config
+
+def preparar_banco(caminho: str, vendas: int):
+    """Scratch database with 100 products and 'vendas' sales"""
+    config.DB_CONFIG['name'] = caminho
+    import database
+    import queries
+    database.create_tables()
+    with database.transaction() as conn:
+        conn.executemany(queries.PRODUTOS_INSERIR, [
+            (f'Produto {i}', 1000, 100 + i, '2030-01-01', None, None, None, None, 'x', 'x')
+            for i in range(100)
+        ])
+        conn.executemany(
+            'INSERT INTO vendas (produto_id, quantidade, preco_unitario_centavos, total_centavos, data, forma_pagamento) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            ((1 + i % 100, 1 + i % 5, 199, 199 * (1 + i % 5),
+              f'2025-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00', 'Dinheiro')
+             for i in range(vendas))
+        )
+    database.close_connections()
+
+def _pico_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def filho(banco: str, formato: str, destino: str):
+    """Run one measurement in this (fresh) process and print the result"""
+    config.DB_CONFIG['name'] = banco
+    import exportacao
+    import database
+    import pandas as pd
+    base = _pico_mib()
+    inicio = time.perf_counter()
+    if formato == 'pandas':
+        with database.get_connection() as conn:
+            pd.read_sql_query(f'SELECT * FROM vendas LIMIT {int(destino)}', conn)
+        rotulo = f"pandas read_sql ({destino})"
+    else:
+        exportacao.exportar('vendas', destino)
+        rotulo = f"exportar {formato}"
+    decorrido = time.perf_counter() - inicio
+    print(f"{rotulo:28} {decorrido:8.1f}s   memória +{_pico_mib() - base:7.1f} MiB", flush=True)
+
+def main():
+    argumentos = sys.argv[1:]
+    limite_pandas = 0
+    if '--pandas' in argumentos:
+        posicao = argumentos.index('--pandas')
+        limite_pandas = int(argumentos[posicao + 1])
+        del argumentos[posicao:posicao + 2]
+    vendas = int(argumentos[0]) if argumentos else 5_000_000
+    formatos = argumentos[1].split(',') if len(argumentos) > 1 else ['csv', 'csv.gz', 'xlsx']
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = os.path.join(diretorio, 'benchmark.db')
+        inicio = time.perf_counter()
+        preparar_banco(banco, vendas)
+        print(f"{vendas} vendas geradas em {time.perf_counter() - inicio:.1f}s")
+
+        medidas = [(formato, os.path.join(diretorio, f'vendas.{formato}')) for formato in formatos]
+        if limite_pandas:
+            medidas.append(('pandas', str(limite_pandas)))
+        for formato, destino in medidas:
+            subprocess.run([sys.executable, __file__, '--filho', banco, formato, destino], check=True)
+            if formato != 'pandas':
+                print(f"{'':28} {os.path.getsize(destino) / 2**20:8.1f} MiB em disco")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--filho']:
+        filho(*sys.argv[2:5])
+    else:
+        main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for FEFO lot allocation.
+Measures the cost of allocating one sale against products holding an
+increasing number of lots, comparing the in-memory heap used by
+lotes.AlocadorFEFO with re-querying the earliest lot on every sale. Every
+lot holds a single unit, so each sale empties one lot: the query has to step
+over the emptied lots in the index, while the heap just pops them. Sales run
+inside one transaction so commit cost does not hide the allocation cost.
+
+Usage: python benchmark_fefo.py [vendas_por_cenario]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import config
+
+def preparar_banco(caminho: str, total_lotes: int):
+    """Create a scratch database with one product holding total_lotes lots"""
+    config.DB_CONFIG['name'] = caminho
+    import database
+    import queries
+    database.create_tables()
+    with database.transaction() as conn:
+        conn.execute(queries.PRODUTOS_INSERIR, ('Produto', total_lotes, 100, '2030-01-01',
+                                                None, None, None, None, 'x', 'x'))
+        conn.executemany(queries.LOTES_INSERIR, [
+            (1, f'L{i}', f'{random.randint(2026, 2035)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}',
+             1, 'x')
+            for i in range(total_lotes)
+        ])
+
+def medir(nome: str, alocar, vendas: int) -> float:
+    import database
+    with database.transaction() as conn:
+        inicio = time.perf_counter()
+        for _ in range(vendas):
+            alocar(conn)
+        decorrido = (time.perf_counter() - inicio) / vendas * 1e6
+        conn.rollback()
+    print(f"  {nome:<38} {decorrido:8.1f} µs/venda")
+    return decorrido
+
+def main():
+    vendas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    import database
+    import queries
+    from lotes import AlocadorFEFO
+
+    consulta_ingenua = '''
+        SELECT id FROM lotes WHERE produto_id = ? AND quantidade > 0
+        ORDER BY validade, id LIMIT 1
+    '''
+
+    def ingenuo(conn):
+        lote_id = conn.execute(consulta_ingenua, (1,)).fetchone()[0]
+        conn.execute(queries.LOTES_BAIXAR, (1, lote_id, 1))
+
+    for total_lotes in (10, 1000, 100000):
+        with tempfile.TemporaryDirectory() as tmp:
+            preparar_banco(os.path.join(tmp, 'bench.db'), total_lotes)
+            alocador = AlocadorFEFO()
+            with database.get_connection() as conn:
+                alocador.alocar(conn, 1, 0)  # warm the heap
+            n = min(vendas, total_lotes)
+            print(f"\n{total_lotes} lotes no produto, {n} vendas de 1 unidade")
+            medir("Heap FEFO em memória", lambda conn: alocador.alocar(conn, 1, 1), n)
+            medir("Consulta do lote mais antigo por venda", ingenuo, n)
+            database.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Startup benchmark for Integre+ application.
+Runs 'python -X importtime' in fresh processes for the modules loaded before
+the login window (main) and after a successful login (gui), prints the
+slowest imports and checks the totals against a budget. Heavy libraries
+(pandas, matplotlib, PIL, ...) must not be among them: features import them
+when first used.
+
+Usage: python benchmark_inicializacao.py [--repeticoes N] [--sem-orcamento]
+Exits with status 1 when a stage is over budget.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Import budget per stage, in milliseconds (best of the repetitions)
+ORCAMENTO_MS = {
+    'main': 150,   # up to the login window
+    'gui': 300,    # main window after login
+}
+
+# Loaded only by the features that need them
+MODULOS_PESADOS = ('pandas', 'numpy', 'matplotlib', 'PIL', 'qrcode', 'openpyxl', 'pyarrow', 'smtplib')
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+def medir(modulo: str) -> Tuple[float, List[Tuple[int, str]], List[str]]:
+    """
+    Import 'modulo' in a fresh interpreter.
+
+    Returns:
+        (total ms, [(cumulative us, module)] sorted slowest first, heavy modules loaded)
+    """
+    codigo = (f"import sys; import {modulo}; "
+              f"print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))")
+    ambiente = dict(os.environ, PYTHONPATH=DIRETORIO)
+    # A scratch working directory keeps the database and log files out of the repo
+    with tempfile.TemporaryDirectory() as diretorio:
+        processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                                  cwd=diretorio, env=ambiente, capture_output=True, text=True, check=True)
+    tempos = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, _, acumulado, nome = linha.replace('import time:', '|').split('|')
+        # Drop the space after the separator but keep the nesting indentation
+        tempos.append((int(acumulado), nome.rstrip()[1:]))
+    # Top-level entries (no indentation in importtime's tree) add up to the total
+    total = sum(acumulado for acumulado, nome in tempos if nome == nome.lstrip())
+    pesados = [m for m in processo.stdout.strip().split(',') if m]
+    return total / 1000, sorted(tempos, reverse=True), pesados
+
+def avaliar(repeticoes: int = 3) -> Dict[str, Tuple[float, List[Tuple[int, str]], List[str]]]:
+    """Best of 'repeticoes' runs per stage"""
+    resultados = {}
+    for modulo in ORCAMENTO_MS:
+        resultados[modulo] = min((medir(modulo) for _ in range(repeticoes)), key=lambda r: r[0])
+    return resultados
+
+def main():
+    argumentos = sys.argv[1:]
+    repeticoes = 3
+    if '--repeticoes' in argumentos:
+        repeticoes = int(argumentos[argumentos.index('--repeticoes') + 1])
+    verificar = '--sem-orcamento' not in argumentos
+
+    falhou = False
+    for modulo, (total, tempos, pesados) in avaliar(repeticoes).items():
+        orcamento = ORCAMENTO_MS[modulo]
+        situacao = 'ok' if total <= orcamento and not pesados else 'ACIMA DO ORÇAMENTO'
+        print(f"import {modulo:6} {total:7.1f} ms (orçamento {orcamento} ms) {situacao}")
+        if pesados:
+            print(f"  módulos pesados carregados: {', '.join(pesados)}")
+        for acumulado, nome in tempos[:10]:
+            print(f"  {acumulado / 1000:7.1f} ms  {nome.strip()}")
+        falhou = falhou or situacao != 'ok'
+    if verificar and falhou:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark for login latency.
+Creates a scratch database with one user per bcrypt cost and times
+login.verificar_credenciais (one SELECT, bcrypt.checkpw, one UPDATE) for a
+correct password. It also times verificar_credenciais_async's submit, which
+is all the Tk thread pays now that verification runs on a worker.
+
+Usage: python benchmark_login.py [repeticoes] [custo ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import config
+
+CUSTOS = (8, 10, 12, 13)
+SENHA = 'Senha@123'
+
+def preparar_banco(caminho: str, custos):
+    """Scratch database with a user 'custo<N>' per cost"""
+    config.DB_CONFIG['name'] = caminho
+    import bcrypt
+    from bootstrap import garantir_schema
+    from database import transaction
+    from datas import agora
+    garantir_schema()
+    with transaction() as conn:
+        for custo in custos:
+            conn.execute(
+                "INSERT INTO usuarios (username, senha, email, permissao, data_cadastro, ultima_atualizacao) "
+                "VALUES (?, ?, ?, 'Funcionario', ?, ?)",
+                (f'custo{custo}', bcrypt.hashpw(SENHA.encode('utf-8'), bcrypt.gensalt(rounds=custo)),
+                 f'custo{custo}@integre.com', agora(), agora()))
+
+def main():
+    argumentos = sys.argv[1:]
+    repeticoes = int(argumentos[0]) if argumentos else 5
+    custos = tuple(int(c) for c in argumentos[1:]) or CUSTOS
+    import database
+    import senhas
+    from login import verificar_credenciais, verificar_credenciais_async
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # No calibration file: each user's cost is the current one, so the
+        # timed logins never include a rehash
+        config.AUTENTICACAO_CONFIG['calibracao'] = os.path.join(tmp, 'calibracao.json')
+        preparar_banco(os.path.join(tmp, 'bench.db'), custos)
+        print(f"{'custo':>5} {'login (mediana)':>16} {'pior':>10} {'thread Tk':>12}")
+        for custo in custos:
+            usuario = f'custo{custo}'
+            config.AUTENTICACAO_CONFIG['bcrypt_rounds'] = custo
+            senhas.redefinir_custo()
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                assert verificar_credenciais(usuario, SENHA)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+
+            inicio = time.perf_counter()
+            futuro = verificar_credenciais_async(usuario, SENHA)
+            bloqueio = (time.perf_counter() - inicio) * 1000
+            assert futuro.result()
+            print(f"{custo:>5} {statistics.median(tempos):13.1f} ms {max(tempos):7.1f} ms {bloqueio:9.3f} ms")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark for statement reuse in the database layer.
+Compares the old connection-per-call pattern (cold statement cache) with the
+persistent connection used by database.get_connection (warm cache).
+
+Usage: python benchmark_queries.py [iteracoes]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import queries
+
+def preparar_banco(caminho: str, total_produtos: int = 1000):
+    """Create a scratch database with sample products"""
+    conn = sqlite3.connect(caminho)
+    conn.execute('''
+        CREATE TABLE produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            preco_centavos INTEGER NOT NULL,
+            validade TEXT NOT NULL,
+            categoria TEXT,
+            codigo_barras TEXT UNIQUE,
+            fornecedor_id INTEGER,
+            imagem BLOB,
+            data_cadastro TEXT NOT NULL,
+            ultima_atualizacao TEXT NOT NULL
+        )
+    ''')
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.executemany(
+        queries.PRODUTOS_INSERIR,
+        [(f'Produto {i}', i % 50, 1000 + i, '2030-01-01', 'Bebidas', str(i), None, None, agora, agora)
+         for i in range(total_produtos)]
+    )
+    conn.commit()
+    conn.close()
+
+def medir(nome: str, func, iteracoes: int) -> float:
+    """Run func iteracoes times and print the mean latency"""
+    inicio = time.perf_counter()
+    for i in range(iteracoes):
+        func(i)
+    decorrido = time.perf_counter() - inicio
+    print(f"{nome:<45} {decorrido / iteracoes * 1e6:8.1f} µs/consulta")
+    return decorrido
+
+def main():
+    iteracoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'bench.db')
+        preparar_banco(caminho)
+
+        def conexao_por_chamada(i):
+            conn = sqlite3.connect(caminho)
+            conn.execute(queries.PRODUTOS_BUSCAR_POR_ID, (i % 1000 + 1,)).fetchall()
+            conn.close()
+
+        sem_cache = sqlite3.connect(caminho, cached_statements=0)
+        com_cache = sqlite3.connect(caminho, cached_statements=256)
+
+        def persistente_sem_cache(i):
+            sem_cache.execute(queries.PRODUTOS_BUSCAR_POR_ID, (i % 1000 + 1,)).fetchall()
+
+        def persistente_com_cache(i):
+            com_cache.execute(queries.PRODUTOS_BUSCAR_POR_ID, (i % 1000 + 1,)).fetchall()
+
+        print(f"Consulta PRODUTOS_BUSCAR_POR_ID, {iteracoes} execuções\n")
+        base = medir("Conexão por chamada (comportamento antigo)", conexao_por_chamada, iteracoes)
+        parse = medir("Conexão persistente, cache desligado", persistente_sem_cache, iteracoes)
+        cache = medir("Conexão persistente, cache de statements", persistente_com_cache, iteracoes)
+
+        print(f"\nEconomia de parse por consulta: {(parse - cache) / iteracoes * 1e6:.1f} µs")
+        print(f"Ganho total vs. antigo: {base / cache:.1f}x")
+
+        sem_cache.close()
+        com_cache.close()
+
+if __name__ == "__main__":
+    main()
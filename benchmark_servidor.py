@@ -0,0 +1,150 @@
+"""
+Benchmark for the central server: sales per second at 1, 4 and 16 terminals.
+Each terminal sells one unit of a random product in a loop for 'segundos'
+seconds, in two setups on copies of the same database:
+
+- direto: every terminal opens the file and calls vendas.registrar_venda,
+  one write transaction per sale (today's shared-file setup)
+- servidor: 'python servidor.py' owns the file in a separate process and the
+  terminals are ClienteTerminal connections; sales are group-committed
+
+Prints sales/s, the median and p99 latency of a sale, failed sales and, for
+the server, the average number of sales per commit.
+
+Usage: python benchmark_servidor.py [segundos] [terminais,...]
+"""
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import config
+
+SENHA = 'Senha@123'
+PRODUTOS = 200
+
+def preparar_banco(caminho: str):
+    config.DB_CONFIG['name'] = caminho
+    config.AUTENTICACAO_CONFIG['bcrypt_rounds'] = 4
+    from bootstrap import garantir_schema
+    import clientes
+    from database import close_connections, transaction
+    import queries
+    garantir_schema()
+    clientes.cadastrar_usuario('caixa', SENHA, 'caixa@integre.com')
+    momento = '2024-01-01 00:00:00'
+    with transaction() as conn:
+        conn.executemany(queries.PRODUTOS_INSERIR, [
+            (f'Produto {i}', 10 ** 9, 100 + i, '2030-01-01', None, None, None, None, momento, momento)
+            for i in range(PRODUTOS)])
+    close_connections()
+
+def rodar(terminais: int, segundos: float, vender):
+    """vender(n) -> callable(produto_id) -> message; returns (sales/s, latencies ms, failures)"""
+    barreira = threading.Barrier(terminais + 1)
+    parar = threading.Event()
+    latencias, falhas = [], []
+    lock = threading.Lock()
+
+    def terminal(n):
+        venda = vender(n)
+        acaso = random.Random(n)
+        proprias, erros = [], 0
+        barreira.wait()
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            mensagem = venda(acaso.randint(1, PRODUTOS))
+            proprias.append((time.perf_counter() - inicio) * 1000)
+            erros += mensagem != "Venda registrada com sucesso."
+        with lock:
+            latencias.extend(proprias)
+            falhas.append(erros)
+
+    threads = [threading.Thread(target=terminal, args=(n,)) for n in range(terminais)]
+    for thread in threads:
+        thread.start()
+    barreira.wait()
+    inicio = time.perf_counter()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    return len(latencias) / decorrido, sorted(latencias), sum(falhas)
+
+def imprimir(rotulo: str, terminais: int, vendas_s: float, latencias, falhas: int, extra: str = ''):
+    p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+    print(f"  {rotulo:<9} {terminais:3d} terminais  {vendas_s:8.0f} vendas/s  mediana "
+          f"{statistics.median(latencias):7.2f} ms  p99 {p99:7.2f} ms  {falhas} falhas{extra}")
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def iniciar_servidor(banco: str, diretorio: str):
+    import servidor
+    porta = porta_livre()
+    processo = subprocess.Popen([sys.executable, os.path.abspath(servidor.__file__), str(porta), banco],
+                                cwd=diretorio, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    prazo = time.monotonic() + 15
+    while True:
+        try:
+            servidor.ClienteTerminal('127.0.0.1', porta, timeout=1).fechar()
+            return processo, porta
+        except OSError:
+            if time.monotonic() > prazo or processo.poll() is not None:
+                processo.kill()
+                raise RuntimeError("Servidor não iniciou")
+            time.sleep(0.1)
+
+def main():
+    argumentos = sys.argv[1:]
+    segundos = float(argumentos[0]) if argumentos else 3
+    quantidades = [int(n) for n in argumentos[1].split(',')] if len(argumentos) > 1 else [1, 4, 16]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modelo = os.path.join(tmp, 'modelo.db')
+        preparar_banco(modelo)
+        import database
+        import servidor
+        import vendas
+        print(f"{segundos:.0f} s por medição, {PRODUTOS} produtos")
+
+        for terminais in quantidades:
+            direto = os.path.join(tmp, f'direto{terminais}.db')
+            shutil.copy(modelo, direto)
+            config.DB_CONFIG['name'] = direto
+            vendas_s, latencias, falhas = rodar(
+                terminais, segundos, lambda n: lambda produto_id: vendas.registrar_venda(produto_id, 1, '1.00'))
+            database.close_connections()
+            imprimir("direto", terminais, vendas_s, latencias, falhas)
+
+            central = os.path.join(tmp, f'servidor{terminais}.db')
+            shutil.copy(modelo, central)
+            processo, porta = iniciar_servidor(central, tmp)
+            clientes_abertos = []
+            try:
+                def conectar(n):
+                    cliente = servidor.ClienteTerminal('127.0.0.1', porta)
+                    cliente.entrar('caixa', SENHA)
+                    clientes_abertos.append(cliente)
+                    return lambda produto_id: cliente.registrar_venda(produto_id, 1)
+                vendas_s, latencias, falhas = rodar(terminais, segundos, conectar)
+                estatisticas = clientes_abertos[0].chamar('estatisticas')
+            finally:
+                for cliente in clientes_abertos:
+                    cliente.fechar()
+                processo.terminate()
+                processo.wait()
+            imprimir("servidor", terminais, vendas_s, latencias, falhas,
+                     f"  {estatisticas['escritas'] / max(estatisticas['lotes'], 1):.1f} vendas por commit")
+
+if __name__ == "__main__":
+    main()
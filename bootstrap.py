@@ -0,0 +1,109 @@
+"""
+Application bootstrap for Integre+ application.
+Importing a module never touches the disk: logging is configured and the
+schema is brought up to date here, once per process, by the entry points
+(main, login, gui, migrations). The schema check is a single PRAGMA
+user_version read when the database is already current.
+"""
+import logging
+import threading
+
+from config import get_config
+from database import create_tables, execute_query, get_connection
+from datas import agora
+import logs
+from migrations import MIGRATIONS, MigrationError, get_schema_version, run_migrations
+
+logger = logging.getLogger(__name__)
+
+# Stored in PRAGMA user_version once create_tables and every migration ran
+VERSAO_SCHEMA = MIGRATIONS[-1].version
+
+_lock = threading.Lock()
+_logging_configurado = False
+_inicializado = False
+
+def configurar_logging():
+    """Apply LOGGING_CONFIG behind a queue (only the first call has any effect)"""
+    global _logging_configurado
+    with _lock:
+        if not _logging_configurado:
+            logs.configurar(get_config()['logging'])
+            _logging_configurado = True
+
+def versao_schema() -> int:
+    """Schema version recorded in the database file (0 if never bootstrapped)"""
+    with get_connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def garantir_schema() -> bool:
+    """
+    Create missing tables and apply pending migrations unless the database
+    already records VERSAO_SCHEMA. Returns True if the schema was updated.
+    Raises MigrationError for a database written by a newer version, which
+    this code must not touch (the marker is never lowered).
+    """
+    versao = versao_schema()
+    if versao == VERSAO_SCHEMA:
+        return False
+    versao = max(versao, get_schema_version())
+    if versao > VERSAO_SCHEMA:
+        raise MigrationError(f"Banco de dados na versão {versao}, mais nova que a deste programa "
+                             f"({VERSAO_SCHEMA}). Atualize o Integre+ antes de abri-lo.")
+    logger.info("Initializing database...")
+    create_tables()
+    run_migrations()
+    with get_connection() as conn:
+        conn.execute(f"PRAGMA user_version = {VERSAO_SCHEMA}")
+    logger.info(f"Database schema at version {VERSAO_SCHEMA}")
+    return True
+
+def criar_usuario_admin() -> bool:
+    """Create default admin user if it doesn't exist"""
+    try:
+        # Check if admin exists
+        query = "SELECT id FROM usuarios WHERE username = 'admin'"
+        result = execute_query(query, fetch=True)
+
+        if not result:
+            from senhas import gerar_hash
+            admin_password = gerar_hash('admin123')
+            query = """
+                INSERT INTO usuarios (
+                    username, senha, email, permissao,
+                    bloqueado, data_cadastro, ultima_atualizacao
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """
+            now = agora()
+            execute_query(query, (
+                'admin',
+                admin_password,
+                'admin@integre.com',
+                'Admin',
+                0,
+                now,
+                now
+            ))
+            logger.info("Default admin user created successfully")
+            return True
+        return False
+    except Exception as e:
+        logger.error(f"Error creating admin user: {e}")
+        return False
+
+def inicializar_aplicacao(criar_admin: bool = True):
+    """
+    Prepare the process to run the application: logging, schema and the
+    default admin user (created if missing, even when the schema was already
+    current). Safe to call from every entry point; only the first call does
+    any work.
+    """
+    global _inicializado
+    configurar_logging()
+    with _lock:
+        if _inicializado:
+            return
+        garantir_schema()
+        if criar_admin:
+            criar_usuario_admin()
+        _inicializado = True
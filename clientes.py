@@ -1,16 +1,18 @@
 import sqlite3
-import bcrypt
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 from typing import Optional, Dict, List, Tuple, Any
 from datetime import datetime, timedelta
-import pandas as pd
 import json
 import logging
 import re
 from utils import THEMES, ModernButton, NotificationManager
 from database import execute_query, DatabaseError
+import queries
 from config import get_config
+import autenticacao
+import senhas
+from sessao import PERMISSOES_POR_PAPEL, sessoes
 
 # Initialize logging
 logger = logging.getLogger(__name__)
@@ -53,15 +55,16 @@ def criar_tabela_usuarios() -> None:
     CREATE TABLE IF NOT EXISTS usuarios (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         username TEXT UNIQUE NOT NULL,
+        senha TEXT NOT NULL,
         email TEXT UNIQUE,
-        senha BLOB NOT NULL,
-        permissao TEXT DEFAULT 'Funcionario',
-        data_criacao TEXT NOT NULL,
+        permissao TEXT NOT NULL DEFAULT 'Funcionario',
         ultimo_login TEXT,
         tentativas_login INTEGER DEFAULT 0,
         bloqueado INTEGER DEFAULT 0,
         token_reset TEXT,
-        expiracao_token TEXT
+        expiracao_token TEXT,
+        data_cadastro TEXT NOT NULL,
+        ultima_atualizacao TEXT NOT NULL
     )
     '''
     try:
@@ -84,13 +87,12 @@ def cadastrar_usuario(username: str, senha: str, email: str, permissao: str = 'F
         validar_email(email)
         
         # Hash password
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(senha.encode('utf-8'), salt)
+        hashed = senhas.gerar_hash(senha)
         
         # Insert user
         query = '''
         INSERT INTO usuarios (
-            username, senha, email, permissao, data_criacao, ultimo_login
+            username, senha, email, permissao, data_cadastro, ultima_atualizacao
         ) VALUES (?, ?, ?, ?, ?, ?)
         '''
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -100,7 +102,7 @@ def cadastrar_usuario(username: str, senha: str, email: str, permissao: str = 'F
             email,
             permissao,
             now,
-            None
+            now
         )
         
         execute_query(query, params)
@@ -113,81 +115,40 @@ def cadastrar_usuario(username: str, senha: str, email: str, permissao: str = 'F
         logger.error(f"Erro ao cadastrar usuário: {str(e)}")
         raise
 
-def autenticar_usuario(username: str, senha: str) -> Optional[Dict[str, Any]]:
+def autenticar_usuario(username: str, senha: str, terminal: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
-    Authenticate user with enhanced security features
+    Authenticate user (see autenticacao.autenticar).
+    Returns None for an unknown user or wrong password; raises UserError when
+    the account is blocked or the terminal is over the failed-attempt limit.
     """
     try:
-        # Get user data
-        query = '''
-        SELECT id, username, senha, permissao, tentativas_login, bloqueado
-        FROM usuarios 
-        WHERE username = ?
-        '''
-        result = execute_query(query, (username,), fetch=True)
-        
-        if not result:
-            logger.warning(f"Tentativa de login com usuário inexistente: {username}")
-            return None
-            
-        user = result[0]
-        
-        # Check if account is blocked
-        if user['bloqueado']:
-            logger.warning(f"Tentativa de login em conta bloqueada: {username}")
-            raise UserError("Conta bloqueada. Entre em contato com o administrador.")
-        
-        # Verify password
-        if bcrypt.checkpw(senha.encode('utf-8'), user['senha']):
-            # Reset login attempts and update last login
-            update_query = '''
-            UPDATE usuarios 
-            SET tentativas_login = 0,
-                ultimo_login = ?
-            WHERE id = ?
-            '''
-            execute_query(update_query, (
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                user['id']
-            ))
-            
-            logger.info(f"Login bem-sucedido: {username}")
-            return {
-                "id": user['id'],
-                "username": user['username'],
-                "permissao": user['permissao']
-            }
-        else:
-            # Increment failed attempts
-            attempts = user['tentativas_login'] + 1
-            update_query = '''
-            UPDATE usuarios 
-            SET tentativas_login = ?,
-                bloqueado = ?
-            WHERE id = ?
-            '''
-            blocked = 1 if attempts >= 3 else 0
-            execute_query(update_query, (attempts, blocked, user['id']))
-            
-            if blocked:
-                logger.warning(f"Conta bloqueada após múltiplas tentativas: {username}")
-                raise UserError("Conta bloqueada após múltiplas tentativas")
-            
-            logger.warning(f"Tentativa de login falha: {username}")
-            return None
-            
+        resultado = autenticacao.autenticar(username, senha, terminal)
     except DatabaseError as e:
         logger.error(f"Erro de banco de dados na autenticação: {str(e)}")
         raise
-    except Exception as e:
-        logger.error(f"Erro na autenticação: {str(e)}")
-        raise
+    if resultado.ok:
+        logger.info(f"Login bem-sucedido: {username}")
+        usuario = resultado.usuario
+        return {
+            "id": usuario['id'],
+            "username": usuario['username'],
+            "permissao": usuario['permissao']
+        }
+    if resultado.situacao == autenticacao.BLOQUEADO:
+        logger.warning(f"Tentativa de login em conta bloqueada: {username}")
+        raise UserError("Conta bloqueada. Entre em contato com o administrador.")
+    if resultado.situacao == autenticacao.BLOQUEADO_AGORA:
+        raise UserError("Conta bloqueada após múltiplas tentativas")
+    if resultado.situacao == autenticacao.LIMITADO:
+        raise UserError(f"Muitas tentativas de login. Tente novamente em {int(resultado.espera // 60) + 1} min.")
+    logger.warning(f"Tentativa de login falha: {username}")
+    return None
 
 def listar_usuarios() -> List[Dict[str, Any]]:
     """List all users with their details"""
     query = '''
     SELECT id, username, email, permissao, 
-           data_criacao, ultimo_login, bloqueado
+           data_cadastro, ultimo_login, bloqueado
     FROM usuarios
     '''
     try:
@@ -204,12 +165,12 @@ def alterar_senha(user_id: int, senha_atual: str, nova_senha: str) -> None:
         query = 'SELECT senha FROM usuarios WHERE id = ?'
         result = execute_query(query, (user_id,), fetch=True)
         
-        if not result or not bcrypt.checkpw(senha_atual.encode('utf-8'), result[0]['senha']):
+        if not result or not senhas.verificar(senha_atual, result[0]['senha']):
             raise PasswordError("Senha atual incorreta")
         
         # Validate and update new password
         validar_senha(nova_senha)
-        hashed = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt())
+        hashed = senhas.gerar_hash(nova_senha)
         
         update_query = 'UPDATE usuarios SET senha = ? WHERE id = ?'
         execute_query(update_query, (hashed, user_id))
@@ -249,14 +210,8 @@ def resetar_senha(email: str) -> None:
 
 def listar_clientes() -> List[Dict[str, Any]]:
     """List all clients"""
-    query = '''
-    SELECT id, nome, cpf, email, telefone, endereco,
-           data_cadastro, ultima_atualizacao
-    FROM clientes
-    ORDER BY nome
-    '''
     try:
-        result = execute_query(query, fetch=True)
+        result = execute_query(queries.CLIENTES_LISTAR, fetch=True)
         return result if result else []
     except DatabaseError as e:
         logger.error(f"Erro ao listar clientes: {str(e)}")
@@ -264,21 +219,19 @@ def listar_clientes() -> List[Dict[str, Any]]:
 
 def buscar_clientes(termo: str) -> List[Dict[str, Any]]:
     """Search clients by name, CPF or email"""
-    query = '''
-    SELECT id, nome, cpf, email, telefone, endereco,
-           data_cadastro, ultima_atualizacao
-    FROM clientes
-    WHERE nome LIKE ? OR cpf LIKE ? OR email LIKE ?
-    ORDER BY nome
-    '''
     try:
         params = (f'%{termo}%', f'%{termo}%', f'%{termo}%')
-        result = execute_query(query, params, fetch=True)
+        result = execute_query(queries.CLIENTES_BUSCAR, params, fetch=True)
         return result if result else []
     except DatabaseError as e:
         logger.error(f"Erro ao buscar clientes: {str(e)}")
         raise
 
+def pagina_clientes(apos: int = 0, limite: int = 100, termo: str = '') -> List[Dict[str, Any]]:
+    """Up to 'limite' clients with id > 'apos', in id order, optionally filtered like buscar_clientes"""
+    padrao = f'%{termo}%'
+    return execute_query(queries.CLIENTES_PAGINA, (apos, padrao, padrao, padrao, limite), fetch=True) or []
+
 def cadastrar_cliente(nome: str, cpf: str, email: str, telefone: str = None, endereco: str = None) -> None:
     """Register a new client"""
     try:
@@ -350,7 +303,7 @@ def confirmar_reset_senha(token: str, nova_senha: str) -> None:
         
         # Update password
         validar_senha(nova_senha)
-        hashed = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt())
+        hashed = senhas.gerar_hash(nova_senha)
         
         update_query = '''
         UPDATE usuarios 
@@ -377,11 +330,35 @@ def desbloquear_usuario(user_id: int) -> None:
         WHERE id = ?
         '''
         execute_query(query, (user_id,))
+        sessoes.invalidar_usuario(user_id)
         logger.info(f"Usuário desbloqueado: ID {user_id}")
     except Exception as e:
         logger.error(f"Erro ao desbloquear usuário: {str(e)}")
         raise
 
+def bloquear_usuario(user_id: int) -> None:
+    """Block a user account and close its open sessions"""
+    try:
+        execute_query('UPDATE usuarios SET bloqueado = 1 WHERE id = ?', (user_id,))
+        sessoes.invalidar_usuario(user_id)
+        logger.info(f"Usuário bloqueado: ID {user_id}")
+    except Exception as e:
+        logger.error(f"Erro ao bloquear usuário: {str(e)}")
+        raise
+
+def alterar_permissao(user_id: int, permissao: str) -> None:
+    """Change a user's role; open sessions are closed so the new role applies at once"""
+    if permissao not in PERMISSOES_POR_PAPEL:
+        raise UserError(f"Permissão inválida: {permissao}")
+    try:
+        execute_query('UPDATE usuarios SET permissao = ?, ultima_atualizacao = ? WHERE id = ?',
+                      (permissao, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), user_id))
+        sessoes.invalidar_usuario(user_id)
+        logger.info(f"Permissão do usuário ID {user_id} alterada para {permissao}")
+    except Exception as e:
+        logger.error(f"Erro ao alterar permissão: {str(e)}")
+        raise
+
 # === GUI ===
 
 def voltar(janela):
@@ -42,10 +42,91 @@ THEME_COLORS = {
 # Database configuration
 DB_CONFIG = {
     'name': 'integre_plus.db',
-    'backup_dir': 'backups'
+    'backup_dir': 'backups',
+    'timeout': 30.0,             # Seconds to wait on a locked database
+    'cached_statements': 256,    # Prepared statements kept per connection
+    'migration_batch_size': 5000, # Rows copied per transaction in table rebuilds
+    'consulta_lenta_ms': 250     # Queries slower than this are logged with their fingerprint
 }
 
-# Logging configuration
+# Expiry alerts
+ALERTAS_CONFIG = {
+    'faixas_dias': (7, 15, 30),  # Upper bounds of the "expiring in N days" buckets
+    'intervalo_minutos': 30      # Period of the scheduled alert job
+}
+
+# Stock ledger checkpoints
+ESTOQUE_CONFIG = {
+    'snapshot_a_cada_movimentos': 200,  # Max movements replayed for "stock as of" queries
+    'intervalo_snapshot_minutos': 60    # Period of the checkpoint job
+}
+
+# Bulk import
+IMPORTACAO_CONFIG = {
+    'linhas_por_lote': 5000,     # Rows merged per transaction
+    'cache_kib': 65536           # SQLite page cache while importing (index updates stay in memory)
+}
+
+# Streaming export
+EXPORTACAO_CONFIG = {
+    'linhas_por_lote': 5000      # Rows fetched per read; bounds peak memory
+}
+
+# Incremental Parquet snapshot for analytics
+ANALITICO_CONFIG = {
+    'diretorio': 'analitico',    # Root of the partitioned dataset
+    'linhas_por_lote': 50000,    # Rows per read (and at most per row group)
+    'atraso_segundos': 5         # Rows changed in the last seconds wait for the next run
+}
+
+# Dashboard charts (see graficos.py)
+GRAFICOS_CONFIG = {
+    'cache_itens': 32,           # Rendered PNGs kept in the LRU
+    'dpi': 100
+}
+
+# Login and password hashing
+AUTENTICACAO_CONFIG = {
+    'bcrypt_rounds': 12,         # Cost of new hashes until this machine is calibrated
+    'calibracao': 'calibracao_senhas.json',  # Written by 'python senhas.py'
+    'tempo_alvo_ms': 250,        # Calibration target for one verification
+    'custo_minimo': 10,          # Never calibrate below this (each +1 doubles the time)
+    'trabalhadores': 2,          # Threads verifying passwords off the Tk thread
+    'limite_tentativas': 5,      # Failed logins per user and terminal in the window...
+    'janela_segundos': 300,      # ...before further attempts are refused
+    'flush_segundos': 5,         # Failure counters are written to usuarios this often
+    'limite_chaves': 10000,      # Windows kept in memory (oldest dropped first)
+    'bloquear_apos': 5,          # Consecutive failed logins that block the account
+    'sessao_minutos': 720        # Sessions expire after a long shift
+}
+
+# HTTP/JSON API (api.py)
+API_CONFIG = {
+    'host': '127.0.0.1',
+    'porta': 8080,
+    'trabalhadores': 16,         # Worker threads, each with its own persistent connection
+    'ociosidade_segundos': 1,    # Idle keep-alive connections give their worker back after this
+    'requisicao_segundos': 5,    # A request that has started must arrive whole within this
+    'pagina': 100,               # Default page size
+    'pagina_maxima': 1000,
+    'gzip_minimo': 1024,         # Smaller bodies are sent uncompressed
+    'corpo_maximo': 65536        # Largest request body accepted (bytes)
+}
+
+# Central server for several checkouts (servidor.py)
+SERVIDOR_CONFIG = {
+    'host': '127.0.0.1',         # Set to the store network address to accept the checkouts
+    'porta': 8765,
+    'terminais': 32,             # Connections served at once (one thread and read connection each); more are refused
+    'keepalive_segundos': 60,    # Silent connections are probed after this, so dead links free their slot
+    'escritas_por_lote': 256,    # Most writes committed in one transaction
+    'espera_lote_ms': 0,         # Extra wait for a batch to fill (0: whatever queued during the last commit)
+    'pagina_maxima': 1000,
+    'linha_maxima': 65536        # Longest request line accepted (bytes)
+}
+
+# Logging configuration (applied by logs.configurar: the handlers below run
+# on one listener thread behind a queue, callers never wait on the disk)
 LOGGING_CONFIG = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -53,12 +134,17 @@ LOGGING_CONFIG = {
         'standard': {
             'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         },
+        'json': {
+            '()': 'logs.FormatadorJSON'
+        },
     },
     'handlers': {
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'logs.ArquivoRotativo',
             'filename': 'app.log',
-            'formatter': 'standard'
+            'maxBytes': 5 * 1024 * 1024,  # Also rotates when the day changes
+            'backupCount': 7,
+            'formatter': 'json'
         },
         'console': {
             'class': 'logging.StreamHandler',
@@ -69,7 +155,13 @@ LOGGING_CONFIG = {
         '': {  # Root logger
             'handlers': ['console', 'file'],
             'level': 'INFO',
-        }
+        },
+        # Per-module levels
+        'database': {'level': 'INFO'},
+        'vendas': {'level': 'INFO'},
+        'matplotlib': {'level': 'WARNING'},
+        'PIL': {'level': 'WARNING'},
+        'urllib3': {'level': 'WARNING'},
     }
 }
 
@@ -80,6 +172,15 @@ def get_config():
         'theme': THEME_COLORS,  # Add both for compatibility
         'db': DB_CONFIG,
         'logging': LOGGING_CONFIG,
+        'alertas': ALERTAS_CONFIG,
+        'estoque': ESTOQUE_CONFIG,
+        'importacao': IMPORTACAO_CONFIG,
+        'exportacao': EXPORTACAO_CONFIG,
+        'analitico': ANALITICO_CONFIG,
+        'graficos': GRAFICOS_CONFIG,
+        'autenticacao': AUTENTICACAO_CONFIG,
+        'api': API_CONFIG,
+        'servidor': SERVIDOR_CONFIG,
         'ui': {
             'dialog': '600x500',
             'list': '1000x700',
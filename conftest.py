@@ -0,0 +1,32 @@
+import pytest
+
+import config
+import database
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    """Point the application at a fresh scratch database"""
+    caminho = str(tmp_path / 'teste.db')
+    monkeypatch.setitem(config.DB_CONFIG, 'name', caminho)
+    database.create_tables()
+    yield caminho
+    database.close_connections()
+
+@pytest.fixture
+def senhas_rapidas(tmp_path, monkeypatch):
+    """Cheapest bcrypt cost and no calibration file, so tests stay fast"""
+    import senhas
+    monkeypatch.setitem(config.AUTENTICACAO_CONFIG, 'bcrypt_rounds', 4)
+    monkeypatch.setitem(config.AUTENTICACAO_CONFIG, 'calibracao', str(tmp_path / 'calibracao.json'))
+    senhas.redefinir_custo()
+    yield
+    senhas.redefinir_custo()
+
+@pytest.fixture(autouse=True)
+def estado_de_login_limpo():
+    """Login failures and sessions from one test never reach another (or the real database)"""
+    yield
+    from limitador_login import limitador
+    from sessao import sessoes
+    limitador.limpar()
+    sessoes.limpar()
@@ -4,15 +4,17 @@ Features dynamic charts, real-time data, and modern UI
 """
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import pandas as pd
-from datetime import datetime, timedelta
 from database import execute_query
+import queries
+from datas import hoje, intervalo_dias
+from dinheiro import para_reais, formatar_reais
+from graficos import GraficoImagem, desenhar_categorias, desenhar_vendas
+from alertas_validade import motor_validade
 from theme_manager import theme_manager
-import numpy as np
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any
+
+if TYPE_CHECKING:
+    from series import Serie
 
 class Dashboard:
     def __init__(self, parent):
@@ -75,7 +77,8 @@ class Dashboard:
             ("💰", "Vendas Hoje", f"R$ {stats['vendas_hoje']:.2f}", 'success'),
             ("📦", "Produtos", str(stats['total_produtos']), 'primary'),
             ("👥", "Clientes", str(stats['total_clientes']), 'secondary'),
-            ("⚠️", "Estoque Baixo", str(stats['estoque_baixo']), 'warning')
+            ("⚠️", "Estoque Baixo", str(stats['estoque_baixo']), 'warning'),
+            ("⏰", stats['vencendo_rotulo'], str(stats['vencendo']), 'error' if stats['vencidos'] else 'warning')
         ]
         
         for i, (icon, title, value, style) in enumerate(cards_data):
@@ -141,78 +144,29 @@ class Dashboard:
         
         self.create_category_chart(right_frame)
     
+    def chart_colors(self) -> Dict[str, Any]:
+        """Colors handed to the chart renderer (part of the cache key)"""
+        return {
+            'fundo': self.colors['card_bg'],
+            'texto': self.colors['text'],
+            'destaque': self.colors['primary'],
+            'paleta': [self.colors['primary'], self.colors['success'],
+                       self.colors['warning'], self.colors['error']],
+        }
+    
     def create_sales_chart(self, parent):
-        """Create sales line chart"""
-        # Get sales data for last 7 days
-        sales_data = self.get_sales_data()
-        
-        # Create matplotlib figure
-        fig = Figure(figsize=(6, 4), dpi=100)
-        fig.patch.set_facecolor(self.colors['card_bg'])
-        
-        ax = fig.add_subplot(111)
-        ax.set_facecolor(self.colors['card_bg'])
-        
-        if sales_data:
-            dates = [item['data'] for item in sales_data]
-            values = [item['total'] for item in sales_data]
-            
-            ax.plot(dates, values, color=self.colors['primary'], linewidth=3, marker='o')
-            ax.fill_between(dates, values, alpha=0.3, color=self.colors['primary'])
-        else:
-            # Show placeholder when no data
-            ax.text(0.5, 0.5, 'Sem dados de vendas', 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, color=self.colors['text'])
-        
-        ax.set_title('Vendas Diárias', color=self.colors['text'], fontsize=12, fontweight='bold')
-        ax.tick_params(colors=self.colors['text'])
-        ax.spines['bottom'].set_color(self.colors['text'])
-        ax.spines['top'].set_color(self.colors['text'])
-        ax.spines['right'].set_color(self.colors['text'])
-        ax.spines['left'].set_color(self.colors['text'])
-        
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-        fig.tight_layout()
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        """Create sales line chart (rendered off the UI thread, cached)"""
+        chart = GraficoImagem(parent, bg=self.colors['card_bg'], fg=self.colors['text'])
+        chart.pack(fill='both', expand=True)
+        chart.mostrar('vendas_7_dias', desenhar_vendas, self.get_sales_data(), self.chart_colors(),
+                      'Vendas Diárias')
     
     def create_category_chart(self, parent):
-        """Create category pie chart"""
-        # Get category data
-        category_data = self.get_category_data()
-        
-        # Create matplotlib figure
-        fig = Figure(figsize=(6, 4), dpi=100)
-        fig.patch.set_facecolor(self.colors['card_bg'])
-        
-        ax = fig.add_subplot(111)
-        ax.set_facecolor(self.colors['card_bg'])
-        
-        if category_data:
-            labels = [item['categoria'] for item in category_data]
-            sizes = [item['quantidade'] for item in category_data]
-            colors_list = [self.colors['primary'], self.colors['success'], 
-                          self.colors['warning'], self.colors['error']]
-            
-            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90,
-                  colors=colors_list[:len(labels)])
-        else:
-            # Show placeholder when no data
-            ax.text(0.5, 0.5, 'Sem dados de produtos', 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, color=self.colors['text'])
-        
-        ax.set_title('Distribuição por Categoria', color=self.colors['text'], 
-                    fontsize=12, fontweight='bold')
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        """Create category pie chart (rendered off the UI thread, cached)"""
+        chart = GraficoImagem(parent, bg=self.colors['card_bg'], fg=self.colors['text'])
+        chart.pack(fill='both', expand=True)
+        chart.mostrar('categorias', desenhar_categorias, self.get_category_data(), self.chart_colors(),
+                      'Distribuição por Categoria')
     
     def create_recent_activity(self, parent):
         """Create recent activity list"""
@@ -264,70 +218,60 @@ class Dashboard:
     def get_dashboard_stats(self) -> Dict[str, Any]:
         """Get dashboard statistics"""
         stats = {
-            'vendas_hoje': 0.0,
+            'vendas_hoje': para_reais(0),
             'total_produtos': 0,
             'total_clientes': 0,
-            'estoque_baixo': 0
+            'estoque_baixo': 0,
+            'vencidos': 0,
+            'vencendo': 0,
+            'vencendo_rotulo': 'Vencendo'
         }
         
         try:
             # Vendas hoje
-            hoje = datetime.now().strftime('%Y-%m-%d')
-            vendas_query = "SELECT COALESCE(SUM(total), 0) as total FROM vendas WHERE DATE(data) = ?"
-            result = execute_query(vendas_query, (hoje,), fetch=True)
+            result = execute_query(queries.VENDAS_TOTAL_PERIODO, intervalo_dias(hoje()), fetch=True)
             if result:
-                stats['vendas_hoje'] = result[0].get('total', 0) or 0
+                stats['vendas_hoje'] = para_reais(result[0].get('total_centavos', 0))
             
             # Total produtos
-            produtos_query = "SELECT COUNT(*) as count FROM produtos"
-            result = execute_query(produtos_query, fetch=True)
+            result = execute_query(queries.PRODUTOS_CONTAR, fetch=True)
             if result:
                 stats['total_produtos'] = result[0].get('count', 0) or 0
             
             # Total clientes
-            clientes_query = "SELECT COUNT(*) as count FROM clientes"
-            result = execute_query(clientes_query, fetch=True)
+            result = execute_query(queries.CLIENTES_CONTAR, fetch=True)
             if result:
                 stats['total_clientes'] = result[0].get('count', 0) or 0
             
             # Estoque baixo
-            estoque_query = "SELECT COUNT(*) as count FROM produtos WHERE quantidade <= 5"
-            result = execute_query(estoque_query, fetch=True)
+            result = execute_query(queries.PRODUTOS_CONTAR_ESTOQUE_BAIXO, (5,), fetch=True)
             if result:
                 stats['estoque_baixo'] = result[0].get('count', 0) or 0
+            
+            # Validade (cached range scan, see alertas_validade)
+            faixas = motor_validade.resumo()
+            stats['vencidos'] = faixas[0]['produtos']
+            stats['vencendo'] = faixas[0]['produtos'] + faixas[1]['produtos']
+            stats['vencendo_rotulo'] = f"Vencidos/Vencendo {faixas[1]['ate_dias']}d"
                 
         except Exception as e:
             print(f"Erro ao obter estatísticas: {e}")
         
         return stats
     
-    def get_sales_data(self) -> List[Dict]:
-        """Get sales data for last 7 days"""
+    def get_sales_data(self) -> 'Serie':
+        """Get daily sales for the last 7 days (today included)"""
+        from series import serie_vazia, serie_vendas  # NumPy only once the dashboard is shown
         try:
-            query = """
-                SELECT DATE(data) as data, COALESCE(SUM(total), 0) as total
-                FROM vendas 
-                WHERE data >= date('now', '-7 days')
-                GROUP BY DATE(data)
-                ORDER BY data
-            """
-            result = execute_query(query, fetch=True)
-            return result or []
+            return serie_vendas('dia', dias=7)
         except Exception as e:
             print(f"Erro ao obter dados de vendas: {e}")
-            return []
+            return serie_vazia('dia')
     
     def get_category_data(self) -> List[Dict]:
         """Get product category distribution"""
         try:
-            query = """
-                SELECT COALESCE(categoria, 'Sem Categoria') as categoria, 
-                       COUNT(*) as quantidade
-                FROM produtos 
-                GROUP BY categoria
-                ORDER BY quantidade DESC
-            """
-            result = execute_query(query, fetch=True)
+            result = execute_query(queries.RESUMO_ESTOQUE_POR_CATEGORIA, fetch=True)
             return result or []
         except Exception as e:
             print(f"Erro ao obter dados de categoria: {e}")
@@ -340,7 +284,7 @@ class Dashboard:
         try:
             # Recent sales
             vendas_query = """
-                SELECT v.data, p.nome as produto, v.quantidade, v.total
+                SELECT v.data, p.nome as produto, v.quantidade, v.total_centavos
                 FROM vendas v
                 JOIN produtos p ON v.produto_id = p.id
                 ORDER BY v.data DESC
@@ -351,7 +295,7 @@ class Dashboard:
             for venda in vendas:
                 activities.append({
                     'time': venda['data'][:16] if venda['data'] else '',
-                    'description': f"Venda: {venda['produto']} (Qtd: {venda['quantidade']}) - R$ {venda['total']:.2f}"
+                    'description': f"Venda: {venda['produto']} (Qtd: {venda['quantidade']}) - {formatar_reais(venda['total_centavos'])}"
                 })
             
             # Recent product additions
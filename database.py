@@ -4,17 +4,17 @@ Handles database connections, schema management, and core database operations.
 """
 import sqlite3
 import logging
-import logging.config
 from datetime import datetime
 import os
 import shutil
+import threading
+import time
 from typing import Optional, List, Dict, Any, Union
 from contextlib import contextmanager
 
 from config import get_config
+from logs import fingerprint_query
 
-# Initialize logging
-logging.config.dictConfig(get_config()['logging'])
 logger = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
@@ -29,24 +29,156 @@ class QueryError(DatabaseError):
     """Exception raised for query execution errors"""
     pass
 
+# Persistent connections, one per thread and database file.
+# Reusing the connection keeps sqlite3's prepared statement cache warm.
+_local = threading.local()
+_all_connections = []
+_all_connections_lock = threading.Lock()
+_generation = 0
+
+def _open_connection(db_name: str) -> sqlite3.Connection:
+    """Open a new connection configured for reuse"""
+    db_config = get_config()['db']
+    conn = sqlite3.connect(
+        db_name,
+        timeout=db_config.get('timeout', 5.0),
+        cached_statements=db_config.get('cached_statements', 128),
+        check_same_thread=False,
+        uri=db_name.startswith('file:')  # e.g. read-only snapshots (see read_only_uri)
+    )
+    conn.row_factory = sqlite3.Row  # Enable row factory for named columns
+    with _all_connections_lock:
+        _all_connections.append(conn)
+    return conn
+
+def _thread_connections() -> Dict[str, sqlite3.Connection]:
+    """Return the calling thread's connection map, discarding closed ones"""
+    if getattr(_local, 'generation', None) != _generation:
+        _local.connections = {}
+        _local.generation = _generation
+    return _local.connections
+
 @contextmanager
 def get_connection():
     """
     Context manager for database connections.
-    Ensures proper connection handling and error management.
+    Yields the calling thread's persistent connection for the configured
+    database, opening it on first use. Any transaction left open by a
+    failing block is rolled back so the connection stays reusable; one that
+    was already open when the block started belongs to an outer block and
+    is left to it.
     """
     config = get_config()
+    db_name = config['db']['name']
+    connections = _thread_connections()
     conn = None
+    externa = False
     try:
-        conn = sqlite3.connect(config['db']['name'])
-        conn.row_factory = sqlite3.Row  # Enable row factory for named columns
+        conn = connections.get(db_name)
+        if conn is None:
+            conn = connections[db_name] = _open_connection(db_name)
+        externa = conn.in_transaction
         yield conn
     except sqlite3.Error as e:
+        if not externa:
+            _rollback_pending(conn)
         logger.error(f"Database connection error: {e}")
         raise ConnectionError(f"Failed to connect to database: {e}")
-    finally:
-        if conn:
+    except BaseException:
+        if not externa:
+            _rollback_pending(conn)
+        raise
+
+def _rollback_pending(conn: Optional[sqlite3.Connection]):
+    """Roll back a transaction left open on a reused connection"""
+    if conn is not None and conn.in_transaction:
+        try:
+            conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Rollback failed: {e}")
+
+@contextmanager
+def transaction():
+    """
+    Run a block as a single write transaction on the thread's connection.
+    BEGIN IMMEDIATE takes the write lock up front, so read-check-write
+    sequences inside the block cannot interleave with other writers.
+    Commits on success and rolls back on any exception.
+
+    When the connection is already in a transaction (an outer transaction()
+    block, or a caller that has not committed yet), the block runs as a
+    SAVEPOINT instead: a failure undoes only the block's own work, and
+    nothing is committed until whoever opened the outer transaction commits.
+    """
+    with get_connection() as conn:
+        if conn.in_transaction:
+            conn.execute("SAVEPOINT bloco")
+            try:
+                yield conn
+            except BaseException:
+                # Some errors (e.g. a full disk) already ended the whole transaction
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO bloco")
+                    conn.execute("RELEASE bloco")
+                raise
+            conn.execute("RELEASE bloco")
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def close_connections():
+    """Close every persistent connection opened by this process"""
+    global _generation
+    with _all_connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+        _generation += 1
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing connection: {e}")
+
+def release_thread_connection():
+    """
+    Close the calling thread's connections and forget them. Threads that end
+    (ProgressDialog jobs, AsyncTask, the central server's writer) call this
+    on their way out; otherwise each one would keep its connection and file
+    handle open until close_connections().
+    """
+    connections = _thread_connections()
+    abertas = list(connections.values())
+    connections.clear()
+    with _all_connections_lock:
+        for conn in abertas:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+    for conn in abertas:
+        try:
             conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing connection: {e}")
+
+def enable_wal_mode() -> str:
+    """
+    Switch the database file to write-ahead logging, so readers neither wait
+    for the writer nor block it. The setting is stored in the file. WAL needs
+    every connection on the same machine: use it only when one process owns
+    the file (see servidor.py), never on a network share.
+
+    Returns:
+        The journal mode now in effect
+    """
+    with get_connection() as conn:
+        modo = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    if modo.lower() != 'wal':
+        logger.warning(f"WAL mode not available, journal mode is {modo}")
+    return modo
 
 def execute_query(query: str, params: tuple = None, fetch: bool = False) -> Union[List[Dict[str, Any]], None]:
     """
@@ -63,8 +195,12 @@ def execute_query(query: str, params: tuple = None, fetch: bool = False) -> Unio
     Raises:
         QueryError: If query execution fails
     """
+    inicio = time.perf_counter()
     try:
         with get_connection() as conn:
+            # Inside an open transaction (e.g. a transaction() block) the
+            # statement joins it; whoever opened it commits or rolls back
+            externa = conn.in_transaction
             cursor = conn.cursor()
             try:
                 if params:
@@ -78,16 +214,150 @@ def execute_query(query: str, params: tuple = None, fetch: bool = False) -> Unio
                     # Convert Row objects to dictionaries
                     return [dict(zip(columns, row)) for row in results]
                 
-                conn.commit()
+                if not externa:
+                    conn.commit()
                 return None
             except sqlite3.Error as e:
-                conn.rollback()
-                logger.error(f"Query execution error: {e}\nQuery: {query}\nParams: {params}")
+                if not externa:
+                    conn.rollback()
+                _registrar_erro_query(e, query, params, inicio)
                 raise QueryError(f"Failed to execute query: {e}")
+            finally:
+                _registrar_query_lenta(query, inicio)
     except sqlite3.Error as e:
-        logger.error(f"Query execution error: {e}\nQuery: {query}\nParams: {params}")
+        _registrar_erro_query(e, query, params, inicio)
         raise QueryError(f"Failed to execute query: {e}")
 
+def _latencia_ms(inicio: float) -> float:
+    return round((time.perf_counter() - inicio) * 1000, 3)
+
+def _registrar_erro_query(erro: Exception, query: str, params, inicio: float):
+    logger.error(f"Query execution error: {erro}\nQuery: {query}\nParams: {params}",
+                 extra={'query_fingerprint': fingerprint_query(query), 'latency_ms': _latencia_ms(inicio)})
+
+def _registrar_query_lenta(query: str, inicio: float):
+    """Warn about queries over DB_CONFIG['consulta_lenta_ms'] (fingerprinted, params left out)"""
+    latencia = _latencia_ms(inicio)
+    if latencia >= get_config()['db']['consulta_lenta_ms']:
+        logger.warning(f"Slow query ({latencia:.1f} ms)",
+                       extra={'query_fingerprint': fingerprint_query(query), 'latency_ms': latencia,
+                              'query': ' '.join(query.split())[:500]})
+
+# Per-category rollups kept current by triggers, so category reports cost
+# O(categories x days) instead of scanning every product and sale.
+# Products without a category are grouped under ''.
+# Sales are keyed by vendas.categoria, the product's category at sale time,
+# so recategorizing a product does not move or strand its past sales.
+RESUMOS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS resumo_estoque_categoria (
+        categoria TEXT PRIMARY KEY,
+        produtos INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL,
+        valor_centavos INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS resumo_vendas_diario (
+        dia TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        vendas INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL,
+        total_centavos INTEGER NOT NULL,
+        PRIMARY KEY (dia, categoria)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_ins
+    AFTER INSERT ON produtos
+    BEGIN
+        INSERT INTO resumo_estoque_categoria (categoria, produtos, quantidade, valor_centavos)
+        VALUES (COALESCE(NEW.categoria, ''), 1, NEW.quantidade, NEW.quantidade * NEW.preco_centavos)
+        ON CONFLICT (categoria) DO UPDATE SET
+            produtos = produtos + 1,
+            quantidade = quantidade + excluded.quantidade,
+            valor_centavos = valor_centavos + excluded.valor_centavos;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_upd
+    AFTER UPDATE OF quantidade, preco_centavos, categoria ON produtos
+    BEGIN
+        UPDATE resumo_estoque_categoria
+        SET produtos = produtos - 1,
+            quantidade = quantidade - OLD.quantidade,
+            valor_centavos = valor_centavos - OLD.quantidade * OLD.preco_centavos
+        WHERE categoria = COALESCE(OLD.categoria, '');
+        INSERT INTO resumo_estoque_categoria (categoria, produtos, quantidade, valor_centavos)
+        VALUES (COALESCE(NEW.categoria, ''), 1, NEW.quantidade, NEW.quantidade * NEW.preco_centavos)
+        ON CONFLICT (categoria) DO UPDATE SET
+            produtos = produtos + 1,
+            quantidade = quantidade + excluded.quantidade,
+            valor_centavos = valor_centavos + excluded.valor_centavos;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_del
+    AFTER DELETE ON produtos
+    BEGIN
+        UPDATE resumo_estoque_categoria
+        SET produtos = produtos - 1,
+            quantidade = quantidade - OLD.quantidade,
+            valor_centavos = valor_centavos - OLD.quantidade * OLD.preco_centavos
+        WHERE categoria = COALESCE(OLD.categoria, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_vendas_ins
+    AFTER INSERT ON vendas
+    BEGIN
+        INSERT INTO resumo_vendas_diario (dia, categoria, vendas, quantidade, total_centavos)
+        VALUES (
+            substr(NEW.data, 1, 10),
+            COALESCE(NEW.categoria, (SELECT categoria FROM produtos WHERE id = NEW.produto_id), ''),
+            1, NEW.quantidade, NEW.total_centavos
+        )
+        ON CONFLICT (dia, categoria) DO UPDATE SET
+            vendas = vendas + 1,
+            quantidade = quantidade + excluded.quantidade,
+            total_centavos = total_centavos + excluded.total_centavos;
+        -- Inserts that did not name the category get the same key stored
+        UPDATE vendas
+        SET categoria = COALESCE((SELECT categoria FROM produtos WHERE id = NEW.produto_id), '')
+        WHERE id = NEW.id AND NEW.categoria IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_vendas_upd
+    AFTER UPDATE OF data, quantidade, total_centavos, categoria ON vendas
+    WHEN OLD.categoria IS NOT NULL
+    BEGIN
+        UPDATE resumo_vendas_diario
+        SET vendas = vendas - 1,
+            quantidade = quantidade - OLD.quantidade,
+            total_centavos = total_centavos - OLD.total_centavos
+        WHERE dia = substr(OLD.data, 1, 10) AND categoria = OLD.categoria;
+        INSERT INTO resumo_vendas_diario (dia, categoria, vendas, quantidade, total_centavos)
+        VALUES (substr(NEW.data, 1, 10), COALESCE(NEW.categoria, ''), 1, NEW.quantidade, NEW.total_centavos)
+        ON CONFLICT (dia, categoria) DO UPDATE SET
+            vendas = vendas + 1,
+            quantidade = quantidade + excluded.quantidade,
+            total_centavos = total_centavos + excluded.total_centavos;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_vendas_del
+    AFTER DELETE ON vendas
+    BEGIN
+        UPDATE resumo_vendas_diario
+        SET vendas = vendas - 1,
+            quantidade = quantidade - OLD.quantidade,
+            total_centavos = total_centavos - OLD.total_centavos
+        WHERE dia = substr(OLD.data, 1, 10) AND categoria = COALESCE(OLD.categoria, '');
+    END
+    """
+]
+
 def create_tables():
     """Create all database tables with proper constraints and indices"""
     queries = [
@@ -97,7 +367,7 @@ def create_tables():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nome TEXT NOT NULL,
             quantidade INTEGER NOT NULL CHECK (quantidade >= 0),
-            preco REAL NOT NULL CHECK (preco >= 0),
+            preco_centavos INTEGER NOT NULL CHECK (preco_centavos >= 0),
             validade TEXT NOT NULL,
             categoria TEXT,
             codigo_barras TEXT UNIQUE,
@@ -116,7 +386,7 @@ def create_tables():
         CREATE TABLE IF NOT EXISTS historico_precos (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             produto_id INTEGER NOT NULL,
-            preco REAL NOT NULL CHECK (preco >= 0),
+            preco_centavos INTEGER NOT NULL CHECK (preco_centavos >= 0),
             data TEXT NOT NULL,
             FOREIGN KEY (produto_id) REFERENCES produtos(id)
                 ON DELETE CASCADE
@@ -130,11 +400,12 @@ def create_tables():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             produto_id INTEGER NOT NULL,
             quantidade INTEGER NOT NULL CHECK (quantidade > 0),
-            preco_unitario REAL NOT NULL CHECK (preco_unitario >= 0),
-            total REAL NOT NULL CHECK (total >= 0),
+            preco_unitario_centavos INTEGER NOT NULL CHECK (preco_unitario_centavos >= 0),
+            total_centavos INTEGER NOT NULL CHECK (total_centavos >= 0),
             data TEXT NOT NULL,
             cliente_id INTEGER,
             forma_pagamento TEXT NOT NULL,
+            categoria TEXT,
             FOREIGN KEY (produto_id) REFERENCES produtos(id)
                 ON DELETE RESTRICT
                 ON UPDATE CASCADE,
@@ -144,6 +415,61 @@ def create_tables():
         )
         """,
         
+        # Lots: stock per expiry date, consumed first-expiring-first-out
+        """
+        CREATE TABLE IF NOT EXISTS lotes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            lote TEXT NOT NULL,
+            validade TEXT NOT NULL,
+            quantidade INTEGER NOT NULL CHECK (quantidade >= 0),
+            data_cadastro TEXT NOT NULL,
+            UNIQUE (produto_id, lote),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        )
+        """,
+        
+        # Lots consumed by each sale
+        """
+        CREATE TABLE IF NOT EXISTS vendas_lotes (
+            venda_id INTEGER NOT NULL,
+            lote_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+            PRIMARY KEY (venda_id, lote_id),
+            FOREIGN KEY (venda_id) REFERENCES vendas(id)
+                ON DELETE CASCADE,
+            FOREIGN KEY (lote_id) REFERENCES lotes(id)
+                ON DELETE RESTRICT
+        )
+        """,
+        
+        # Append-only stock ledger: every change to produtos.quantidade is a
+        # signed movement (sale, receipt, adjustment)
+        """
+        CREATE TABLE IF NOT EXISTS movimentos_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL CHECK (tipo IN ('venda', 'entrada', 'ajuste')),
+            quantidade INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            referencia_id INTEGER,
+            observacao TEXT
+        )
+        """,
+        
+        # Per-product stock checkpoints used to bound ledger replays
+        """
+        CREATE TABLE IF NOT EXISTS snapshots_estoque (
+            produto_id INTEGER NOT NULL,
+            ultimo_movimento_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (produto_id, ultimo_movimento_id)
+        )
+        """,
+        
         # Suppliers table
         """
         CREATE TABLE IF NOT EXISTS fornecedores (
@@ -177,6 +503,8 @@ def create_tables():
             ultimo_login TEXT,
             tentativas_login INTEGER DEFAULT 0,
             bloqueado INTEGER DEFAULT 0,
+            token_reset TEXT,
+            expiracao_token TEXT,
             data_cadastro TEXT NOT NULL,
             ultima_atualizacao TEXT NOT NULL
         )
@@ -232,20 +560,70 @@ def create_tables():
     indices = [
         "CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos(nome)",
         "CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos(categoria)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_validade ON produtos(validade)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_ultima_atualizacao ON produtos(ultima_atualizacao)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_ultima_atualizacao ON clientes(ultima_atualizacao)",
         "CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas(data)",
         "CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas(cliente_id)",
-        "CREATE INDEX IF NOT EXISTS idx_historico_precos_produto ON historico_precos(produto_id)",
+        "CREATE INDEX IF NOT EXISTS idx_vendas_produto_data ON vendas(produto_id, data)",
+        "CREATE INDEX IF NOT EXISTS idx_historico_precos_produto_data ON historico_precos(produto_id, data)",
+        "CREATE INDEX IF NOT EXISTS idx_lotes_produto_validade ON lotes(produto_id, validade)",
+        "CREATE INDEX IF NOT EXISTS idx_vendas_lotes_lote ON vendas_lotes(lote_id)",
+        "CREATE INDEX IF NOT EXISTS idx_movimentos_produto ON movimentos_estoque(produto_id)",
+        "CREATE INDEX IF NOT EXISTS idx_movimentos_produto_data ON movimentos_estoque(produto_id, data)",
+        "CREATE INDEX IF NOT EXISTS idx_snapshots_produto_data ON snapshots_estoque(produto_id, data, ultimo_movimento_id)",
         "CREATE INDEX IF NOT EXISTS idx_audit_log_usuario ON audit_log(usuario_id)",
         "CREATE INDEX IF NOT EXISTS idx_audit_log_data ON audit_log(data)"
     ]
     
+    # Ledger rows are immutable; the current stock view is derived from them.
+    # Price history rows become validity intervals for as-of joins.
+    views_triggers = [
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_movimentos_sem_update
+        BEFORE UPDATE ON movimentos_estoque
+        BEGIN SELECT RAISE(ABORT, 'movimentos_estoque é somente inclusão'); END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_movimentos_sem_delete
+        BEFORE DELETE ON movimentos_estoque
+        BEGIN SELECT RAISE(ABORT, 'movimentos_estoque é somente inclusão'); END
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS vw_precos_vigencia AS
+        SELECT produto_id, preco_centavos, data AS valido_de,
+               LEAD(data) OVER (PARTITION BY produto_id ORDER BY data, id) AS valido_ate
+        FROM historico_precos
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS vw_estoque_atual AS
+        SELECT p.id AS produto_id,
+               COALESCE(s.quantidade, 0) + COALESCE((
+                   SELECT SUM(m.quantidade) FROM movimentos_estoque m
+                   WHERE m.produto_id = p.id AND m.id > COALESCE(s.ultimo_movimento_id, 0)
+               ), 0) AS quantidade
+        FROM produtos p
+        LEFT JOIN (
+            -- Bare column with MAX(): SQLite returns quantidade from the latest snapshot
+            SELECT produto_id, quantidade, MAX(ultimo_movimento_id) AS ultimo_movimento_id
+            FROM snapshots_estoque GROUP BY produto_id
+        ) s ON s.produto_id = p.id
+        """
+    ]
+    
+    # One transaction: a single commit instead of one per statement
     try:
-        for query in queries + indices:
-            execute_query(query)
+        with transaction() as conn:
+            for query in queries + indices + views_triggers:
+                conn.execute(query)
+            # Files that predate vendas.categoria get the rollups from migrations 11 and 13
+            if 'categoria' in [coluna['name'] for coluna in conn.execute("PRAGMA table_info(vendas)")]:
+                for query in RESUMOS_DDL:
+                    conn.execute(query)
         logger.info("Database tables and indices created successfully")
-    except QueryError as e:
+    except DatabaseError as e:
         logger.error(f"Failed to create database schema: {e}")
-        raise
+        raise QueryError(f"Failed to create database schema: {e}")
 
 def create_backup():
     """Create a backup of the database file"""
@@ -270,6 +648,26 @@ def create_backup():
         logger.error(f"Failed to create database backup: {e}")
         raise DatabaseError(f"Backup creation failed: {e}")
 
+def create_snapshot(path: str) -> str:
+    """
+    Copy the database to 'path' with SQLite's online backup API.
+    Unlike a file copy, the result is a consistent point-in-time image even
+    while other connections are writing. Returns 'path'.
+    """
+    target = sqlite3.connect(path)
+    try:
+        with get_connection() as conn:
+            conn.backup(target)
+    finally:
+        target.close()
+    logger.info(f"Database snapshot created: {path}")
+    return path
+
+def read_only_uri(path: str) -> str:
+    """URI that opens a database file read-only (usable as DB_CONFIG['name'])"""
+    from urllib.request import pathname2url  # urllib.request costs ~25 ms to import
+    return f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+
 def restore_backup(backup_file: str):
     """Restore database from a backup file"""
     config = get_config()
@@ -282,8 +680,7 @@ def restore_backup(backup_file: str):
         create_backup()
         
         # Close all connections
-        with get_connection() as conn:
-            conn.close()
+        close_connections()
         
         # Restore from backup
         shutil.copy2(backup_file, config['db']['name'])
@@ -314,6 +711,6 @@ def log_audit(usuario_id: Optional[int], acao: str, tabela: str,
         # Don't raise the error to avoid interrupting the main operation
         pass
 
-# Initialize database
 if __name__ == "__main__":
-    create_tables()
+    from bootstrap import inicializar_aplicacao
+    inicializar_aplicacao(criar_admin=False)
@@ -0,0 +1,113 @@
+"""
+Date helpers for Integre+ application.
+Timestamps are stored as strict ISO-8601 text ('YYYY-MM-DD HH:MM:SS' and
+'YYYY-MM-DD' for plain dates). That form sorts chronologically as a string,
+so every date filter can be written as an index range scan on the raw column.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple, Union
+
+FORMATO_DATA_HORA = '%Y-%m-%d %H:%M:%S'
+FORMATO_DATA = '%Y-%m-%d'
+FORMATO_DATA_BR = '%d/%m/%Y'
+
+DataLike = Union[str, date, datetime]
+
+def agora() -> str:
+    """Current local timestamp in canonical form"""
+    return datetime.now().strftime(FORMATO_DATA_HORA)
+
+def hoje() -> str:
+    """Current local date in canonical form"""
+    return date.today().strftime(FORMATO_DATA)
+
+def para_date(valor: DataLike) -> date:
+    """Parse a date given as date/datetime, 'dd/mm/aaaa' or ISO-8601 text"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    # Fast path for the zero-padded forms; date() still validates the values
+    if len(texto) >= 10 and texto[4] == '-' and texto[7] == '-' and texto[:4].isdigit():
+        try:
+            return date(int(texto[:4]), int(texto[5:7]), int(texto[8:10]))
+        except ValueError:
+            pass
+    elif len(texto) == 10 and texto[2] == '/' and texto[5] == '/' and texto[6:].isdigit():
+        try:
+            return date(int(texto[6:]), int(texto[3:5]), int(texto[:2]))
+        except ValueError:
+            pass
+    if '/' in texto:
+        return datetime.strptime(texto, FORMATO_DATA_BR).date()
+    return datetime.strptime(texto[:10], FORMATO_DATA).date()
+
+def normalizar_data(valor: DataLike) -> str:
+    """Return a date as 'YYYY-MM-DD'. Raises ValueError on unknown formats."""
+    return para_date(valor).strftime(FORMATO_DATA)
+
+def normalizar_data_hora(valor: DataLike) -> str:
+    """Return a timestamp as 'YYYY-MM-DD HH:MM:SS' (dates become midnight)"""
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_DATA_HORA)
+    if isinstance(valor, date):
+        return valor.strftime(FORMATO_DATA) + ' 00:00:00'
+    texto = str(valor).strip()
+    if '/' in texto:
+        return normalizar_data(texto) + ' 00:00:00'
+    return datetime.fromisoformat(texto).strftime(FORMATO_DATA_HORA)
+
+def formatar_data_br(valor: Optional[DataLike]) -> str:
+    """Format a stored date for display as dd/mm/aaaa"""
+    if not valor:
+        return ''
+    try:
+        return para_date(valor).strftime(FORMATO_DATA_BR)
+    except ValueError:
+        return str(valor)
+
+def limite_exclusivo(valor: DataLike) -> str:
+    """
+    Exclusive upper bound for "as of 'valor'", for use as 'col < ?'.
+    A plain date means the end of that day (next midnight); a timestamp
+    includes everything recorded in that second.
+    """
+    if isinstance(valor, datetime):
+        momento = valor.replace(microsecond=0)
+    elif isinstance(valor, date) or '/' in str(valor) or len(str(valor).strip()) == 10:
+        return intervalo_dias(valor)[1]
+    else:
+        momento = datetime.fromisoformat(str(valor).strip()).replace(microsecond=0)
+    return (momento + timedelta(seconds=1)).strftime(FORMATO_DATA_HORA)
+
+def intervalo_dias(inicio: DataLike, fim: Optional[DataLike] = None) -> Tuple[str, str]:
+    """
+    Half-open timestamp range [inicio 00:00:00, dia seguinte a fim 00:00:00).
+    Use as 'col >= ? AND col < ?' so the whole last day is included and the
+    filter stays sargable.
+    """
+    primeiro = para_date(inicio)
+    ultimo = para_date(fim) if fim else primeiro
+    return (
+        primeiro.strftime(FORMATO_DATA) + ' 00:00:00',
+        (ultimo + timedelta(days=1)).strftime(FORMATO_DATA) + ' 00:00:00'
+    )
+
+# SQL expressions used by migrations to rewrite legacy values in place
+SQL_NORMALIZAR_DATA = '''
+    CASE
+        WHEN {col} GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+            THEN substr({col}, 7, 4) || '-' || substr({col}, 4, 2) || '-' || substr({col}, 1, 2)
+        ELSE substr({col}, 1, 10)
+    END
+'''
+
+SQL_NORMALIZAR_DATA_HORA = '''
+    CASE
+        WHEN {col} GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+            THEN substr({col}, 7, 4) || '-' || substr({col}, 4, 2) || '-' || substr({col}, 1, 2) || ' 00:00:00'
+        WHEN length({col}) = 10 THEN {col} || ' 00:00:00'
+        ELSE substr(replace({col}, 'T', ' '), 1, 19)
+    END
+'''
@@ -0,0 +1,101 @@
+"""
+Money helpers for Integre+ application.
+Monetary values are stored as integer centavos so sums are exact and stay
+integer arithmetic inside SQLite. Conversion to reais happens only at the
+edges: Decimal for single values, vectorized division for DataFrames.
+"""
+import re
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import Any, Dict, Iterable, List, Union
+
+CENTAVOS_POR_REAL = 100
+_DUAS_CASAS = Decimal('0.01')
+
+Valor = Union[int, float, str, Decimal]
+
+# Text amounts: a thousands separator must be followed by exactly three
+# digits, and there are at most two decimal places. pt-BR first, so '1.234'
+# is one thousand two hundred and thirty-four reais; '1,234' (comma thousands
+# or three decimals?) is ambiguous and refused.
+_MILHAR_PONTO = r'[1-9]\d{0,2}(?:\.\d{3})+'
+_MILHAR_VIRGULA = r'[1-9]\d{0,2}(?:,\d{3})+'
+_FORMATOS_TEXTO = (
+    (re.compile(rf'(-?)(\d+|{_MILHAR_PONTO})(?:,(\d{{1,2}}))?'), '.'),   # 1234 / 1.234 / 1.234,56
+    (re.compile(rf'(-?)(\d+|{_MILHAR_VIRGULA})\.(\d{{1,2}})'), ','),     # 12.90 / 1,234.56
+)
+
+def _texto_para_decimal(valor: str) -> str:
+    texto = valor.replace('R$', '').strip()
+    for formato, milhar in _FORMATOS_TEXTO:
+        encontrado = formato.fullmatch(texto)
+        if encontrado:
+            sinal, inteiro, decimais = encontrado.groups()
+            return f"{sinal}{inteiro.replace(milhar, '')}.{decimais or '0'}"
+    raise ValueError(f"Valor monetário inválido: {valor!r}")
+
+def para_centavos(valor: Valor) -> int:
+    """
+    Convert an amount in reais to integer centavos.
+    Accepts Decimal, int, float or text ('12.90', '12,90', 'R$ 1.234,56',
+    '1,234.56'). Text in any other format, or with more than two decimal
+    places, raises ValueError. Floats are converted through their shortest
+    repr, so 0.1 becomes 10.
+    """
+    if isinstance(valor, bool):
+        raise ValueError("Valor monetário inválido")
+    if isinstance(valor, str):
+        valor = _texto_para_decimal(valor)
+    try:
+        reais = Decimal(str(valor)) if not isinstance(valor, Decimal) else valor
+        return int((reais * CENTAVOS_POR_REAL).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Valor monetário inválido: {valor!r}")
+
+def para_reais(centavos: int) -> Decimal:
+    """Convert integer centavos to a Decimal amount in reais"""
+    return (Decimal(int(centavos or 0)) / CENTAVOS_POR_REAL).quantize(_DUAS_CASAS)
+
+def formatar_reais(centavos: int) -> str:
+    """Format centavos for display, e.g. 'R$ 12.90'"""
+    return f"R$ {para_reais(centavos):.2f}"
+
+def centavos_para_texto(centavos: int) -> str:
+    """Exact '1234.50' text for bulk exports, without building a Decimal per value"""
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(centavos), CENTAVOS_POR_REAL)
+    return f"{sinal}{reais}.{resto:02d}"
+
+def adicionar_reais(linhas: Iterable[Dict[str, Any]], colunas: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Add reais fields next to the centavos ones in each row.
+
+    Args:
+        linhas: Rows as returned by execute_query(fetch=True)
+        colunas: Centavos column -> reais field name, e.g. {'preco_centavos': 'preco'}
+    """
+    resultado = []
+    for linha in linhas:
+        for origem, destino in colunas.items():
+            if origem in linha and linha[origem] is not None:
+                linha[destino] = para_reais(linha[origem])
+        resultado.append(linha)
+    return resultado
+
+def converter_colunas_para_reais(df, colunas: Dict[str, str]):
+    """
+    Vectorized centavos -> reais conversion for pandas DataFrames.
+    The integer columns are replaced by float reais columns for export.
+    """
+    for origem, destino in colunas.items():
+        if origem in df.columns:
+            df[destino] = df[origem].astype('float64') / CENTAVOS_POR_REAL
+            if destino != origem:
+                df.drop(columns=origem, inplace=True)
+    return df
+
+# Standard names of the monetary columns in the schema
+COLUNAS_MONETARIAS = {
+    'preco_centavos': 'preco',
+    'preco_unitario_centavos': 'preco_unitario',
+    'total_centavos': 'total',
+}
@@ -0,0 +1,99 @@
+"""
+Stock ledger for Integre+ application.
+Every change to produtos.quantidade is appended to movimentos_estoque as a
+signed delta in the same transaction, so concurrent terminals commute instead
+of overwriting each other. Periodic per-product snapshots bound the replay
+needed to answer "stock as of date X".
+"""
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+from config import get_config
+from database import execute_query, transaction
+from datas import DataLike, agora, limite_exclusivo
+import queries
+
+logger = logging.getLogger(__name__)
+
+TIPOS_MOVIMENTO = ('venda', 'entrada', 'ajuste')
+
+def registrar_movimento(conn: sqlite3.Connection, produto_id: int, tipo: str, quantidade: int,
+                        referencia_id: Optional[int] = None, observacao: Optional[str] = None,
+                        data: Optional[str] = None) -> int:
+    """
+    Append a movement inside the caller's transaction.
+
+    Args:
+        conn: Connection with the transaction that changes produtos.quantidade
+        tipo: 'venda', 'entrada' or 'ajuste'
+        quantidade: Signed delta (sales are negative)
+        referencia_id: Sale or lot id that originated the movement
+
+    Returns:
+        The movement id
+    """
+    if tipo not in TIPOS_MOVIMENTO:
+        raise ValueError(f"Tipo de movimento inválido: {tipo}")
+    cursor = conn.execute(queries.MOVIMENTOS_INSERIR, (
+        produto_id, tipo, quantidade, data or agora(), referencia_id, observacao
+    ))
+    return cursor.lastrowid
+
+def estoque_atual(produto_id: int) -> int:
+    """Stock derived from the ledger (latest snapshot plus later movements)"""
+    result = execute_query(queries.ESTOQUE_ATUAL_PRODUTO, (produto_id,), fetch=True)
+    return result[0]['quantidade'] if result else 0
+
+def estoque_em(produto_id: int, data: DataLike) -> int:
+    """
+    Stock of a product at a point in time.
+    Starts from the nearest snapshot taken up to 'data' and replays only the
+    movements recorded after it. A plain date ('2025-01-02', date(...)) means
+    the stock at the end of that day; a timestamp includes movements recorded
+    at that exact second.
+    """
+    limite = limite_exclusivo(data)
+    snapshot = execute_query(queries.SNAPSHOT_ANTERIOR, (produto_id, limite), fetch=True)
+    base, ultimo = (snapshot[0]['quantidade'], snapshot[0]['ultimo_movimento_id']) if snapshot else (0, 0)
+    saldo = execute_query(queries.MOVIMENTOS_SALDO_APOS, (produto_id, ultimo, limite), fetch=True)
+    return base + saldo[0]['saldo']
+
+def gerar_snapshots(minimo_movimentos: Optional[int] = None) -> int:
+    """
+    Checkpoint every product with at least 'minimo_movimentos' movements
+    since its last snapshot. Returns the number of snapshots written.
+    """
+    if minimo_movimentos is None:
+        minimo_movimentos = get_config()['estoque']['snapshot_a_cada_movimentos']
+    with transaction() as conn:
+        cursor = conn.execute(queries.SNAPSHOTS_GERAR, (agora(), max(1, minimo_movimentos)))
+        gerados = cursor.rowcount
+    if gerados:
+        logger.info(f"{gerados} snapshot(s) de estoque gerado(s)")
+    return gerados
+
+def divergencias() -> List[Dict]:
+    """Products whose materialized counter disagrees with the ledger"""
+    return execute_query(queries.ESTOQUE_DIVERGENCIAS, fetch=True) or []
+
+def agendar_snapshots(root, intervalo_ms: Optional[int] = None):
+    """Run gerar_snapshots periodically on the Tk event loop"""
+    intervalo_ms = intervalo_ms or get_config()['estoque']['intervalo_snapshot_minutos'] * 60 * 1000
+
+    def executar():
+        try:
+            gerar_snapshots()
+        except Exception as e:
+            logger.error(f"Erro ao gerar snapshots de estoque: {e}")
+        try:
+            root.after(intervalo_ms, executar)
+        except Exception:
+            # Window closed: stop rescheduling
+            pass
+
+    root.after(intervalo_ms, executar)
+
+if __name__ == "__main__":
+    total = gerar_snapshots()
+    print(f"{total} snapshot(s) gerado(s). Divergências: {len(divergencias())}")
@@ -0,0 +1,233 @@
+"""
+Streaming export for Integre+ application.
+Tables are read in keyset pages of a few thousand rows and written straight
+to an openpyxl write-only workbook or to CSV (optionally gzip-compressed), so
+peak memory depends on the page size, not on the size of the history.
+"""
+import csv
+import gzip
+import logging
+import os
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from config import get_config
+from database import get_connection
+from dinheiro import CENTAVOS_POR_REAL, COLUNAS_MONETARIAS, centavos_para_texto
+import queries
+
+logger = logging.getLogger(__name__)
+
+# Progress callback: (linhas_escritas, total_estimado)
+Progresso = Callable[[int, Optional[int]], None]
+
+# An Excel sheet holds 1,048,576 rows; larger exports continue on a new sheet
+LINHAS_POR_PLANILHA = 1_048_575
+
+# tipo -> (keyset page query, count query, sheet title, column headers)
+EXPORTACOES = {
+    'vendas': (queries.VENDAS_EXPORTAR, queries.VENDAS_CONTAR, 'Vendas', {
+        'id': 'ID', 'data': 'Data', 'produto': 'Produto', 'quantidade': 'Quantidade',
+        'preco_unitario_centavos': 'Preço Unitário', 'total_centavos': 'Total',
+        'forma_pagamento': 'Pagamento', 'cliente': 'Cliente',
+    }),
+    'produtos': (queries.PRODUTOS_EXPORTAR, queries.PRODUTOS_CONTAR, 'Produtos', {
+        'id': 'ID', 'nome': 'Nome', 'quantidade': 'Quantidade', 'preco_centavos': 'Preço',
+        'validade': 'Validade', 'categoria': 'Categoria', 'codigo_barras': 'Código de Barras',
+        'fornecedor_id': 'Fornecedor',
+    }),
+    'clientes': (queries.CLIENTES_EXPORTAR, queries.CLIENTES_CONTAR, 'Clientes', {
+        'id': 'ID', 'nome': 'Nome', 'cpf': 'CPF', 'email': 'Email', 'telefone': 'Telefone',
+        'endereco': 'Endereço', 'data_cadastro': 'Cadastro',
+    }),
+}
+
+FORMATOS = ('.xlsx', '.csv', '.csv.gz')
+
+class ExportacaoError(Exception):
+    """Exception raised for invalid export requests"""
+    pass
+
+class _EscritorCSV:
+    """';'-separated UTF-8 CSV (with BOM for Excel), gzip when the name ends in .gz"""
+
+    def __init__(self, caminho: str, destino: str):
+        abrir = gzip.open if destino.endswith('.gz') else open
+        self._arquivo = abrir(caminho, 'wt', newline='', encoding='utf-8-sig')
+        self._csv = csv.writer(self._arquivo, delimiter=';')
+
+    @staticmethod
+    def dinheiro(centavos: int) -> str:
+        return centavos_para_texto(centavos)
+
+    def cabecalho(self, nomes: Sequence[str]):
+        self._csv.writerow(nomes)
+
+    def escrever(self, linhas: Iterable[Sequence]):
+        self._csv.writerows(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+    def descartar(self):
+        self._arquivo.close()
+
+class _EscritorXLSX:
+    """openpyxl write-only workbook: rows are serialized as they are appended"""
+
+    def __init__(self, caminho: str, titulo: str):
+        from openpyxl import Workbook
+        self._livro = Workbook(write_only=True)
+        self._caminho = caminho
+        self._titulo = titulo
+        self._nomes: List[str] = []
+        self._planilhas = 0
+        self._linhas = 0
+        self._planilha = None
+
+    @staticmethod
+    def dinheiro(centavos: int) -> float:
+        return centavos / CENTAVOS_POR_REAL
+
+    def _nova_planilha(self):
+        self._planilhas += 1
+        titulo = self._titulo if self._planilhas == 1 else f"{self._titulo} ({self._planilhas})"
+        self._planilha = self._livro.create_sheet(titulo)
+        self._planilha.append(self._nomes)
+        self._linhas = 0
+
+    def cabecalho(self, nomes: Sequence[str]):
+        self._nomes = list(nomes)
+        self._nova_planilha()
+
+    def escrever(self, linhas: Iterable[Sequence]):
+        for linha in linhas:
+            if self._linhas >= LINHAS_POR_PLANILHA:
+                self._nova_planilha()
+            self._planilha.append(linha)
+            self._linhas += 1
+
+    def fechar(self):
+        self._livro.save(self._caminho)
+
+    def descartar(self):
+        # Finish the sheets' row generators; their temp files are removed by openpyxl at exit
+        for planilha in self._livro.worksheets:
+            try:
+                planilha.close()
+            except Exception:
+                pass
+
+def formato_do_caminho(caminho: str) -> str:
+    """'.xlsx', '.csv' or '.csv.gz' from the file name"""
+    nome = caminho.lower()
+    for formato in sorted(FORMATOS, key=len, reverse=True):
+        if nome.endswith(formato):
+            return formato
+    raise ExportacaoError(f"Formato não suportado: {os.path.basename(caminho)} (use {', '.join(FORMATOS)})")
+
+def _converter(linhas: List[tuple], indices: Sequence[int], dinheiro) -> Iterable[Sequence]:
+    if not indices:
+        return linhas
+    convertidas = []
+    for linha in linhas:
+        valores = list(linha)
+        for indice in indices:
+            if valores[indice] is not None:
+                valores[indice] = dinheiro(valores[indice])
+        convertidas.append(valores)
+    return convertidas
+
+def exportar(tipo: str, caminho: str, progresso: Optional[Progresso] = None,
+             cancelar: Optional[threading.Event] = None,
+             tamanho_lote: Optional[int] = None) -> Optional[int]:
+    """
+    Export 'vendas', 'produtos' or 'clientes' to an .xlsx, .csv or .csv.gz file.
+
+    Rows are fetched in primary key order, one page per short read, and
+    money columns are written in reais. The data goes to a temporary file
+    that replaces 'caminho' only when the export completes.
+
+    Returns:
+        Number of rows written, or None if cancelled (no file is left behind)
+    """
+    if tipo not in EXPORTACOES:
+        raise ExportacaoError(f"Exportação desconhecida: {tipo}")
+    consulta, contagem, titulo, cabecalhos = EXPORTACOES[tipo]
+    formato = formato_do_caminho(caminho)
+    tamanho_lote = tamanho_lote or get_config()['exportacao']['linhas_por_lote']
+
+    with get_connection() as conn:
+        total = conn.execute(contagem).fetchone()[0]
+
+    temporario = f"{caminho}.parcial"
+    escritor = _EscritorXLSX(temporario, titulo) if formato == '.xlsx' else _EscritorCSV(temporario, caminho)
+
+    def descartar():
+        try:
+            escritor.descartar()
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    escritas = 0
+    try:
+        ultimo_id = 0
+        indices_dinheiro: List[int] = []
+        while True:
+            if cancelar is not None and cancelar.is_set():
+                descartar()
+                logger.info(f"Exportação de {tipo} cancelada após {escritas} linha(s)")
+                return None
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None  # plain tuples go straight to the writers
+                linhas = cursor.execute(consulta, (ultimo_id, tamanho_lote)).fetchall()
+                if ultimo_id == 0:
+                    nomes = [coluna[0] for coluna in cursor.description]
+                    indices_dinheiro = [i for i, nome in enumerate(nomes) if nome in COLUNAS_MONETARIAS]
+                    escritor.cabecalho([cabecalhos.get(nome, nome) for nome in nomes])
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            escritor.escrever(_converter(linhas, indices_dinheiro, escritor.dinheiro))
+            escritas += len(linhas)
+            if progresso:
+                progresso(escritas, total)
+        escritor.fechar()
+        os.replace(temporario, caminho)
+    except BaseException:
+        descartar()
+        raise
+    logger.info(f"{escritas} linha(s) de {tipo} exportada(s) para {caminho}")
+    return escritas
+
+# ================= INTERFACE GRÁFICA =================
+
+def gui_exportar(tipo: str, caminho: Optional[str] = None):
+    """Ask for a destination and export on a worker thread behind a progress window"""
+    from tkinter import filedialog
+    from utils import ProgressDialog
+
+    if caminho is None:
+        caminho = filedialog.asksaveasfilename(
+            title=f"Exportar {tipo}",
+            initialfile=f"{tipo}.xlsx",
+            defaultextension='.xlsx',
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv"), ("CSV compactado", "*.csv.gz")]
+        )
+        if not caminho:
+            return
+
+    def concluir(janela, escritas: Optional[int]):
+        if escritas is None:
+            janela.set_status("Exportação cancelada")
+        else:
+            janela.set_status(f"{escritas} linha(s) exportada(s) para '{os.path.basename(caminho)}'")
+
+    ProgressDialog(
+        f"Exportar {tipo}",
+        f"Exportando {tipo}...",
+        lambda progresso, cancelar: exportar(tipo, caminho, progresso, cancelar),
+        on_done=concluir
+    )
@@ -0,0 +1,206 @@
+"""
+Chart rendering for Integre+ application.
+Charts are drawn with matplotlib's Agg backend on a worker thread into PNG
+buffers and shown in Tk as plain images. Buffers are kept in an LRU keyed
+by (chart, data digest, theme colors, size), so redrawing unchanged data,
+e.g. on a theme toggle back or a dashboard refresh, skips matplotlib.
+"""
+import base64
+import hashlib
+import io
+import logging
+import pickle
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Chart colors: 'fundo', 'texto', 'destaque' and optionally 'paleta' (a list)
+Cores = Dict[str, Any]
+
+# desenhar(ax, dados, cores) fills one matplotlib Axes
+Desenho = Callable[[Any, Any, Cores], None]
+
+# (chart, data digest, colors, width, height, title)
+Chave = Tuple[str, str, Tuple, int, int, str]
+
+def _digest(valor) -> str:
+    return hashlib.blake2b(pickle.dumps(valor, protocol=4), digest_size=16).hexdigest()
+
+def _renderizar_png(desenhar: Desenho, dados, cores: Cores, largura: int, altura: int, dpi: int,
+                    titulo: str = '') -> bytes:
+    """Draw one chart off-screen. Safe on any thread: no pyplot, no Tk."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(largura / dpi, altura / dpi), dpi=dpi)
+    FigureCanvasAgg(figura)
+    figura.patch.set_facecolor(cores['fundo'])
+    ax = figura.add_subplot(111)
+    ax.set_facecolor(cores['fundo'])
+    desenhar(ax, dados, cores)
+    if titulo:
+        ax.set_title(titulo, color=cores['texto'], fontsize=12, fontweight='bold')
+    ax.tick_params(colors=cores['texto'])
+    for borda in ax.spines.values():
+        borda.set_color(cores['texto'])
+    figura.tight_layout()
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format='png', facecolor=figura.get_facecolor())
+    return buffer.getvalue()
+
+class RenderizadorGraficos:
+    """Single rendering thread plus an LRU of PNG buffers"""
+
+    def __init__(self, capacidade: Optional[int] = None, dpi: Optional[int] = None):
+        config = get_config()['graficos']
+        self.capacidade = capacidade or config['cache_itens']
+        self.dpi = dpi or config['dpi']
+        self._cache: 'OrderedDict[Chave, bytes]' = OrderedDict()
+        self._pendentes: Dict[Chave, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.renderizados = 0
+
+    def chave(self, nome: str, dados, cores: Cores, largura: int, altura: int, titulo: str = '') -> Chave:
+        return (nome, _digest(dados), tuple(sorted((k, str(v)) for k, v in cores.items())), largura, altura, titulo)
+
+    def em_cache(self, chave: Chave) -> Optional[bytes]:
+        with self._lock:
+            png = self._cache.get(chave)
+            if png is not None:
+                self._cache.move_to_end(chave)
+            return png
+
+    def _guardar(self, chave: Chave, png: bytes):
+        with self._lock:
+            self.renderizados += 1
+            self._cache[chave] = png
+            self._cache.move_to_end(chave)
+            while len(self._cache) > self.capacidade:
+                self._cache.popitem(last=False)
+            self._pendentes.pop(chave, None)
+
+    def _trabalho(self, chave: Chave, desenhar: Desenho, dados, cores: Cores) -> bytes:
+        try:
+            png = _renderizar_png(desenhar, dados, cores, chave[3], chave[4], self.dpi, chave[5])
+        except BaseException:
+            with self._lock:
+                self._pendentes.pop(chave, None)
+            raise
+        self._guardar(chave, png)
+        return png
+
+    def solicitar(self, nome: str, desenhar: Desenho, dados, cores: Cores,
+                  largura: int, altura: int, titulo: str = '') -> Tuple[Chave, Future]:
+        """
+        PNG for the chart, as a future. Cache hits come back already
+        resolved; identical requests in flight share one rendering.
+        """
+        chave = self.chave(nome, dados, cores, largura, altura, titulo)
+        png = self.em_cache(chave)
+        if png is not None:
+            futuro: Future = Future()
+            futuro.set_result(png)
+            return chave, futuro
+        with self._lock:
+            futuro = self._pendentes.get(chave)
+            if futuro is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='graficos')
+                futuro = self._executor.submit(self._trabalho, chave, desenhar, dados, cores)
+                self._pendentes[chave] = futuro
+        return chave, futuro
+
+    def limpar(self):
+        with self._lock:
+            self._cache.clear()
+
+renderizador = RenderizadorGraficos()
+
+class GraficoImagem(tk.Label):
+    """
+    Label that shows a chart rendered by 'renderizador'. mostrar() can be
+    called again with new data or colors; only the latest request is shown.
+    """
+    def __init__(self, master, largura: int = 600, altura: int = 400, poll_ms: int = 30, **kwargs):
+        kwargs.setdefault('text', "Carregando gráfico...")
+        super().__init__(master, **kwargs)
+        self.largura = largura
+        self.altura = altura
+        self._poll_ms = poll_ms
+        self._chave: Optional[Chave] = None
+        self._imagem: Optional[tk.PhotoImage] = None  # keep a reference or Tk drops the image
+
+    def mostrar(self, nome: str, desenhar: Desenho, dados, cores: Cores, titulo: str = ''):
+        chave, futuro = renderizador.solicitar(nome, desenhar, dados, cores, self.largura, self.altura, titulo)
+        self._chave = chave
+        if futuro.done():
+            self._exibir(chave, futuro)
+        else:
+            self.after(self._poll_ms, self._aguardar, chave, futuro)
+
+    def _aguardar(self, chave: Chave, futuro: Future):
+        if not self.winfo_exists() or chave != self._chave:
+            return
+        if futuro.done():
+            self._exibir(chave, futuro)
+        else:
+            self.after(self._poll_ms, self._aguardar, chave, futuro)
+
+    def _exibir(self, chave: Chave, futuro: Future):
+        if chave != self._chave:
+            return
+        try:
+            png = futuro.result()
+        except Exception as e:
+            logger.error(f"Falha ao renderizar gráfico {chave[0]}: {e}")
+            self.config(image='', text="Erro ao gerar gráfico")
+            return
+        self._imagem = tk.PhotoImage(master=self, data=base64.b64encode(png))
+        self.config(image=self._imagem, text='')
+
+# ================= DESENHOS =================
+
+def desenhar_vendas(ax, serie, cores: Cores):
+    """Line chart of a series.Serie in reais, filled below the line"""
+    if not serie.total_centavos.any():
+        ax.text(0.5, 0.5, 'Sem dados de vendas', ha='center', va='center',
+                transform=ax.transAxes, fontsize=12, color=cores['texto'])
+        return
+    rotulos = serie.rotulos()
+    valores = serie.total_reais
+    ax.plot(rotulos, valores, color=cores['destaque'], linewidth=2, marker='o')
+    ax.fill_between(rotulos, valores, alpha=0.3, color=cores['destaque'])
+    ax.set_ylabel('Valor Total (R$)', color=cores['texto'])
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.tick_params(axis='x', labelrotation=45)
+
+def desenhar_categorias(ax, categorias: List[Dict], cores: Cores):
+    """Pie chart of {'categoria', 'quantidade'} rows"""
+    if not categorias:
+        ax.text(0.5, 0.5, 'Sem dados de produtos', ha='center', va='center',
+                transform=ax.transAxes, fontsize=12, color=cores['texto'])
+        return
+    paleta = cores.get('paleta') or [cores['destaque']]
+    ax.pie([item['quantidade'] for item in categorias], labels=[item['categoria'] for item in categorias],
+           autopct='%1.1f%%', startangle=90, colors=paleta[:len(categorias)],
+           textprops={'color': cores['texto']})
+
+def desenhar_estoque(ax, itens: List[Tuple[str, int]], cores: Cores):
+    """Bar chart of (nome, quantidade) with the value above each bar"""
+    if not itens:
+        ax.text(0.5, 0.5, 'Sem produtos', ha='center', va='center',
+                transform=ax.transAxes, fontsize=12, color=cores['texto'])
+        return
+    nomes = [nome for nome, _ in itens]
+    barras = ax.bar(range(len(itens)), [quantidade for _, quantidade in itens], color=cores['destaque'])
+    ax.bar_label(barras, color=cores['texto'])
+    ax.set_ylabel('Quantidade', color=cores['texto'])
+    ax.set_xticks(range(len(nomes)))
+    ax.set_xticklabels(nomes, rotation=45, ha='right')
@@ -1,18 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
-from PIL import Image, ImageTk
 import produtos, relatorios, clientes
+import importacao
+import exportacao
 import vendas
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import shutil
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 import json
 import database
+from datas import formatar_data_br
+from graficos import GraficoImagem, desenhar_estoque, desenhar_vendas
+from alertas_validade import agendar_alertas
+from estoque import agendar_snapshots
+from logs import definir_usuario
+from sessao import Sessao, sessoes
 import os
 from typing import Optional, Dict, List
 import threading
@@ -25,12 +26,23 @@ from utils import (
 
 class IntegrePlusGUI:
     def __init__(self):
-        self.usuario_logado = None
-        self.permissao_usuario = None
+        self.sessao: Optional[Sessao] = None
         self.tema_atual = load_user_preferences().get('tema', 'claro')
         self.notification_manager = None
         self.animations_enabled = True  # New flag to enable/disable animations
         
+    @property
+    def usuario_logado(self) -> Optional[str]:
+        return self.sessao.username if self.sessao else None
+
+    @property
+    def permissao_usuario(self) -> Optional[str]:
+        return self.sessao.papel if self.sessao else None
+
+    def pode(self, permissao: str) -> bool:
+        """In-memory permission check against the current session"""
+        return sessoes.pode(self.sessao, permissao)
+
     def aplicar_tema(self, style, tema='claro'):
         """Apply theme colors to the GUI"""
         colors = THEMES[tema]
@@ -94,32 +106,29 @@ class IntegrePlusGUI:
         dashboard_frame = ttk.Frame(parent, style='Card.TFrame')
         dashboard_frame.pack(fill='both', expand=True, padx=20, pady=20)
 
-        # Create figure with subplots
-        fig = plt.figure(figsize=(12, 6))
-        fig.patch.set_facecolor(THEMES[self.tema_atual]['background'])
+        # Charts are rendered off the UI thread and cached (see graficos.py)
+        graficos_frame = ttk.Frame(dashboard_frame, style='Card.TFrame')
+        graficos_frame.pack(fill='both', expand=True)
         
         # Product stock chart
-        ax1 = fig.add_subplot(121)
-        self.atualizar_grafico_estoque(ax1)
+        estoque_frame = ttk.LabelFrame(graficos_frame, text="Níveis de Estoque")
+        estoque_frame.pack(side='left', fill='both', expand=True, padx=(0, 5))
+        grafico_estoque = GraficoImagem(estoque_frame, largura=600, altura=450)
+        grafico_estoque.pack(fill='both', expand=True)
+        self.atualizar_grafico_estoque(grafico_estoque)
         
         # Sales trend chart
-        ax2 = fig.add_subplot(122)
-        self.atualizar_grafico_vendas(ax2)
-        
-        # Embed the chart
-        canvas = FigureCanvasTkAgg(fig, master=dashboard_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
-        
-        # Add matplotlib toolbar
-        toolbar = NavigationToolbar2Tk(canvas, dashboard_frame)
-        toolbar.update()
+        vendas_frame = ttk.LabelFrame(graficos_frame, text="Tendência de Vendas")
+        vendas_frame.pack(side='left', fill='both', expand=True, padx=(5, 0))
+        grafico_vendas = GraficoImagem(vendas_frame, largura=600, altura=450)
+        grafico_vendas.pack(fill='both', expand=True)
+        self.atualizar_grafico_vendas(grafico_vendas)
         
         # Add refresh button
         refresh_btn = ModernButton(
             dashboard_frame,
             text="↻ Atualizar Gráficos",
-            command=lambda: self.atualizar_dashboard(ax1, ax2, canvas)
+            command=lambda: self.atualizar_dashboard(grafico_estoque, grafico_vendas)
         )
         refresh_btn.pack(pady=10)
 
@@ -135,69 +144,37 @@ class IntegrePlusGUI:
         # This is a placeholder for more complex animation if using other GUI frameworks
         pass
 
-    def atualizar_grafico_estoque(self, ax):
+    def cores_grafico(self) -> Dict[str, str]:
+        """Theme colors handed to the chart renderer (part of the cache key)"""
+        cores = THEMES[self.tema_atual]
+        return {'fundo': cores['background'], 'texto': cores['text'], 'destaque': cores['accent']}
+
+    def atualizar_grafico_estoque(self, grafico):
         """Update stock level chart"""
         try:
-            dados = produtos.listar_produtos()
-            if dados:
-                nomes = [d['nome'] for d in dados]
-                qtds = [d['quantidade'] for d in dados]
-                
-                ax.clear()
-                bars = ax.bar(nomes, qtds, color=THEMES[self.tema_atual]['accent'])
-                
-                # Add value labels on top of bars
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                            f'{int(height)}',
-                            ha='center', va='bottom')
-                
-                ax.set_title('Níveis de Estoque', color=THEMES[self.tema_atual]['text'])
-                ax.set_xlabel('Produtos', color=THEMES[self.tema_atual]['text'])
-                ax.set_ylabel('Quantidade', color=THEMES[self.tema_atual]['text'])
-                ax.tick_params(axis='both', colors=THEMES[self.tema_atual]['text'])
-                ax.set_xticks(range(len(nomes)))
-                ax.set_xticklabels(nomes, rotation=45, ha='right')
+            dados = [(d['nome'], d['quantidade']) for d in produtos.listar_produtos()]
+            grafico.mostrar('estoque', desenhar_estoque, dados, self.cores_grafico(), 'Níveis de Estoque')
         except Exception as e:
             self.notification_manager.show_notification(
                 f"Erro ao atualizar gráfico de estoque: {str(e)}",
                 type_='error'
             )
 
-    def atualizar_grafico_vendas(self, ax):
+    def atualizar_grafico_vendas(self, grafico):
         """Update sales trend chart"""
         try:
-            # Get sales data from database (implement this in vendas.py)
-            vendas = relatorios.obter_vendas_por_periodo()
-            if vendas:
-                datas = [v[0] for v in vendas]
-                valores = [v[1] for v in vendas]
-                
-                ax.clear()
-                ax.plot(datas, valores, marker='o', 
-                       color=THEMES[self.tema_atual]['accent'],
-                       linewidth=2)
-                
-                ax.set_title('Tendência de Vendas', color=THEMES[self.tema_atual]['text'])
-                ax.set_xlabel('Data', color=THEMES[self.tema_atual]['text'])
-                ax.set_ylabel('Valor Total (R$)', color=THEMES[self.tema_atual]['text'])
-                ax.tick_params(axis='both', colors=THEMES[self.tema_atual]['text'])
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Rotate x-axis labels for better readability
-                ax.set_xticklabels(datas, rotation=45, ha='right')
+            from series import serie_vendas  # NumPy only once a chart is shown
+            grafico.mostrar('vendas', desenhar_vendas, serie_vendas('dia'), self.cores_grafico(), 'Tendência de Vendas')
         except Exception as e:
             self.notification_manager.show_notification(
                 f"Erro ao atualizar gráfico de vendas: {str(e)}",
                 type_='error'
             )
 
-    def atualizar_dashboard(self, ax1, ax2, canvas):
+    def atualizar_dashboard(self, grafico_estoque, grafico_vendas):
         """Update both dashboard charts"""
-        self.atualizar_grafico_estoque(ax1)
-        self.atualizar_grafico_vendas(ax2)
-        canvas.draw()
+        self.atualizar_grafico_estoque(grafico_estoque)
+        self.atualizar_grafico_vendas(grafico_vendas)
         self.notification_manager.show_notification(
             "Dashboard atualizado com sucesso!",
             type_='success'
@@ -339,6 +316,18 @@ class IntegrePlusGUI:
             command=lambda: produtos.gui_cadastrar_produto(tela_cheia=True)
         ).pack(side='left', padx=5)
 
+        ModernButton(
+            btn_frame,
+            text="📥 Importar",
+            command=lambda: importacao.gui_importar('produtos', ao_concluir=self.carregar_produtos)
+        ).pack(side='left', padx=5)
+
+        ModernButton(
+            btn_frame,
+            text="📤 Exportar",
+            command=lambda: exportacao.gui_exportar('produtos')
+        ).pack(side='left', padx=5)
+
         ModernButton(
             btn_frame,
             text="✏️ Editar",
@@ -390,6 +379,18 @@ class IntegrePlusGUI:
             command=lambda: clientes.gui_cadastrar_cliente(tela_cheia=True)
         ).pack(side='left', padx=5)
 
+        ModernButton(
+            btn_frame,
+            text="📥 Importar",
+            command=lambda: importacao.gui_importar('clientes', ao_concluir=self.carregar_clientes)
+        ).pack(side='left', padx=5)
+
+        ModernButton(
+            btn_frame,
+            text="📤 Exportar",
+            command=lambda: exportacao.gui_exportar('clientes')
+        ).pack(side='left', padx=5)
+
         ModernButton(
             btn_frame,
             text="✏️ Editar",
@@ -530,6 +531,18 @@ class IntegrePlusGUI:
             command=self.gerar_relatorio
         ).grid(row=2, column=0, columnspan=3, pady=10)
 
+        ModernButton(
+            options_frame,
+            text="🗂️ Exportar Parquet (BI)",
+            command=relatorios.gui_exportar_analitico
+        ).grid(row=3, column=0, columnspan=3, pady=(0, 10))
+
+        ModernButton(
+            options_frame,
+            text="📦 Pacote de Relatórios",
+            command=relatorios.gerar_relatorio_geral
+        ).grid(row=4, column=0, columnspan=3, pady=(0, 10))
+
         # Preview area
         preview_frame = ttk.LabelFrame(frame, text="Prévia")
         preview_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -567,7 +580,7 @@ class IntegrePlusGUI:
         ).pack(pady=10)
 
         # User settings
-        if self.permissao_usuario == "Admin":
+        if self.pode('usuarios'):
             user_frame = ttk.LabelFrame(frame, text="Usuários")
             user_frame.pack(fill='x', padx=10, pady=5)
 
@@ -611,7 +624,7 @@ class IntegrePlusGUI:
                             produto.get('nome', ''),
                             produto.get('quantidade', ''),
                             f"R$ {produto.get('preco', 0):.2f}" if produto.get('preco') is not None else '',
-                            produto.get('validade', ''),
+                            formatar_data_br(produto.get('validade', '')),
                             produto.get('categoria', ''),
                             produto.get('codigo_barras', ''),
                             produto.get('fornecedor_id', '')
@@ -675,6 +688,8 @@ class IntegrePlusGUI:
             except tk.TclError:
                 # Widget has been destroyed, skip loading
                 pass
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao obter vendas recentes: {e}")
 
     def filtrar_produtos(self, termo_busca):
         """Filter products based on search term"""
@@ -690,7 +705,7 @@ class IntegrePlusGUI:
                             produto.get('nome', ''),
                             produto.get('quantidade', ''),
                             f"R$ {produto.get('preco', 0):.2f}" if produto.get('preco') is not None else '',
-                            produto.get('validade', ''),
+                            formatar_data_br(produto.get('validade', '')),
                             produto.get('categoria', ''),
                             produto.get('codigo_barras', ''),
                             produto.get('fornecedor_id', '')
@@ -855,7 +870,8 @@ class IntegrePlusGUI:
             cliente = next((c for c in clientes_lista if ((c['nome'] if isinstance(c, dict) else c[1]).strip().lower() == cliente_nome.strip().lower())), None)
             cliente_id = cliente['id'] if cliente and isinstance(cliente, dict) else (cliente[0] if cliente else None)
 
-            resultado = vendas.registrar_venda(produto_id, quantidade, preco_unitario, cliente_id)
+            resultado = vendas.registrar_venda(produto_id, quantidade, preco_unitario, cliente_id,
+                                               sessao=self.sessao)
             if resultado == "Venda registrada com sucesso.":
                 self.notification_manager.show_notification(
                     resultado,
@@ -925,7 +941,7 @@ class IntegrePlusGUI:
 
     def gerenciar_usuarios(self):
         """Show user management interface"""
-        if self.permissao_usuario != "Admin":
+        if not self.pode('usuarios'):
             self.notification_manager.show_notification(
                 "Acesso negado!",
                 type_='error'
@@ -938,6 +954,8 @@ class IntegrePlusGUI:
     def logout(self):
         """Logout current user"""
         if messagebox.askyesno("Logout", "Deseja realmente sair?"):
+            sessoes.encerrar(self.sessao)
+            definir_usuario(None)
             self.root.destroy()
             # Import and start the modern login
             import login
@@ -978,6 +996,13 @@ class IntegrePlusGUI:
         # Show initial dashboard
         self.mostrar_dashboard()
         
+        # Periodic stock ledger checkpoints and near-expiry alerts
+        agendar_snapshots(self.root)
+        agendar_alertas(
+            self.root,
+            lambda mensagem: self.notification_manager.show_notification(f"Validade: {mensagem}", type_='warning')
+        )
+        
         # Start main loop
         self.root.mainloop()
 
@@ -1050,8 +1075,8 @@ def gui_login():
         usuario = clientes.autenticar_usuario(user, senha)
         if usuario:
             app = IntegrePlusGUI()
-            app.usuario_logado = user
-            app.permissao_usuario = usuario.get('permissao', 'Funcionario') if isinstance(usuario, dict) else 'Funcionario'
+            app.sessao = sessoes.abrir(usuario)
+            definir_usuario(app.usuario_logado)
             login.destroy()
             app.main_gui()
         else:
@@ -1092,6 +1117,6 @@ def gui_login():
     login.mainloop()
 
 if __name__ == "__main__":
-    # Initialize database
-    database.create_tables()
+    from bootstrap import inicializar_aplicacao
+    inicializar_aplicacao()
     gui_login()
@@ -14,6 +14,7 @@ import produtos
 import vendas
 import clientes
 import relatorios
+import exportacao
 
 class ModernGUI:
     def __init__(self):
@@ -310,7 +311,7 @@ class ModernGUI:
         buttons = [
             ("➕ Nova Venda", vendas.gui_registrar_venda, 'success'),
             ("📋 Histórico", vendas.gui_listar_vendas, 'primary'),
-            ("📊 Exportar", lambda: vendas.exportar_vendas_excel(), 'warning')
+            ("📊 Exportar", lambda: exportacao.gui_exportar('vendas'), 'warning')
         ]
         
         for text, command, style in buttons:
@@ -581,5 +582,7 @@ class ModernGUI:
         """Start the GUI application"""
         self.root.mainloop()
 
-# Create global GUI instance
-gui = ModernGUI()
+if __name__ == "__main__":
+    from bootstrap import inicializar_aplicacao
+    inicializar_aplicacao()
+    ModernGUI().run()
@@ -0,0 +1,349 @@
+"""
+Bulk import for Integre+ application.
+Products and clients are read from CSV or XLSX in chunks, validated row by
+row and merged set-based: each chunk is loaded into a TEMP staging table and
+upserted with INSERT ... ON CONFLICT in its own transaction, so a large file
+costs a handful of statements per chunk instead of several per row.
+"""
+import csv
+import logging
+import os
+import threading
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from alertas_validade import motor_validade
+from clientes import UserError, validar_email
+from config import get_config
+from database import get_connection, transaction, DatabaseError
+from datas import agora
+from lotes import alocador_fefo
+from produtos import normalizar_dados_produto
+import queries
+
+logger = logging.getLogger(__name__)
+
+# Progress callback: (linhas_processadas, total_estimado or None)
+Progresso = Callable[[int, Optional[int]], None]
+
+# Accepted columns per import type; the first one is the conflict key
+CAMPOS_PRODUTOS = ('codigo_barras', 'nome', 'quantidade', 'preco', 'validade', 'categoria', 'fornecedor_id')
+CAMPOS_CLIENTES = ('cpf', 'nome', 'email', 'telefone', 'endereco')
+
+# Header spellings seen in spreadsheets, after accent/case normalization
+_SINONIMOS = {
+    'codigo': 'codigo_barras',
+    'codigo_de_barras': 'codigo_barras',
+    'ean': 'codigo_barras',
+    'produto': 'nome',
+    'qtd': 'quantidade',
+    'estoque': 'quantidade',
+    'preco_unitario': 'preco',
+    'valor': 'preco',
+    'fornecedor': 'fornecedor_id',
+    'e-mail': 'email',
+    'endereco_completo': 'endereco',
+}
+
+class ImportacaoError(Exception):
+    """Exception raised when a file cannot be imported at all"""
+    pass
+
+class ResultadoImportacao:
+    """Outcome of an import: counters plus one (linha, mensagem) per rejected row"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.novos = 0
+        self.atualizados = 0
+        self.erros: List[Tuple[int, str]] = []
+        self.cancelado = False
+
+    @property
+    def importados(self) -> int:
+        return self.novos + self.atualizados
+
+    def resumo(self) -> str:
+        texto = (f"{self.lidas} linha(s) lida(s): {self.novos} novo(s), "
+                 f"{self.atualizados} atualizado(s), {len(self.erros)} com erro")
+        return texto + " (cancelado)" if self.cancelado else texto
+
+def _normalizar_cabecalho(nome: Any) -> str:
+    texto = unicodedata.normalize('NFKD', str(nome or '')).encode('ascii', 'ignore').decode()
+    texto = texto.strip().lower().replace(' ', '_')
+    return _SINONIMOS.get(texto, texto)
+
+def _texto(valor: Any) -> str:
+    """Cell value as stripped text (XLSX cells may be numbers or datetimes)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()[:10]
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+def _contar_linhas(caminho: str) -> int:
+    """Count newlines with buffered binary reads, for the progress estimate"""
+    total = 0
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            total += bloco.count(b'\n')
+    return total
+
+def _ler_csv(caminho: str) -> Tuple[Optional[int], Iterator[Sequence[Any]]]:
+    total = max(_contar_linhas(caminho) - 1, 0)
+
+    def linhas():
+        with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+            except csv.Error:
+                dialeto = csv.excel
+            yield from csv.reader(arquivo, dialeto)
+
+    return total, linhas()
+
+def _ler_xlsx(caminho: str) -> Tuple[Optional[int], Iterator[Sequence[Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportacaoError("Importação de XLSX requer o pacote openpyxl")
+    # Read-only mode streams rows from the sheet XML instead of building the workbook
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    planilha = livro.active
+    total = planilha.max_row - 1 if planilha.max_row else None
+
+    def linhas():
+        try:
+            yield from planilha.iter_rows(values_only=True)
+        finally:
+            livro.close()
+
+    return total, linhas()
+
+def ler_em_lotes(caminho: str, campos: Sequence[str], tamanho_lote: int
+                 ) -> Tuple[Optional[int], Iterator[List[Tuple[int, Dict[str, str]]]]]:
+    """
+    Stream a CSV or XLSX file as chunks of (numero_da_linha, {campo: texto}).
+    The first row must be a header; unknown columns are ignored.
+
+    Returns:
+        (estimated number of data rows or None, chunk iterator)
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        total, linhas = _ler_csv(caminho)
+    elif extensao in ('.xlsx', '.xlsm'):
+        total, linhas = _ler_xlsx(caminho)
+    else:
+        raise ImportacaoError(f"Formato não suportado: {extensao or caminho}")
+
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        raise ImportacaoError("Arquivo vazio")
+    posicoes = {}
+    for indice, nome in enumerate(cabecalho):
+        campo = _normalizar_cabecalho(nome)
+        if campo in campos and campo not in posicoes:
+            posicoes[campo] = indice
+    if campos[0] not in posicoes:
+        raise ImportacaoError(f"Coluna obrigatória ausente: {campos[0]}")
+
+    def lotes():
+        lote = []
+        # Line 1 is the header, so data starts at line 2 as in a spreadsheet
+        for numero, linha in enumerate(linhas, start=2):
+            if not any(linha):
+                continue
+            lote.append((numero, {
+                campo: (linha[indice].strip() if type(linha[indice]) is str else _texto(linha[indice]))
+                if indice < len(linha) else ''
+                for campo, indice in posicoes.items()
+            }))
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    return total, lotes()
+
+def _validar_produto(numero: int, campos: Dict[str, str]) -> tuple:
+    codigo = campos.get('codigo_barras', '')
+    if not codigo:
+        raise ValueError("Código de barras é obrigatório na importação.")
+    nome, quantidade, preco_centavos, validade = normalizar_dados_produto(
+        campos.get('nome'), campos.get('quantidade'), campos.get('preco'), campos.get('validade')
+    )
+    fornecedor = campos.get('fornecedor_id', '')
+    if fornecedor and not fornecedor.isdigit():
+        raise ValueError("Fornecedor deve ser o ID numérico.")
+    return (codigo, numero, nome, quantidade, preco_centavos, validade,
+            campos.get('categoria') or None, int(fornecedor) if fornecedor else None)
+
+def _validar_cliente(numero: int, campos: Dict[str, str]) -> tuple:
+    nome, cpf, email = campos.get('nome', ''), campos.get('cpf', ''), campos.get('email', '')
+    if not nome or not cpf or not email:
+        raise ValueError("Nome, CPF e email são obrigatórios.")
+    try:
+        validar_email(email)
+    except UserError as e:
+        raise ValueError(str(e))
+    return (cpf, numero, nome, email, campos.get('telefone') or None, campos.get('endereco') or None)
+
+def _mesclar_produtos(conn, linhas: List[tuple], momento: str, resultado: ResultadoImportacao):
+    conn.execute(queries.IMPORTACAO_PRODUTOS_CRIAR)
+    conn.execute(queries.IMPORTACAO_PRODUTOS_LIMPAR)
+    conn.executemany(queries.IMPORTACAO_PRODUTOS_CARREGAR, linhas)
+    conn.execute(queries.IMPORTACAO_PRODUTOS_EXISTENTES)
+    conn.execute(queries.IMPORTACAO_PRODUTOS_MESCLAR, (momento,))
+    baixas = conn.execute(queries.IMPORTACAO_PRODUTOS_LOTES_BAIXAR).fetchall()
+    conn.executemany(queries.LOTES_BAIXAR, [(b['retirar'], b['id'], b['retirar']) for b in baixas])
+    conn.execute(queries.IMPORTACAO_PRODUTOS_VALIDADE_DOS_LOTES)
+    conn.execute(queries.IMPORTACAO_PRODUTOS_NOVOS)
+    conn.execute(queries.IMPORTACAO_PRODUTOS_MOVIMENTOS, (momento,))
+    conn.execute(queries.IMPORTACAO_PRODUTOS_PRECOS, (momento,))
+    contagem = conn.execute(queries.IMPORTACAO_PRODUTOS_CONTAR_NOVOS).fetchone()
+    conn.execute(queries.IMPORTACAO_PRODUTOS_LIMPAR)
+    # Cached FEFO heaps of the lots taken above are stale now
+    for produto_id in {b['produto_id'] for b in baixas}:
+        alocador_fefo.descartar(produto_id)
+    return contagem['novos'], contagem['total'] - contagem['novos']
+
+def _mesclar_clientes(conn, linhas: List[tuple], momento: str, resultado: ResultadoImportacao):
+    conn.execute(queries.IMPORTACAO_CLIENTES_CRIAR)
+    conn.execute(queries.IMPORTACAO_CLIENTES_INDICE_EMAIL)
+    conn.execute(queries.IMPORTACAO_CLIENTES_LIMPAR)
+    conn.executemany(queries.IMPORTACAO_CLIENTES_CARREGAR, linhas)
+    conflitos = conn.execute(queries.IMPORTACAO_CLIENTES_EMAIL_CONFLITANTE).fetchall()
+    for conflito in conflitos:
+        resultado.erros.append((conflito['linha'], f"Email já usado por outro CPF: {conflito['email']}"))
+    conn.executemany(queries.IMPORTACAO_CLIENTES_REMOVER_LINHA, [(c['linha'],) for c in conflitos])
+    conn.execute(queries.IMPORTACAO_CLIENTES_EXISTENTES)
+    conn.execute(queries.IMPORTACAO_CLIENTES_MESCLAR, (momento,))
+    contagem = conn.execute(queries.IMPORTACAO_CLIENTES_CONTAR_NOVOS).fetchone()
+    conn.execute(queries.IMPORTACAO_CLIENTES_LIMPAR)
+    return contagem['novos'], contagem['total'] - contagem['novos']
+
+def _importar(caminho: str, campos: Sequence[str], validar, mesclar,
+              progresso: Optional[Progresso], cancelar: Optional[threading.Event],
+              tamanho_lote: Optional[int]) -> ResultadoImportacao:
+    config = get_config()['importacao']
+    tamanho_lote = tamanho_lote or config['linhas_por_lote']
+    total, lotes = ler_em_lotes(caminho, campos, tamanho_lote)
+    resultado = ResultadoImportacao()
+    momento = agora()
+    with get_connection() as conn:
+        cache_anterior = conn.execute("PRAGMA cache_size").fetchone()[0]
+        conn.execute(f"PRAGMA cache_size = {-int(config['cache_kib'])}")
+    try:
+        _mesclar_lotes(lotes, validar, mesclar, momento, resultado, total, progresso, cancelar)
+    finally:
+        with get_connection() as conn:
+            conn.execute(f"PRAGMA cache_size = {int(cache_anterior)}")
+    logger.info(f"Importação de {caminho}: {resultado.resumo()}")
+    return resultado
+
+def _mesclar_lotes(lotes, validar, mesclar, momento: str, resultado: ResultadoImportacao,
+                   total: Optional[int], progresso: Optional[Progresso],
+                   cancelar: Optional[threading.Event]):
+    for lote in lotes:
+        if cancelar is not None and cancelar.is_set():
+            resultado.cancelado = True
+            break
+        validas = []
+        for numero, valores in lote:
+            try:
+                validas.append(validar(numero, valores))
+            except ValueError as e:
+                resultado.erros.append((numero, str(e)))
+        resultado.lidas += len(lote)
+        if validas:
+            try:
+                with transaction() as conn:
+                    novos, atualizados = mesclar(conn, validas, momento, resultado)
+                resultado.novos += novos
+                resultado.atualizados += atualizados
+            except DatabaseError as e:
+                # The chunk was rolled back as a whole; earlier chunks stay committed
+                logger.error(f"Erro ao importar linhas {lote[0][0]}-{lote[-1][0]}: {e}")
+                resultado.erros.extend((linha[1], f"Lote rejeitado pelo banco: {e}") for linha in validas)
+        if progresso:
+            progresso(resultado.lidas, total)
+
+def importar_produtos(caminho: str, progresso: Optional[Progresso] = None,
+                      cancelar: Optional[threading.Event] = None,
+                      tamanho_lote: Optional[int] = None) -> ResultadoImportacao:
+    """
+    Create or update products from a CSV/XLSX file keyed by codigo_barras.
+    'quantidade' is the stock count: the difference to the current stock is
+    written to the ledger, and price changes to the price history. A lower
+    count is taken out of the product's lots FEFO-first, and products with
+    lots keep the earliest lot expiry as validade.
+    Each chunk commits on its own, so a cancelled import keeps the chunks
+    already merged.
+    """
+    resultado = _importar(caminho, CAMPOS_PRODUTOS, _validar_produto, _mesclar_produtos,
+                          progresso, cancelar, tamanho_lote)
+    if resultado.importados:
+        motor_validade.invalidar()
+    return resultado
+
+def importar_clientes(caminho: str, progresso: Optional[Progresso] = None,
+                      cancelar: Optional[threading.Event] = None,
+                      tamanho_lote: Optional[int] = None) -> ResultadoImportacao:
+    """Create or update clients from a CSV/XLSX file keyed by CPF"""
+    return _importar(caminho, CAMPOS_CLIENTES, _validar_cliente, _mesclar_clientes,
+                     progresso, cancelar, tamanho_lote)
+
+def exportar_erros(resultado: ResultadoImportacao, caminho: str):
+    """Write the rejected rows as a CSV (linha;erro)"""
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(('linha', 'erro'))
+        escritor.writerows(sorted(resultado.erros))
+
+# ================= INTERFACE GRÁFICA =================
+
+def gui_importar(tipo: str = 'produtos', ao_concluir: Optional[Callable[[], None]] = None):
+    """Pick a file and import it on a worker thread behind a progress window"""
+    import tkinter as tk
+    from tkinter import filedialog, ttk
+    from utils import ProgressDialog
+
+    importar = importar_produtos if tipo == 'produtos' else importar_clientes
+    caminho = filedialog.askopenfilename(
+        title=f"Importar {tipo}",
+        filetypes=[("Planilhas", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")]
+    )
+    if not caminho:
+        return
+
+    def concluir(janela, resultado: ResultadoImportacao):
+        janela.set_status(resultado.resumo())
+        if resultado.erros:
+            erros_texto = tk.Text(janela.body, height=12, width=70, font=("Arial", 10))
+            erros_texto.pack(fill='both', expand=True, pady=10)
+            for linha, mensagem in resultado.erros[:500]:
+                erros_texto.insert('end', f"Linha {linha}: {mensagem}\n")
+            if len(resultado.erros) > 500:
+                erros_texto.insert('end', f"... e mais {len(resultado.erros) - 500} erro(s)\n")
+
+            def salvar_erros():
+                destino = filedialog.asksaveasfilename(defaultextension='.csv', filetypes=[("CSV", "*.csv")])
+                if destino:
+                    exportar_erros(resultado, destino)
+            ttk.Button(janela.buttons, text="Salvar erros", command=salvar_erros).pack(side='left', padx=5)
+        if ao_concluir:
+            ao_concluir()
+
+    ProgressDialog(
+        f"Importar {tipo}",
+        f"Importando {os.path.basename(caminho)}...",
+        lambda progresso, cancelar: importar(caminho, progresso, cancelar),
+        on_done=concluir
+    )
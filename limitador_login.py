@@ -0,0 +1,209 @@
+"""
+Login throttling for Integre+ application.
+Failed logins are counted in memory, in a sliding window per username and
+terminal. Once a key is over the limit, further attempts are refused before
+bcrypt runs and before anything is written. The failure counters in
+usuarios.tentativas_login are written in one batched transaction every few
+seconds by a timer armed while failures are pending, so a brute-force burst
+costs the database one write per flush interval instead of one per attempt.
+"""
+import atexit
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config import get_config
+from database import DatabaseError, transaction
+import queries
+
+logger = logging.getLogger(__name__)
+
+Chave = Tuple[str, str]
+
+_terminal: Optional[str] = None
+
+def terminal_local() -> str:
+    """Name of this terminal (the host name), used when callers give none"""
+    global _terminal
+    if _terminal is None:
+        _terminal = socket.gethostname() or 'local'
+    return _terminal
+
+class LimitadorLogin:
+    """
+    Sliding-window limiter: at most 'tentativas' failures per (username,
+    terminal) in the last 'janela' seconds. Thread-safe. Pending failure
+    counts are flushed 'intervalo_flush' seconds (by 'relogio') after the
+    previous flush; call encerrar() to stop the timer and write them.
+    """
+    def __init__(self, tentativas: Optional[int] = None, janela: Optional[float] = None,
+                 intervalo_flush: Optional[float] = None, max_chaves: Optional[int] = None,
+                 relogio=time.monotonic):
+        config = get_config()['autenticacao']
+        self.tentativas = tentativas or config['limite_tentativas']
+        self.janela = janela or config['janela_segundos']
+        self.intervalo_flush = intervalo_flush if intervalo_flush is not None else config['flush_segundos']
+        self.max_chaves = max_chaves or config['limite_chaves']
+        self._relogio = relogio
+        self._falhas: Dict[Chave, Deque[float]] = {}
+        self._pendentes: Dict[str, int] = {}
+        self._ultimo_flush = relogio()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._encerrado = False
+        self.recusadas = 0
+
+    @staticmethod
+    def _chave(username: str, terminal: Optional[str]) -> Chave:
+        return (username.strip().lower(), terminal or terminal_local())
+
+    def _janela_atual(self, chave: Chave, agora: float) -> Optional[Deque[float]]:
+        falhas = self._falhas.get(chave)
+        if falhas is not None:
+            limite = agora - self.janela
+            while falhas and falhas[0] <= limite:
+                falhas.popleft()
+            if not falhas:
+                del self._falhas[chave]
+                return None
+        return falhas
+
+    def tempo_restante(self, username: str, terminal: Optional[str] = None) -> float:
+        """Seconds until 'username' may try again from 'terminal' (0 if allowed now)"""
+        agora = self._relogio()
+        with self._lock:
+            falhas = self._janela_atual(self._chave(username, terminal), agora)
+            if falhas is None or len(falhas) < self.tentativas:
+                return 0.0
+            return falhas[-self.tentativas] + self.janela - agora
+
+    def permitido(self, username: str, terminal: Optional[str] = None) -> bool:
+        """False if the key is over the limit; counts the refusal"""
+        if self.tempo_restante(username, terminal) > 0:
+            with self._lock:
+                self.recusadas += 1
+            return False
+        return True
+
+    def registrar_falha(self, username: str, terminal: Optional[str] = None, persistir: bool = True) -> int:
+        """
+        Count a failed attempt. With 'persistir', tentativas_login is bumped
+        on the next flush (pass False when the username does not exist).
+
+        Returns:
+            Failures of 'username' now waiting for the flush, this one included
+        """
+        agora = self._relogio()
+        chave = self._chave(username, terminal)
+        with self._lock:
+            falhas = self._falhas.get(chave)
+            if falhas is None:
+                if len(self._falhas) >= self.max_chaves:
+                    self._podar(agora)
+                falhas = self._falhas[chave] = deque(maxlen=self.tentativas)
+            falhas.append(agora)
+            if len(falhas) == self.tentativas and falhas[0] > agora - self.janela:
+                # Logged once per lockout; the refusals that follow are only counted
+                logger.warning(f"Login suspenso por excesso de tentativas: {chave[0]} em {chave[1]}")
+            pendentes = self._pendentes.get(username, 0)
+            if persistir:
+                pendentes = self._pendentes[username] = pendentes + 1
+                self._agendar(agora)
+            cheio = len(self._pendentes) >= self.max_chaves
+        if cheio:
+            self.descarregar()
+        return pendentes
+
+    def registrar_sucesso(self, username: str, terminal: Optional[str] = None):
+        """Clear the window and pending failures (the login resets the counter itself)"""
+        with self._lock:
+            self._falhas.pop(self._chave(username, terminal), None)
+            self._pendentes.pop(username, None)
+
+    def falhas_pendentes(self, username: str) -> int:
+        """Failures counted for 'username' but not yet written"""
+        with self._lock:
+            return self._pendentes.get(username, 0)
+
+    def descartar_pendentes(self, username: str) -> int:
+        """Take the pending failures of 'username' (the caller writes them)"""
+        with self._lock:
+            return self._pendentes.pop(username, 0)
+
+    def limpar(self):
+        """Forget every window and pending failure without writing them"""
+        with self._lock:
+            self._falhas.clear()
+            self._pendentes.clear()
+            self.recusadas = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _podar(self, agora: float):
+        """Drop expired windows; if still full, the oldest ones (lock held)"""
+        for chave in list(self._falhas):
+            self._janela_atual(chave, agora)
+        excesso = len(self._falhas) - self.max_chaves + 1
+        if excesso > 0:
+            antigas = sorted(self._falhas, key=lambda c: self._falhas[c][-1])[:excesso]
+            for chave in antigas:
+                del self._falhas[chave]
+
+    def _agendar(self, agora: float):
+        """Arm the flush timer for when the interval is due (lock held)"""
+        if self._timer is not None or not self._pendentes or self._encerrado:
+            return
+        espera = max(self._ultimo_flush + self.intervalo_flush - agora, 0.01)
+        self._timer = threading.Timer(espera, self._flush_periodico)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_periodico(self):
+        with self._lock:
+            self._timer = None
+            vencido = self._relogio() - self._ultimo_flush >= self.intervalo_flush
+        try:
+            if vencido:
+                self.descarregar()
+        finally:
+            # Failures that arrived meanwhile, or that the flush put back
+            # after a database error, wait for the next interval
+            with self._lock:
+                self._agendar(self._relogio())
+
+    def encerrar(self):
+        """Stop the flush timer and write what is pending (at exit)"""
+        with self._lock:
+            self._encerrado = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.descarregar()
+
+    def descarregar(self):
+        """Write pending failure counts in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                pendentes, self._pendentes = self._pendentes, {}
+                self._ultimo_flush = self._relogio()
+                self._podar(self._ultimo_flush)
+            if not pendentes:
+                return
+            try:
+                with transaction() as conn:
+                    conn.executemany(queries.USUARIOS_SOMAR_TENTATIVAS,
+                                     [(quantidade, username) for username, quantidade in pendentes.items()])
+            except DatabaseError as e:
+                logger.error(f"Falha ao gravar tentativas de login: {e}")
+                with self._lock:
+                    for username, quantidade in pendentes.items():
+                        self._pendentes[username] = self._pendentes.get(username, 0) + quantidade
+
+limitador = LimitadorLogin()
+
+atexit.register(limitador.encerrar)
@@ -7,10 +7,15 @@ from tkinter import ttk, messagebox
 import logging
 import json
 import os
-import bcrypt
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 
-from database import execute_query
+from autenticacao import autenticar
+from config import get_config
+from logs import definir_usuario
+from sessao import sessoes
 from theme_manager import theme_manager
 from utils import (
     ModernCard, ModernEntry, AnimatedButton, 
@@ -19,59 +24,39 @@ from utils import (
 
 logger = logging.getLogger(__name__)
 
-def verificar_credenciais(username: str, password: str) -> dict:
-    """Verify user credentials and return user data"""
+# Interval between checks for a finished login, in milliseconds
+POLL_LOGIN_MS = 50
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def verificar_credenciais(username: str, password: str, terminal: Optional[str] = None) -> dict:
+    """Verify user credentials and return user data (None if refused), see autenticacao"""
     try:
-        # First get the stored hash for the username
-        get_hash_query = """
-            SELECT id, username, email, permissao, ultimo_login, senha, bloqueado
-            FROM usuarios 
-            WHERE username = ? AND bloqueado = 0
-        """
-        result = execute_query(get_hash_query, (username,), fetch=True)
-        
-        if not result:
-            # Increment failed attempts
-            increment_query = """
-                UPDATE usuarios 
-                SET tentativas_login = tentativas_login + 1 
-                WHERE username = ?
-            """
-            execute_query(increment_query, (username,))
-            return None
-            
-        user_data = result[0]
-        stored_hash = user_data['senha']
-        
-        # Verify the password
-        if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
-            # Update last login
-            update_query = """
-                UPDATE usuarios 
-                SET ultimo_login = ?, tentativas_login = 0 
-                WHERE id = ?
-            """
-            execute_query(update_query, (datetime.now().isoformat(), user_data['id']))
-            return user_data
-        else:
-            # Increment failed attempts
-            increment_query = """
-                UPDATE usuarios 
-                SET tentativas_login = tentativas_login + 1 
-                WHERE username = ?
-            """
-            execute_query(increment_query, (username,))
-            return None
-            
+        return autenticar(username, password, terminal).usuario
     except Exception as e:
         logger.error(f"Error verifying credentials: {e}")
         return None
 
+def verificar_credenciais_async(username: str, password: str, terminal: Optional[str] = None) -> Future:
+    """
+    Run verificar_credenciais on a login worker thread. bcrypt takes
+    hundreds of milliseconds by design, so the Tk thread only polls the
+    future and keeps animating meanwhile.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_config()['autenticacao']['trabalhadores'],
+                                           thread_name_prefix='login')
+    return _executor.submit(verificar_credenciais, username, password, terminal)
+
 class ModernLoginWindow:
     def __init__(self):
         self.root = tk.Tk()
         self.current_theme = theme_manager.current_theme
         self.colors = theme_manager.get_colors()
+        self._login_futuro: Optional[Future] = None
         
         self.setup_window()
         self.create_interface()
@@ -478,21 +463,29 @@ class ModernLoginWindow:
             self.show_notification("Por favor, preencha todos os campos", 'warning')
             return
         
+        if self._login_futuro is not None and not self._login_futuro.done():
+            return  # a verification is already running
+        
         # Show loading
         self.login_btn.configure(text="🔄 Verificando...", state='disabled')
         self.loading_spinner.start()
         
-        # Cancel any previous pending login callbacks
-        if hasattr(self, '_login_after_id'):
-            self.root.after_cancel(self._login_after_id)
-        
-        # Simulate async login (in real app, use threading)
-        self._login_after_id = self.root.after(1000, lambda: self._process_login(username, password))
+        self._login_futuro = verificar_credenciais_async(username, password)
+        self.root.after(POLL_LOGIN_MS, self._aguardar_login, self._login_futuro, username)
+    
+    def _aguardar_login(self, futuro: Future, username: str):
+        """Poll the login worker from the Tk event loop"""
+        if futuro is not self._login_futuro or not self.root.winfo_exists():
+            return
+        if futuro.done():
+            self._process_login(username, futuro)
+        else:
+            self.root.after(POLL_LOGIN_MS, self._aguardar_login, futuro, username)
     
-    def _process_login(self, username, password):
-        """Process login credentials"""
+    def _process_login(self, username: str, futuro: Future):
+        """Process the result of a finished credential check"""
         try:
-            user_data = verificar_credenciais(username, password)
+            user_data = futuro.result()
             
             if user_data:
                 logger.info(f"Successful login for user: {username}")
@@ -537,8 +530,8 @@ class ModernLoginWindow:
             
             # Create main application
             app = IntegrePlusGUI()
-            app.usuario_logado = user_data['username']
-            app.permissao_usuario = user_data.get('permissao', 'Funcionario')
+            app.sessao = sessoes.abrir(user_data)
+            definir_usuario(app.usuario_logado)
             
             # Start main GUI
             app.main_gui()
@@ -661,9 +654,8 @@ class ModernLoginWindow:
 def main():
     """Main entry point for login"""
     try:
-        # Initialize database
-        from database import create_tables
-        create_tables()
+        from bootstrap import inicializar_aplicacao
+        inicializar_aplicacao()
         
         # Create and run login window
         login = ModernLoginWindow()
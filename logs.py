@@ -0,0 +1,140 @@
+"""
+Logging setup for Integre+ application.
+Records are put on an in-memory queue by the calling thread and written by a
+single listener thread, so a sale or a search never waits on the disk. The
+log file holds one JSON object per line (module, user, latency_ms, query
+fingerprint, ...) and rotates by size and by day.
+"""
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Fields copied from 'extra' into the JSON record when present
+CAMPOS_EXTRAS = ('usuario', 'latency_ms', 'query', 'query_fingerprint', 'terminal', 'venda_id', 'produto_id')
+
+_usuario: Optional[str] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def definir_usuario(usuario: Optional[str]):
+    """User attached to every record from now on (None after logout)"""
+    global _usuario
+    _usuario = usuario
+
+# ================= QUERY FINGERPRINTS =================
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACOS = re.compile(r"\s+")
+
+def normalizar_query(sql: str) -> str:
+    """SQL with literals replaced by '?' and whitespace collapsed"""
+    texto = _LITERAIS.sub('?', sql)
+    texto = _LISTAS.sub('(?+)', texto)
+    return _ESPACOS.sub(' ', texto).strip()
+
+def fingerprint_query(sql: str) -> str:
+    """Short stable id shared by every execution of the same statement shape"""
+    return hashlib.blake2b(normalizar_query(sql).encode('utf-8'), digest_size=6).hexdigest()
+
+# ================= FORMATTERS AND HANDLERS =================
+
+class FormatadorJSON(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'module': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for campo in CAMPOS_EXTRAS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+class ArquivoRotativo(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also starts a new file when the day changes"""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8', delay=True):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=delay)
+        self._dia = self._dia_do_arquivo()
+
+    def _dia_do_arquivo(self) -> str:
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(self.baseFilename)).strftime('%Y-%m-%d')
+        except OSError:
+            return datetime.now().strftime('%Y-%m-%d')
+
+    def shouldRollover(self, record) -> bool:
+        dia = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d')
+        if dia != self._dia and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._dia = datetime.now().strftime('%Y-%m-%d')
+
+class FilaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback apart from the message (so the
+    JSON file gets it as 'exc') and stamps the current user.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, 'usuario', None) is None and _usuario is not None:
+            record.usuario = _usuario
+        return record
+
+# ================= SETUP =================
+
+def configurar(config: Dict[str, Any]) -> logging.handlers.QueueListener:
+    """
+    Apply a dictConfig-style configuration, then move the root handlers
+    behind a queue: loggers only enqueue, one thread does all the I/O.
+    Per-module levels come from config['loggers'].
+    """
+    global _listener
+    parar()
+    logging.config.dictConfig(config)
+    raiz = logging.getLogger()
+    handlers = list(raiz.handlers)
+    fila: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in handlers:
+        raiz.removeHandler(handler)
+    raiz.addHandler(FilaHandler(fila))
+    _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def parar():
+    """Flush pending records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(parar)
@@ -0,0 +1,152 @@
+"""
+Lot management for Integre+ application.
+Stock of a product may be split into lots with their own expiry date. Sales
+consume lots first-expiring-first-out (FEFO) from a per-product min-heap kept
+in memory, so an allocation touches O(log lots) entries instead of sorting
+or scanning the product's lots on every sale.
+"""
+import heapq
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from alertas_validade import motor_validade
+from database import get_connection, transaction, DatabaseError
+from datas import agora, normalizar_data
+from estoque import registrar_movimento
+import queries
+
+logger = logging.getLogger(__name__)
+
+# Heap entry: (validade, lote_id, quantidade). Tuples order by expiry, then
+# by lot id, which is the FEFO order.
+Entrada = Tuple[str, int, int]
+
+class LoteError(Exception):
+    """Exception raised for invalid lot operations"""
+    pass
+
+class AlocadorFEFO:
+    """
+    In-memory FEFO index of available lots, one heap per product.
+    Heaps are loaded lazily from idx_lotes_produto_validade. Every decrement
+    is a conditional UPDATE, so a heap made stale by another process is
+    detected by rowcount, reloaded inside the same transaction and retried.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[int, List[Entrada]] = {}
+        self._lock = threading.Lock()
+
+    def _carregar(self, conn: sqlite3.Connection, produto_id: int) -> List[Entrada]:
+        heap = [
+            (row['validade'], row['id'], row['quantidade'])
+            for row in conn.execute(queries.LOTES_DISPONIVEIS_PRODUTO, (produto_id,))
+        ]
+        # Rows arrive in (validade, id) order, which is already a valid heap
+        self._heaps[produto_id] = heap
+        return heap
+
+    def descartar(self, produto_id: Optional[int] = None):
+        """Forget the cached heap of a product (or of all products)"""
+        with self._lock:
+            if produto_id is None:
+                self._heaps.clear()
+            else:
+                self._heaps.pop(produto_id, None)
+
+    def alocar(self, conn: sqlite3.Connection, produto_id: int, quantidade: int) -> List[Tuple[int, int]]:
+        """
+        Take up to 'quantidade' units from the product's lots, earliest expiry
+        first, decrementing them on 'conn' (which must be in a transaction).
+
+        Returns:
+            List of (lote_id, quantidade) taken. The sum may be lower than
+            requested when part of the product's stock is not tracked by lots.
+            If the transaction is rolled back afterwards, call descartar().
+        """
+        with self._lock:
+            heap = self._heaps.get(produto_id)
+            if heap is None:
+                heap = self._carregar(conn, produto_id)
+            alocacao = []
+            restante = quantidade
+            recarregado = False
+            while restante and heap:
+                validade, lote_id, disponivel = heap[0]
+                retirar = min(restante, disponivel)
+                cursor = conn.execute(queries.LOTES_BAIXAR, (retirar, lote_id, retirar))
+                if cursor.rowcount == 0:
+                    # Another process sold from this lot. The transaction holds
+                    # the write lock, so one reload gives a consistent view.
+                    if recarregado:
+                        raise LoteError(f"Lotes do produto {produto_id} inconsistentes")
+                    logger.info(f"Lotes do produto {produto_id} mudaram fora deste processo; recarregando")
+                    heap = self._carregar(conn, produto_id)
+                    recarregado = True
+                    continue
+                if retirar == disponivel:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (validade, lote_id, disponivel - retirar))
+                alocacao.append((lote_id, retirar))
+                restante -= retirar
+            return alocacao
+
+    def adicionar(self, produto_id: int, entrada: Entrada):
+        """Insert a new lot into a loaded heap (no-op if not loaded yet)"""
+        with self._lock:
+            heap = self._heaps.get(produto_id)
+            if heap is not None:
+                heapq.heappush(heap, entrada)
+
+# Global allocator instance
+alocador_fefo = AlocadorFEFO()
+
+def cadastrar_lote(produto_id: int, lote: str, validade: str, quantidade: int) -> int:
+    """
+    Receive a lot: adds its units to the product stock and sets the product's
+    validade to the earliest expiry among lots with stock.
+
+    Returns:
+        The new lot id
+    """
+    if not lote or quantidade <= 0:
+        raise LoteError("Dados inválidos para cadastro de lote.")
+    validade = normalizar_data(validade)
+    momento = agora()
+    try:
+        with transaction() as conn:
+            cursor = conn.execute(queries.LOTES_INSERIR, (produto_id, lote, validade, quantidade, momento))
+            lote_id = cursor.lastrowid
+            conn.execute(queries.PRODUTOS_REPOR_ESTOQUE, (quantidade, momento, produto_id))
+            registrar_movimento(conn, produto_id, 'entrada', quantidade, referencia_id=lote_id,
+                                observacao=f"Lote {lote}", data=momento)
+            conn.execute(queries.PRODUTOS_VALIDADE_DOS_LOTES, (produto_id,))
+    except DatabaseError as e:
+        raise LoteError(f"Erro ao cadastrar lote: {e}")
+    alocador_fefo.adicionar(produto_id, (validade, lote_id, quantidade))
+    motor_validade.produto_alterado(produto_id)
+    return lote_id
+
+def ajustar_lotes(conn: sqlite3.Connection, produto_id: int, delta: int, validade: str, momento: str):
+    """
+    Mirror a stock adjustment of a product that has lots on 'conn' (in a
+    transaction): a decrease is taken from the lots FEFO-first, like a sale;
+    an increase becomes an adjustment lot expiring on 'validade'. Products
+    without lots keep using only the counter. Call alocador_fefo.descartar()
+    afterwards.
+    """
+    if not delta or conn.execute(queries.LOTES_EXISTE_PRODUTO, (produto_id,)).fetchone() is None:
+        return
+    if delta < 0:
+        alocador_fefo.alocar(conn, produto_id, -delta)
+    else:
+        conn.execute(queries.LOTES_AJUSTE, (produto_id, f"Ajuste {momento}", validade, delta, momento))
+    conn.execute(queries.PRODUTOS_VALIDADE_DOS_LOTES, (produto_id,))
+
+def listar_lotes(produto_id: int) -> List[Dict]:
+    """Lots with stock for a product, in FEFO order"""
+    with get_connection() as conn:
+        return [dict(row) for row in conn.execute(queries.LOTES_DISPONIVEIS_PRODUTO, (produto_id,))]
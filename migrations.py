@@ -0,0 +1,556 @@
+"""
+Schema migration engine for Integre+ application.
+Applies ordered, idempotent schema steps and records them in schema_version.
+Large tables are rebuilt online: rows are copied in short batches while
+triggers mirror concurrent writes, and only the final swap takes a lock.
+"""
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config import get_config
+from database import get_connection, DatabaseError, RESUMOS_DDL
+from datas import SQL_NORMALIZAR_DATA, SQL_NORMALIZAR_DATA_HORA
+import queries
+
+logger = logging.getLogger(__name__)
+
+class MigrationError(DatabaseError):
+    """Exception raised when a migration step fails"""
+    pass
+
+class Migration:
+    """A single schema step identified by a monotonically increasing version"""
+    def __init__(self, version: int, descricao: str, aplicar: Callable[[sqlite3.Connection], None]):
+        self.version = version
+        self.descricao = descricao
+        self.aplicar = aplicar
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.descricao!r})"
+
+MIGRATIONS: List[Migration] = []
+
+def migracao(version: int, descricao: str):
+    """Register a function as the migration step for a schema version"""
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Versão de migração duplicada: {version}")
+        MIGRATIONS.append(Migration(version, descricao, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+# ================= HELPERS =================
+
+def colunas_da_tabela(conn: sqlite3.Connection, tabela: str) -> List[str]:
+    """Return the column names of a table (empty if it does not exist)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")]
+
+def tabela_existe(conn: sqlite3.Connection, tabela: str) -> bool:
+    """Check whether a table exists"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+    ).fetchone()
+    return row is not None
+
+def adicionar_coluna(conn: sqlite3.Connection, tabela: str, coluna: str, definicao: str) -> bool:
+    """Add a column if it is missing. Returns True when the column was added."""
+    if coluna in colunas_da_tabela(conn, tabela):
+        return False
+    conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+    logger.info(f"Coluna adicionada: {tabela}.{coluna}")
+    return True
+
+def rebuild_table(conn: sqlite3.Connection, tabela: str, ddl: str,
+                  expressoes: Dict[str, str], indices: Optional[List[str]] = None,
+                  batch_size: Optional[int] = None, pausa: float = 0.0) -> int:
+    """
+    Rebuild a table with a new definition without holding a long lock.
+
+    Args:
+        conn: Connection in autocommit-friendly state (no open transaction)
+        tabela: Table being rebuilt
+        ddl: CREATE TABLE statement using {tabela} as the table name placeholder
+        expressoes: Destination column -> SQL expression over the old columns
+        indices: CREATE INDEX statements for the new table (final names)
+        batch_size: Rows copied per transaction
+        pausa: Seconds to sleep between batches to let other writers in
+
+    Returns:
+        Number of rows copied by the batch loop
+    """
+    batch_size = batch_size or get_config()['db'].get('migration_batch_size', 5000)
+    novo = f"{tabela}__novo"
+    colunas = ', '.join(expressoes)
+    selecao = ', '.join(expressoes.values())
+    if conn.in_transaction:
+        conn.commit()
+    espelho = f"INSERT OR REPLACE INTO {novo} ({colunas}) SELECT {selecao} FROM {tabela} WHERE rowid = NEW.rowid"
+
+    conn.execute(f"DROP TABLE IF EXISTS {novo}")
+    conn.execute(ddl.format(tabela=novo))
+
+    # Indices are moved up front so each batch maintains them incrementally
+    # instead of a full rebuild under the final lock.
+    for indice in indices or []:
+        nome = indice.split(' ON ')[0].split()[-1]
+        conn.execute(f"DROP INDEX IF EXISTS {nome}")
+        conn.execute(indice.format(tabela=novo))
+
+    # Mirror concurrent writes into the new table while the copy runs
+    # (persistent triggers, so writes from other connections are captured too)
+    conn.execute(f"CREATE TRIGGER {novo}_ins AFTER INSERT ON {tabela} BEGIN {espelho}; END")
+    conn.execute(f"CREATE TRIGGER {novo}_upd AFTER UPDATE ON {tabela} BEGIN {espelho}; END")
+    conn.execute(f"CREATE TRIGGER {novo}_del AFTER DELETE ON {tabela} "
+                 f"BEGIN DELETE FROM {novo} WHERE rowid = OLD.rowid; END")
+    conn.commit()
+
+    limite = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela}").fetchone()[0]
+    ultimo = 0
+    copiadas = 0
+    try:
+        while ultimo < limite:
+            conn.execute("BEGIN IMMEDIATE")
+            fim = conn.execute(
+                f"SELECT MAX(rowid) FROM (SELECT rowid FROM {tabela} WHERE rowid > ? AND rowid <= ? "
+                f"ORDER BY rowid LIMIT ?)", (ultimo, limite, batch_size)
+            ).fetchone()[0]
+            if fim is None:
+                conn.commit()
+                break
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {novo} ({colunas}) SELECT {selecao} FROM {tabela} "
+                f"WHERE rowid > ? AND rowid <= ?", (ultimo, fim)
+            )
+            conn.commit()
+            copiadas += cursor.rowcount
+            ultimo = fim
+            if pausa:
+                time.sleep(pausa)
+
+        # Short exclusive swap
+        conn.execute("BEGIN IMMEDIATE")
+        for sufixo in ('ins', 'upd', 'del'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {novo}_{sufixo}")
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        conn.execute(f"DROP TABLE {tabela}")
+        conn.execute(f"ALTER TABLE {novo} RENAME TO {tabela}")
+        conn.commit()
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.rollback()
+        for sufixo in ('ins', 'upd', 'del'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {novo}_{sufixo}")
+        conn.execute(f"DROP TABLE IF EXISTS {novo}")
+        conn.commit()
+        raise MigrationError(f"Falha ao reconstruir {tabela}: {e}")
+
+    logger.info(f"Tabela {tabela} reconstruída ({copiadas} linhas copiadas)")
+    return copiadas
+
+def atualizar_em_lotes(conn: sqlite3.Connection, tabela: str, atribuicoes: str,
+                       condicao: str = '1', batch_size: Optional[int] = None) -> int:
+    """
+    Run 'UPDATE tabela SET atribuicoes WHERE condicao' in rowid-range batches,
+    committing between batches so writers are never blocked for long.
+    Returns the number of rows changed.
+    """
+    batch_size = batch_size or get_config()['db'].get('migration_batch_size', 5000)
+    if conn.in_transaction:
+        conn.commit()
+    limite = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela}").fetchone()[0]
+    alteradas = 0
+    for inicio in range(0, limite, batch_size):
+        cursor = conn.execute(
+            f"UPDATE {tabela} SET {atribuicoes} WHERE rowid > ? AND rowid <= ? AND ({condicao})",
+            (inicio, inicio + batch_size)
+        )
+        conn.commit()
+        alteradas += cursor.rowcount
+    return alteradas
+
+# ================= VERSION TRACKING =================
+
+def _garantir_tabela_versao(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+def get_schema_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    if conn is None:
+        with get_connection() as conn:
+            return get_schema_version(conn)
+    if not tabela_existe(conn, 'schema_version'):
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def run_migrations(target: Optional[int] = None) -> int:
+    """
+    Apply pending migrations in order.
+
+    Args:
+        target: Stop after this version (defaults to the latest)
+
+    Returns:
+        Number of migrations applied
+    """
+    aplicadas = 0
+    with get_connection() as conn:
+        _garantir_tabela_versao(conn)
+        atual = get_schema_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= atual:
+                continue
+            if target is not None and migration.version > target:
+                break
+            logger.info(f"Aplicando migração {migration.version}: {migration.descricao}")
+            try:
+                migration.aplicar(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, descricao, aplicada_em) VALUES (?, ?, ?)",
+                    (migration.version, migration.descricao, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                logger.error(f"Migração {migration.version} falhou: {e}")
+                raise MigrationError(f"Migração {migration.version} falhou: {e}")
+            aplicadas += 1
+    return aplicadas
+
+# ================= MIGRATIONS =================
+
+@migracao(1, "Colunas de produtos (categoria, código de barras, fornecedor)")
+def _m001_colunas_produtos(conn):
+    adicionar_coluna(conn, 'produtos', 'categoria', 'TEXT')
+    if adicionar_coluna(conn, 'produtos', 'codigo_barras', 'TEXT'):
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_codigo_barras ON produtos(codigo_barras)")
+    adicionar_coluna(conn, 'produtos', 'fornecedor_id', 'INTEGER REFERENCES fornecedores(id)')
+    adicionar_coluna(conn, 'produtos', 'imagem', 'BLOB')
+    for coluna in ('data_cadastro', 'ultima_atualizacao'):
+        if adicionar_coluna(conn, 'produtos', coluna, 'TEXT'):
+            conn.execute(f"UPDATE produtos SET {coluna} = datetime('now', 'localtime') WHERE {coluna} IS NULL")
+
+@migracao(2, "Colunas de vendas (preço unitário, total, cliente, pagamento)")
+def _m002_colunas_vendas(conn):
+    existentes = colunas_da_tabela(conn, 'vendas')
+    # Schemas created after migration 6 already hold the centavos columns
+    if 'total_centavos' not in existentes:
+        adicionar_coluna(conn, 'vendas', 'preco_unitario', 'REAL NOT NULL DEFAULT 0')
+        adicionar_coluna(conn, 'vendas', 'total', 'REAL NOT NULL DEFAULT 0')
+    adicionar_coluna(conn, 'vendas', 'cliente_id', 'INTEGER')
+    adicionar_coluna(conn, 'vendas', 'forma_pagamento', "TEXT NOT NULL DEFAULT 'Dinheiro'")
+
+@migracao(3, "Colunas de clientes (contato e datas)")
+def _m003_colunas_clientes(conn):
+    for coluna in ('email', 'telefone', 'endereco'):
+        adicionar_coluna(conn, 'clientes', coluna, 'TEXT')
+    for coluna in ('data_cadastro', 'ultima_atualizacao'):
+        if adicionar_coluna(conn, 'clientes', coluna, 'TEXT'):
+            conn.execute(f"UPDATE clientes SET {coluna} = datetime('now', 'localtime') WHERE {coluna} IS NULL")
+
+USUARIOS_DDL = '''
+    CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        senha TEXT NOT NULL,
+        email TEXT UNIQUE,
+        permissao TEXT NOT NULL DEFAULT 'Funcionario',
+        ultimo_login TEXT,
+        tentativas_login INTEGER DEFAULT 0,
+        bloqueado INTEGER DEFAULT 0,
+        token_reset TEXT,
+        expiracao_token TEXT,
+        data_cadastro TEXT NOT NULL,
+        ultima_atualizacao TEXT NOT NULL
+    )
+'''
+
+@migracao(4, "Schema canônico de usuarios (data_criacao -> data_cadastro)")
+def _m004_usuarios_canonico(conn):
+    existentes = set(colunas_da_tabela(conn, 'usuarios'))
+    canonicas = {'data_cadastro', 'ultima_atualizacao', 'token_reset', 'expiracao_token'}
+    if canonicas <= existentes:
+        return
+
+    def coluna(nome, padrao='NULL'):
+        return nome if nome in existentes else padrao
+
+    data = 'COALESCE({}, datetime(\'now\', \'localtime\'))'.format(
+        ', '.join(c for c in ('data_cadastro', 'data_criacao') if c in existentes) or 'NULL'
+    )
+    expressoes = {
+        'id': 'id',
+        'username': 'username',
+        'senha': 'senha',
+        'email': coluna('email'),
+        'permissao': f"COALESCE({coluna('permissao')}, 'Funcionario')",
+        'ultimo_login': coluna('ultimo_login'),
+        'tentativas_login': f"COALESCE({coluna('tentativas_login')}, 0)",
+        'bloqueado': f"COALESCE({coluna('bloqueado')}, 0)",
+        'token_reset': coluna('token_reset'),
+        'expiracao_token': coluna('expiracao_token'),
+        'data_cadastro': data,
+        'ultima_atualizacao': f"COALESCE({coluna('ultima_atualizacao')}, {data})",
+    }
+    rebuild_table(conn, 'usuarios', USUARIOS_DDL, expressoes)
+
+# Columns holding timestamps, by table. Dates ('YYYY-MM-DD') are listed apart.
+COLUNAS_DATA_HORA = {
+    'vendas': ['data'],
+    'produtos': ['data_cadastro', 'ultima_atualizacao'],
+    'clientes': ['data_cadastro', 'ultima_atualizacao'],
+    'usuarios': ['ultimo_login', 'expiracao_token', 'data_cadastro', 'ultima_atualizacao'],
+    'historico_precos': ['data'],
+    'fornecedores': ['data_cadastro'],
+    'audit_log': ['data'],
+}
+COLUNAS_DATA = {
+    'produtos': ['validade'],
+}
+
+@migracao(5, "Datas em ISO-8601 estrito e índice de validade")
+def _m005_datas_iso(conn):
+    canonico_data_hora = "GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'"
+    canonico_data = "GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+    for colunas_por_tabela, expressao, canonico in (
+        (COLUNAS_DATA_HORA, SQL_NORMALIZAR_DATA_HORA, canonico_data_hora),
+        (COLUNAS_DATA, SQL_NORMALIZAR_DATA, canonico_data),
+    ):
+        for tabela, colunas in colunas_por_tabela.items():
+            existentes = colunas_da_tabela(conn, tabela)
+            for col in colunas:
+                if col not in existentes:
+                    continue
+                alteradas = atualizar_em_lotes(
+                    conn, tabela,
+                    f"{col} = {expressao.format(col=col)}",
+                    f"{col} IS NOT NULL AND NOT ({col} {canonico})"
+                )
+                if alteradas:
+                    logger.info(f"{alteradas} valores normalizados em {tabela}.{col}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_validade ON produtos(validade)")
+
+PRODUTOS_DDL = '''
+    CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        quantidade INTEGER NOT NULL CHECK (quantidade >= 0),
+        preco_centavos INTEGER NOT NULL CHECK (preco_centavos >= 0),
+        validade TEXT NOT NULL,
+        categoria TEXT,
+        codigo_barras TEXT UNIQUE,
+        fornecedor_id INTEGER,
+        imagem BLOB,
+        data_cadastro TEXT NOT NULL,
+        ultima_atualizacao TEXT NOT NULL,
+        FOREIGN KEY (fornecedor_id) REFERENCES fornecedores(id)
+            ON DELETE SET NULL
+            ON UPDATE CASCADE
+    )
+'''
+
+VENDAS_DDL = '''
+    CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        produto_id INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+        preco_unitario_centavos INTEGER NOT NULL CHECK (preco_unitario_centavos >= 0),
+        total_centavos INTEGER NOT NULL CHECK (total_centavos >= 0),
+        data TEXT NOT NULL,
+        cliente_id INTEGER,
+        forma_pagamento TEXT NOT NULL,
+        FOREIGN KEY (produto_id) REFERENCES produtos(id)
+            ON DELETE RESTRICT
+            ON UPDATE CASCADE,
+        FOREIGN KEY (cliente_id) REFERENCES usuarios(id)
+            ON DELETE SET NULL
+            ON UPDATE CASCADE
+    )
+'''
+
+HISTORICO_PRECOS_DDL = '''
+    CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        produto_id INTEGER NOT NULL,
+        preco_centavos INTEGER NOT NULL CHECK (preco_centavos >= 0),
+        data TEXT NOT NULL,
+        FOREIGN KEY (produto_id) REFERENCES produtos(id)
+            ON DELETE CASCADE
+            ON UPDATE CASCADE
+    )
+'''
+
+def _centavos(coluna: str) -> str:
+    """SQL converting a REAL reais column to integer centavos (half away from zero)"""
+    return f"CAST(ROUND(COALESCE({coluna}, 0) * 100) AS INTEGER)"
+
+@migracao(6, "Valores monetários em centavos inteiros")
+def _m006_centavos(conn):
+    colunas = colunas_da_tabela(conn, 'produtos')
+    if 'preco' in colunas and 'preco_centavos' not in colunas:
+        rebuild_table(conn, 'produtos', PRODUTOS_DDL, {
+            'id': 'id', 'nome': 'nome', 'quantidade': 'quantidade',
+            'preco_centavos': _centavos('preco'), 'validade': 'validade',
+            'categoria': 'categoria', 'codigo_barras': 'codigo_barras',
+            'fornecedor_id': 'fornecedor_id', 'imagem': 'imagem',
+            'data_cadastro': 'data_cadastro', 'ultima_atualizacao': 'ultima_atualizacao',
+        }, indices=[
+            "CREATE INDEX idx_produtos_nome ON {tabela}(nome)",
+            "CREATE INDEX idx_produtos_categoria ON {tabela}(categoria)",
+            "CREATE INDEX idx_produtos_validade ON {tabela}(validade)",
+        ])
+
+    colunas = colunas_da_tabela(conn, 'vendas')
+    if 'total' in colunas and 'total_centavos' not in colunas:
+        rebuild_table(conn, 'vendas', VENDAS_DDL, {
+            'id': 'id', 'produto_id': 'produto_id', 'quantidade': 'quantidade',
+            'preco_unitario_centavos': _centavos('preco_unitario'),
+            'total_centavos': _centavos('total'),
+            'data': 'data', 'cliente_id': 'cliente_id', 'forma_pagamento': 'forma_pagamento',
+        }, indices=[
+            "CREATE INDEX idx_vendas_data ON {tabela}(data)",
+            "CREATE INDEX idx_vendas_cliente ON {tabela}(cliente_id)",
+        ])
+
+    colunas = colunas_da_tabela(conn, 'historico_precos')
+    if 'preco' in colunas and 'preco_centavos' not in colunas:
+        rebuild_table(conn, 'historico_precos', HISTORICO_PRECOS_DDL, {
+            'id': 'id', 'produto_id': 'produto_id',
+            'preco_centavos': _centavos('preco'), 'data': 'data',
+        }, indices=[
+            "CREATE INDEX idx_historico_precos_produto ON {tabela}(produto_id)",
+        ])
+
+@migracao(7, "Lotes por validade (FEFO)")
+def _m007_lotes(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS lotes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            lote TEXT NOT NULL,
+            validade TEXT NOT NULL,
+            quantidade INTEGER NOT NULL CHECK (quantidade >= 0),
+            data_cadastro TEXT NOT NULL,
+            UNIQUE (produto_id, lote),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_lotes (
+            venda_id INTEGER NOT NULL,
+            lote_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+            PRIMARY KEY (venda_id, lote_id),
+            FOREIGN KEY (venda_id) REFERENCES vendas(id)
+                ON DELETE CASCADE,
+            FOREIGN KEY (lote_id) REFERENCES lotes(id)
+                ON DELETE RESTRICT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lotes_produto_validade ON lotes(produto_id, validade)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_lotes_lote ON vendas_lotes(lote_id)")
+
+@migracao(8, "Razão de movimentos de estoque com snapshots")
+def _m008_movimentos_estoque(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS movimentos_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL CHECK (tipo IN ('venda', 'entrada', 'ajuste')),
+            quantidade INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            referencia_id INTEGER,
+            observacao TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots_estoque (
+            produto_id INTEGER NOT NULL,
+            ultimo_movimento_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (produto_id, ultimo_movimento_id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_produto ON movimentos_estoque(produto_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_produto_data ON movimentos_estoque(produto_id, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_produto_data ON snapshots_estoque(produto_id, data, ultimo_movimento_id)")
+    # Opening balance for stock that predates the ledger
+    cursor = conn.execute('''
+        INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, data, observacao)
+        SELECT id, 'ajuste', quantidade, ?, 'Saldo inicial' FROM produtos
+        WHERE quantidade != 0
+          AND NOT EXISTS (SELECT 1 FROM movimentos_estoque m WHERE m.produto_id = produtos.id)
+    ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+    if cursor.rowcount:
+        logger.info(f"Saldo inicial registrado para {cursor.rowcount} produtos")
+
+@migracao(9, "Histórico de preços com índice (produto_id, data)")
+def _m009_historico_precos(conn):
+    conn.execute("DROP INDEX IF EXISTS idx_historico_precos_produto")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_historico_precos_produto_data ON historico_precos(produto_id, data)")
+    # Baseline: the current price is taken as valid since the product was created
+    cursor = conn.execute('''
+        INSERT INTO historico_precos (produto_id, preco_centavos, data)
+        SELECT id, preco_centavos, COALESCE(data_cadastro, ?) FROM produtos
+        WHERE NOT EXISTS (SELECT 1 FROM historico_precos h WHERE h.produto_id = produtos.id)
+    ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+    if cursor.rowcount:
+        logger.info(f"Preço inicial registrado para {cursor.rowcount} produtos")
+
+@migracao(10, "Índices de ultima_atualizacao para exportação incremental")
+def _m010_indices_atualizacao(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_ultima_atualizacao ON produtos(ultima_atualizacao)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_ultima_atualizacao ON clientes(ultima_atualizacao)")
+
+@migracao(11, "Resumos por categoria (estoque e vendas diárias)")
+def _m011_resumos_categoria(conn):
+    # Also recreates the triggers dropped when migration 6 rebuilt produtos and vendas
+    for ddl in RESUMOS_DDL:
+        conn.execute(ddl)
+    conn.execute("DELETE FROM resumo_estoque_categoria")
+    conn.execute("DELETE FROM resumo_vendas_diario")
+    conn.execute(queries.RESUMO_ESTOQUE_RECALCULAR)
+    # Older files get vendas.categoria in migration 13, which rebuilds the sales rollup
+    if 'categoria' in colunas_da_tabela(conn, 'vendas'):
+        conn.execute(queries.RESUMO_VENDAS_RECALCULAR)
+
+@migracao(12, "Índice (produto_id, data) para séries de vendas por produto")
+def _m012_indice_vendas_produto(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_produto_data ON vendas(produto_id, data)")
+
+@migracao(13, "Categoria da venda como chave do resumo de vendas")
+def _m013_categoria_vendas(conn):
+    adicionar_coluna(conn, 'vendas', 'categoria', 'TEXT')
+    # The category at sale time was never recorded; the current one is the best guess
+    atualizar_em_lotes(conn, 'vendas',
+                       "categoria = COALESCE((SELECT categoria FROM produtos WHERE id = vendas.produto_id), '')",
+                       'categoria IS NULL')
+    for gatilho in ('trg_resumo_vendas_ins', 'trg_resumo_vendas_upd', 'trg_resumo_vendas_del'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {gatilho}")
+    for ddl in RESUMOS_DDL:
+        conn.execute(ddl)
+    conn.execute("DELETE FROM resumo_vendas_diario")
+    conn.execute(queries.RESUMO_VENDAS_RECALCULAR)
+
+if __name__ == "__main__":
+    from bootstrap import configurar_logging
+    from database import create_tables
+    configurar_logging()
+    create_tables()
+    total = run_migrations()
+    print(f"{total} migração(ões) aplicada(s). Versão atual: {get_schema_version()}")
@@ -0,0 +1,55 @@
+"""
+Price history for Integre+ application.
+historico_precos keeps one row per price change (price valid from 'data' on),
+written in the same transaction as the product update. Lookups use the
+(produto_id, data) index, and reports join sales to the price in force with
+the vw_precos_vigencia interval view.
+"""
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+from database import execute_query
+from datas import DataLike, intervalo_dias, limite_exclusivo
+from dinheiro import adicionar_reais
+import queries
+
+logger = logging.getLogger(__name__)
+
+def registrar_preco_inicial(conn: sqlite3.Connection, produto_id: int, preco_centavos: int, data: str):
+    """Record the price of a new product inside the caller's transaction"""
+    conn.execute(queries.HISTORICO_PRECOS_INSERIR, (produto_id, preco_centavos, data))
+
+def registrar_alteracao_preco(conn: sqlite3.Connection, produto_id: int, preco_centavos: int, data: str) -> bool:
+    """
+    Record a new price if it differs from the product's current one.
+    Must run in the caller's transaction before produtos is updated.
+    Returns True when a history row was written.
+    """
+    cursor = conn.execute(queries.HISTORICO_PRECOS_REGISTRAR_ALTERACAO,
+                          (preco_centavos, data, produto_id, preco_centavos))
+    return cursor.rowcount > 0
+
+def preco_centavos_em(produto_id: int, data: DataLike) -> Optional[int]:
+    """
+    List price of a product at a point in time (None before its first price).
+    A plain date means the end of that day, as in estoque.estoque_em.
+    """
+    result = execute_query(queries.HISTORICO_PRECO_EM, (produto_id, limite_exclusivo(data)), fetch=True)
+    return result[0]['preco_centavos'] if result else None
+
+def historico_produto(produto_id: int) -> List[Dict]:
+    """Price changes of a product, oldest first, with 'preco' in reais"""
+    result = execute_query(queries.HISTORICO_PRECOS_PRODUTO, (produto_id,), fetch=True)
+    return adicionar_reais(result or [], {'preco_centavos': 'preco'})
+
+def vendas_com_preco_vigente(data_inicio: DataLike, data_fim: DataLike) -> List[Dict]:
+    """
+    Sales in the period with the list price in force at each sale date,
+    e.g. to measure discounts. Dates are inclusive.
+    """
+    result = execute_query(queries.VENDAS_COM_PRECO_VIGENTE, intervalo_dias(data_inicio, data_fim), fetch=True)
+    return adicionar_reais(result or [], {
+        'preco_unitario_centavos': 'preco_unitario',
+        'preco_tabela_centavos': 'preco_tabela',
+    })
@@ -2,71 +2,103 @@
 Product management module for Integre+ application.
 Handles product CRUD operations and GUI interfaces.
 """
-from database import execute_query, create_tables
-import pandas as pd
+from database import execute_query, transaction
+import queries
+from datas import agora, normalizar_data, formatar_data_br
+from alertas_validade import motor_validade
+from estoque import registrar_movimento
+from lotes import ajustar_lotes, alocador_fefo
+from exportacao import exportar
+from precos import registrar_preco_inicial, registrar_alteracao_preco
+from dinheiro import Valor, para_centavos, adicionar_reais
 from typing import List, Tuple, Optional, Dict, Any
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-from PIL import Image, ImageTk
 import io
-import qrcode
-from datetime import datetime
 import logging
 from config import get_config
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
-# Initialize tables
-create_tables()
+# Products expose the exact centavos value plus 'preco' as Decimal reais
+_COLUNAS_PRECO = {'preco_centavos': 'preco'}
 
-def cadastrar_produto(nome: str, quantidade: int, preco: float, validade: str, categoria: Optional[str] = None, codigo_barras: Optional[str] = None, fornecedor_id: Optional[int] = None, imagem: Optional[bytes] = None) -> None:
-    if not nome or quantidade < 0 or preco < 0:
+def _com_reais(linhas: Optional[List[Dict]]) -> List[Dict]:
+    return adicionar_reais(linhas or [], _COLUNAS_PRECO)
+
+def cadastrar_produto(nome: str, quantidade: int, preco: Valor, validade: str, categoria: Optional[str] = None, codigo_barras: Optional[str] = None, fornecedor_id: Optional[int] = None, imagem: Optional[bytes] = None) -> int:
+    """Create a product and record its initial stock and price. Returns the new id."""
+    preco_centavos = para_centavos(preco)
+    if not nome or quantidade < 0 or preco_centavos < 0:
         raise ValueError("Dados inválidos para cadastro de produto.")
-    query = '''
-        INSERT INTO produtos (nome, quantidade, preco, validade, categoria, codigo_barras, fornecedor_id, imagem, data_cadastro, ultima_atualizacao)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    '''
-    params = (nome, quantidade, preco, validade, categoria, codigo_barras, fornecedor_id, imagem, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    execute_query(query, params)
+    validade = normalizar_data(validade)
+    momento = agora()
+    params = (nome, quantidade, preco_centavos, validade, categoria, codigo_barras, fornecedor_id, imagem, momento, momento)
+    with transaction() as conn:
+        produto_id = conn.execute(queries.PRODUTOS_INSERIR, params).lastrowid
+        registrar_preco_inicial(conn, produto_id, preco_centavos, momento)
+        if quantidade:
+            registrar_movimento(conn, produto_id, 'entrada', quantidade, observacao='Cadastro', data=momento)
+    motor_validade.produto_alterado(produto_id)
+    return produto_id
 
 def listar_produtos() -> List[Dict]:
-    query = '''
-        SELECT id, nome, quantidade, preco, validade, 
-               COALESCE(categoria, 'N/A') as categoria,
-               COALESCE(codigo_barras, '') as codigo_barras,
-               COALESCE(fornecedor_id, 0) as fornecedor_id,
-               imagem
-        FROM produtos
-    '''
     try:
-        result = execute_query(query, fetch=True)
-        return result if result else []
+        result = execute_query(queries.PRODUTOS_LISTAR, fetch=True)
+        return _com_reais(result)
     except Exception as e:
         logger.error(f"Error listing products: {e}")
         return []
 
-def atualizar_produto(produto_id: int, nome: str, quantidade: int, preco: float, validade: str, categoria: Optional[str] = None, codigo_barras: Optional[str] = None, fornecedor_id: Optional[int] = None, imagem: Optional[bytes] = None) -> None:
-    if not nome or quantidade < 0 or preco < 0:
+def atualizar_produto(produto_id: int, nome: str, quantidade: int, preco: Valor, validade: str, categoria: Optional[str] = None, codigo_barras: Optional[str] = None, fornecedor_id: Optional[int] = None, imagem: Optional[bytes] = None, quantidade_anterior: Optional[int] = None) -> None:
+    """
+    Update a product. Stock is applied as a delta, recorded as an adjustment
+    in the ledger and mirrored on the product's lots (see lotes.ajustar_lotes);
+    a price change is added to historico_precos.
+
+    Args:
+        quantidade: Stock the user wants to set
+        quantidade_anterior: Stock shown when the edit started. When given, only
+            the user's change is applied, so sales made meanwhile are kept.
+            Otherwise 'quantidade' is taken as an absolute count.
+    """
+    preco_centavos = para_centavos(preco)
+    if not nome or quantidade < 0 or preco_centavos < 0:
         raise ValueError("Dados inválidos para atualização de produto.")
-    query = '''
-        UPDATE produtos 
-        SET nome = ?, quantidade = ?, preco = ?, validade = ?, categoria = ?, codigo_barras = ?, fornecedor_id = ?, imagem = ?, ultima_atualizacao = ?
-        WHERE id = ?
-    '''
-    params = (nome, quantidade, preco, validade, categoria, codigo_barras, fornecedor_id, imagem, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), produto_id)
-    execute_query(query, params)
+    validade = normalizar_data(validade)
+    momento = agora()
+    try:
+        with transaction() as conn:
+            atual = conn.execute(queries.VENDAS_ESTOQUE_PRODUTO, (produto_id,)).fetchone()
+            if atual is None:
+                raise ValueError("Produto não encontrado.")
+            if quantidade_anterior is None:
+                quantidade_anterior = atual['quantidade']
+            delta = quantidade - quantidade_anterior
+            # Sales made since the edit started may leave less than the change removes
+            if atual['quantidade'] + delta < 0:
+                raise ValueError(f"Estoque insuficiente: há {atual['quantidade']} em estoque "
+                                 f"e a alteração retira {-delta}.")
+            registrar_alteracao_preco(conn, produto_id, preco_centavos, momento)
+            params = (nome, delta, preco_centavos, validade, categoria, codigo_barras, fornecedor_id, imagem, momento, produto_id)
+            if conn.execute(queries.PRODUTOS_ATUALIZAR, params).rowcount == 0:
+                raise ValueError("Produto não encontrado.")
+            if delta:
+                registrar_movimento(conn, produto_id, 'ajuste', delta, observacao='Atualização de produto', data=momento)
+                ajustar_lotes(conn, produto_id, delta, validade, momento)
+    finally:
+        # The heap was changed in memory, or the transaction rolled back
+        alocador_fefo.descartar(produto_id)
+    motor_validade.produto_alterado(produto_id)
 
 def excluir_produto(produto_id: int) -> None:
-    query = 'DELETE FROM produtos WHERE id = ?'
-    execute_query(query, (produto_id,))
+    execute_query(queries.PRODUTOS_EXCLUIR, (produto_id,))
+    motor_validade.produto_removido(produto_id)
 
 def exportar_produtos_para_excel(caminho: str = 'produtos_exportados.xlsx') -> None:
     try:
-        produtos = listar_produtos()
-        if produtos:
-            df = pd.DataFrame(produtos, columns=['ID', 'Nome', 'Quantidade', 'Preço', 'Validade'])
-            df.to_excel(caminho, index=False)
+        if exportar('produtos', caminho):
             messagebox.showinfo("Exportação", f"Produtos exportados com sucesso para '{caminho}'.")
         else:
             messagebox.showinfo("Exportação", "Nenhum produto encontrado para exportar.")
@@ -74,55 +106,50 @@ def exportar_produtos_para_excel(caminho: str = 'produtos_exportados.xlsx') -> N
         messagebox.showerror("Erro", f"Erro ao exportar produtos: {e}")
 
 def buscar_produtos_por_nome(nome: str) -> List[Dict]:
-    query = '''
-        SELECT id, nome, quantidade, preco, validade,
-               COALESCE(categoria, 'N/A') as categoria,
-               COALESCE(codigo_barras, '') as codigo_barras,
-               COALESCE(fornecedor_id, 0) as fornecedor_id,
-               imagem
-        FROM produtos 
-        WHERE nome LIKE ?
-    '''
-    result = execute_query(query, ('%' + nome + '%',), fetch=True) or []
-    columns = ['id', 'nome', 'quantidade', 'preco', 'validade', 'categoria', 'codigo_barras', 'fornecedor_id', 'imagem']
-    return [dict(zip(columns, row)) for row in result]
+    return _com_reais(execute_query(queries.PRODUTOS_BUSCAR_POR_NOME, ('%' + nome + '%',), fetch=True))
 
-def produtos_estoque_baixo(limite: int = 5) -> List[Dict]:
-    query = '''
-        SELECT id, nome, quantidade, preco, validade,
-               COALESCE(categoria, 'N/A') as categoria,
-               COALESCE(codigo_barras, '') as codigo_barras,
-               COALESCE(fornecedor_id, 0) as fornecedor_id,
-               imagem
-        FROM produtos 
-        WHERE quantidade <= ?
-    '''
-    result = execute_query(query, (limite,), fetch=True) or []
-    columns = ['id', 'nome', 'quantidade', 'preco', 'validade', 'categoria', 'codigo_barras', 'fornecedor_id', 'imagem']
-    return [dict(zip(columns, row)) for row in result]
+def pagina_produtos(apos: int = 0, limite: int = 100, nome: str = '') -> List[Dict]:
+    """Up to 'limite' products with id > 'apos', in id order, optionally filtered by name"""
+    return _com_reais(execute_query(queries.PRODUTOS_PAGINA, (apos, f'%{nome}%', limite), fetch=True))
 
-def validar_dados_produto(nome: str, quantidade: str, preco: str, validade: str) -> tuple[bool, str]:
-    """Validate product data input"""
-    if not nome.strip():
-        return False, "Nome do produto é obrigatório."
+def produtos_estoque_baixo(limite: int = 5) -> List[Dict]:
+    return _com_reais(execute_query(queries.PRODUTOS_ESTOQUE_BAIXO, (limite,), fetch=True))
+
+def normalizar_dados_produto(nome: str, quantidade: Any, preco: Valor, validade: Any) -> Tuple[str, int, int, str]:
+    """
+    Validate product input and return it in storage form:
+    (nome, quantidade, preco_centavos, validade 'YYYY-MM-DD').
+    Raises ValueError with a message suitable for the user.
+    """
+    nome = str(nome or '').strip()
+    if not nome:
+        raise ValueError("Nome do produto é obrigatório.")
     try:
         qtd = int(quantidade)
-        if qtd < 0:
-            return False, "Quantidade não pode ser negativa."
-    except ValueError:
-        return False, "Quantidade deve ser um número inteiro."
+    except (TypeError, ValueError):
+        raise ValueError("Quantidade deve ser um número inteiro.")
+    if qtd < 0:
+        raise ValueError("Quantidade não pode ser negativa.")
     try:
-        prc = float(preco)
-        if prc < 0:
-            return False, "Preço não pode ser negativo."
+        prc = para_centavos(preco)
     except ValueError:
-        return False, "Preço deve ser um número válido."
-    if not validade.strip():
-        return False, "Data de validade é obrigatória."
+        raise ValueError("Preço deve ser um número válido.")
+    if prc < 0:
+        raise ValueError("Preço não pode ser negativo.")
+    if validade is None or not str(validade).strip():
+        raise ValueError("Data de validade é obrigatória.")
     try:
-        datetime.strptime(validade, '%d/%m/%Y')
+        validade = normalizar_data(validade)
     except ValueError:
-        return False, "Data de validade deve estar no formato dd/mm/aaaa"
+        raise ValueError("Data de validade deve estar no formato dd/mm/aaaa")
+    return nome, qtd, prc, validade
+
+def validar_dados_produto(nome: str, quantidade: str, preco: str, validade: str) -> tuple[bool, str]:
+    """Validate product data input"""
+    try:
+        normalizar_dados_produto(nome, quantidade, preco, validade)
+    except ValueError as e:
+        return False, str(e)
     return True, ""
 
 # ================= INTERFACE GRÁFICA =================
@@ -147,7 +174,7 @@ def gui_cadastrar_produto(tela_cheia=False):
             cadastrar_produto(
                 nome=nome,
                 quantidade=int(quantidade),
-                preco=float(preco),
+                preco=preco,
                 validade=validade,
                 categoria=var_categoria.get() if var_categoria.get() != "Selecione..." else None,
                 codigo_barras=entry_codigo_barras.get().strip() or None,
@@ -325,39 +352,29 @@ def gui_listar_produtos(tela_cheia=False, parent=None):
             produto['nome'],
             produto['quantidade'],
             f"R$ {produto['preco']:.2f}",
-            produto['validade'],
+            formatar_data_br(produto['validade']),
             produto['categoria'] or "N/A"
         ]
         tree.insert('', tk.END, values=values)
 
 def buscar_produto(produto_id: int) -> Optional[Dict[str, Any]]:
     """Find a product by ID"""
-    query = '''
-        SELECT id, nome, quantidade, preco, validade,
-               COALESCE(categoria, 'N/A') as categoria,
-               COALESCE(codigo_barras, '') as codigo_barras,
-               COALESCE(fornecedor_id, 0) as fornecedor_id,
-               imagem
-        FROM produtos 
-        WHERE id = ?
-    '''
-    result = execute_query(query, (produto_id,), fetch=True)
-    if not result:
-        return None
-    
-    columns = ['id', 'nome', 'quantidade', 'preco', 'validade', 'categoria', 'codigo_barras', 'fornecedor_id', 'imagem']
-    return dict(zip(columns, result[0]))
+    result = _com_reais(execute_query(queries.PRODUTOS_BUSCAR_POR_ID, (produto_id,), fetch=True))
+    return result[0] if result else None
 
 def gui_atualizar_produto(tela_cheia=False):
     """GUI for updating a product"""
     config = get_config()
     theme = config['themes']['light']
     
+    quantidade_exibida = {}
+
     def buscar():
         try:
             produto_id = int(entry_id.get())
             produto = buscar_produto(produto_id)
             if produto:
+                quantidade_exibida[produto_id] = produto['quantidade']
                 entry_nome.delete(0, tk.END)
                 entry_nome.insert(0, produto['nome'])
                 entry_quantidade.delete(0, tk.END)
@@ -365,7 +382,7 @@ def gui_atualizar_produto(tela_cheia=False):
                 entry_preco.delete(0, tk.END)
                 entry_preco.insert(0, str(produto['preco']))
                 entry_validade.delete(0, tk.END)
-                entry_validade.insert(0, produto['validade'])
+                entry_validade.insert(0, formatar_data_br(produto['validade']))
                 var_categoria.set(produto['categoria'] or "Selecione...")
             else:
                 messagebox.showerror("Erro", "Produto não encontrado.")
@@ -392,9 +409,10 @@ def gui_atualizar_produto(tela_cheia=False):
                 produto_id=produto_id,
                 nome=nome,
                 quantidade=int(quantidade),
-                preco=float(preco),
+                preco=preco,
                 validade=validade,
-                categoria=var_categoria.get() if var_categoria.get() != "Selecione..." else None
+                categoria=var_categoria.get() if var_categoria.get() != "Selecione..." else None,
+                quantidade_anterior=quantidade_exibida.get(produto_id)
             )
             logger.info(f"Produto atualizado: {nome} (ID: {produto_id})")
             messagebox.showinfo("Sucesso", "Produto atualizado com sucesso!")
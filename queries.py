@@ -0,0 +1,634 @@
+"""
+SQL statement registry for Integre+ application.
+Every hot statement is defined once here so the exact same string reaches
+sqlite3 on every call and is served from the per-connection statement cache.
+"""
+
+# Column list shared by every product lookup
+PRODUTO_COLUNAS = '''
+    id, nome, quantidade, preco_centavos, validade,
+    COALESCE(categoria, 'N/A') as categoria,
+    COALESCE(codigo_barras, '') as codigo_barras,
+    COALESCE(fornecedor_id, 0) as fornecedor_id,
+    imagem
+'''
+
+# Products
+PRODUTOS_LISTAR = f'SELECT {PRODUTO_COLUNAS} FROM produtos'
+
+PRODUTOS_BUSCAR_POR_NOME = f'SELECT {PRODUTO_COLUNAS} FROM produtos WHERE nome LIKE ?'
+
+PRODUTOS_ESTOQUE_BAIXO = f'SELECT {PRODUTO_COLUNAS} FROM produtos WHERE quantidade <= ?'
+
+PRODUTOS_BUSCAR_POR_ID = f'SELECT {PRODUTO_COLUNAS} FROM produtos WHERE id = ?'
+
+PRODUTOS_PRECO = 'SELECT preco_centavos FROM produtos WHERE id = ?'
+
+PRODUTOS_INSERIR = '''
+    INSERT INTO produtos (nome, quantidade, preco_centavos, validade, categoria, codigo_barras, fornecedor_id, imagem, data_cadastro, ultima_atualizacao)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Stock changes are applied as a delta so concurrent sales are never overwritten
+PRODUTOS_ATUALIZAR = '''
+    UPDATE produtos
+    SET nome = ?, quantidade = quantidade + ?, preco_centavos = ?, validade = ?, categoria = ?, codigo_barras = ?, fornecedor_id = ?, imagem = ?, ultima_atualizacao = ?
+    WHERE id = ?
+'''
+
+PRODUTOS_EXCLUIR = 'DELETE FROM produtos WHERE id = ?'
+
+PRODUTOS_CONTAR = 'SELECT COUNT(*) as count FROM produtos'
+
+PRODUTOS_CONTAR_ESTOQUE_BAIXO = 'SELECT COUNT(*) as count FROM produtos WHERE quantidade <= ?'
+
+# Expiry alerts: one range scan on idx_produtos_validade up to the horizon
+PRODUTOS_VENCENDO_ATE = '''
+    SELECT id, nome, quantidade, validade FROM produtos
+    WHERE validade < ? AND quantidade > 0
+    ORDER BY validade
+'''
+
+PRODUTOS_VALIDADE_POR_ID = 'SELECT id, nome, quantidade, validade FROM produtos WHERE id = ?'
+
+# Changes whenever another connection (terminal, servidor.py) commits
+VERSAO_DADOS = 'PRAGMA data_version'
+
+# Sales
+VENDAS_ESTOQUE_PRODUTO = 'SELECT quantidade FROM produtos WHERE id = ?'
+
+# categoria is the rollup key: the product's category at sale time
+VENDAS_INSERIR = '''
+    INSERT INTO vendas (produto_id, quantidade, preco_unitario_centavos, total_centavos,
+                      data, cliente_id, forma_pagamento, categoria)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, COALESCE((SELECT categoria FROM produtos WHERE id = ?1), ''))
+'''
+
+# Conditional decrement: rowcount 0 means the stock was insufficient
+VENDAS_BAIXAR_ESTOQUE = '''
+    UPDATE produtos
+    SET quantidade = quantidade - ?,
+        ultima_atualizacao = ?
+    WHERE id = ? AND quantidade >= ?
+'''
+
+VENDAS_LISTAR = '''
+    SELECT v.id, p.nome as produto, v.quantidade, v.preco_unitario_centavos, v.total_centavos,
+           v.data, v.forma_pagamento, u.username as cliente
+    FROM vendas v
+    JOIN produtos p ON v.produto_id = p.id
+    LEFT JOIN usuarios u ON v.cliente_id = u.id
+    ORDER BY v.data DESC
+'''
+
+# Money columns are integer centavos (see dinheiro.py); SUM stays exact.
+# Date filters are half-open ISO ranges (see datas.intervalo_dias) so they
+# are served by idx_vendas_data
+VENDAS_TOTAL_PERIODO = '''
+    SELECT COALESCE(SUM(total_centavos), 0) as total_centavos FROM vendas
+    WHERE data >= ? AND data < ?
+'''
+
+VENDAS_POR_DIA_PERIODO = '''
+    SELECT substr(data, 1, 10) as data, COALESCE(SUM(total_centavos), 0) as total_centavos
+    FROM vendas
+    WHERE data >= ? AND data < ?
+    GROUP BY substr(data, 1, 10)
+    ORDER BY 1
+'''
+
+VENDAS_RECENTES = '''
+    SELECT v.id, v.data, u.username as cliente, p.nome as produto,
+           v.quantidade, v.total_centavos
+    FROM vendas v
+    JOIN usuarios u ON v.cliente_id = u.id
+    JOIN produtos p ON v.produto_id = p.id
+    ORDER BY v.data DESC
+    LIMIT ?
+'''
+
+# Lots (FEFO)
+LOTES_INSERIR = '''
+    INSERT INTO lotes (produto_id, lote, validade, quantidade, data_cadastro)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Stock edits of a product with lots become one adjustment lot per second
+LOTES_AJUSTE = '''
+    INSERT INTO lotes (produto_id, lote, validade, quantidade, data_cadastro)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (produto_id, lote) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+'''
+
+LOTES_EXISTE_PRODUTO = 'SELECT 1 FROM lotes WHERE produto_id = ? LIMIT 1'
+
+LOTES_DISPONIVEIS_PRODUTO = '''
+    SELECT id, lote, validade, quantidade FROM lotes
+    WHERE produto_id = ? AND quantidade > 0
+    ORDER BY validade, id
+'''
+
+# Conditional decrement: rowcount 0 means the in-memory view was stale
+LOTES_BAIXAR = 'UPDATE lotes SET quantidade = quantidade - ? WHERE id = ? AND quantidade >= ?'
+
+PRODUTOS_REPOR_ESTOQUE = '''
+    UPDATE produtos
+    SET quantidade = quantidade + ?,
+        ultima_atualizacao = ?
+    WHERE id = ?
+'''
+
+# Earliest expiry among lots with stock becomes the product's validade
+PRODUTOS_VALIDADE_DOS_LOTES = '''
+    UPDATE produtos
+    SET validade = COALESCE(
+        (SELECT MIN(validade) FROM lotes WHERE produto_id = produtos.id AND quantidade > 0),
+        validade)
+    WHERE id = ?
+'''
+
+VENDAS_LOTES_INSERIR = 'INSERT INTO vendas_lotes (venda_id, lote_id, quantidade) VALUES (?, ?, ?)'
+
+# Stock ledger
+MOVIMENTOS_INSERIR = '''
+    INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, data, referencia_id, observacao)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Nearest checkpoint before an exclusive bound (see datas.limite_exclusivo), served by idx_snapshots_produto_data
+SNAPSHOT_ANTERIOR = '''
+    SELECT ultimo_movimento_id, quantidade FROM snapshots_estoque
+    WHERE produto_id = ? AND data < ?
+    ORDER BY data DESC, ultimo_movimento_id DESC
+    LIMIT 1
+'''
+
+# Bounded replay after a checkpoint: (produto_id, rowid) range on idx_movimentos_produto
+MOVIMENTOS_SALDO_APOS = '''
+    SELECT COALESCE(SUM(quantidade), 0) as saldo FROM movimentos_estoque
+    WHERE produto_id = ? AND id > ? AND data < ?
+'''
+
+ESTOQUE_ATUAL_PRODUTO = 'SELECT quantidade FROM vw_estoque_atual WHERE produto_id = ?'
+
+# Checkpoint every product with at least ? movements since its last snapshot
+SNAPSHOTS_GERAR = '''
+    INSERT INTO snapshots_estoque (produto_id, ultimo_movimento_id, quantidade, data)
+    SELECT m.produto_id, MAX(m.id), COALESCE(s.quantidade, 0) + SUM(m.quantidade), ?
+    FROM movimentos_estoque m
+    LEFT JOIN (
+        SELECT produto_id, quantidade, MAX(ultimo_movimento_id) AS ultimo_movimento_id
+        FROM snapshots_estoque GROUP BY produto_id
+    ) s ON s.produto_id = m.produto_id
+    WHERE m.id > COALESCE(s.ultimo_movimento_id, 0)
+    GROUP BY m.produto_id
+    HAVING COUNT(*) >= ?
+'''
+
+# Products whose materialized counter disagrees with the ledger
+ESTOQUE_DIVERGENCIAS = '''
+    SELECT p.id as produto_id, p.quantidade as contador, v.quantidade as razao
+    FROM produtos p JOIN vw_estoque_atual v ON v.produto_id = p.id
+    WHERE p.quantidade != v.quantidade
+'''
+
+# Price history. Rows hold the price valid from 'data' on.
+# Inserts a row only when the new price differs from the current one.
+HISTORICO_PRECOS_REGISTRAR_ALTERACAO = '''
+    INSERT INTO historico_precos (produto_id, preco_centavos, data)
+    SELECT id, ?, ? FROM produtos WHERE id = ? AND preco_centavos != ?
+'''
+
+HISTORICO_PRECOS_INSERIR = 'INSERT INTO historico_precos (produto_id, preco_centavos, data) VALUES (?, ?, ?)'
+
+# Point-in-time lookup before an exclusive bound (see datas.limite_exclusivo):
+# one descending seek on idx_historico_precos_produto_data. Same-second
+# changes are ordered by id, as in vw_precos_vigencia.
+HISTORICO_PRECO_EM = '''
+    SELECT preco_centavos FROM historico_precos
+    WHERE produto_id = ? AND data < ?
+    ORDER BY data DESC, id DESC
+    LIMIT 1
+'''
+
+HISTORICO_PRECOS_PRODUTO = '''
+    SELECT preco_centavos, data FROM historico_precos
+    WHERE produto_id = ?
+    ORDER BY data
+'''
+
+# Sales joined to the list price in force at the sale date. The window view
+# turns history rows into [valido_de, valido_ate) intervals, so this is a
+# single join instead of a correlated subquery per sale.
+VENDAS_COM_PRECO_VIGENTE = '''
+    SELECT v.id, v.data, v.produto_id, p.nome as produto, v.quantidade,
+           v.preco_unitario_centavos, h.preco_centavos as preco_tabela_centavos
+    FROM vendas v
+    JOIN produtos p ON p.id = v.produto_id
+    LEFT JOIN vw_precos_vigencia h
+        ON h.produto_id = v.produto_id
+       AND v.data >= h.valido_de
+       AND (h.valido_ate IS NULL OR v.data < h.valido_ate)
+    WHERE v.data >= ? AND v.data < ?
+    ORDER BY v.data
+'''
+
+# Clients
+CLIENTE_COLUNAS = '''
+    id, nome, cpf, email, telefone, endereco,
+    data_cadastro, ultima_atualizacao
+'''
+
+CLIENTES_LISTAR = f'SELECT {CLIENTE_COLUNAS} FROM clientes ORDER BY nome'
+
+CLIENTES_BUSCAR = f'''
+    SELECT {CLIENTE_COLUNAS} FROM clientes
+    WHERE nome LIKE ? OR cpf LIKE ? OR email LIKE ?
+    ORDER BY nome
+'''
+
+CLIENTES_CONTAR = 'SELECT COUNT(*) as count FROM clientes'
+
+# Streaming export. Keyset pages (id > last id seen) keep each read short, so
+# an export never holds a read transaction open for the whole table.
+VENDAS_EXPORTAR = '''
+    SELECT v.id, v.data, p.nome as produto, v.quantidade, v.preco_unitario_centavos,
+           v.total_centavos, v.forma_pagamento, u.username as cliente
+    FROM vendas v
+    LEFT JOIN produtos p ON v.produto_id = p.id
+    LEFT JOIN usuarios u ON v.cliente_id = u.id
+    WHERE v.id > ?
+    ORDER BY v.id
+    LIMIT ?
+'''
+
+VENDAS_CONTAR = 'SELECT COUNT(*) as count FROM vendas'
+
+PRODUTOS_EXPORTAR = '''
+    SELECT id, nome, quantidade, preco_centavos, validade, categoria, codigo_barras, fornecedor_id
+    FROM produtos
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+CLIENTES_EXPORTAR = '''
+    SELECT id, nome, cpf, email, telefone, endereco, data_cadastro
+    FROM clientes
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+# API pages. Keyset pagination (id > last id of the previous page) costs the
+# same on the last page as on the first; images are left out of listings.
+PRODUTOS_PAGINA = '''
+    SELECT id, nome, quantidade, preco_centavos, validade,
+           COALESCE(categoria, 'N/A') as categoria,
+           COALESCE(codigo_barras, '') as codigo_barras,
+           COALESCE(fornecedor_id, 0) as fornecedor_id
+    FROM produtos
+    WHERE id > ? AND nome LIKE ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+CLIENTES_PAGINA = f'''
+    SELECT {CLIENTE_COLUNAS} FROM clientes
+    WHERE id > ? AND (nome LIKE ? OR cpf LIKE ? OR email LIKE ?)
+    ORDER BY id
+    LIMIT ?
+'''
+
+VENDAS_PAGINA = '''
+    SELECT v.id, v.produto_id, p.nome as produto, v.quantidade, v.preco_unitario_centavos,
+           v.total_centavos, v.data, v.forma_pagamento, v.cliente_id
+    FROM vendas v
+    LEFT JOIN produtos p ON v.produto_id = p.id
+    WHERE v.id > ?
+    ORDER BY v.id
+    LIMIT ?
+'''
+
+# Analytics (Parquet) snapshot. Sales are append-only, so new rows are the
+# ones above the last exported id. Products and clients are picked up by
+# ultima_atualizacao in [since, until), paged by (ultima_atualizacao, id).
+# The last column is the month partition.
+VENDAS_ANALITICO = '''
+    SELECT id, data, produto_id, quantidade, preco_unitario_centavos, total_centavos,
+           cliente_id, forma_pagamento, substr(data, 1, 7) as mes
+    FROM vendas
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+PRODUTOS_ANALITICO = '''
+    SELECT id, nome, quantidade, preco_centavos, validade, categoria, codigo_barras, fornecedor_id,
+           data_cadastro, ultima_atualizacao, substr(ultima_atualizacao, 1, 7) as mes
+    FROM produtos
+    WHERE ultima_atualizacao >= ?1 AND ultima_atualizacao < ?2
+      AND (ultima_atualizacao > ?1 OR id > ?3)
+    ORDER BY ultima_atualizacao, id
+    LIMIT ?4
+'''
+
+CLIENTES_ANALITICO = '''
+    SELECT id, nome, cpf, email, telefone, endereco,
+           data_cadastro, ultima_atualizacao, substr(ultima_atualizacao, 1, 7) as mes
+    FROM clientes
+    WHERE ultima_atualizacao >= ?1 AND ultima_atualizacao < ?2
+      AND (ultima_atualizacao > ?1 OR id > ?3)
+    ORDER BY ultima_atualizacao, id
+    LIMIT ?4
+'''
+
+# Bulk import. Each chunk is loaded into a TEMP staging table (keyed by the
+# conflict column, so the last duplicate in a file wins) and merged with one
+# statement per step instead of one round trip per row.
+IMPORTACAO_PRODUTOS_CRIAR = '''
+    CREATE TEMP TABLE IF NOT EXISTS importacao_produtos (
+        codigo_barras TEXT PRIMARY KEY,
+        linha INTEGER NOT NULL,
+        nome TEXT NOT NULL,
+        quantidade INTEGER NOT NULL,
+        preco_centavos INTEGER NOT NULL,
+        validade TEXT NOT NULL,
+        categoria TEXT,
+        fornecedor_id INTEGER,
+        produto_id INTEGER,
+        quantidade_anterior INTEGER,
+        preco_anterior INTEGER
+    )
+'''
+
+IMPORTACAO_PRODUTOS_CARREGAR = '''
+    INSERT OR REPLACE INTO importacao_produtos
+        (codigo_barras, linha, nome, quantidade, preco_centavos, validade, categoria, fornecedor_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Current stock and price of products that already exist, for the ledger and
+# price history rows written after the merge. The correlated subquery seeks
+# the barcode index once per staged row (UPDATE ... FROM scanned produtos).
+IMPORTACAO_PRODUTOS_EXISTENTES = '''
+    UPDATE importacao_produtos
+    SET (produto_id, quantidade_anterior, preco_anterior) = (
+        SELECT id, quantidade, preco_centavos FROM produtos
+        WHERE codigo_barras = importacao_produtos.codigo_barras
+    )
+'''
+
+# 'WHERE true' resolves the parsing ambiguity between a join and ON CONFLICT
+IMPORTACAO_PRODUTOS_MESCLAR = '''
+    INSERT INTO produtos (nome, quantidade, preco_centavos, validade, categoria, codigo_barras,
+                          fornecedor_id, data_cadastro, ultima_atualizacao)
+    SELECT nome, quantidade, preco_centavos, validade, categoria, codigo_barras, fornecedor_id, ?1, ?1
+    FROM importacao_produtos WHERE true
+    ON CONFLICT(codigo_barras) DO UPDATE SET
+        nome = excluded.nome,
+        quantidade = excluded.quantidade,
+        preco_centavos = excluded.preco_centavos,
+        validade = excluded.validade,
+        categoria = COALESCE(excluded.categoria, produtos.categoria),
+        fornecedor_id = COALESCE(excluded.fornecedor_id, produtos.fornecedor_id),
+        ultima_atualizacao = excluded.ultima_atualizacao
+'''
+
+IMPORTACAO_PRODUTOS_NOVOS = '''
+    UPDATE importacao_produtos
+    SET produto_id = (SELECT id FROM produtos WHERE codigo_barras = importacao_produtos.codigo_barras)
+    WHERE produto_id IS NULL
+'''
+
+# A lower imported count is taken out of the product's lots FEFO-first, like a
+# sale: each lot gives what the earlier-expiring lots did not cover
+IMPORTACAO_PRODUTOS_LOTES_BAIXAR = '''
+    SELECT id, produto_id, MIN(quantidade, reducao - anteriores) as retirar FROM (
+        SELECT l.id, l.produto_id, l.quantidade, i.quantidade_anterior - i.quantidade as reducao,
+               SUM(l.quantidade) OVER (PARTITION BY l.produto_id ORDER BY l.validade, l.id)
+                   - l.quantidade as anteriores
+        FROM importacao_produtos i
+        JOIN lotes l ON l.produto_id = i.produto_id AND l.quantidade > 0
+        WHERE i.quantidade < i.quantidade_anterior
+    )
+    WHERE anteriores < reducao
+'''
+
+# Products with lots in stock keep the earliest lot expiry (see PRODUTOS_VALIDADE_DOS_LOTES)
+IMPORTACAO_PRODUTOS_VALIDADE_DOS_LOTES = '''
+    UPDATE produtos
+    SET validade = COALESCE(
+        (SELECT MIN(validade) FROM lotes WHERE produto_id = produtos.id AND quantidade > 0),
+        validade)
+    WHERE id IN (SELECT produto_id FROM importacao_produtos WHERE quantidade_anterior IS NOT NULL)
+'''
+
+# Imported quantities are stock counts: new products get an 'entrada', existing
+# ones an 'ajuste' with the difference
+IMPORTACAO_PRODUTOS_MOVIMENTOS = '''
+    INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, data, observacao)
+    SELECT produto_id,
+           CASE WHEN quantidade_anterior IS NULL THEN 'entrada' ELSE 'ajuste' END,
+           quantidade - COALESCE(quantidade_anterior, 0), ?, 'Importação'
+    FROM importacao_produtos
+    WHERE quantidade != COALESCE(quantidade_anterior, 0)
+'''
+
+IMPORTACAO_PRODUTOS_PRECOS = '''
+    INSERT INTO historico_precos (produto_id, preco_centavos, data)
+    SELECT produto_id, preco_centavos, ?
+    FROM importacao_produtos
+    WHERE preco_anterior IS NULL OR preco_anterior != preco_centavos
+'''
+
+IMPORTACAO_PRODUTOS_CONTAR_NOVOS = '''
+    SELECT COUNT(*) as novos, (SELECT COUNT(*) FROM importacao_produtos) as total
+    FROM importacao_produtos WHERE quantidade_anterior IS NULL
+'''
+
+IMPORTACAO_PRODUTOS_LIMPAR = 'DELETE FROM importacao_produtos'
+
+IMPORTACAO_CLIENTES_CRIAR = '''
+    CREATE TEMP TABLE IF NOT EXISTS importacao_clientes (
+        cpf TEXT PRIMARY KEY,
+        linha INTEGER NOT NULL,
+        nome TEXT NOT NULL,
+        email TEXT NOT NULL,
+        telefone TEXT,
+        endereco TEXT,
+        existente INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+IMPORTACAO_CLIENTES_INDICE_EMAIL = 'CREATE INDEX IF NOT EXISTS temp.idx_importacao_clientes_email ON importacao_clientes(email)'
+
+IMPORTACAO_CLIENTES_CARREGAR = '''
+    INSERT OR REPLACE INTO importacao_clientes (cpf, linha, nome, email, telefone, endereco)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# email is UNIQUE too: rows whose email belongs to another CPF (in the table or
+# earlier in the chunk) would abort the merge, so they are reported and dropped
+IMPORTACAO_CLIENTES_EMAIL_CONFLITANTE = '''
+    SELECT linha, email FROM importacao_clientes s
+    WHERE EXISTS (SELECT 1 FROM clientes c WHERE c.email = s.email AND c.cpf IS NOT s.cpf)
+       OR EXISTS (SELECT 1 FROM importacao_clientes o WHERE o.email = s.email AND o.linha < s.linha)
+    ORDER BY linha
+'''
+
+IMPORTACAO_CLIENTES_REMOVER_LINHA = 'DELETE FROM importacao_clientes WHERE linha = ?'
+
+IMPORTACAO_CLIENTES_EXISTENTES = '''
+    UPDATE importacao_clientes SET existente = 1
+    WHERE EXISTS (SELECT 1 FROM clientes WHERE clientes.cpf = importacao_clientes.cpf)
+'''
+
+IMPORTACAO_CLIENTES_MESCLAR = '''
+    INSERT INTO clientes (nome, cpf, email, telefone, endereco, data_cadastro, ultima_atualizacao)
+    SELECT nome, cpf, email, telefone, endereco, ?1, ?1
+    FROM importacao_clientes WHERE true
+    ON CONFLICT(cpf) DO UPDATE SET
+        nome = excluded.nome,
+        email = excluded.email,
+        telefone = COALESCE(excluded.telefone, clientes.telefone),
+        endereco = COALESCE(excluded.endereco, clientes.endereco),
+        ultima_atualizacao = excluded.ultima_atualizacao
+'''
+
+IMPORTACAO_CLIENTES_CONTAR_NOVOS = '''
+    SELECT COUNT(*) - COALESCE(SUM(existente), 0) as novos, COUNT(*) as total
+    FROM importacao_clientes
+'''
+
+IMPORTACAO_CLIENTES_LIMPAR = 'DELETE FROM importacao_clientes'
+
+# Category rollups (see database.RESUMOS_DDL); the recalculations rebuild them
+# from scratch, the triggers keep them current afterwards
+RESUMO_ESTOQUE_RECALCULAR = '''
+    INSERT INTO resumo_estoque_categoria (categoria, produtos, quantidade, valor_centavos)
+    SELECT COALESCE(categoria, ''), COUNT(*), SUM(quantidade), SUM(quantidade * preco_centavos)
+    FROM produtos
+    GROUP BY COALESCE(categoria, '')
+'''
+
+RESUMO_VENDAS_RECALCULAR = '''
+    INSERT INTO resumo_vendas_diario (dia, categoria, vendas, quantidade, total_centavos)
+    SELECT substr(data, 1, 10), COALESCE(categoria, ''), COUNT(*), SUM(quantidade), SUM(total_centavos)
+    FROM vendas
+    GROUP BY 1, 2
+'''
+
+# One row per category (registered in categorias, in stock or sold in the
+# period): stock value now, sales between two 'YYYY-MM-DD' days inclusive,
+# and turnover as units sold over units on hand
+RELATORIO_CATEGORIAS = '''
+    WITH vendidos AS (
+        SELECT categoria, SUM(vendas) AS vendas, SUM(quantidade) AS quantidade,
+               SUM(total_centavos) AS total_centavos
+        FROM resumo_vendas_diario
+        WHERE dia >= ? AND dia <= ?
+        GROUP BY categoria
+    ),
+    nomes AS (
+        SELECT nome AS categoria FROM categorias
+        UNION SELECT categoria FROM resumo_estoque_categoria WHERE produtos > 0
+        UNION SELECT categoria FROM vendidos
+    )
+    SELECT n.categoria, c.descricao,
+           COALESCE(e.produtos, 0) AS produtos,
+           COALESCE(e.quantidade, 0) AS quantidade,
+           COALESCE(e.valor_centavos, 0) AS valor_centavos,
+           COALESCE(v.vendas, 0) AS vendas,
+           COALESCE(v.quantidade, 0) AS quantidade_vendida,
+           COALESCE(v.total_centavos, 0) AS total_centavos,
+           ROUND(CAST(COALESCE(v.quantidade, 0) AS REAL) / NULLIF(e.quantidade, 0), 2) AS giro
+    FROM nomes n
+    LEFT JOIN categorias c ON c.nome = n.categoria
+    LEFT JOIN resumo_estoque_categoria e ON e.categoria = n.categoria
+    LEFT JOIN vendidos v ON v.categoria = n.categoria
+    ORDER BY total_centavos DESC, valor_centavos DESC, n.categoria
+'''
+
+RESUMO_ESTOQUE_POR_CATEGORIA = '''
+    SELECT CASE categoria WHEN '' THEN 'Sem Categoria' ELSE categoria END as categoria,
+           produtos as quantidade
+    FROM resumo_estoque_categoria
+    WHERE produtos > 0
+    ORDER BY produtos DESC
+'''
+
+# Sales series (see series.py). Daily rows come from the rollup; hourly rows
+# are a range scan over vendas for product filters and other timezones.
+SERIE_VENDAS_DIARIO = '''
+    SELECT dia, SUM(vendas), SUM(quantidade), SUM(total_centavos)
+    FROM resumo_vendas_diario
+    WHERE dia >= ? AND dia <= ?
+    GROUP BY dia
+'''
+
+SERIE_VENDAS_DIARIO_CATEGORIA = '''
+    SELECT dia, vendas, quantidade, total_centavos
+    FROM resumo_vendas_diario
+    WHERE dia >= ? AND dia <= ? AND categoria = ?
+'''
+
+SERIE_VENDAS_HORARIO = '''
+    SELECT substr(data, 1, 13), COUNT(*), SUM(quantidade), SUM(total_centavos)
+    FROM vendas
+    WHERE data >= ? AND data < ?
+    GROUP BY 1
+'''
+
+SERIE_VENDAS_HORARIO_PRODUTO = '''
+    SELECT substr(data, 1, 13), COUNT(*), SUM(quantidade), SUM(total_centavos)
+    FROM vendas
+    WHERE produto_id = ? AND data >= ? AND data < ?
+    GROUP BY 1
+'''
+
+# Category at sale time, as in the daily rollup (see database.RESUMOS_DDL)
+SERIE_VENDAS_HORARIO_CATEGORIA = '''
+    SELECT substr(data, 1, 13), COUNT(*), SUM(quantidade), SUM(total_centavos)
+    FROM vendas
+    WHERE data >= ? AND data < ? AND COALESCE(categoria, '') = ?
+    GROUP BY 1
+'''
+
+# Users. Failed logins are counted in memory (see limitador_login.py) and
+# added here in batches.
+USUARIOS_SOMAR_TENTATIVAS = 'UPDATE usuarios SET tentativas_login = tentativas_login + ? WHERE username = ?'
+
+# Login (see autenticacao.py): one lookup on the username index, then at most
+# one of the updates below
+USUARIOS_AUTENTICAR = '''
+    SELECT id, username, email, permissao, ultimo_login, senha, bloqueado, tentativas_login
+    FROM usuarios
+    WHERE username = ?
+'''
+
+USUARIOS_LOGIN_OK = '''
+    UPDATE usuarios
+    SET ultimo_login = ?, tentativas_login = 0, senha = COALESCE(?, senha)
+    WHERE id = ?
+'''
+
+# Adds the failures still pending in the limiter: concurrent failures that
+# were already flushed, or that block the account twice, are not overwritten
+USUARIOS_BLOQUEAR = 'UPDATE usuarios SET tentativas_login = tentativas_login + ?, bloqueado = 1 WHERE id = ?'
+
+# Role of an active user, to reopen an invalidated session (see sessao.py)
+USUARIOS_SESSAO = 'SELECT id, username, permissao FROM usuarios WHERE id = ? AND bloqueado = 0'
+
+# Registry of named statements, used by tooling and benchmarks
+QUERIES = {
+    nome: valor for nome, valor in dict(globals()).items()
+    if nome.isupper() and isinstance(valor, str) and not nome.endswith('_COLUNAS')
+}
+
+def get_query(nome: str) -> str:
+    """Return a registered statement by name"""
+    try:
+        return QUERIES[nome]
+    except KeyError:
+        raise KeyError(f"Query não registrada: {nome}")
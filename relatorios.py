@@ -1,66 +1,101 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from tkinter import messagebox
+from config import get_config
 from database import get_connection
-import clientes
-import produtos
+import queries
+from exportacao import exportar
+from datas import hoje, para_date
+from datas import FORMATO_DATA, FORMATO_DATA_HORA
+from dinheiro import para_reais, CENTAVOS_POR_REAL
+
+logger = logging.getLogger(__name__)
 
 def gerar_relatorio_vendas(caminho: str = 'relatorio_vendas.xlsx') -> None:
     try:
-        with get_connection() as conn:
-            df = pd.read_sql_query('SELECT * FROM vendas', conn)
-        if df.empty:
+        if not exportar('vendas', caminho):
             messagebox.showinfo("Relatório", "Nenhuma venda registrada.")
             return
-        df.to_excel(caminho, index=False)
         messagebox.showinfo("Relatório", f"Relatório de vendas exportado como '{caminho}'.")
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao gerar relatório de vendas: {e}")
 
 def gerar_relatorio_clientes(caminho: str = 'relatorio_clientes.xlsx') -> None:
     try:
-        lista = clientes.listar_clientes()
-        df = pd.DataFrame(lista, columns=["ID", "Nome", "CPF", "Email"])
-        if df.empty:
+        if not exportar('clientes', caminho):
             messagebox.showinfo("Relatório", "Nenhum cliente cadastrado.")
             return
-        df.to_excel(caminho, index=False)
         messagebox.showinfo("Relatório", f"Relatório de clientes exportado como '{caminho}'.")
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao gerar relatório de clientes: {str(e)}")
 
+# Category report columns: (result column, header)
+COLUNAS_CATEGORIA = (
+    ('categoria', 'Categoria'), ('descricao', 'Descrição'), ('produtos', 'Produtos'),
+    ('quantidade', 'Estoque'), ('valor_centavos', 'Valor em Estoque'), ('vendas', 'Vendas'),
+    ('quantidade_vendida', 'Itens Vendidos'), ('total_centavos', 'Faturamento'), ('giro', 'Giro'),
+)
+
+def resumo_por_categoria(data_inicio=None, data_fim=None, dias: int = 30) -> List[Dict]:
+    """
+    Stock value, sales and turnover per category, read from the rollup tables.
+    The period defaults to the last 'dias' days up to today; 'giro' is units
+    sold in the period divided by units currently on hand.
+    """
+    fim = para_date(data_fim) if data_fim else para_date(hoje())
+    inicio = para_date(data_inicio) if data_inicio else fim - timedelta(days=dias - 1)
+    with get_connection() as conn:
+        linhas = conn.execute(queries.RELATORIO_CATEGORIAS, (
+            inicio.strftime(FORMATO_DATA), fim.strftime(FORMATO_DATA)
+        )).fetchall()
+    resumo = []
+    for linha in linhas:
+        item = dict(linha)
+        item['categoria'] = item['categoria'] or 'Sem categoria'
+        resumo.append(item)
+    return resumo
+
+def construir_relatorio_categoria(caminho: str, data_inicio=None, data_fim=None) -> int:
+    """Write the category report without any UI. Returns the number of rows written."""
+    from openpyxl import Workbook
+    resumo = resumo_por_categoria(data_inicio, data_fim)
+    if not resumo:
+        return 0
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet('Categorias')
+    planilha.append([titulo for _, titulo in COLUNAS_CATEGORIA])
+    for item in resumo:
+        planilha.append([
+            item[coluna] / CENTAVOS_POR_REAL if coluna.endswith('_centavos') else item[coluna]
+            for coluna, _ in COLUNAS_CATEGORIA
+        ])
+    livro.save(caminho)
+    return len(resumo)
+
 def gerar_relatorio_categoria(caminho: str = 'relatorio_categoria.xlsx') -> None:
     try:
-        lista = produtos.listar_produtos()
-        if not lista:
-            messagebox.showinfo("Relatório", "Nenhum produto cadastrado.")
+        if not construir_relatorio_categoria(caminho):
+            messagebox.showinfo("Relatório", "Nenhuma categoria com produtos ou vendas.")
             return
-        df = pd.DataFrame(lista, columns=["ID", "Nome", "Quantidade", "Preço", "Validade"])
-        df['Categoria'] = df['Nome'].apply(lambda nome: nome.split()[0] if isinstance(nome, str) else 'Indefinido')
-        agrupado = df.groupby('Categoria').agg({
-            'Quantidade': 'sum',
-            'Preço': 'mean'
-        }).reset_index()
-        agrupado.to_excel(caminho, index=False)
         messagebox.showinfo("Relatório", f"Relatório por categoria exportado como '{caminho}'.")
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao gerar relatório por categoria: {str(e)}")
 
-def grafico_vendas() -> None:
+def grafico_vendas(intervalo: str = 'dia', dias: int = 90) -> None:
+    import matplotlib.pyplot as plt
+    from series import serie_vendas
     try:
-        with get_connection() as conn:
-            df = pd.read_sql_query('''
-                SELECT data, SUM(quantidade) AS total_vendido 
-                FROM vendas 
-                GROUP BY data
-            ''', conn)
-        if df.empty:
+        serie = serie_vendas(intervalo, dias=dias)
+        if not serie.quantidade.any():
             messagebox.showinfo("Gráfico", "Nenhuma venda encontrada para gerar gráfico.")
             return
-        df['data'] = pd.to_datetime(df['data'])
-        plt.style.use('seaborn-vignette')
         plt.figure(figsize=(10, 6))
-        plt.plot(df['data'], df['total_vendido'], marker='o', color='#007acc', linewidth=2)
+        plt.plot(serie.datas(), serie.quantidade, marker='o', color='#007acc', linewidth=2)
         plt.title('Vendas ao Longo do Tempo', fontsize=16)
         plt.xlabel('Data', fontsize=12)
         plt.ylabel('Quantidade Vendida', fontsize=12)
@@ -71,49 +106,234 @@ def grafico_vendas() -> None:
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao gerar gráfico de vendas: {e}")
 
-def gerar_relatorio_geral():
-    try:
-        gerar_relatorio_vendas('relatorio_vendas_geral.xlsx')
-        gerar_relatorio_clientes('relatorio_clientes_geral.xlsx')
-        gerar_relatorio_categoria('relatorio_categoria_geral.xlsx')
-        messagebox.showinfo("Relatório Geral", "Todos os relatórios foram gerados com sucesso!")
-    except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao gerar relatório geral: {e}")
+def gerar_relatorio_geral(destino: Optional[str] = None):
+    """
+    Build the full report pack in parallel worker processes, against a
+    snapshot of the database, behind a progress window with cancellation.
+    """
+    from relatorios_paralelos import gui_gerar_pacote
+    gui_gerar_pacote(destino)
 
 def obter_vendas_recentes(limite: int = 10):
     """Retorna as vendas mais recentes do banco de dados"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT v.id, v.data, u.username as cliente, p.nome as produto, 
-                       v.quantidade, v.total
-                FROM vendas v
-                JOIN usuarios u ON v.cliente_id = u.id
-                JOIN produtos p ON v.produto_id = p.id
-                ORDER BY v.data DESC
-                LIMIT ?
-            ''', (limite,))
-            return cursor.fetchall()
+            cursor.execute(queries.VENDAS_RECENTES, (limite,))
+            # Total is returned in reais: (id, data, cliente, produto, quantidade, total)
+            return [tuple(venda[:5]) + (para_reais(venda[5]),) for venda in cursor.fetchall()]
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao obter vendas recentes: {e}")
-        return []
+        logger.error(f"Erro ao obter vendas recentes: {e}")
+        raise
 
 def obter_vendas_por_periodo(data_inicio=None, data_fim=None):
-    """Retorna vendas agregadas por data dentro do período especificado"""
+    """Retorna (dia, total em reais) para cada dia do período, com zero nos dias sem vendas"""
+    from series import serie_vendas
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            query = '''
-                SELECT data, SUM(total) as total_vendas
-                FROM vendas
-                WHERE (? IS NULL OR data >= ?)
-                  AND (? IS NULL OR data <= ?)
-                GROUP BY data
-                ORDER BY data
-            '''
-            cursor.execute(query, (data_inicio, data_inicio, data_fim, data_fim))
-            return cursor.fetchall()
+        serie = serie_vendas('dia', data_inicio, data_fim)
+        return [(str(dia), para_reais(total)) for dia, total in zip(serie.inicio, serie.total_centavos.tolist())]
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao obter vendas por período: {e}")
-        return []
+        logger.error(f"Erro ao obter vendas por período: {e}")
+        raise
+
+# ================= EXPORTAÇÃO ANALÍTICA (PARQUET) =================
+
+# Table -> (page query, watermark kind, column types). 'id' watermarks suit
+# append-only tables; 'atualizacao' ones select rows changed since the last
+# cutoff through the ultima_atualizacao index. Money stays in integer
+# centavos, so nothing is lost on the way to the BI tools.
+TABELAS_ANALITICAS = {
+    'vendas': (queries.VENDAS_ANALITICO, 'id', {
+        'id': 'int64', 'data': 'timestamp', 'produto_id': 'int64', 'quantidade': 'int64',
+        'preco_unitario_centavos': 'int64', 'total_centavos': 'int64', 'cliente_id': 'int64',
+        'forma_pagamento': 'string',
+    }),
+    'produtos': (queries.PRODUTOS_ANALITICO, 'atualizacao', {
+        'id': 'int64', 'nome': 'string', 'quantidade': 'int64', 'preco_centavos': 'int64',
+        'validade': 'date', 'categoria': 'string', 'codigo_barras': 'string', 'fornecedor_id': 'int64',
+        'data_cadastro': 'timestamp', 'ultima_atualizacao': 'timestamp',
+    }),
+    'clientes': (queries.CLIENTES_ANALITICO, 'atualizacao', {
+        'id': 'int64', 'nome': 'string', 'cpf': 'string', 'email': 'string', 'telefone': 'string',
+        'endereco': 'string', 'data_cadastro': 'timestamp', 'ultima_atualizacao': 'timestamp',
+    }),
+}
+
+ARQUIVO_MARCAS = '_marcas.json'
+
+def _carregar_marcas(destino: str) -> Dict[str, Dict]:
+    caminho = os.path.join(destino, ARQUIVO_MARCAS)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def _salvar_marcas(destino: str, marcas: Dict[str, Dict]):
+    caminho = os.path.join(destino, ARQUIVO_MARCAS)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(marcas, arquivo, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+
+def ler_alteracoes(tabela: str, marca: Dict, limite: int, ate: str) -> Tuple[Dict, Iterator[Tuple[List[str], List[tuple]]]]:
+    """
+    Pages of rows added or changed since 'marca' (the watermark of the last
+    export), each as (column names, rows). Rows changed at or after 'ate'
+    are left for the next run.
+
+    Returns:
+        (new watermark, page iterator); the watermark is only valid once the
+        iterator has been exhausted.
+    """
+    consulta, tipo_marca, _ = TABELAS_ANALITICAS[tabela]
+    nova_marca = dict(marca)
+
+    def paginas():
+        ultimo_id = marca.get('id', 0)
+        ultima = marca.get('ate', '')
+        while True:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                if tipo_marca == 'id':
+                    linhas = cursor.execute(consulta, (ultimo_id, limite)).fetchall()
+                else:
+                    linhas = cursor.execute(consulta, (ultima, ate, ultimo_id, limite)).fetchall()
+                nomes = [coluna[0] for coluna in cursor.description]
+            if not linhas:
+                break
+            if tipo_marca == 'id':
+                ultimo_id = nova_marca['id'] = linhas[-1][0]
+            else:
+                # Keyset on (ultima_atualizacao, id) within [desde, ate)
+                ultima = linhas[-1][nomes.index('ultima_atualizacao')]
+                ultimo_id = linhas[-1][0]
+            yield nomes, linhas
+        if tipo_marca != 'id':
+            nova_marca['ate'] = ate
+
+    return nova_marca, paginas()
+
+def _tipos_arrow(pa):
+    return {
+        'int64': pa.int64(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('s'),
+        'date': pa.date32(),
+    }
+
+def _tabela_arrow(pa, pc, nomes: List[str], linhas: List[tuple], colunas: Dict[str, str]):
+    """Column-wise conversion of a page; text timestamps are parsed vectorized"""
+    tipos = _tipos_arrow(pa)
+    dados = {}
+    for nome, valores in zip(nomes, zip(*linhas)):
+        tipo = colunas.get(nome, 'string')
+        if tipo == 'timestamp':
+            dados[nome] = pc.strptime(pa.array(valores, pa.string()), format='%Y-%m-%d %H:%M:%S', unit='s')
+        elif tipo == 'date':
+            dados[nome] = pc.strptime(pa.array(valores, pa.string()), format='%Y-%m-%d', unit='s').cast(pa.date32())
+        else:
+            dados[nome] = pa.array(valores, tipos[tipo])
+    return pa.table(dados)
+
+def _exportar_tabela_parquet(tabela: str, destino: str, marca: Dict, limite: int, ate: str,
+                             progresso=None, cancelar: Optional[threading.Event] = None) -> Tuple[Optional[int], Dict]:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    _, tipo_marca, colunas = TABELAS_ANALITICAS[tabela]
+    tipos = _tipos_arrow(pa)
+    esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in colunas.items()])
+    diretorio = os.path.join(destino, tabela)
+    # Files are named after the watermark they start from, so a run that
+    # crashed before saving its watermark is overwritten, not duplicated
+    inicio = str(marca.get('id', 0)) if tipo_marca == 'id' else (marca.get('ate') or '0')
+    nome_arquivo = 'parte-' + ''.join(c for c in inicio if c.isalnum()) + '.parquet'
+    for antigo in glob.glob(os.path.join(diretorio, 'mes=*', nome_arquivo)):
+        os.remove(antigo)
+
+    nova_marca, paginas = ler_alteracoes(tabela, marca, limite, ate)
+    escritores = {}
+    escritas = 0
+    try:
+        for nomes, linhas in paginas:
+            if cancelar is not None and cancelar.is_set():
+                raise InterruptedError
+            pagina = _tabela_arrow(pa, pc, nomes, linhas, colunas)
+            for mes in pc.unique(pagina['mes']).to_pylist():
+                if mes not in escritores:
+                    particao = os.path.join(diretorio, f"mes={mes}")
+                    os.makedirs(particao, exist_ok=True)
+                    temporario = os.path.join(particao, '.' + nome_arquivo + '.tmp')
+                    escritores[mes] = (pq.ParquetWriter(temporario, esquema), temporario)
+                parte = pagina.filter(pc.equal(pagina['mes'], mes)).select(esquema.names)
+                escritores[mes][0].write_table(parte.cast(esquema))
+            escritas += len(linhas)
+            if progresso:
+                progresso(escritas, None)
+        for mes, (escritor, temporario) in escritores.items():
+            escritor.close()
+            os.replace(temporario, os.path.join(diretorio, f"mes={mes}", nome_arquivo))
+    except BaseException as e:
+        for escritor, temporario in escritores.values():
+            escritor.close()
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        if isinstance(e, InterruptedError):
+            return None, marca
+        raise
+    return escritas, nova_marca
+
+def exportar_analitico(destino: Optional[str] = None, tabelas: Sequence[str] = tuple(TABELAS_ANALITICAS),
+                       progresso=None, cancelar: Optional[threading.Event] = None) -> Dict[str, int]:
+    """
+    Append rows added or changed since the last run to a Parquet dataset,
+    one directory per table, partitioned by month (mes=AAAA-MM).
+
+    Sales are partitioned by sale date. Products and clients are written as
+    change records partitioned by ultima_atualizacao; readers keep the latest
+    record per id. Watermarks live in <destino>/_marcas.json and are saved
+    per table only after its files are in place, so each run costs O(delta).
+    Requires pyarrow.
+
+    Returns:
+        Rows written per table (tables not finished because of cancellation
+        are left out and will be retried in full on the next run)
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("A exportação Parquet requer o pacote pyarrow (pip install pyarrow)")
+    config = get_config()['analitico']
+    destino = destino or config['diretorio']
+    os.makedirs(destino, exist_ok=True)
+    ate = (datetime.now() - timedelta(seconds=config['atraso_segundos'])).strftime(FORMATO_DATA_HORA)
+    marcas = _carregar_marcas(destino)
+    resultado = {}
+    for tabela in tabelas:
+        escritas, nova_marca = _exportar_tabela_parquet(
+            tabela, destino, marcas.get(tabela, {}), config['linhas_por_lote'], ate, progresso, cancelar
+        )
+        if escritas is None:
+            logger.info(f"Exportação analítica cancelada em {tabela}")
+            break
+        marcas[tabela] = nova_marca
+        _salvar_marcas(destino, marcas)
+        resultado[tabela] = escritas
+    logger.info(f"Exportação analítica para {destino}: {resultado}")
+    return resultado
+
+def gui_exportar_analitico(destino: Optional[str] = None):
+    """Run exportar_analitico on a worker thread behind a progress window"""
+    from utils import ProgressDialog
+
+    def concluir(janela, resultado: Dict[str, int]):
+        resumo = ', '.join(f"{tabela}: {total}" for tabela, total in resultado.items())
+        janela.set_status(f"Linhas novas ou alteradas - {resumo or 'nenhuma'}")
+
+    ProgressDialog(
+        "Exportação analítica",
+        "Exportando Parquet...",
+        lambda progresso, cancelar: exportar_analitico(destino, progresso=progresso, cancelar=cancelar),
+        on_done=concluir
+    )
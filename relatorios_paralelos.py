@@ -0,0 +1,126 @@
+"""
+Parallel report pack for Integre+ application.
+The sales, client and category reports are independent, so each one is built
+in its own worker process against a read-only snapshot of the database. The
+snapshot keeps the pack consistent while the shop keeps selling, and the
+workers never contend with the main process for the write lock.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Optional, Sequence
+
+from database import create_snapshot, read_only_uri
+
+logger = logging.getLogger(__name__)
+
+# Progress callback: (relatorios_concluidos, total)
+Progresso = Callable[[int, Optional[int]], None]
+
+# tipo -> default file name
+RELATORIOS = {
+    'vendas': 'relatorio_vendas.xlsx',
+    'clientes': 'relatorio_clientes.xlsx',
+    'categoria': 'relatorio_categoria.xlsx',
+}
+
+class RelatorioError(Exception):
+    """Exception raised when one or more reports of the pack fail"""
+    pass
+
+def _executar(tipo: str, banco: str, caminho: str, cancelar) -> Optional[int]:
+    """Worker entry point: build one report from the snapshot 'banco'"""
+    import config
+    config.DB_CONFIG['name'] = banco  # before anything opens a connection
+    if cancelar.is_set():
+        return None
+    if tipo == 'categoria':
+        from relatorios import construir_relatorio_categoria
+        return construir_relatorio_categoria(caminho)
+    from exportacao import exportar
+    return exportar(tipo, caminho, cancelar=cancelar)
+
+def gerar_pacote(destino: str = '.', tipos: Sequence[str] = tuple(RELATORIOS),
+                 progresso: Optional[Progresso] = None,
+                 cancelar: Optional[threading.Event] = None,
+                 processos: Optional[int] = None) -> Optional[Dict[str, Optional[int]]]:
+    """
+    Build the reports in 'tipos' concurrently into the 'destino' directory.
+
+    Returns:
+        Rows written per report, or None if cancelled (finished files are kept)
+    """
+    desconhecidos = [tipo for tipo in tipos if tipo not in RELATORIOS]
+    if desconhecidos:
+        raise RelatorioError(f"Relatório desconhecido: {', '.join(desconhecidos)}")
+    os.makedirs(destino, exist_ok=True)
+    processos = processos or min(len(tipos), os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory(prefix='integre_relatorios_') as diretorio:
+        banco = read_only_uri(create_snapshot(os.path.join(diretorio, 'snapshot.db')))
+        # 'spawn' keeps Tk and open SQLite handles out of the workers
+        contexto = multiprocessing.get_context('spawn')
+        with contexto.Manager() as gerente, \
+                ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+            evento = gerente.Event()
+            pendentes = {
+                executor.submit(_executar, tipo, banco, os.path.join(destino, RELATORIOS[tipo]), evento): tipo
+                for tipo in tipos
+            }
+            resultados: Dict[str, Optional[int]] = {}
+            erros = []
+            if progresso:
+                progresso(0, len(tipos))
+            while pendentes:
+                if cancelar is not None and cancelar.is_set() and not evento.is_set():
+                    evento.set()
+                    for futuro in pendentes:
+                        futuro.cancel()
+                prontos, _ = wait(pendentes, timeout=0.2, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    tipo = pendentes.pop(futuro)
+                    if futuro.cancelled():
+                        continue
+                    try:
+                        resultados[tipo] = futuro.result()
+                    except Exception as e:
+                        logger.error(f"Relatório {tipo} falhou: {e}")
+                        erros.append(f"{tipo}: {e}")
+                if prontos and progresso:
+                    progresso(len(tipos) - len(pendentes), len(tipos))
+
+    if cancelar is not None and cancelar.is_set():
+        logger.info(f"Pacote de relatórios cancelado; concluídos: {', '.join(resultados) or 'nenhum'}")
+        return None
+    if erros:
+        raise RelatorioError("; ".join(erros))
+    logger.info(f"Pacote de relatórios gerado em {destino}: {resultados}")
+    return resultados
+
+# ================= INTERFACE GRÁFICA =================
+
+def gui_gerar_pacote(destino: Optional[str] = None):
+    """Ask for a directory and build the pack behind a progress window"""
+    from tkinter import filedialog
+    from utils import ProgressDialog
+
+    if destino is None:
+        destino = filedialog.askdirectory(title="Pasta do pacote de relatórios")
+        if not destino:
+            return
+
+    def concluir(janela, resultados: Optional[Dict[str, Optional[int]]]):
+        if resultados is None:
+            janela.set_status("Geração cancelada")
+        else:
+            janela.set_status(f"{len(resultados)} relatório(s) gerado(s) em '{destino}'")
+
+    ProgressDialog(
+        "Pacote de Relatórios",
+        "Gerando relatórios em paralelo...",
+        lambda progresso, cancelar: gerar_pacote(destino, progresso=progresso, cancelar=cancelar),
+        on_done=concluir
+    )
@@ -0,0 +1,162 @@
+"""
+Password hashing for Integre+ application.
+Every bcrypt hash is created and checked here. The cost comes from a
+per-machine calibration (the highest cost whose verification still fits the
+target time, saved to a JSON file) or, before calibrating, from
+AUTENTICACAO_CONFIG['bcrypt_rounds']. Hashes stored with another cost are
+replaced on the next successful login, so a deployment converges on the
+calibrated cost without forcing password resets.
+
+Usage: python senhas.py [alvo_ms]   (calibrate this machine)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import bcrypt
+
+from config import get_config
+from datas import agora
+
+logger = logging.getLogger(__name__)
+
+Hash = Union[bytes, str]
+
+# bcrypt's own limits
+CUSTO_MINIMO_BCRYPT = 4
+CUSTO_MAXIMO_BCRYPT = 31
+
+_lock = threading.Lock()
+_custo: Optional[int] = None
+
+def _codificar(valor: Hash) -> bytes:
+    return valor if isinstance(valor, bytes) else valor.encode('utf-8')
+
+def _caminho_calibracao() -> str:
+    return get_config()['autenticacao']['calibracao']
+
+def carregar_calibracao() -> Optional[Dict]:
+    """Saved calibration for this machine, or None"""
+    caminho = _caminho_calibracao()
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if CUSTO_MINIMO_BCRYPT <= int(dados['custo']) <= CUSTO_MAXIMO_BCRYPT:
+            return dados
+        logger.warning(f"Calibração de senha ignorada: custo inválido em {caminho}")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Calibração de senha ignorada: {e}")
+    return None
+
+def custo_atual() -> int:
+    """Cost for new hashes: the calibrated one, else the configured default"""
+    global _custo
+    with _lock:
+        if _custo is None:
+            calibracao = carregar_calibracao()
+            _custo = int(calibracao['custo']) if calibracao else get_config()['autenticacao']['bcrypt_rounds']
+        return _custo
+
+def redefinir_custo():
+    """Forget the cached cost (re-read on next use)"""
+    global _custo
+    with _lock:
+        _custo = None
+
+def gerar_hash(senha: str, custo: Optional[int] = None) -> bytes:
+    """bcrypt hash of 'senha' at 'custo' (default custo_atual())"""
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=custo or custo_atual()))
+
+def custo_do_hash(hash_armazenado: Hash) -> Optional[int]:
+    """Cost recorded in a '$2b$12$...' hash, None if it is not bcrypt"""
+    partes = _codificar(hash_armazenado).split(b'$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+def verificar(senha: str, hash_armazenado: Optional[Hash]) -> bool:
+    """True if 'senha' matches; malformed or missing hashes never match"""
+    if not hash_armazenado:
+        return False
+    try:
+        return bcrypt.checkpw(senha.encode('utf-8'), _codificar(hash_armazenado))
+    except ValueError:
+        logger.warning("Hash de senha inválido no banco")
+        return False
+
+def precisa_rehash(hash_armazenado: Hash) -> bool:
+    """True if the hash was made with a cost other than custo_atual()"""
+    return custo_do_hash(hash_armazenado) != custo_atual()
+
+def verificar_e_atualizar(senha: str, hash_armazenado: Optional[Hash]) -> Tuple[bool, Optional[bytes]]:
+    """
+    Check a password and, when it matches but the stored cost is outdated,
+    hash it again at the current cost.
+
+    Returns:
+        (matches, new hash to store or None)
+    """
+    if not verificar(senha, hash_armazenado):
+        return False, None
+    if precisa_rehash(hash_armazenado):
+        return True, gerar_hash(senha)
+    return True, None
+
+# ================= CALIBRATION =================
+
+def medir_verificacao(custo: int, repeticoes: int = 3) -> float:
+    """Best verification time at 'custo', in milliseconds"""
+    senha = b'calibracao-Integre+'
+    hash_teste = bcrypt.hashpw(senha, bcrypt.gensalt(rounds=custo))
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(senha, hash_teste)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+def calibrar(alvo_ms: Optional[float] = None, salvar: bool = True) -> Dict:
+    """
+    Pick the highest cost whose verification takes at most 'alvo_ms' on this
+    machine, never below AUTENTICACAO_CONFIG['custo_minimo'].
+
+    Each extra cost unit doubles bcrypt's work, so the time measured at the
+    minimum cost predicts the others; the prediction is then confirmed by
+    measuring the chosen cost (and stepping down while it is too slow).
+    """
+    config = get_config()['autenticacao']
+    alvo_ms = alvo_ms or config['tempo_alvo_ms']
+    minimo = max(config['custo_minimo'], CUSTO_MINIMO_BCRYPT)
+
+    base = medir_verificacao(minimo)
+    custo = minimo
+    while custo < CUSTO_MAXIMO_BCRYPT and base * 2 ** (custo + 1 - minimo) <= alvo_ms:
+        custo += 1
+    tempo = medir_verificacao(custo) if custo != minimo else base
+    while tempo > alvo_ms and custo > minimo:
+        custo -= 1
+        tempo = medir_verificacao(custo)
+
+    calibracao = {'custo': custo, 'tempo_ms': round(tempo, 1), 'alvo_ms': alvo_ms, 'calibrado_em': agora()}
+    if salvar:
+        caminho = _caminho_calibracao()
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(calibracao, f, indent=2)
+        os.replace(temporario, caminho)
+        redefinir_custo()
+        logger.info(f"Custo de senha calibrado: {custo} ({tempo:.0f} ms, alvo {alvo_ms:.0f} ms)")
+    return calibracao
+
+if __name__ == "__main__":
+    import sys
+    from bootstrap import configurar_logging
+    configurar_logging()
+    resultado = calibrar(float(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print(f"Custo {resultado['custo']}: {resultado['tempo_ms']} ms por verificação "
+          f"(alvo {resultado['alvo_ms']} ms), salvo em {_caminho_calibracao()}")
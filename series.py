@@ -0,0 +1,131 @@
+"""
+Sales time series for Integre+ application.
+Every sales chart reads the same compact NumPy arrays: one point per day,
+week or month over the requested range, with empty buckets filled with zero.
+Local-time daily series come from the resumo_vendas_diario rollup; product
+filters and other timezones use an index range scan over vendas aggregated
+by hour.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from database import get_connection
+from datas import DataLike, FORMATO_DATA, FORMATO_DATA_HORA, hoje, para_date
+from dinheiro import CENTAVOS_POR_REAL
+import queries
+
+INTERVALOS = ('dia', 'semana', 'mes')
+
+# Label format per bucket size
+FORMATOS_ROTULO = {'dia': '%d/%m', 'semana': '%d/%m', 'mes': '%m/%Y'}
+
+class Serie(NamedTuple):
+    """Aligned arrays, one position per bucket ('inicio' is the bucket's first day)"""
+    intervalo: str
+    inicio: np.ndarray          # datetime64[D]
+    vendas: np.ndarray          # int64
+    quantidade: np.ndarray      # int64
+    total_centavos: np.ndarray  # int64
+
+    @property
+    def total_reais(self) -> np.ndarray:
+        return self.total_centavos / CENTAVOS_POR_REAL
+
+    def datas(self) -> List[date]:
+        return self.inicio.astype(object).tolist()
+
+    def rotulos(self) -> List[str]:
+        formato = FORMATOS_ROTULO[self.intervalo]
+        return [dia.strftime(formato) for dia in self.datas()]
+
+def serie_vazia(intervalo: str = 'dia') -> Serie:
+    """A series with no buckets, for callers that must always draw something"""
+    vazio = np.zeros(0, dtype=np.int64)
+    return Serie(intervalo, np.zeros(0, dtype='datetime64[D]'), vazio, vazio, vazio)
+
+def _inicio_balde(dias: np.ndarray, intervalo: str) -> np.ndarray:
+    """First day of the bucket containing each day (weeks start on Monday)"""
+    if intervalo == 'semana':
+        # 1970-01-01 was a Thursday, so day number + 3 is 0 on Mondays
+        return dias - (dias.astype(np.int64) + 3) % 7
+    if intervalo == 'mes':
+        return dias.astype('datetime64[M]').astype('datetime64[D]')
+    return dias
+
+def _eixo(inicio: date, fim: date, intervalo: str) -> np.ndarray:
+    """Every bucket start between 'inicio' and 'fim' (inclusive)"""
+    primeiro, ultimo = _inicio_balde(np.array([inicio, fim], dtype='datetime64[D]'), intervalo)
+    if intervalo == 'mes':
+        return np.arange(primeiro.astype('datetime64[M]'), ultimo.astype('datetime64[M]') + 1).astype('datetime64[D]')
+    return np.arange(primeiro, ultimo + 1, 7 if intervalo == 'semana' else 1)
+
+def _linhas_diarias(inicio: date, fim: date, produto_id: Optional[int],
+                    categoria: Optional[str], fuso: Optional[str]) -> list:
+    """(dia, vendas, quantidade, total_centavos) rows for the local-time days in range"""
+    if fuso is None and produto_id is None:
+        consulta, params = queries.SERIE_VENDAS_DIARIO, [inicio.strftime(FORMATO_DATA), fim.strftime(FORMATO_DATA)]
+        if categoria is not None:
+            consulta = queries.SERIE_VENDAS_DIARIO_CATEGORIA
+            params.append(categoria)
+        with get_connection() as conn:
+            return conn.execute(consulta, params).fetchall()
+
+    # Another timezone can move a sale across midnight, so read one extra
+    # stored day on each side and bucket by hour
+    de = (inicio - timedelta(days=1)).strftime(FORMATO_DATA) + ' 00:00:00'
+    ate = (fim + timedelta(days=2)).strftime(FORMATO_DATA) + ' 00:00:00'
+    if produto_id is not None:
+        consulta, params = queries.SERIE_VENDAS_HORARIO_PRODUTO, (produto_id, de, ate)
+    elif categoria is not None:
+        consulta, params = queries.SERIE_VENDAS_HORARIO_CATEGORIA, (de, ate, categoria)
+    else:
+        consulta, params = queries.SERIE_VENDAS_HORARIO, (de, ate)
+    with get_connection() as conn:
+        horas = conn.execute(consulta, params).fetchall()
+
+    zona = ZoneInfo(fuso) if fuso else None
+    linhas = []
+    for hora, vendas, quantidade, total in horas:
+        momento = datetime.strptime(hora + ':00:00', FORMATO_DATA_HORA)
+        if zona is not None:
+            momento = momento.astimezone(zona)  # naive values are the machine's local time
+        dia = momento.date()
+        if inicio <= dia <= fim:
+            linhas.append((dia.strftime(FORMATO_DATA), vendas, quantidade, total))
+    return linhas
+
+def serie_vendas(intervalo: str = 'dia', inicio: Optional[DataLike] = None, fim: Optional[DataLike] = None,
+                 produto_id: Optional[int] = None, categoria: Optional[str] = None,
+                 fuso: Optional[str] = None, dias: int = 30) -> Serie:
+    """
+    Sales per day, week or month between 'inicio' and 'fim' (inclusive).
+
+    Args:
+        intervalo: 'dia', 'semana' (Monday to Sunday) or 'mes'
+        inicio, fim: Range of days; defaults to the last 'dias' days up to today
+        produto_id: Only this product (takes precedence over 'categoria')
+        categoria: Only this category ('' for products without one)
+        fuso: IANA timezone for the day boundaries, e.g. 'America/Manaus';
+            None uses the local time the sales were recorded in
+
+    Returns:
+        A Serie with one entry per bucket, zero where nothing was sold
+    """
+    if intervalo not in INTERVALOS:
+        raise ValueError(f"Intervalo inválido: {intervalo} (use {', '.join(INTERVALOS)})")
+    fim = para_date(fim) if fim else para_date(hoje())
+    inicio = para_date(inicio) if inicio else fim - timedelta(days=dias - 1)
+    if inicio > fim:
+        raise ValueError("Data inicial posterior à data final")
+
+    eixo = _eixo(inicio, fim, intervalo)
+    valores = np.zeros((3, len(eixo)), dtype=np.int64)
+    linhas = _linhas_diarias(inicio, fim, produto_id, categoria, fuso)
+    if linhas:
+        dias_vendidos = np.array([linha[0] for linha in linhas], dtype='datetime64[D]')
+        posicoes = np.searchsorted(eixo, _inicio_balde(dias_vendidos, intervalo))
+        np.add.at(valores, (slice(None), posicoes), np.array([linha[1:] for linha in linhas], dtype=np.int64).T)
+    return Serie(intervalo, eixo, valores[0], valores[1], valores[2])
@@ -0,0 +1,443 @@
+"""
+Central server for Integre+ application.
+When several checkouts open the same integre_plus.db on a network share,
+each sale takes its own write transaction, and concurrent writers fail with
+"database is locked". In server mode one process on the machine holding the
+file owns the database, and the checkouts are thin clients (ClienteTerminal)
+talking to it over TCP:
+
+- writes go through one queue to a single writer thread (EscritorAgrupado).
+  It commits everything queued while the previous commit ran in a single
+  transaction (group commit), so one fsync covers many sales. Each write
+  runs in its own SAVEPOINT, so a failing sale is undone alone, and a sale is
+  acknowledged only after its batch commits
+- reads run concurrently on the connection threads, each with its own
+  persistent connection. The file is switched to WAL, so readers neither
+  wait for the writer nor block it
+- a connection logs in once (see autenticacao and sessao); every operation
+  is then checked against the session's permissions in memory
+- each connection holds a worker for its whole life, so at most 'terminais'
+  checkouts are connected at once. One more is refused right away with
+  {"ok": false, "erro": "Servidor lotado..."} instead of waiting for a free
+  worker, and TCP keepalive frees the slot of a checkout whose link died
+
+Protocol: one JSON object per line each way. Request
+{"op": "...", "args": {...}}; response {"ok": true, "resultado": ...} or
+{"ok": false, "erro": "..."}.
+
+Usage: python servidor.py [porta] [banco]
+"""
+import json
+import logging
+import queue
+import socket
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from alertas_validade import motor_validade
+from api import PoolDeTrabalhadoresMixin
+import autenticacao
+import clientes
+from config import get_config
+from database import DatabaseError, enable_wal_mode, release_thread_connection, transaction
+from datas import agora
+from dinheiro import para_reais
+from lotes import alocador_fefo
+import produtos
+import queries
+from sessao import Sessao, sessoes
+import vendas
+
+logger = logging.getLogger(__name__)
+
+class ErroServidor(Exception):
+    """Operation refused; the message is meant for the user"""
+    pass
+
+# ================= ESCRITA AGRUPADA =================
+
+class Escrita(NamedTuple):
+    executar: Callable[[sqlite3.Connection], Any]   # runs inside the batch transaction
+    desfeita: Optional[Callable[[], None]]          # called if the write is rolled back
+    futuro: Future
+
+class EscritorAgrupado:
+    """
+    Single writer thread. Writes are queued with enviar() and committed in
+    batches of up to 'max_lote'; the returned Future resolves once the batch
+    commits (or with the write's exception).
+    """
+
+    def __init__(self, max_lote: Optional[int] = None, espera_ms: Optional[float] = None):
+        config = get_config()['servidor']
+        self.max_lote = max_lote or config['escritas_por_lote']
+        self.espera = (config['espera_lote_ms'] if espera_ms is None else espera_ms) / 1000
+        self.lotes = 0
+        self.escritas = 0
+        self._fila = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='escritor', daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        """Commit what is queued, then stop the thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(None)
+            thread.join()
+
+    def enviar(self, executar: Callable[[sqlite3.Connection], Any],
+               desfeita: Optional[Callable[[], None]] = None) -> Future:
+        futuro = Future()
+        self._fila.put(Escrita(executar, desfeita, futuro))
+        return futuro
+
+    def _executar(self):
+        try:
+            self._escrever_lotes()
+        finally:
+            release_thread_connection()
+
+    def _escrever_lotes(self):
+        while True:
+            escrita = self._fila.get()
+            if escrita is None:
+                return
+            if self.espera:
+                time.sleep(self.espera)
+            lote, parar = [escrita], False
+            while len(lote) < self.max_lote:
+                try:
+                    escrita = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if escrita is None:
+                    parar = True
+                    break
+                lote.append(escrita)
+            self._gravar(lote)
+            if parar:
+                return
+
+    def _gravar(self, lote):
+        resultados = []
+        try:
+            with transaction() as conn:
+                for escrita in lote:
+                    conn.execute("SAVEPOINT escrita")
+                    try:
+                        resultados.append((escrita, escrita.executar(conn), None))
+                        conn.execute("RELEASE escrita")
+                    except Exception as e:
+                        # If SQLite already dropped the transaction this fails
+                        # too, and the whole batch is reported as failed
+                        conn.execute("ROLLBACK TO escrita")
+                        conn.execute("RELEASE escrita")
+                        if not isinstance(e, ErroServidor):
+                            logger.exception("Escrita desfeita")
+                        resultados.append((escrita, None, e))
+        except Exception as e:
+            logger.exception(f"Lote de {len(lote)} escritas desfeito")
+            resultados = [(escrita, None, e) for escrita in lote]
+        self.lotes += 1
+        self.escritas += len(lote)
+        for escrita, resultado, erro in resultados:
+            if erro is None:
+                escrita.futuro.set_result(resultado)
+                continue
+            if escrita.desfeita is not None:
+                escrita.desfeita()
+            escrita.futuro.set_exception(erro)
+
+escritor = EscritorAgrupado()
+
+# ================= OPERAÇÕES =================
+
+def _inteiro(args: Dict, nome: str, padrao: Optional[int] = None, minimo: int = 0) -> Optional[int]:
+    valor = args.get(nome, padrao)
+    if valor is padrao:
+        return valor
+    if type(valor) is not int or valor < minimo:
+        raise ErroServidor(f"Parâmetro inválido: {nome}")
+    return valor
+
+def _limite(args: Dict) -> int:
+    return min(_inteiro(args, 'limite', 100, 1), get_config()['servidor']['pagina_maxima'])
+
+def _login(terminal: 'ManipuladorTerminal', args: Dict):
+    username, senha = args.get('username'), args.get('senha')
+    if not isinstance(username, str) or not isinstance(senha, str):
+        raise ErroServidor("Informe 'username' e 'senha'")
+    resultado = autenticacao.autenticar(username, senha, terminal.client_address[0])
+    if resultado.situacao == autenticacao.LIMITADO:
+        raise ErroServidor(f"Muitas tentativas. Tente novamente em {int(resultado.espera) + 1} segundos.")
+    if resultado.situacao in (autenticacao.BLOQUEADO, autenticacao.BLOQUEADO_AGORA):
+        raise ErroServidor("Conta bloqueada. Procure o administrador.")
+    if not resultado.ok:
+        raise ErroServidor("Usuário ou senha inválidos")
+    sessoes.encerrar(terminal.sessao)
+    terminal.sessao = sessoes.abrir(resultado.usuario)
+    return {'username': terminal.sessao.username, 'papel': terminal.sessao.papel,
+            'permissoes': sorted(terminal.sessao.permissoes)}
+
+def _venda(terminal: 'ManipuladorTerminal', args: Dict):
+    produto_id = _inteiro(args, 'produto_id', minimo=1)
+    quantidade = _inteiro(args, 'quantidade', minimo=1)
+    cliente_id = _inteiro(args, 'cliente_id')
+    forma_pagamento = args.get('forma_pagamento', 'Dinheiro')
+    if produto_id is None or quantidade is None or not isinstance(forma_pagamento, str):
+        raise ErroServidor("Informe 'produto_id' e 'quantidade'")
+
+    def executar(conn):
+        # Catalog price, read in the same transaction as the stock decrement
+        linha = conn.execute(queries.PRODUTOS_PRECO, (produto_id,)).fetchone()
+        if linha is None:
+            raise ErroServidor("Produto não encontrado.")
+        venda_id = vendas.lancar_venda(conn, produto_id, quantidade, linha[0],
+                                       cliente_id, forma_pagamento, agora())
+        if venda_id is None:
+            raise ErroServidor("Estoque insuficiente.")
+        return {'venda_id': venda_id, 'total': para_reais(quantidade * linha[0])}
+
+    # A rolled back sale leaves the in-memory lot heap ahead of the database
+    resultado = escritor.enviar(executar, lambda: alocador_fefo.descartar(produto_id)).result()
+    motor_validade.estoque_alterado(produto_id)
+    logger.info(f"Venda {resultado['venda_id']} registrada", extra={
+        'venda_id': resultado['venda_id'], 'produto_id': produto_id})
+    return resultado
+
+def _produto(terminal: 'ManipuladorTerminal', args: Dict):
+    produto = produtos.buscar_produto(_inteiro(args, 'id', 0))
+    if produto is None:
+        raise ErroServidor("Produto não encontrado.")
+    produto.pop('imagem', None)
+    return produto
+
+def _produtos(terminal: 'ManipuladorTerminal', args: Dict):
+    return produtos.pagina_produtos(_inteiro(args, 'apos', 0), _limite(args), str(args.get('nome', '')))
+
+def _clientes(terminal: 'ManipuladorTerminal', args: Dict):
+    return clientes.pagina_clientes(_inteiro(args, 'apos', 0), _limite(args), str(args.get('busca', '')))
+
+def _vendas(terminal: 'ManipuladorTerminal', args: Dict):
+    return vendas.pagina_vendas(_inteiro(args, 'apos', 0), _limite(args))
+
+def _estatisticas(terminal: 'ManipuladorTerminal', args: Dict):
+    return {'lotes': escritor.lotes, 'escritas': escritor.escritas}
+
+class Operacao(NamedTuple):
+    funcao: Callable[['ManipuladorTerminal', Dict], Any]
+    permissao: Optional[str]        # None: no login needed; '': any session
+
+OPERACOES: Dict[str, Operacao] = {
+    'login': Operacao(_login, None),
+    'venda': Operacao(_venda, 'vendas'),
+    'produto': Operacao(_produto, 'produtos'),
+    'produtos': Operacao(_produtos, 'produtos'),
+    'clientes': Operacao(_clientes, 'clientes'),
+    'vendas': Operacao(_vendas, 'vendas'),
+    'estatisticas': Operacao(_estatisticas, ''),
+}
+
+# ================= REDE =================
+
+class ManipuladorTerminal(socketserver.StreamRequestHandler):
+    """One checkout connection: requests are answered in order"""
+
+    disable_nagle_algorithm = True
+    sessao: Optional[Sessao] = None
+
+    def setup(self):
+        super().setup()
+        # Idle checkouts stay connected; a link that died without a FIN is
+        # found by keepalive probes and the read below fails
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE,
+                                       get_config()['servidor']['keepalive_segundos'])
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+
+    def handle(self):
+        maximo = get_config()['servidor']['linha_maxima']
+        while True:
+            try:
+                linha = self.rfile.readline(maximo + 1)
+            except OSError as e:
+                logger.info(f"Conexão de {self.client_address[0]} perdida: {e}")
+                return
+            if not linha:
+                return
+            if len(linha) > maximo:
+                self._enviar({'ok': False, 'erro': "Pedido muito grande"})
+                return
+            self._enviar(self._atender(linha))
+
+    def finish(self):
+        sessoes.encerrar(self.sessao)
+        super().finish()
+
+    def _enviar(self, resposta: Dict):
+        self.wfile.write(json.dumps(resposta, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+
+    def _atender(self, linha: bytes) -> Dict:
+        try:
+            pedido = json.loads(linha)
+        except ValueError:
+            return {'ok': False, 'erro': "Pedido inválido"}
+        if not isinstance(pedido, dict) or not isinstance(pedido.get('op'), str):
+            return {'ok': False, 'erro': "Pedido inválido"}
+        args = pedido.get('args') or {}
+        operacao = OPERACOES.get(pedido['op'])
+        if operacao is None or not isinstance(args, dict):
+            return {'ok': False, 'erro': "Pedido inválido"}
+        # Anything else raised below is a bug or a database failure, and is logged
+        try:
+            if operacao.permissao is not None:
+                if not sessoes.valida(self.sessao):
+                    raise ErroServidor("Sessão expirada. Faça login novamente.")
+                if operacao.permissao and not sessoes.pode(self.sessao, operacao.permissao):
+                    raise ErroServidor(f"Permissão negada: {operacao.permissao}")
+            return {'ok': True, 'resultado': operacao.funcao(self, args)}
+        except ErroServidor as e:
+            return {'ok': False, 'erro': str(e)}
+        except (DatabaseError, sqlite3.Error):
+            logger.exception(f"Erro de banco de dados atendendo {self.client_address[0]}")
+            return {'ok': False, 'erro': "Banco de dados indisponível"}
+        except Exception:
+            logger.exception(f"Erro atendendo {self.client_address[0]}")
+            return {'ok': False, 'erro': "Erro interno"}
+
+class ServidorCentral(PoolDeTrabalhadoresMixin, socketserver.TCPServer):
+    """TCP server on a pool of SERVIDOR_CONFIG['terminais'] threads"""
+
+    allow_reuse_address = True
+
+    def __init__(self, endereco: Tuple[str, int], terminais: Optional[int] = None):
+        super().__init__(endereco, ManipuladorTerminal)
+        self.terminais = terminais or get_config()['servidor']['terminais']
+        self.trabalhadores = ThreadPoolExecutor(max_workers=self.terminais, thread_name_prefix='terminal')
+        enable_wal_mode()
+        escritor.iniciar()
+
+    def process_request(self, request, client_address):
+        with self._abertas_lock:
+            lotado = len(self._abertas) >= self.terminais
+        if not lotado:
+            super().process_request(request, client_address)
+            return
+        # A queued checkout would hang until its own timeout with no message
+        logger.warning(f"Conexão de {client_address[0]} recusada: {self.terminais} terminais conectados")
+        try:
+            request.sendall(json.dumps({'ok': False, 'erro': f"Servidor lotado: {self.terminais} terminais "
+                                        "já conectados. Tente novamente mais tarde."},
+                                       ensure_ascii=False).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        escritor.parar()
+
+def criar_servidor(host: Optional[str] = None, porta: Optional[int] = None,
+                   terminais: Optional[int] = None) -> ServidorCentral:
+    """Bound server with the writer running (porta 0 picks a free port)"""
+    config = get_config()['servidor']
+    return ServidorCentral((host or config['host'], config['porta'] if porta is None else porta), terminais)
+
+def servir(host: Optional[str] = None, porta: Optional[int] = None):
+    """Serve until interrupted"""
+    servidor = criar_servidor(host, porta)
+    host, porta = servidor.server_address[:2]
+    logger.info(f"Servidor central do Integre+ em {host}:{porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+# ================= CLIENTE =================
+
+class ClienteTerminal:
+    """Thin client for one checkout: a connection to the central server"""
+
+    def __init__(self, host: Optional[str] = None, porta: Optional[int] = None, timeout: float = 30):
+        config = get_config()['servidor']
+        self._socket = socket.create_connection((host or config['host'], porta or config['porta']), timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._leitor = self._socket.makefile('rb')
+
+    def chamar(self, op: str, **args) -> Any:
+        """
+        Run one operation; raises ErroServidor with the server's message.
+        A network failure, a timeout or an unreadable reply also raises
+        ErroServidor and closes the client: a late reply would otherwise be
+        read as the answer to the next request. Connect again to go on.
+        """
+        if self._socket is None:
+            raise ErroServidor("Sem conexão com o servidor. Conecte o terminal novamente.")
+        try:
+            self._socket.sendall(json.dumps({'op': op, 'args': args}).encode('utf-8') + b'\n')
+            linha = self._leitor.readline()
+            if not linha:
+                self.fechar()
+                raise ErroServidor("Conexão encerrada pelo servidor")
+            resposta = json.loads(linha)
+            if not isinstance(resposta, dict) or 'ok' not in resposta:
+                raise ValueError(f"resposta inválida: {linha[:100]!r}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Conexão com o servidor perdida em '{op}': {e}")
+            self.fechar()
+            raise ErroServidor("Sem resposta do servidor. Confira se a operação foi concluída antes de repetir.")
+        if not resposta['ok']:
+            raise ErroServidor(resposta['erro'])
+        return resposta.get('resultado')
+
+    def entrar(self, username: str, senha: str) -> Dict:
+        return self.chamar('login', username=username, senha=senha)
+
+    def registrar_venda(self, produto_id: int, quantidade: int, cliente_id: Optional[int] = None,
+                        forma_pagamento: str = "Dinheiro") -> str:
+        """
+        Same contract as vendas.registrar_venda: a message for the user, also
+        when the server cannot be reached (see chamar)
+        """
+        try:
+            self.chamar('venda', produto_id=produto_id, quantidade=quantidade,
+                        cliente_id=cliente_id, forma_pagamento=forma_pagamento)
+            return "Venda registrada com sucesso."
+        except ErroServidor as e:
+            return str(e)
+
+    def fechar(self):
+        if self._socket is not None:
+            self._leitor.close()
+            self._socket.close()
+            self._socket = self._leitor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+if __name__ == "__main__":
+    import config
+    from bootstrap import inicializar_aplicacao
+    if len(sys.argv) > 2:
+        config.DB_CONFIG['name'] = sys.argv[2]
+    inicializar_aplicacao()
+    servir(porta=int(sys.argv[1]) if len(sys.argv) > 1 else None)
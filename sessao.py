@@ -0,0 +1,123 @@
+"""
+User sessions for Integre+ application.
+A login opens a Sessao holding the user's role and the permission set that
+role grants, resolved once. Authorization checks (e.g. on every sale) are
+then a dict and a set lookup, with no query. Changing a user's role or
+blocking them closes their open sessions at once; sessions also expire
+after AUTENTICACAO_CONFIG['sessao_minutos'].
+"""
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Mapping, Optional
+
+from config import get_config
+from database import execute_query
+import queries
+
+logger = logging.getLogger(__name__)
+
+# Permission set granted by each role
+PERMISSOES_POR_PAPEL: Dict[str, FrozenSet[str]] = {
+    'Admin': frozenset({'vendas', 'produtos', 'clientes', 'estoque', 'relatorios',
+                        'importacao', 'configuracoes', 'backup', 'usuarios'}),
+    'Gerente': frozenset({'vendas', 'produtos', 'clientes', 'estoque', 'relatorios',
+                          'importacao', 'configuracoes', 'backup'}),
+    'Funcionario': frozenset({'vendas', 'produtos', 'clientes'}),
+}
+
+class PermissaoNegada(Exception):
+    """Raised when a session lacks a permission or is no longer valid"""
+    pass
+
+@dataclass(frozen=True)
+class Sessao:
+    token: str
+    usuario_id: int
+    username: str
+    papel: str
+    permissoes: FrozenSet[str]
+    criada_em: float            # time.monotonic()
+    expira_em: float            # time.monotonic()
+
+def permissoes_do_papel(papel: str) -> FrozenSet[str]:
+    """Permissions of a role (unknown roles get none)"""
+    return PERMISSOES_POR_PAPEL.get(papel, frozenset())
+
+class GerenciadorSessoes:
+    """Open sessions by token. Thread-safe."""
+
+    def __init__(self, duracao_minutos: Optional[float] = None, relogio=time.monotonic):
+        self.duracao = (duracao_minutos or get_config()['autenticacao']['sessao_minutos']) * 60
+        self._relogio = relogio
+        self._abertas: Dict[str, Sessao] = {}
+        self._lock = threading.Lock()
+
+    def abrir(self, usuario: Mapping) -> Sessao:
+        """Session for an authenticated user row ('id', 'username', 'permissao')"""
+        agora = self._relogio()
+        papel = usuario.get('permissao') or 'Funcionario'
+        with self._lock:
+            # Drop expired sessions so the table stays as small as the staff
+            for token in [t for t, s in self._abertas.items() if s.expira_em <= agora]:
+                del self._abertas[token]
+            sessao = Sessao(secrets.token_hex(16), usuario['id'], usuario['username'], papel,
+                            permissoes_do_papel(papel), agora, agora + self.duracao)
+            self._abertas[sessao.token] = sessao
+        logger.info(f"Sessão aberta: {sessao.username} ({papel})")
+        return sessao
+
+    def valida(self, sessao: Optional[Sessao]) -> bool:
+        """Still open (not closed or invalidated) and not expired"""
+        if sessao is None or self._relogio() >= sessao.expira_em:
+            return False
+        return self._abertas.get(sessao.token) is sessao
+
+    def por_token(self, token: str) -> Optional[Sessao]:
+        """Valid session with this token, or None"""
+        sessao = self._abertas.get(token)
+        return sessao if self.valida(sessao) else None
+
+    def pode(self, sessao: Optional[Sessao], permissao: str) -> bool:
+        """In-memory authorization check"""
+        return self.valida(sessao) and permissao in sessao.permissoes
+
+    def exigir(self, sessao: Optional[Sessao], permissao: str):
+        """Raise PermissaoNegada unless pode(sessao, permissao)"""
+        if not self.valida(sessao):
+            raise PermissaoNegada("Sessão expirada. Faça login novamente.")
+        if permissao not in sessao.permissoes:
+            raise PermissaoNegada(f"Permissão negada: {permissao}")
+
+    def invalidar_usuario(self, usuario_id: int):
+        """Invalidate every open session of a user (role changed, blocked, ...)"""
+        with self._lock:
+            tokens = [t for t, s in self._abertas.items() if s.usuario_id == usuario_id]
+            for token in tokens:
+                del self._abertas[token]
+        if tokens:
+            logger.info(f"Sessões do usuário {usuario_id} invalidadas: {len(tokens)}")
+
+    def encerrar(self, sessao: Optional[Sessao]):
+        """Logout: close this session only"""
+        if sessao is not None:
+            with self._lock:
+                self._abertas.pop(sessao.token, None)
+
+    def renovar(self, sessao: Sessao) -> Optional[Sessao]:
+        """
+        New session with the user's current role, read from the database,
+        or None if the user no longer exists or is blocked.
+        """
+        self.encerrar(sessao)
+        resultado = execute_query(queries.USUARIOS_SESSAO, (sessao.usuario_id,), fetch=True)
+        return self.abrir(resultado[0]) if resultado else None
+
+    def limpar(self):
+        """Close every session"""
+        with self._lock:
+            self._abertas.clear()
+
+sessoes = GerenciadorSessoes()
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import database
+import queries
+from alertas_validade import MotorValidade, motor_validade
+
+def _em(dias):
+    return (date.today() + timedelta(days=dias)).strftime('%d/%m/%Y')
+
+def test_faixas_de_validade(banco_temporario):
+    import produtos
+    produtos.cadastrar_produto('Vencido', 2, '1', _em(-3))
+    produtos.cadastrar_produto('Semana', 4, '1', _em(5))
+    produtos.cadastrar_produto('Mes', 6, '1', _em(20))
+    produtos.cadastrar_produto('Longe', 8, '1', _em(90))
+    produtos.cadastrar_produto('Sem estoque', 0, '1', _em(1))
+
+    faixas = MotorValidade(faixas=(7, 30)).resumo()
+    assert [(f['produtos'], f['unidades']) for f in faixas] == [(1, 2), (1, 4), (1, 6)]
+    assert faixas[1]['itens'][0]['nome'] == 'Semana'
+
+def test_cache_atualizado_nas_escritas(banco_temporario):
+    import produtos
+    import vendas
+    motor_validade.recarregar()
+    assert motor_validade.mensagem_alerta() is None
+
+    produtos.cadastrar_produto('Iogurte', 3, '2,50', _em(2))
+    produto = produtos.listar_produtos()[0]
+    assert [p['nome'] for p in motor_validade.vencendo_em(7)] == ['Iogurte']
+
+    vendas.registrar_venda(produto['id'], 3, produto['preco'])
+    assert motor_validade.vencendo_em(7) == []
+
+def test_varredura_usa_indice_de_validade(banco_temporario):
+    plano = database.execute_query(
+        'EXPLAIN QUERY PLAN ' + queries.PRODUTOS_VENCENDO_ATE, ('2030-01-01',), fetch=True
+    )
+    assert any('idx_produtos_validade' in linha['detail'] for linha in plano)
+
+def test_escritas_de_outra_conexao_invalidam_o_cache(banco_temporario):
+    import sqlite3
+    motor = MotorValidade(faixas=(7, 30))
+    assert motor.vencendo_em(7) == []
+
+    # Another terminal writing straight to the shared database file
+    externa = sqlite3.connect(banco_temporario)
+    validade = (date.today() + timedelta(days=2)).isoformat()
+    with externa:
+        externa.execute(queries.PRODUTOS_INSERIR, ('Leite', 5, 450, validade, '', None, None, None,
+                                                   '2024-01-01 00:00:00', '2024-01-01 00:00:00'))
+    assert [p['nome'] for p in motor.vencendo_em(7)] == ['Leite']
+
+    with externa:
+        externa.execute('UPDATE produtos SET quantidade = 0')
+    assert motor.vencendo_em(7) == []
+    externa.close()
@@ -0,0 +1,136 @@
+import gzip
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import api
+from bootstrap import garantir_schema
+import clientes
+import produtos
+
+@pytest.fixture
+def servidor(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('gerente', 'Senha@123', 'gerente@integre.com', 'Gerente')
+    clientes.cadastrar_usuario('caixa', 'Senha@123', 'caixa@integre.com')
+    for i in range(5):
+        produtos.cadastrar_produto(f'Produto {i}', 10, '2.50', '2030-01-01', 'Mercearia')
+    servidor = api.criar_servidor('127.0.0.1', 0, trabalhadores=4)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+class Cliente:
+    """Keep-alive connection to the test server"""
+
+    def __init__(self, servidor, token=None):
+        self.conexao = http.client.HTTPConnection(*servidor.server_address[:2], timeout=5)
+        self.token = token
+
+    def pedir(self, metodo, caminho, corpo=None, **cabecalhos):
+        if self.token:
+            cabecalhos['Authorization'] = f'Bearer {self.token}'
+        dados = corpo if corpo is None or isinstance(corpo, bytes) else json.dumps(corpo).encode()
+        self.conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+        resposta = self.conexao.getresponse()
+        bruto = resposta.read()
+        if resposta.getheader('Content-Encoding') == 'gzip':
+            bruto = gzip.decompress(bruto)
+        return resposta, json.loads(bruto) if bruto else None
+
+    def entrar(self, username):
+        resposta, corpo = self.pedir('POST', '/api/login', {'username': username, 'senha': 'Senha@123'})
+        assert resposta.status == 200
+        self.token = corpo['token']
+        return corpo
+
+def test_login_e_permissoes(servidor):
+    cliente = Cliente(servidor)
+    assert cliente.pedir('GET', '/api/produtos')[0].status == 401
+    assert cliente.pedir('POST', '/api/login', {'username': 'caixa', 'senha': 'x'})[0].status == 401
+    assert cliente.pedir('POST', '/api/login', b'nao e json')[0].status == 400
+
+    assert cliente.entrar('caixa')['papel'] == 'Funcionario'
+    assert cliente.pedir('GET', '/api/produtos')[0].status == 200
+    assert cliente.pedir('GET', '/api/relatorios/categorias')[0].status == 403
+    assert cliente.pedir('GET', '/api/nada')[0].status == 404
+    assert cliente.pedir('POST', '/api/produtos', {})[0].status == 405
+
+    assert cliente.pedir('POST', '/api/logout')[0].status == 204
+    assert cliente.pedir('GET', '/api/produtos')[0].status == 401
+
+def test_paginas_etag_e_gzip(servidor):
+    cliente = Cliente(servidor)
+    cliente.entrar('gerente')
+    ids, apos = [], 0
+    while apos is not None:
+        resposta, pagina = cliente.pedir('GET', f'/api/produtos?limite=2&apos={apos}')
+        ids += [produto['id'] for produto in pagina['itens']]
+        apos = pagina['proximo']
+    assert ids == [1, 2, 3, 4, 5]
+    assert cliente.pedir('GET', '/api/produtos?limite=0')[0].status == 400
+
+    resposta, corpo = cliente.pedir('GET', '/api/produtos/3')
+    assert corpo['nome'] == 'Produto 2' and corpo['preco'] == '2.50' and 'imagem' not in corpo
+    etag = resposta.getheader('ETag')
+    resposta, corpo = cliente.pedir('GET', '/api/produtos/3', **{'If-None-Match': etag})
+    assert (resposta.status, corpo) == (304, None)
+
+    # Small bodies go uncompressed, large ones gzipped when accepted
+    assert cliente.pedir('GET', '/api/produtos/3', **{'Accept-Encoding': 'gzip'})[0].getheader('Content-Encoding') is None
+    for i in range(5, 40):
+        produtos.cadastrar_produto(f'Produto {i}', 10, '2.50', '2030-01-01')
+    resposta, pagina = cliente.pedir('GET', '/api/produtos', **{'Accept-Encoding': 'gzip'})
+    assert resposta.getheader('Content-Encoding') == 'gzip'
+    assert len(pagina['itens']) == 40
+
+def test_venda_pela_api(servidor):
+    cliente = Cliente(servidor)
+    cliente.entrar('caixa')
+    resposta, corpo = cliente.pedir('POST', '/api/vendas', {'produto_id': 1, 'quantidade': 4})
+    assert resposta.status == 201 and corpo['total'] == '10.00'
+    assert cliente.pedir('POST', '/api/vendas', {'produto_id': 1, 'quantidade': 7})[0].status == 409
+    assert cliente.pedir('POST', '/api/vendas', {'produto_id': 99, 'quantidade': 1})[0].status == 404
+    assert cliente.pedir('POST', '/api/vendas', {'produto_id': 1, 'quantidade': '1'})[0].status == 400
+
+    resposta, pagina = cliente.pedir('GET', '/api/vendas')
+    assert [(v['produto_id'], v['quantidade'], v['total']) for v in pagina['itens']] == [(1, 4, '10.00')]
+    assert produtos.buscar_produto(1)['quantidade'] == 6
+
+def test_keep_alive_cede_o_trabalhador(banco_temporario, senhas_rapidas, monkeypatch):
+    monkeypatch.setitem(api.get_config()['api'], 'ociosidade_segundos', 30)
+    servidor = api.criar_servidor('127.0.0.1', 0, trabalhadores=1)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        primeiro, segundo = Cliente(servidor), Cliente(servidor)
+        assert primeiro.pedir('GET', '/api/produtos')[0].getheader('Connection') is None
+
+        # The only worker is idle on the first connection; the second waits in the queue
+        respostas = []
+        espera = threading.Thread(target=lambda: respostas.append(segundo.pedir('GET', '/api/produtos')[0]))
+        espera.start()
+        prazo = time.monotonic() + 5
+        while not servidor.conexoes_na_fila() and time.monotonic() < prazo:
+            time.sleep(0.01)
+        assert servidor.conexoes_na_fila() == 1
+
+        # The next response gives the worker up instead of idling for 30 s
+        assert primeiro.pedir('GET', '/api/produtos')[0].getheader('Connection') == 'close'
+        espera.join(5)
+        assert [r.status for r in respostas] == [401]
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+def test_conexao_ociosa_e_encerrada(servidor, monkeypatch):
+    monkeypatch.setitem(api.get_config()['api'], 'ociosidade_segundos', 0.2)
+    cliente = Cliente(servidor)
+    assert cliente.pedir('GET', '/api/produtos')[0].status == 401
+    time.sleep(0.5)
+    # The server closed the idle connection: the socket reads end of stream
+    assert cliente.conexao.sock.recv(1) == b''
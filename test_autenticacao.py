@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+import autenticacao
+from bootstrap import garantir_schema
+import clientes
+from database import execute_query, get_connection
+from limitador_login import limitador
+
+@pytest.fixture
+def usuarios(banco_temporario, senhas_rapidas, monkeypatch):
+    garantir_schema()
+    monkeypatch.setattr(limitador, 'intervalo_flush', 3600)
+    for i in range(8):
+        clientes.cadastrar_usuario(f'caixa{i}', 'Senha@123', f'caixa{i}@integre.com')
+
+def _comandos(funcao, *args):
+    """(situacao, SELECTs, UPDATEs) issued on this thread's connection"""
+    comandos = []
+    with get_connection() as conn:
+        conn.set_trace_callback(comandos.append)
+        try:
+            situacao = funcao(*args).situacao
+        finally:
+            conn.set_trace_callback(None)
+    contar = lambda verbo: sum(c.lstrip().upper().startswith(verbo) for c in comandos)
+    return situacao, contar('SELECT'), contar('UPDATE')
+
+def test_no_maximo_uma_leitura_e_uma_escrita(usuarios):
+    autenticar = autenticacao.autenticar
+    assert _comandos(autenticar, 'caixa0', 'Senha@123', 't1') == (autenticacao.OK, 1, 1)
+    assert _comandos(autenticar, 'ninguem', 'x', 't1') == (autenticacao.INVALIDO, 1, 0)
+    for _ in range(4):
+        assert _comandos(autenticar, 'caixa1', 'errada', 't1') == (autenticacao.INVALIDO, 1, 0)
+    # The 5th consecutive failure blocks the account
+    assert _comandos(autenticar, 'caixa1', 'errada', 't2') == (autenticacao.BLOQUEADO_AGORA, 1, 1)
+    assert _comandos(autenticar, 'caixa1', 'Senha@123', 't2') == (autenticacao.BLOQUEADO, 1, 0)
+    # Over the limit on a terminal: refused before any query
+    for _ in range(4):
+        autenticar('ninguem', 'x', 't1')
+    assert _comandos(autenticar, 'ninguem', 'x', 't1') == (autenticacao.LIMITADO, 0, 0)
+
+    linha = execute_query("SELECT tentativas_login, bloqueado FROM usuarios WHERE username = 'caixa1'", fetch=True)[0]
+    assert (linha['tentativas_login'], linha['bloqueado']) == (5, 1)
+
+def test_mesma_semantica_nos_dois_caminhos(usuarios):
+    import login
+    assert login.verificar_credenciais('caixa2', 'Senha@123')['username'] == 'caixa2'
+    assert 'senha' not in login.verificar_credenciais('caixa2', 'Senha@123')
+    assert clientes.autenticar_usuario('caixa2', 'Senha@123')['username'] == 'caixa2'
+    clientes.bloquear_usuario(clientes.autenticar_usuario('caixa2', 'Senha@123')['id'])
+    assert login.verificar_credenciais('caixa2', 'Senha@123') is None
+    with pytest.raises(clientes.UserError, match="bloqueada"):
+        clientes.autenticar_usuario('caixa2', 'Senha@123')
+
+def test_logins_simultaneos_de_varios_terminais(usuarios):
+    barreira = threading.Barrier(24)
+    resultados, erros = [], []
+
+    def entrar(username, senha, terminal):
+        try:
+            barreira.wait()
+            resultados.append((username, autenticacao.autenticar(username, senha, terminal).situacao))
+        except Exception as e:
+            erros.append(e)
+
+    # 7 users on their own terminals, one user on 8 terminals at once, and
+    # 9 failures for the last user spread over 9 terminals
+    tarefas = [(f'caixa{i}', 'Senha@123', f'terminal{i}') for i in range(7)]
+    tarefas += [('caixa0', 'Senha@123', f'terminal{i}') for i in range(7, 15)]
+    tarefas += [('caixa7', 'errada', f'terminal{i}') for i in range(15, 24)]
+    threads = [threading.Thread(target=entrar, args=tarefa) for tarefa in tarefas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    assert len(resultados) == 24
+    assert all(situacao == autenticacao.OK for username, situacao in resultados if username != 'caixa7')
+    falhas = [situacao for username, situacao in resultados if username == 'caixa7']
+    assert autenticacao.BLOQUEADO_AGORA in falhas
+    assert set(falhas) <= {autenticacao.INVALIDO, autenticacao.BLOQUEADO_AGORA, autenticacao.BLOQUEADO}
+    linha = execute_query("SELECT bloqueado FROM usuarios WHERE username = 'caixa7'", fetch=True)[0]
+    assert linha['bloqueado'] == 1
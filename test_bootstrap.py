@@ -0,0 +1,56 @@
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+import bootstrap
+import database
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+def test_importar_modulos_nao_faz_io(tmp_path):
+    modulos = sorted(
+        os.path.basename(caminho)[:-3] for caminho in glob.glob(os.path.join(DIRETORIO, '*.py'))
+        if not os.path.basename(caminho).startswith(('test_', 'benchmark_', 'conftest'))
+    )
+    codigo = (
+        "import importlib, os\n"
+        f"for modulo in {modulos!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(modulo)\n"
+        "    except ImportError:\n"
+        "        pass  # legacy scripts that no longer import\n"
+        "print(sorted(os.listdir('.')))\n"
+    )
+    processo = subprocess.run([sys.executable, '-c', codigo], cwd=tmp_path, capture_output=True, text=True,
+                              env=dict(os.environ, PYTHONPATH=DIRETORIO), check=True)
+    assert processo.stdout.strip() == '[]'
+
+def test_schema_atual_custa_uma_consulta(banco_temporario):
+    assert bootstrap.garantir_schema()
+    comandos = []
+    with database.get_connection() as conn:
+        conn.set_trace_callback(comandos.append)
+        try:
+            assert not bootstrap.garantir_schema()
+        finally:
+            conn.set_trace_callback(None)
+    assert comandos == ['PRAGMA user_version']
+
+def test_admin_criado_mesmo_com_schema_atual(banco_temporario, senhas_rapidas, monkeypatch):
+    bootstrap.garantir_schema()
+    assert database.execute_query("SELECT id FROM usuarios WHERE username = 'admin'", fetch=True) == []
+    monkeypatch.setattr(bootstrap, '_inicializado', False)
+    bootstrap.inicializar_aplicacao()
+    assert len(database.execute_query("SELECT id FROM usuarios WHERE username = 'admin'", fetch=True)) == 1
+
+def test_banco_mais_novo_e_recusado(banco_temporario):
+    from migrations import MigrationError
+    bootstrap.garantir_schema()
+    with database.get_connection() as conn:
+        conn.execute(f"PRAGMA user_version = {bootstrap.VERSAO_SCHEMA + 1}")
+    with pytest.raises(MigrationError, match="mais nova"):
+        bootstrap.garantir_schema()
+    assert bootstrap.versao_schema() == bootstrap.VERSAO_SCHEMA + 1
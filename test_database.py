@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database
+import queries
+import produtos
+
+def test_conexao_persistente_por_thread(banco_temporario):
+    with database.get_connection() as primeira:
+        pass
+    with database.get_connection() as segunda:
+        pass
+    assert primeira is segunda
+
+    outras = []
+    thread = threading.Thread(target=lambda: outras.append(database.get_connection().__enter__()))
+    thread.start()
+    thread.join()
+    assert outras[0] is not primeira
+
+def test_close_connections_reabre(banco_temporario):
+    with database.get_connection() as antiga:
+        pass
+    database.close_connections()
+    with database.get_connection() as nova:
+        assert nova is not antiga
+        assert nova.execute('SELECT 1').fetchone()[0] == 1
+
+def test_thread_que_termina_libera_a_conexao(banco_temporario):
+    abertas = []
+
+    def tarefa():
+        with database.get_connection() as conn:
+            abertas.append(conn)
+        database.release_thread_connection()
+
+    thread = threading.Thread(target=tarefa)
+    thread.start()
+    thread.join()
+    assert abertas[0] not in database._all_connections
+    with pytest.raises(sqlite3.ProgrammingError):
+        abertas[0].execute('SELECT 1')
+
+def test_erro_desfaz_transacao_pendente(banco_temporario):
+    try:
+        with database.get_connection() as conn:
+            conn.execute("INSERT INTO categorias (nome) VALUES ('Bebidas')")
+            raise RuntimeError("falha")
+    except RuntimeError:
+        pass
+    assert database.execute_query("SELECT * FROM categorias", fetch=True) == []
+
+def test_transacao_aninhada_nao_confirma_a_externa(banco_temporario):
+    categorias = lambda: [l['nome'] for l in database.execute_query(
+        "SELECT nome FROM categorias ORDER BY nome", fetch=True)]
+    try:
+        with database.transaction():
+            database.execute_query("INSERT INTO categorias (nome) VALUES ('Bebidas')")
+            with database.transaction() as conn:
+                conn.execute("INSERT INTO categorias (nome) VALUES ('Limpeza')")
+            # A failing inner block undoes only its own work
+            try:
+                with database.transaction() as conn:
+                    conn.execute("INSERT INTO categorias (nome) VALUES ('Padaria')")
+                    raise RuntimeError("interna")
+            except RuntimeError:
+                pass
+            raise RuntimeError("externa")
+    except RuntimeError:
+        pass
+    assert categorias() == []
+
+    with database.transaction():
+        database.execute_query("INSERT INTO categorias (nome) VALUES ('Bebidas')")
+        with database.transaction() as conn:
+            conn.execute("INSERT INTO categorias (nome) VALUES ('Limpeza')")
+    assert categorias() == ['Bebidas', 'Limpeza']
+
+def test_registro_de_queries():
+    assert queries.get_query('PRODUTOS_LISTAR') is queries.PRODUTOS_LISTAR
+    assert 'PRODUTO_COLUNAS' not in queries.QUERIES
+
+def test_consultas_de_produto_retornam_dicionarios(banco_temporario):
+    produtos.cadastrar_produto('Vinho Tinto', 3, 89.9, '01/01/2030', 'Bebidas', '789')
+    encontrado = produtos.buscar_produtos_por_nome('Vinho')
+    assert encontrado[0]['nome'] == 'Vinho Tinto'
+    assert produtos.produtos_estoque_baixo(5)[0]['codigo_barras'] == '789'
+    assert produtos.buscar_produto(encontrado[0]['id'])['categoria'] == 'Bebidas'
@@ -0,0 +1,28 @@
+from datetime import date, datetime
+
+import pytest
+
+import database
+import datas
+import queries
+
+def test_normalizar_data_aceita_formatos_de_entrada():
+    assert datas.normalizar_data('31/12/2030') == '2030-12-31'
+    assert datas.normalizar_data('2030-12-31 10:00:00') == '2030-12-31'
+    assert datas.normalizar_data(date(2030, 12, 31)) == '2030-12-31'
+    with pytest.raises(ValueError):
+        datas.normalizar_data('31-12-2030')
+
+def test_normalizar_data_hora():
+    assert datas.normalizar_data_hora('2025-06-09T21:43:56.768123') == '2025-06-09 21:43:56'
+    assert datas.normalizar_data_hora(datetime(2025, 6, 9, 8, 5)) == '2025-06-09 08:05:00'
+    assert datas.formatar_data_br('2030-12-31') == '31/12/2030'
+
+def test_intervalo_inclui_ultimo_dia():
+    assert datas.intervalo_dias('2025-06-01', '30/06/2025') == ('2025-06-01 00:00:00', '2025-07-01 00:00:00')
+
+@pytest.mark.parametrize('query', [queries.VENDAS_TOTAL_PERIODO, queries.VENDAS_POR_DIA_PERIODO])
+def test_filtros_de_data_usam_indice(banco_temporario, query):
+    plano = database.execute_query('EXPLAIN QUERY PLAN ' + query, ('2025-01-01', '2025-02-01'), fetch=True)
+    detalhes = ' '.join(linha['detail'] for linha in plano)
+    assert 'idx_vendas_data' in detalhes
@@ -0,0 +1,87 @@
+import sqlite3
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+import database
+import migrations
+from dinheiro import para_centavos, para_reais, converter_colunas_para_reais
+
+def test_conversao_centavos():
+    assert para_centavos('12,90') == 1290
+    assert para_centavos('R$ 1.234,56') == 123456
+    assert para_centavos(0.1) == 10
+    assert para_centavos(Decimal('0.005')) == 1
+    assert para_reais(1290) == Decimal('12.90')
+    with pytest.raises(ValueError):
+        para_centavos('abc')
+
+def test_formatos_de_texto_ambiguos_sao_recusados():
+    assert para_centavos('1.234') == 123400
+    assert para_centavos('1.234.567,8') == 123456780
+    assert para_centavos('1,234.56') == 123456
+    assert para_centavos('-2,50') == -250
+    assert para_centavos('R$ 7') == 700
+    for texto in ('1,234', '12,345', '1.23.4', '1.234.56', '1,2,3', '0,005', '12.3456', '1.2345,00', '', ',50'):
+        with pytest.raises(ValueError):
+            para_centavos(texto)
+
+def test_conversao_vetorizada():
+    df = pd.DataFrame({'total_centavos': [10, 20, 30]})
+    converter_colunas_para_reais(df, {'total_centavos': 'total'})
+    assert list(df.columns) == ['total']
+    assert df['total'].sum() == pytest.approx(0.6)
+
+def test_venda_soma_exata_e_atomica(banco_temporario):
+    import produtos
+    import vendas
+
+    produtos.cadastrar_produto('Bala', 1000, '0,10', '01/01/2030')
+    produto = produtos.listar_produtos()[0]
+    assert produto['preco_centavos'] == 10
+    assert produto['preco'] == Decimal('0.10')
+
+    for _ in range(3):
+        assert vendas.registrar_venda(produto['id'], 1, produto['preco']) == "Venda registrada com sucesso."
+    assert vendas.registrar_venda(produto['id'], 5000, produto['preco']) == "Estoque insuficiente."
+
+    total = database.execute_query("SELECT SUM(total_centavos) AS t, COUNT(*) AS n FROM vendas", fetch=True)[0]
+    assert (total['t'], total['n']) == (30, 3)
+    assert produtos.buscar_produto(produto['id'])['quantidade'] == 997
+
+def test_migracao_converte_reais_legados(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'legado.db')
+    conn = sqlite3.connect(caminho)
+    conn.execute('''
+        CREATE TABLE produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL,
+            quantidade INTEGER NOT NULL, preco REAL NOT NULL CHECK (preco >= 0),
+            validade TEXT NOT NULL, categoria TEXT, codigo_barras TEXT UNIQUE,
+            fornecedor_id INTEGER, imagem BLOB,
+            data_cadastro TEXT NOT NULL, ultima_atualizacao TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, produto_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL, preco_unitario REAL NOT NULL, total REAL NOT NULL,
+            data TEXT NOT NULL, cliente_id INTEGER, forma_pagamento TEXT NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO produtos (nome, quantidade, preco, validade, data_cadastro, ultima_atualizacao) "
+                 "VALUES ('Bala', 10, 0.1, '2030-01-01', '2025-06-01 10:00:00', '2025-06-01 10:00:00')")
+    conn.execute("INSERT INTO vendas (produto_id, quantidade, preco_unitario, total, data, forma_pagamento) "
+                 "VALUES (1, 3, 0.1, ?, '2025-06-01 10:00:00', 'PIX')", (3 * 0.1,))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setitem(database.get_config()['db'], 'name', caminho)
+    database.create_tables()
+    migrations.run_migrations()
+
+    produto = database.execute_query("SELECT * FROM produtos", fetch=True)[0]
+    venda = database.execute_query("SELECT * FROM vendas", fetch=True)[0]
+    assert 'preco' not in produto and produto['preco_centavos'] == 10
+    assert (venda['preco_unitario_centavos'], venda['total_centavos']) == (10, 30)
+    database.close_connections()
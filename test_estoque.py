@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+import pytest
+
+import database
+import estoque
+
+def test_razao_acompanha_contador(banco_temporario):
+    import produtos
+    import vendas
+    import lotes
+    lotes.alocador_fefo.descartar()
+    produto_id = produtos.cadastrar_produto('Creatina', 10, '80', '01/01/2030')
+    lotes.cadastrar_lote(produto_id, 'L1', '2029-01-01', 5)
+    vendas.registrar_venda(produto_id, 4, '80')
+    produtos.atualizar_produto(produto_id, 'Creatina', 20, '80', '01/01/2030')
+
+    assert estoque.estoque_atual(produto_id) == 20
+    assert estoque.divergencias() == []
+    tipos = database.execute_query("SELECT tipo, quantidade FROM movimentos_estoque ORDER BY id", fetch=True)
+    assert [(t['tipo'], t['quantidade']) for t in tipos] == [('entrada', 10), ('entrada', 5), ('venda', -4), ('ajuste', 9)]
+
+def test_atualizacao_nao_apaga_venda_concorrente(banco_temporario):
+    import produtos
+    import vendas
+    produto_id = produtos.cadastrar_produto('Energético', 10, '9,90', '01/01/2030')
+    # The editor loaded 10 units; another terminal sells 3 before the save
+    vendas.registrar_venda(produto_id, 3, '9,90')
+    produtos.atualizar_produto(produto_id, 'Energético', 15, '9,90', '01/01/2030', quantidade_anterior=10)
+    assert produtos.buscar_produto(produto_id)['quantidade'] == 12
+
+    # The editor still shows 10 and removes 8, but only 4 are left after another sale
+    vendas.registrar_venda(produto_id, 8, '9,90')
+    with pytest.raises(ValueError, match="Estoque insuficiente"):
+        produtos.atualizar_produto(produto_id, 'Energético', 2, '9,90', '01/01/2030', quantidade_anterior=10)
+    assert produtos.buscar_produto(produto_id)['quantidade'] == 4
+    assert estoque.divergencias() == []
+
+def test_estoque_em_data_usa_snapshot(banco_temporario):
+    with database.transaction() as conn:
+        conn.execute("INSERT INTO produtos (nome, quantidade, preco_centavos, validade, data_cadastro, ultima_atualizacao) "
+                     "VALUES ('Água', 0, 200, '2030-01-01', 'x', 'x')")
+        for dia, delta in ((1, 50), (2, -10), (3, -5), (4, 20)):
+            estoque.registrar_movimento(conn, 1, 'entrada' if delta > 0 else 'venda', delta,
+                                        data=f'2025-01-0{dia} 12:00:00')
+    assert estoque.gerar_snapshots(minimo_movimentos=2) == 1
+    # Pretend the checkpoint job ran right after the last movement
+    database.execute_query("UPDATE snapshots_estoque SET data = '2025-01-04 12:00:00'")
+    with database.transaction() as conn:
+        estoque.registrar_movimento(conn, 1, 'venda', -1, data='2025-01-05 12:00:00')
+
+    # A plain date is the end of that day; a timestamp includes its own second
+    assert estoque.estoque_em(1, '2025-01-02') == 40
+    assert estoque.estoque_em(1, date(2025, 1, 2)) == 40
+    assert estoque.estoque_em(1, '02/01/2025') == 40
+    assert estoque.estoque_em(1, '2025-01-02 00:00:00') == 50
+    assert estoque.estoque_em(1, datetime(2025, 1, 2, 12, 0)) == 40
+    assert estoque.estoque_em(1, '2025-01-02 11:59:59') == 50
+    assert estoque.estoque_em(1, '2025-01-03 13:00:00') == 35
+    assert estoque.estoque_em(1, '2025-01-04 13:00:00') == 55
+    assert estoque.estoque_em(1, '2025-01-06') == 54
+    assert estoque.estoque_atual(1) == 54
+
+def test_razao_e_somente_inclusao(banco_temporario):
+    with database.transaction() as conn:
+        estoque.registrar_movimento(conn, 1, 'entrada', 1)
+    with pytest.raises(database.QueryError):
+        database.execute_query("DELETE FROM movimentos_estoque")
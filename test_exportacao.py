@@ -0,0 +1,52 @@
+import csv
+import gzip
+import threading
+
+import pytest
+from openpyxl import load_workbook
+
+import exportacao
+
+def _vender(quantidade):
+    import produtos
+    import vendas
+    produtos.cadastrar_produto('Suco', 100, '3,50', '2030-01-01')
+    produto = produtos.listar_produtos()[0]
+    for _ in range(quantidade):
+        vendas.registrar_venda(produto['id'], 1, produto['preco'])
+
+def test_exporta_csv_compactado_em_paginas(banco_temporario, tmp_path):
+    _vender(7)
+    caminho = str(tmp_path / 'vendas.csv.gz')
+    progresso = []
+    escritas = exportacao.exportar('vendas', caminho, progresso=lambda feitas, total: progresso.append((feitas, total)),
+                                   tamanho_lote=3)
+    assert escritas == 7
+    assert progresso == [(3, 7), (6, 7), (7, 7)]
+    with gzip.open(caminho, 'rt', encoding='utf-8-sig') as arquivo:
+        linhas = list(csv.reader(arquivo, delimiter=';'))
+    assert linhas[0][:6] == ['ID', 'Data', 'Produto', 'Quantidade', 'Preço Unitário', 'Total']
+    assert [linha[0] for linha in linhas[1:]] == [str(i) for i in range(1, 8)]
+    assert linhas[1][4:6] == ['3.50', '3.50']
+
+def test_exporta_xlsx_com_valores_em_reais(banco_temporario, tmp_path):
+    _vender(2)
+    caminho = str(tmp_path / 'produtos.xlsx')
+    assert exportacao.exportar('produtos', caminho) == 1
+    planilha = load_workbook(caminho, read_only=True).active
+    cabecalho, linha = list(planilha.iter_rows(values_only=True))
+    assert cabecalho[:5] == ('ID', 'Nome', 'Quantidade', 'Preço', 'Validade')
+    assert linha[1:4] == ('Suco', 98, 3.5)
+
+def test_cancelamento_nao_deixa_arquivo(banco_temporario, tmp_path):
+    _vender(5)
+    caminho = tmp_path / 'vendas.xlsx'
+    cancelar = threading.Event()
+    escritas = exportacao.exportar('vendas', str(caminho), progresso=lambda *_: cancelar.set(),
+                                   cancelar=cancelar, tamanho_lote=2)
+    assert escritas is None
+    assert list(tmp_path.glob('vendas*')) == []
+
+def test_formato_desconhecido(banco_temporario, tmp_path):
+    with pytest.raises(exportacao.ExportacaoError):
+        exportacao.exportar('vendas', str(tmp_path / 'vendas.json'))
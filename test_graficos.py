@@ -0,0 +1,30 @@
+from graficos import RenderizadorGraficos, desenhar_estoque
+
+CLARO = {'fundo': '#ffffff', 'texto': '#000000', 'destaque': '#007acc'}
+ESCURO = {'fundo': '#222222', 'texto': '#eeeeee', 'destaque': '#ffaa00'}
+
+def test_reusa_png_para_os_mesmos_dados_tema_e_tamanho():
+    renderizador = RenderizadorGraficos(capacidade=2, dpi=50)
+    dados = [('Chá', 3), ('Pão', 5)]
+    chave, futuro = renderizador.solicitar('estoque', desenhar_estoque, dados, CLARO, 200, 150)
+    png = futuro.result(timeout=30)
+    assert png.startswith(b'\x89PNG')
+
+    _, repetido = renderizador.solicitar('estoque', desenhar_estoque, list(dados), dict(CLARO), 200, 150)
+    assert repetido.done() and repetido.result() == png
+    assert renderizador.renderizados == 1
+
+    # Theme, data and size are all part of the key; the oldest entry is evicted
+    renderizador.solicitar('estoque', desenhar_estoque, dados, ESCURO, 200, 150)[1].result(timeout=30)
+    renderizador.solicitar('estoque', desenhar_estoque, [('Chá', 4)], CLARO, 200, 150)[1].result(timeout=30)
+    assert renderizador.renderizados == 3
+    assert renderizador.em_cache(chave) is None
+
+def test_titulo_entra_no_png_e_na_chave():
+    renderizador = RenderizadorGraficos(capacidade=4, dpi=50)
+    dados = [('Chá', 3)]
+    sem_titulo = renderizador.solicitar('estoque', desenhar_estoque, dados, CLARO, 200, 150)[1].result(timeout=30)
+    com_titulo = renderizador.solicitar('estoque', desenhar_estoque, dados, CLARO, 200, 150,
+                                        'Níveis de Estoque')[1].result(timeout=30)
+    assert com_titulo != sem_titulo
+    assert renderizador.renderizados == 2
@@ -0,0 +1,98 @@
+import threading
+
+import database
+import importacao
+from estoque import divergencias
+from precos import historico_produto
+
+def _csv(tmp_path, nome, texto):
+    caminho = tmp_path / nome
+    caminho.write_text(texto, encoding='utf-8')
+    return str(caminho)
+
+def test_importa_e_atualiza_produtos(banco_temporario, tmp_path):
+    caminho = _csv(tmp_path, 'produtos.csv',
+                   'Código de Barras;Nome;Quantidade;Preço;Validade;Categoria\n'
+                   '789;Leite;10;4,50;31/12/2030;Bebidas\n'
+                   '790;Pão;dez;1,00;2030-01-01;\n'
+                   ';Sem código;1;1,00;2030-01-01;\n')
+    progresso = []
+    resultado = importacao.importar_produtos(caminho, progresso=lambda feitas, total: progresso.append(feitas))
+    assert (resultado.lidas, resultado.novos, resultado.atualizados) == (3, 1, 0)
+    assert [linha for linha, _ in resultado.erros] == [3, 4]
+    assert progresso == [3]
+
+    atualizacao = _csv(tmp_path, 'estoque.csv',
+                       'codigo_barras,nome,quantidade,preco,validade\n'
+                       '789,Leite integral,7,"5,00",2030-12-31\n')
+    resultado = importacao.importar_produtos(atualizacao)
+    assert (resultado.novos, resultado.atualizados) == (0, 1)
+
+    produto = database.execute_query('SELECT * FROM produtos', fetch=True)[0]
+    assert (produto['nome'], produto['quantidade'], produto['preco_centavos'], produto['categoria']) == \
+        ('Leite integral', 7, 500, 'Bebidas')
+    assert divergencias() == []
+    assert [h['preco_centavos'] for h in historico_produto(produto['id'])] == [450, 500]
+
+def test_contagem_menor_baixa_os_lotes(banco_temporario, tmp_path):
+    import lotes
+    import produtos
+    import vendas
+    lotes.alocador_fefo.descartar()
+    produto_id = produtos.cadastrar_produto('Whey', 2, '100', '2030-12-31', codigo_barras='555')
+    lotes.cadastrar_lote(produto_id, 'A', '2027-01-01', 3)
+    lotes.cadastrar_lote(produto_id, 'B', '2027-02-01', 5)
+    assert vendas.registrar_venda(produto_id, 1, '100') == "Venda registrada com sucesso."
+
+    # 9 in stock (7 in lots); counting 4 takes the missing 5 from A, then B
+    resultado = importacao.importar_produtos(_csv(tmp_path, 'contagem.csv',
+                                                  'codigo_barras,nome,quantidade,preco,validade\n'
+                                                  '555,Whey,4,100,2031-01-01\n'))
+    assert resultado.erros == []
+    assert {l['lote']: l['quantidade'] for l in lotes.listar_lotes(produto_id)} == {'B': 2}
+    produto = produtos.buscar_produto(produto_id)
+    assert (produto['quantidade'], produto['validade']) == (4, '2027-02-01')
+
+    assert vendas.registrar_venda(produto_id, 4, '100') == "Venda registrada com sucesso."
+    assert lotes.listar_lotes(produto_id) == []
+    assert divergencias() == []
+
+def test_importa_xlsx(banco_temporario, tmp_path):
+    from datetime import datetime
+    from openpyxl import Workbook
+    livro = Workbook()
+    livro.active.append(['EAN', 'Produto', 'Qtd', 'Valor', 'Validade'])
+    livro.active.append([123, 'Café', 5.0, 12.9, datetime(2031, 5, 1)])
+    caminho = str(tmp_path / 'produtos.xlsx')
+    livro.save(caminho)
+
+    resultado = importacao.importar_produtos(caminho)
+    assert resultado.erros == []
+    produto = database.execute_query('SELECT * FROM produtos', fetch=True)[0]
+    assert (produto['codigo_barras'], produto['quantidade'], produto['preco_centavos'], produto['validade']) == \
+        ('123', 5, 1290, '2031-05-01')
+
+def test_importa_clientes_e_rejeita_email_de_outro_cpf(banco_temporario, tmp_path):
+    caminho = _csv(tmp_path, 'clientes.csv',
+                   'cpf;nome;email;telefone\n'
+                   '111;Ana;ana@exemplo.com;9999\n'
+                   '222;Bia;ana@exemplo.com;\n'
+                   '333;Caio;email-invalido;\n')
+    resultado = importacao.importar_clientes(caminho)
+    assert (resultado.novos, resultado.atualizados) == (1, 0)
+    assert sorted(linha for linha, _ in resultado.erros) == [3, 4]
+
+    caminho = _csv(tmp_path, 'clientes2.csv', 'cpf;nome;email\n111;Ana Souza;ana@exemplo.com\n')
+    resultado = importacao.importar_clientes(caminho)
+    assert (resultado.novos, resultado.atualizados) == (0, 1)
+    cliente = database.execute_query('SELECT * FROM clientes', fetch=True)[0]
+    assert (cliente['nome'], cliente['telefone']) == ('Ana Souza', '9999')
+
+def test_cancelamento_mantem_lotes_ja_gravados(banco_temporario, tmp_path):
+    linhas = ''.join(f'{i};Produto {i};1;1,00;2030-01-01\n' for i in range(10))
+    caminho = _csv(tmp_path, 'produtos.csv', 'codigo_barras;nome;quantidade;preco;validade\n' + linhas)
+    cancelar = threading.Event()
+    resultado = importacao.importar_produtos(caminho, progresso=lambda *_: cancelar.set(),
+                                             cancelar=cancelar, tamanho_lote=4)
+    assert resultado.cancelado
+    assert resultado.novos == 4
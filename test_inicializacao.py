@@ -0,0 +1,12 @@
+import pytest
+
+import benchmark_inicializacao as inicializacao
+
+@pytest.mark.parametrize('modulo', ['main', 'login', 'gui'])
+def test_inicializacao_nao_carrega_modulos_pesados(modulo):
+    _, _, pesados = inicializacao.medir(modulo)
+    assert pesados == []
+
+def test_inicializacao_dentro_do_orcamento():
+    for modulo, (total, _, _) in inicializacao.avaliar(repeticoes=3).items():
+        assert total <= inicializacao.ORCAMENTO_MS[modulo], f"import {modulo}: {total:.0f} ms"
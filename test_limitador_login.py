@@ -0,0 +1,125 @@
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from bootstrap import garantir_schema
+import clientes
+from database import execute_query
+from limitador_login import LimitadorLogin, limitador
+import login
+import senhas
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+def test_janela_deslizante_por_usuario_e_terminal(banco_temporario):
+    relogio = Relogio()
+    limite = LimitadorLogin(tentativas=3, janela=60, intervalo_flush=3600, relogio=relogio)
+    for _ in range(3):
+        assert limite.permitido('ana', 'caixa1')
+        limite.registrar_falha('ana', 'caixa1')
+        relogio.agora += 10
+    assert not limite.permitido('ana', 'caixa1')
+    assert limite.permitido('ana', 'caixa2')
+    assert limite.permitido('bia', 'caixa1')
+
+    # The oldest failure leaves the window 60 s after it happened
+    assert limite.tempo_restante('ana', 'caixa1') == pytest.approx(30)
+    relogio.agora += 30
+    assert limite.permitido('ana', 'caixa1')
+
+    limite.registrar_falha('ana', 'caixa1')
+    assert not limite.permitido('ana', 'caixa1')
+    limite.registrar_sucesso('ana', 'caixa1')
+    assert limite.permitido('ana', 'caixa1')
+
+def test_falhas_gravadas_em_lote(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('ana', 'Senha@123', 'ana@integre.com')
+    limite = LimitadorLogin(tentativas=100, janela=60, intervalo_flush=3600)
+    for _ in range(7):
+        limite.registrar_falha('ana', 'caixa1')
+    limite.registrar_falha('fantasma', 'caixa1', persistir=False)
+
+    consulta = "SELECT tentativas_login FROM usuarios WHERE username = 'ana'"
+    assert execute_query(consulta, fetch=True)[0]['tentativas_login'] == 0
+    limite.descarregar()
+    assert execute_query(consulta, fetch=True)[0]['tentativas_login'] == 7
+    assert limite.falhas_pendentes('ana') == 0
+
+def test_falhas_gravadas_pelo_timer_quando_o_intervalo_vence(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('ana', 'Senha@123', 'ana@integre.com')
+    relogio = Relogio()
+    limite = LimitadorLogin(tentativas=100, janela=60, intervalo_flush=0.05, relogio=relogio)
+    consulta = "SELECT tentativas_login FROM usuarios WHERE username = 'ana'"
+    try:
+        limite.registrar_falha('ana', 'caixa1')
+        limite.registrar_falha('ana', 'caixa1')
+        # The timer fires, but by the limiter's clock the interval is not over yet
+        time.sleep(0.2)
+        assert limite.falhas_pendentes('ana') == 2
+
+        relogio.agora += 1
+        prazo = time.monotonic() + 5
+        while execute_query(consulta, fetch=True)[0]['tentativas_login'] != 2 and time.monotonic() < prazo:
+            time.sleep(0.01)
+        assert execute_query(consulta, fetch=True)[0]['tentativas_login'] == 2
+        assert limite.falhas_pendentes('ana') == 0
+
+        limite.registrar_falha('ana', 'caixa1')
+    finally:
+        limite.encerrar()
+    assert execute_query(consulta, fetch=True)[0]['tentativas_login'] == 3
+    assert limite._timer is None
+
+def test_rajada_de_falhas_nao_trava_o_banco(banco_temporario, senhas_rapidas, monkeypatch):
+    garantir_schema()
+    clientes.cadastrar_usuario('caixa', 'Senha@123', 'caixa@integre.com')
+    verificacoes = []
+    original = bcrypt.checkpw
+    monkeypatch.setattr(senhas.bcrypt, 'checkpw', lambda *a: verificacoes.append(1) or original(*a))
+
+    # 4 terminals alternating the real user and 4 unknown ones, as fast as they can
+    parar = threading.Event()
+    tentativas = []
+
+    def atacar(terminal):
+        feitas = 0
+        while not parar.is_set():
+            login.verificar_credenciais('caixa' if feitas % 2 else f'fantasma{feitas % 8}', 'errada', terminal)
+            feitas += 1
+        tentativas.append(feitas)
+
+    atacantes = [threading.Thread(target=atacar, args=(f'terminal{i}',)) for i in range(4)]
+    inicio = time.perf_counter()
+    for atacante in atacantes:
+        atacante.start()
+
+    # Meanwhile a busy cashier writes every 5 ms; every write must stay fast
+    pior = 0.0
+    escritas = 0
+    while time.perf_counter() - inicio < 1.0:
+        antes = time.perf_counter()
+        execute_query("INSERT INTO categorias (nome) VALUES (?)", (f'cat{escritas}',))
+        pior = max(pior, time.perf_counter() - antes)
+        escritas += 1
+        time.sleep(0.005)
+    parar.set()
+    for atacante in atacantes:
+        atacante.join()
+    decorrido = time.perf_counter() - inicio
+
+    assert sum(tentativas) / decorrido >= 1000
+    assert pior < 0.2
+    # Each terminal reaches bcrypt at most 'limite_tentativas' times for the real user
+    assert len(verificacoes) <= 4 * limitador.tentativas
+    limitador.descarregar()
+    falhas = execute_query("SELECT tentativas_login FROM usuarios WHERE username = 'caixa'", fetch=True)
+    assert falhas[0]['tentativas_login'] == len(verificacoes)
@@ -0,0 +1,32 @@
+import threading
+
+import bcrypt
+
+from bootstrap import garantir_schema
+from database import execute_query
+from datas import agora
+from limitador_login import limitador
+import login
+import senhas
+
+def _criar_usuario(username, senha):
+    execute_query(
+        "INSERT INTO usuarios (username, senha, email, permissao, data_cadastro, ultima_atualizacao) "
+        "VALUES (?, ?, ?, 'Funcionario', ?, ?)",
+        (username, bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=4)),
+         f'{username}@integre.com', agora(), agora()))
+
+def test_verificacao_roda_fora_da_thread_chamadora(banco_temporario, senhas_rapidas, monkeypatch):
+    garantir_schema()
+    _criar_usuario('maria', 'Senha@123')
+    threads = []
+    original = bcrypt.checkpw
+    monkeypatch.setattr(senhas.bcrypt, 'checkpw',
+                        lambda *a: threads.append(threading.current_thread()) or original(*a))
+
+    assert login.verificar_credenciais_async('maria', 'Senha@123').result(timeout=10)['username'] == 'maria'
+    assert login.verificar_credenciais_async('maria', 'errada').result(timeout=10) is None
+    assert threads and threading.current_thread() not in threads
+    limitador.descarregar()
+    tentativas = execute_query("SELECT tentativas_login FROM usuarios WHERE username = 'maria'", fetch=True)
+    assert tentativas[0]['tentativas_login'] == 1
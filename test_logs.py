@@ -0,0 +1,96 @@
+import json
+import logging
+import threading
+import time
+
+import logs
+
+def _config(arquivo, **handler):
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {'json': {'()': 'logs.FormatadorJSON'}},
+        'handlers': {'file': dict({'class': 'logs.ArquivoRotativo', 'filename': str(arquivo),
+                                   'formatter': 'json'}, **handler)},
+        'loggers': {'': {'handlers': ['file'], 'level': 'INFO'},
+                    'teste.silencioso': {'level': 'WARNING'}},
+    }
+
+def test_fingerprint_ignora_literais_e_espacos():
+    a = logs.fingerprint_query("SELECT * FROM produtos WHERE id = 10 AND nome = 'Arroz'")
+    b = logs.fingerprint_query("SELECT * FROM produtos\n   WHERE id = 7 AND nome = 'Feijão'")
+    c = logs.fingerprint_query("SELECT * FROM vendas WHERE id = 10")
+    assert a == b
+    assert a != c
+
+def test_registros_json_com_usuario_e_niveis_por_modulo(tmp_path):
+    arquivo = tmp_path / 'app.log'
+    raiz = logging.getLogger()
+    anteriores, nivel = list(raiz.handlers), raiz.level
+    try:
+        logs.configurar(_config(arquivo))
+        logs.definir_usuario('maria')
+        logging.getLogger('teste.vendas').info("Venda %s registrada", 5, extra={'latency_ms': 1.5, 'venda_id': 5})
+        logging.getLogger('teste.silencioso').info("não aparece")
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logging.getLogger('teste.vendas').exception("Erro")
+        logs.parar()
+    finally:
+        logs.definir_usuario(None)
+        raiz.handlers[:] = anteriores
+        raiz.setLevel(nivel)
+
+    registros = [json.loads(linha) for linha in arquivo.read_text(encoding='utf-8').splitlines()]
+    assert len(registros) == 2
+    assert registros[0]['msg'] == "Venda 5 registrada"
+    assert registros[0]['module'] == 'teste.vendas'
+    assert registros[0]['usuario'] == 'maria'
+    assert registros[0]['latency_ms'] == 1.5
+    assert registros[1]['level'] == 'ERROR'
+    assert 'ValueError: falhou' in registros[1]['exc']
+
+def test_disco_lento_nao_bloqueia_quem_registra(tmp_path):
+    liberar = threading.Event()
+
+    class HandlerLento(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.recebidos = 0
+
+        def emit(self, record):
+            liberar.wait(5)
+            self.recebidos += 1
+
+    lento = HandlerLento()
+    config = _config(tmp_path / 'app.log')
+    config['handlers']['lento'] = {'()': lambda: lento}
+    config['loggers']['']['handlers'].append('lento')
+    raiz = logging.getLogger()
+    anteriores, nivel = list(raiz.handlers), raiz.level
+    try:
+        logs.configurar(config)
+        inicio = time.perf_counter()
+        for i in range(200):
+            logging.getLogger('teste.vendas').info(f"Venda {i}")
+        decorrido = time.perf_counter() - inicio
+        liberar.set()
+        logs.parar()
+    finally:
+        liberar.set()
+        raiz.handlers[:] = anteriores
+        raiz.setLevel(nivel)
+
+    assert decorrido < 1
+    assert lento.recebidos == 200
+
+def test_rotacao_por_tamanho(tmp_path):
+    arquivo = tmp_path / 'app.log'
+    handler = logs.ArquivoRotativo(str(arquivo), maxBytes=200, backupCount=2)
+    handler.setFormatter(logs.FormatadorJSON())
+    for i in range(20):
+        handler.handle(logging.makeLogRecord({'name': 'teste', 'msg': f"linha {i}", 'levelname': 'INFO'}))
+    handler.close()
+    assert (tmp_path / 'app.log.1').exists()
+    assert not (tmp_path / 'app.log.3').exists()
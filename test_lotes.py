@@ -0,0 +1,63 @@
+import database
+import lotes
+
+def _produto(nome='Whey', quantidade=0):
+    import produtos
+    produtos.cadastrar_produto(nome, quantidade, '100', '31/12/2030')
+    return produtos.listar_produtos()[-1]['id']
+
+def test_venda_consome_lotes_fefo(banco_temporario):
+    import vendas
+    lotes.alocador_fefo.descartar()
+    produto_id = _produto()
+    lotes.cadastrar_lote(produto_id, 'B', '2027-03-01', 5)
+    lotes.cadastrar_lote(produto_id, 'A', '2027-01-01', 3)
+    lotes.cadastrar_lote(produto_id, 'C', '2027-06-01', 5)
+
+    assert vendas.registrar_venda(produto_id, 4, '100') == "Venda registrada com sucesso."
+    assert vendas.registrar_venda(produto_id, 2, '100') == "Venda registrada com sucesso."
+
+    restantes = {l['lote']: l['quantidade'] for l in lotes.listar_lotes(produto_id)}
+    assert restantes == {'B': 2, 'C': 5}
+    consumo = database.execute_query(
+        "SELECT l.lote, SUM(vl.quantidade) AS q FROM vendas_lotes vl JOIN lotes l ON l.id = vl.lote_id "
+        "GROUP BY l.lote ORDER BY l.lote", fetch=True)
+    assert [(c['lote'], c['q']) for c in consumo] == [('A', 3), ('B', 3)]
+    produto = database.execute_query("SELECT quantidade, validade FROM produtos WHERE id = ?", (produto_id,), fetch=True)[0]
+    assert produto == {'quantidade': 7, 'validade': '2027-03-01'}
+
+def test_heap_desatualizado_e_recarregado(banco_temporario):
+    import vendas
+    lotes.alocador_fefo.descartar()
+    produto_id = _produto()
+    lotes.cadastrar_lote(produto_id, 'A', '2027-01-01', 3)
+    lotes.cadastrar_lote(produto_id, 'B', '2027-02-01', 3)
+    vendas.registrar_venda(produto_id, 1, '100')
+
+    # Another terminal sells the rest of lot A directly in the database
+    database.execute_query("UPDATE lotes SET quantidade = 0 WHERE lote = 'A'")
+    assert vendas.registrar_venda(produto_id, 2, '100') == "Venda registrada com sucesso."
+    assert {l['lote']: l['quantidade'] for l in lotes.listar_lotes(produto_id)} == {'B': 1}
+
+def test_produto_sem_lotes_usa_contador(banco_temporario):
+    import vendas
+    lotes.alocador_fefo.descartar()
+    produto_id = _produto(quantidade=4)
+    assert vendas.registrar_venda(produto_id, 4, '100') == "Venda registrada com sucesso."
+    assert database.execute_query("SELECT COUNT(*) AS n FROM vendas_lotes", fetch=True)[0]['n'] == 0
+
+def test_edicao_de_estoque_acompanha_os_lotes(banco_temporario):
+    import produtos
+    import vendas
+    lotes.alocador_fefo.descartar()
+    produto_id = _produto()
+    lotes.cadastrar_lote(produto_id, 'L1', '2027-01-01', 10)
+    vendas.registrar_venda(produto_id, 8, '100')
+
+    produtos.atualizar_produto(produto_id, 'Whey', 0, '100', '2030-12-31')
+    assert lotes.listar_lotes(produto_id) == []
+
+    produtos.atualizar_produto(produto_id, 'Whey', 5, '100', '2030-12-31')
+    assert vendas.registrar_venda(produto_id, 3, '100') == "Venda registrada com sucesso."
+    assert [(l['validade'], l['quantidade']) for l in lotes.listar_lotes(produto_id)] == [('2030-12-31', 2)]
+    assert produtos.buscar_produto(produto_id)['validade'] == '2030-12-31'
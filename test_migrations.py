@@ -0,0 +1,90 @@
+import sqlite3
+
+import database
+import migrations
+
+def test_migracoes_sao_idempotentes(banco_temporario):
+    aplicadas = migrations.run_migrations()
+    assert aplicadas == len(migrations.MIGRATIONS)
+    assert migrations.get_schema_version() == migrations.MIGRATIONS[-1].version
+    assert migrations.run_migrations() == 0
+
+def test_usuarios_legado_recebe_schema_canonico(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'legado.db')
+    conn = sqlite3.connect(caminho)
+    conn.execute('''
+        CREATE TABLE usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE,
+            senha BLOB NOT NULL,
+            permissao TEXT DEFAULT 'Funcionario',
+            data_criacao TEXT NOT NULL,
+            ultimo_login TEXT,
+            tentativas_login INTEGER DEFAULT 0,
+            bloqueado INTEGER DEFAULT 0,
+            token_reset TEXT,
+            expiracao_token TEXT
+        )
+    ''')
+    conn.execute("INSERT INTO usuarios (username, senha, data_criacao) VALUES ('arthur', 'x', '2025-06-01 10:00:00')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setitem(database.get_config()['db'], 'name', caminho)
+    database.create_tables()
+    migrations.run_migrations()
+
+    with database.get_connection() as conn:
+        colunas = migrations.colunas_da_tabela(conn, 'usuarios')
+    assert 'data_criacao' not in colunas
+    usuario = database.execute_query("SELECT * FROM usuarios", fetch=True)[0]
+    assert usuario['username'] == 'arthur'
+    assert usuario['data_cadastro'] == '2025-06-01 10:00:00'
+    assert usuario['ultima_atualizacao'] == '2025-06-01 10:00:00'
+    database.close_connections()
+
+def test_rebuild_em_lotes_espelha_escritas_concorrentes(banco_temporario, monkeypatch):
+    database.execute_query("CREATE TABLE itens (id INTEGER PRIMARY KEY, valor REAL)")
+    for i in range(1, 11):
+        database.execute_query("INSERT INTO itens (id, valor) VALUES (?, ?)", (i, i * 1.5))
+
+    chamadas = []
+    def escrita_concorrente(_):
+        if chamadas:
+            return
+        chamadas.append(1)
+        outra = sqlite3.connect(banco_temporario)
+        outra.execute("UPDATE itens SET valor = 99 WHERE id = 1")
+        outra.execute("DELETE FROM itens WHERE id = 10")
+        outra.execute("INSERT INTO itens (id, valor) VALUES (11, 4.25)")
+        outra.commit()
+        outra.close()
+    monkeypatch.setattr(migrations.time, 'sleep', escrita_concorrente)
+
+    with database.get_connection() as conn:
+        migrations.rebuild_table(
+            conn, 'itens',
+            "CREATE TABLE {tabela} (id INTEGER PRIMARY KEY, centavos INTEGER NOT NULL)",
+            {'id': 'id', 'centavos': 'CAST(ROUND(valor * 100) AS INTEGER)'},
+            indices=["CREATE INDEX idx_itens_centavos ON {tabela}(centavos)"],
+            batch_size=3, pausa=0.01
+        )
+    linhas = database.execute_query("SELECT id, centavos FROM itens ORDER BY id", fetch=True)
+    valores = {l['id']: l['centavos'] for l in linhas}
+    assert valores[1] == 9900
+    assert 10 not in valores
+    assert valores[11] == 425
+    assert len(valores) == 10
+    indices = database.execute_query("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'itens'", fetch=True)
+    assert [i['name'] for i in indices] == ['idx_itens_centavos']
+
+def test_datas_legadas_sao_normalizadas(banco_temporario):
+    migrations.run_migrations(target=4)
+    database.execute_query('''
+        INSERT INTO produtos (nome, quantidade, preco_centavos, validade, data_cadastro, ultima_atualizacao)
+        VALUES ('BCAA', 1, 1000, '15/08/2026', '2025-06-09T21:48:53.209', '2025-06-09 21:48:53')
+    ''')
+    migrations.run_migrations()
+    produto = database.execute_query("SELECT validade, data_cadastro FROM produtos", fetch=True)[0]
+    assert produto == {'validade': '2026-08-15', 'data_cadastro': '2025-06-09 21:48:53'}
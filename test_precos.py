@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+import database
+import precos
+import queries
+
+def test_historico_registra_apenas_mudancas(banco_temporario):
+    import produtos
+    produto_id = produtos.cadastrar_produto('Vinho', 10, '50', '01/01/2030')
+    produtos.atualizar_produto(produto_id, 'Vinho', 10, '50', '01/01/2030')
+    produtos.atualizar_produto(produto_id, 'Vinho', 10, '45,90', '01/01/2030')
+    assert [h['preco'] for h in precos.historico_produto(produto_id)] == [Decimal('50.00'), Decimal('45.90')]
+
+def test_preco_em_data_e_join_por_vigencia(banco_temporario):
+    with database.transaction() as conn:
+        conn.execute("INSERT INTO produtos (nome, quantidade, preco_centavos, validade, data_cadastro, ultima_atualizacao) "
+                     "VALUES ('Cerveja', 100, 700, '2030-01-01', 'x', 'x')")
+        for preco, data in ((500, '2025-01-01 00:00:00'), (600, '2025-02-01 00:00:00'), (700, '2025-03-01 00:00:00')):
+            conn.execute(queries.HISTORICO_PRECOS_INSERIR, (1, preco, data))
+        for data in ('2025-01-15 10:00:00', '2025-02-01 00:00:00', '2025-03-10 09:00:00'):
+            conn.execute(queries.VENDAS_INSERIR, (1, 1, 450, 450, data, None, 'PIX'))
+
+    assert precos.preco_centavos_em(1, '2024-12-31') is None
+    assert precos.preco_centavos_em(1, '2025-02-15') == 600
+    vendas = precos.vendas_com_preco_vigente('2025-01-01', '2025-03-31')
+    assert [v['preco_tabela_centavos'] for v in vendas] == [500, 600, 700]
+
+def test_preco_do_proprio_dia(banco_temporario):
+    import estoque
+    import produtos
+    from datas import hoje
+    produto_id = produtos.cadastrar_produto('Suco', 10, '8', '01/01/2030')
+    produtos.atualizar_produto(produto_id, 'Suco', 10, '9', '01/01/2030')
+    # Both prices were set today: the later one is in force at the end of the day
+    assert precos.preco_centavos_em(produto_id, hoje()) == 900
+    assert estoque.estoque_em(produto_id, hoje()) == 10
+
+def test_consulta_pontual_usa_indice(banco_temporario):
+    plano = database.execute_query('EXPLAIN QUERY PLAN ' + queries.HISTORICO_PRECO_EM, (1, 'x'), fetch=True)
+    assert any('idx_historico_precos_produto_data' in linha['detail'] for linha in plano)
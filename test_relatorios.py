@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+import database
+import relatorios
+
+def _preparar():
+    import produtos
+    import vendas
+    produtos.cadastrar_produto('Chá', 10, '2,00', '2030-01-01')
+    produto = produtos.listar_produtos()[0]
+    vendas.registrar_venda(produto['id'], 1, produto['preco'])
+    vendas.registrar_venda(produto['id'], 2, produto['preco'])
+    return produto
+
+def _ler(tabela, marca, ate='9999-12-31 00:00:00', limite=1):
+    nova_marca, paginas = relatorios.ler_alteracoes(tabela, marca, limite, ate)
+    linhas = [linha for _, pagina in paginas for linha in pagina]
+    return nova_marca, linhas
+
+def test_marca_dagua_le_apenas_o_delta(banco_temporario):
+    produto = _preparar()
+    marca, linhas = _ler('vendas', {})
+    assert [linha[0] for linha in linhas] == [1, 2] and marca == {'id': 2}
+    assert _ler('vendas', marca)[1] == []
+
+    marca, linhas = _ler('produtos', {}, ate='9999-12-31 00:00:00')
+    assert [linha[0] for linha in linhas] == [produto['id']]
+    assert _ler('produtos', marca)[1] == []
+
+    # Changes at or after the cutoff wait for the next run
+    database.execute_query("UPDATE produtos SET ultima_atualizacao = '9999-12-31 00:00:00'")
+    assert _ler('produtos', {}, ate='9999-12-31 00:00:00')[1] == []
+
+def test_parquet_incremental_particionado(banco_temporario, tmp_path, monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setitem(relatorios.get_config()['analitico'], 'atraso_segundos', 0)
+    _preparar()
+    time.sleep(1)
+    assert relatorios.exportar_analitico(str(tmp_path))['vendas'] == 2
+    assert relatorios.exportar_analitico(str(tmp_path)) == {'vendas': 0, 'produtos': 0, 'clientes': 0}
+
+    vendas = pq.read_table(str(tmp_path / 'vendas'))
+    assert vendas.num_rows == 2
+    assert vendas.column('total_centavos').to_pylist() == [200, 400]
+
+def test_pacote_paralelo_usa_snapshot(banco_temporario, tmp_path):
+    import relatorios_paralelos
+    _preparar()
+    progresso = []
+    resultados = relatorios_paralelos.gerar_pacote(
+        str(tmp_path / 'pacote'), progresso=lambda feitos, total: progresso.append(feitos), processos=2)
+    assert resultados == {'vendas': 2, 'clientes': 0, 'categoria': 1}
+    assert progresso[0] == 0 and progresso[-1] == 3
+    assert sorted(p.name for p in (tmp_path / 'pacote').iterdir()) == \
+        ['relatorio_categoria.xlsx', 'relatorio_clientes.xlsx', 'relatorio_vendas.xlsx']
+
+def test_resumo_por_categoria_acompanha_gatilhos(banco_temporario):
+    import produtos
+    import vendas
+    leite = produtos.cadastrar_produto('Leite', 10, '5,00', '2030-01-01', categoria='Bebidas')
+    suco = produtos.cadastrar_produto('Suco', 4, '8,00', '2030-01-01', categoria='Bebidas')
+    produtos.cadastrar_produto('Arroz', 2, '20,00', '2030-01-01')
+    database.execute_query("INSERT INTO categorias (nome, descricao) VALUES ('Limpeza', 'Sem produtos')")
+    vendas.registrar_venda(leite, 2, '5,00')
+    produtos.atualizar_produto(suco, 'Suco', 6, '10,00', '2030-01-01', categoria='Sucos')
+
+    resumo = {item['categoria']: item for item in relatorios.resumo_por_categoria()}
+    assert set(resumo) == {'Bebidas', 'Sucos', 'Sem categoria', 'Limpeza'}
+    bebidas = resumo['Bebidas']
+    assert (bebidas['produtos'], bebidas['quantidade'], bebidas['valor_centavos']) == (1, 8, 4000)
+    assert (bebidas['vendas'], bebidas['quantidade_vendida'], bebidas['total_centavos'], bebidas['giro']) == \
+        (1, 2, 1000, 0.25)
+    assert resumo['Sucos']['valor_centavos'] == 6000
+    assert resumo['Limpeza']['descricao'] == 'Sem produtos' and resumo['Limpeza']['giro'] is None
+
+    # The triggers must agree with a full recalculation
+    estoque = database.execute_query('SELECT * FROM resumo_estoque_categoria WHERE produtos > 0 ORDER BY categoria', fetch=True)
+    database.execute_query('DELETE FROM resumo_estoque_categoria')
+    database.execute_query(relatorios.queries.RESUMO_ESTOQUE_RECALCULAR)
+    assert database.execute_query('SELECT * FROM resumo_estoque_categoria ORDER BY categoria', fetch=True) == estoque
+
+def test_resumo_de_vendas_usa_a_categoria_da_venda(banco_temporario):
+    import produtos
+    import vendas
+    suco = produtos.cadastrar_produto('Suco', 10, '8,00', '2030-01-01', categoria='Bebidas')
+    vendas.registrar_venda(suco, 1, '8,00')
+    vendas.registrar_venda(suco, 2, '8,00')
+    produtos.atualizar_produto(suco, 'Suco', 7, '8,00', '2030-01-01', categoria='Sucos')
+    vendas.registrar_venda(suco, 1, '8,00')
+
+    def vendido():
+        return {r['categoria']: (r['vendas'], r['total_centavos']) for r in database.execute_query(
+            'SELECT categoria, SUM(vendas) AS vendas, SUM(total_centavos) AS total_centavos '
+            'FROM resumo_vendas_diario GROUP BY categoria HAVING SUM(vendas) > 0', fetch=True)}
+
+    assert vendido() == {'Bebidas': (2, 2400), 'Sucos': (1, 800)}
+    # Deleting and editing a sale made before the change touch the old category
+    database.execute_query('DELETE FROM vendas WHERE id = 1')
+    database.execute_query("UPDATE vendas SET quantidade = 3, total_centavos = 2400, data = '2020-01-01 10:00:00' WHERE id = 2")
+    assert vendido() == {'Bebidas': (1, 2400), 'Sucos': (1, 800)}
+
+    # The triggers must agree with a full recalculation
+    linhas = database.execute_query('SELECT * FROM resumo_vendas_diario WHERE vendas > 0 ORDER BY dia, categoria', fetch=True)
+    database.execute_query('DELETE FROM resumo_vendas_diario')
+    database.execute_query(relatorios.queries.RESUMO_VENDAS_RECALCULAR)
+    assert database.execute_query('SELECT * FROM resumo_vendas_diario ORDER BY dia, categoria', fetch=True) == linhas
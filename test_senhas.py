@@ -0,0 +1,44 @@
+import json
+
+import bcrypt
+
+import clientes
+from bootstrap import garantir_schema
+from database import execute_query
+import config
+import senhas
+
+def test_hash_usa_custo_configurado_e_verifica(senhas_rapidas):
+    hash_senha = senhas.gerar_hash('Senha@123')
+    assert senhas.custo_do_hash(hash_senha) == 4
+    assert senhas.verificar('Senha@123', hash_senha)
+    assert senhas.verificar('Senha@123', hash_senha.decode('utf-8'))
+    assert not senhas.verificar('errada', hash_senha)
+    assert not senhas.verificar('Senha@123', b'nao-e-bcrypt')
+    assert not senhas.verificar('Senha@123', None)
+
+def test_calibracao_salva_e_passa_a_valer(senhas_rapidas, monkeypatch):
+    monkeypatch.setitem(config.AUTENTICACAO_CONFIG, 'custo_minimo', 4)
+    # Verification time doubles per cost: 1 ms at 4, 32 ms at 9, 64 ms at 10
+    monkeypatch.setattr(senhas, 'medir_verificacao', lambda custo, repeticoes=3: 2.0 ** (custo - 4))
+    resultado = senhas.calibrar(alvo_ms=40)
+    assert resultado['custo'] == 9
+    with open(config.AUTENTICACAO_CONFIG['calibracao'], encoding='utf-8') as f:
+        assert json.load(f)['custo'] == 9
+    assert senhas.custo_atual() == 9
+    assert senhas.custo_do_hash(senhas.gerar_hash('x')) == 9
+
+def test_login_troca_hash_de_custo_antigo(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('joana', 'Senha@123', 'joana@integre.com')
+    antigo = bcrypt.hashpw(b'Senha@123', bcrypt.gensalt(rounds=5))
+    execute_query("UPDATE usuarios SET senha = ? WHERE username = 'joana'", (antigo,))
+
+    assert clientes.autenticar_usuario('joana', 'Senha@123')['username'] == 'joana'
+    novo = execute_query("SELECT senha FROM usuarios WHERE username = 'joana'", fetch=True)[0]['senha']
+    assert senhas.custo_do_hash(novo) == 4
+    assert senhas.verificar('Senha@123', novo)
+
+    # Already current: kept as is
+    assert clientes.autenticar_usuario('joana', 'Senha@123')
+    assert execute_query("SELECT senha FROM usuarios WHERE username = 'joana'", fetch=True)[0]['senha'] == novo
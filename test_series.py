@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import database
+import series
+
+def _venda(produto_id, data, quantidade, total_centavos):
+    database.execute_query(
+        'INSERT INTO vendas (produto_id, quantidade, preco_unitario_centavos, total_centavos, data, forma_pagamento) '
+        "VALUES (?, ?, 100, ?, ?, 'Dinheiro')", (produto_id, quantidade, total_centavos, data))
+
+@pytest.fixture
+def vendas_exemplo(banco_temporario):
+    import produtos
+    cha = produtos.cadastrar_produto('Chá', 100, '1,00', '2030-01-01', categoria='Bebidas')
+    pao = produtos.cadastrar_produto('Pão', 100, '1,00', '2030-01-01')
+    _venda(cha, '2025-03-03 09:00:00', 1, 100)   # Monday
+    _venda(cha, '2025-03-03 23:30:00', 2, 200)
+    _venda(pao, '2025-03-05 10:00:00', 3, 300)
+    _venda(cha, '2025-04-01 12:00:00', 4, 400)
+    return cha, pao
+
+def test_dias_sem_venda_sao_preenchidos(vendas_exemplo):
+    serie = series.serie_vendas('dia', '2025-03-02', '2025-03-06')
+    assert serie.rotulos() == ['02/03', '03/03', '04/03', '05/03', '06/03']
+    assert serie.total_centavos.tolist() == [0, 300, 0, 300, 0]
+    assert serie.vendas.tolist() == [0, 2, 0, 1, 0]
+
+def test_semanas_e_meses(vendas_exemplo):
+    semanas = series.serie_vendas('semana', '2025-03-01', '2025-03-10')
+    assert semanas.inicio.tolist() == np.array(['2025-02-24', '2025-03-03', '2025-03-10'], dtype='datetime64[D]').tolist()
+    assert semanas.quantidade.tolist() == [0, 6, 0]
+    meses = series.serie_vendas('mes', '2025-02-15', '2025-04-30')
+    assert meses.rotulos() == ['02/2025', '03/2025', '04/2025']
+    assert meses.total_centavos.tolist() == [0, 600, 400]
+
+def test_filtros_e_fuso(vendas_exemplo, monkeypatch):
+    cha, _ = vendas_exemplo
+    assert series.serie_vendas('mes', '2025-03-01', '2025-04-30', produto_id=cha).quantidade.tolist() == [3, 4]
+    assert series.serie_vendas('mes', '2025-03-01', '2025-04-30', categoria='').quantidade.tolist() == [3, 0]
+    # Recorded in São Paulo (UTC-3): the 23:30 sale belongs to the next day in UTC
+    monkeypatch.setenv('TZ', 'America/Sao_Paulo')
+    import time
+    time.tzset()
+    try:
+        serie = series.serie_vendas('dia', '2025-03-03', '2025-03-04', fuso='UTC')
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert serie.quantidade.tolist() == [1, 2]
+
+def test_categoria_da_venda_nos_dois_caminhos(vendas_exemplo):
+    import produtos
+    cha, _ = vendas_exemplo
+    produtos.atualizar_produto(cha, 'Chá', 100, '1,00', '2030-01-01', categoria='Chás')
+    for categoria, esperado in (('Bebidas', 3), ('Chás', 0)):
+        rollup = series.serie_vendas('mes', '2025-03-01', '2025-03-31', categoria=categoria)
+        horario = series.serie_vendas('mes', '2025-03-01', '2025-03-31', categoria=categoria, fuso='UTC')
+        assert rollup.quantidade.tolist() == horario.quantidade.tolist() == [esperado]
+
+def test_serie_por_produto_usa_indice(banco_temporario):
+    plano = database.execute_query('EXPLAIN QUERY PLAN ' + series.queries.SERIE_VENDAS_HORARIO_PRODUTO,
+                                   (1, '2025-01-01', '2025-02-01'), fetch=True)
+    assert 'idx_vendas_produto_data' in ' '.join(linha['detail'] for linha in plano)
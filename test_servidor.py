@@ -0,0 +1,131 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from bootstrap import garantir_schema
+import clientes
+from database import execute_query
+import produtos
+import servidor as central
+
+@pytest.fixture
+def servidor(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('caixa', 'Senha@123', 'caixa@integre.com')
+    produtos.cadastrar_produto('Arroz', 100, '5.00', '2030-01-01')
+    servidor = central.criar_servidor('127.0.0.1', 0, terminais=8)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_escritas_agrupadas_e_falha_isolada(banco_temporario):
+    escritor = central.EscritorAgrupado()
+    desfeitas = []
+
+    def inserir(nome, falhar=False):
+        def executar(conn):
+            conn.execute("INSERT INTO categorias (nome) VALUES (?)", (nome,))
+            if falhar:
+                raise central.ErroServidor("recusada")
+            return nome
+        return executar
+
+    # Queued before the writer starts, so they all go in one transaction
+    futuros = [escritor.enviar(inserir('A')),
+               escritor.enviar(inserir('B', falhar=True), lambda: desfeitas.append('B')),
+               escritor.enviar(inserir('C'))]
+    escritor.iniciar()
+    assert futuros[0].result(5) == 'A' and futuros[2].result(5) == 'C'
+    with pytest.raises(central.ErroServidor):
+        futuros[1].result(5)
+    escritor.parar()
+
+    assert (escritor.lotes, escritor.escritas) == (1, 3)
+    assert desfeitas == ['B']
+    assert [l['nome'] for l in execute_query("SELECT nome FROM categorias ORDER BY nome", fetch=True)] == ['A', 'C']
+
+def test_login_e_permissoes(servidor):
+    with central.ClienteTerminal(*servidor.server_address[:2]) as cliente:
+        with pytest.raises(central.ErroServidor, match="Faça login"):
+            cliente.chamar('produtos')
+        with pytest.raises(central.ErroServidor, match="inválidos"):
+            cliente.entrar('caixa', 'errada')
+        assert cliente.entrar('caixa', 'Senha@123')['papel'] == 'Funcionario'
+        assert [p['nome'] for p in cliente.chamar('produtos')] == ['Arroz']
+        with pytest.raises(central.ErroServidor, match="Pedido inválido"):
+            cliente.chamar('apagar_tudo')
+        for linha in (b'nao e json\n', b'[1, 2]\n', b'{"op": ["venda"]}\n'):
+            cliente._socket.sendall(linha)
+            assert json.loads(cliente._leitor.readline()) == {'ok': False, 'erro': "Pedido inválido"}
+        assert cliente.registrar_venda(99, 1) == "Produto não encontrado."
+
+def test_vendas_simultaneas_de_varios_terminais(servidor):
+    resultados, erros = [], []
+
+    def terminal():
+        try:
+            with central.ClienteTerminal(*servidor.server_address[:2]) as cliente:
+                cliente.entrar('caixa', 'Senha@123')
+                for _ in range(20):
+                    resultados.append(cliente.registrar_venda(1, 1))
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=terminal) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 160 attempts on a stock of 100: exactly 100 go through, none is lost
+    assert erros == []
+    assert resultados.count("Venda registrada com sucesso.") == 100
+    assert resultados.count("Estoque insuficiente.") == 60
+    assert produtos.buscar_produto(1)['quantidade'] == 0
+    assert execute_query("SELECT COUNT(*) as n FROM vendas", fetch=True)[0]['n'] == 100
+    assert central.escritor.escritas >= 160
+
+def test_servidor_que_nao_responde():
+    with socket.socket() as mudo:
+        # Connections complete in the backlog, but nothing is ever read or answered
+        mudo.bind(('127.0.0.1', 0))
+        mudo.listen()
+        cliente = central.ClienteTerminal(*mudo.getsockname(), timeout=0.2)
+        assert cliente.registrar_venda(1, 1).startswith("Sem resposta do servidor")
+        # The late reply must never be taken for the next sale's
+        assert cliente.registrar_venda(1, 1).startswith("Sem conexão com o servidor")
+        cliente.fechar()
+
+def test_terminal_alem_da_capacidade_e_recusado(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    clientes.cadastrar_usuario('caixa', 'Senha@123', 'caixa@integre.com')
+    servidor = central.criar_servidor('127.0.0.1', 0, terminais=1)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        with central.ClienteTerminal(*servidor.server_address[:2], timeout=5) as primeiro:
+            primeiro.entrar('caixa', 'Senha@123')
+            with central.ClienteTerminal(*servidor.server_address[:2], timeout=5) as segundo:
+                with pytest.raises(central.ErroServidor, match="Servidor lotado"):
+                    segundo.entrar('caixa', 'Senha@123')
+        # The slot is free again once the first checkout disconnects
+        prazo = time.monotonic() + 5
+        while servidor.conexoes_na_fila() or servidor._abertas:
+            assert time.monotonic() < prazo
+            time.sleep(0.01)
+        with central.ClienteTerminal(*servidor.server_address[:2], timeout=5) as terceiro:
+            assert terceiro.entrar('caixa', 'Senha@123')['username'] == 'caixa'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+def test_erro_de_programacao_nao_vira_pedido_invalido(servidor, monkeypatch):
+    def quebrada(terminal, args):
+        return args.inexistente
+    monkeypatch.setitem(central.OPERACOES, 'quebrada', central.Operacao(quebrada, None))
+    with central.ClienteTerminal(*servidor.server_address[:2]) as cliente:
+        with pytest.raises(central.ErroServidor, match="Erro interno"):
+            cliente.chamar('quebrada')
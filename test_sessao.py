@@ -0,0 +1,62 @@
+import pytest
+
+from bootstrap import garantir_schema
+import clientes
+from database import execute_query, get_connection
+from sessao import GerenciadorSessoes, PermissaoNegada, sessoes
+import vendas
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+def _usuario(username, permissao='Funcionario'):
+    clientes.cadastrar_usuario(username, 'Senha@123', f'{username}@integre.com', permissao)
+    return execute_query("SELECT id, username, permissao FROM usuarios WHERE username = ?", (username,), fetch=True)[0]
+
+def test_permissoes_em_memoria_e_expiracao(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    relogio = Relogio()
+    gerenciador = GerenciadorSessoes(duracao_minutos=60, relogio=relogio)
+    sessao = gerenciador.abrir(_usuario('caixa'))
+
+    comandos = []
+    with get_connection() as conn:
+        conn.set_trace_callback(comandos.append)
+        try:
+            assert gerenciador.pode(sessao, 'vendas')
+            assert not gerenciador.pode(sessao, 'usuarios')
+        finally:
+            conn.set_trace_callback(None)
+    assert comandos == []
+
+    with pytest.raises(PermissaoNegada):
+        gerenciador.exigir(sessao, 'usuarios')
+    relogio.agora += 3600
+    assert not gerenciador.pode(sessao, 'vendas')
+    with pytest.raises(PermissaoNegada, match="expirada"):
+        gerenciador.exigir(sessao, 'vendas')
+
+def test_alteracoes_do_admin_invalidam_sessoes(banco_temporario, senhas_rapidas):
+    garantir_schema()
+    usuario = _usuario('gerente', 'Gerente')
+    caixa1, caixa2 = sessoes.abrir(usuario), sessoes.abrir(usuario)
+
+    # Logout on one terminal keeps the other open
+    sessoes.encerrar(caixa1)
+    assert not sessoes.valida(caixa1)
+    assert sessoes.pode(caixa2, 'relatorios')
+
+    clientes.alterar_permissao(usuario['id'], 'Funcionario')
+    assert not sessoes.valida(caixa2)
+    assert vendas.registrar_venda(1, 1, 10, sessao=caixa2).startswith("Permissão negada")
+    renovada = sessoes.renovar(caixa2)
+    assert renovada.papel == 'Funcionario'
+    assert not sessoes.pode(renovada, 'relatorios')
+
+    clientes.bloquear_usuario(usuario['id'])
+    assert not sessoes.valida(renovada)
+    assert sessoes.renovar(renovada) is None
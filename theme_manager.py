@@ -11,12 +11,22 @@ from config import THEME_COLORS
 
 class ThemeManager:
     def __init__(self):
-        self.current_theme = 'light'
+        self._current_theme = None  # read from theme_file on first use
         self.theme_file = 'user_theme.json'
-        self.load_theme_preference()
+    
+    @property
+    def current_theme(self) -> str:
+        if self._current_theme is None:
+            self.load_theme_preference()
+        return self._current_theme
+    
+    @current_theme.setter
+    def current_theme(self, tema: str):
+        self._current_theme = tema
         
     def load_theme_preference(self):
         """Load user's theme preference from file"""
+        self.current_theme = 'light'
         try:
             if os.path.exists(self.theme_file):
                 with open(self.theme_file, 'r') as f:
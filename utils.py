@@ -2,10 +2,12 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Optional, Callable
 import threading
+import queue
 from functools import partial
 import json
 import os
 from config import THEME_COLORS
+from database import release_thread_connection
 
 # Use themes from config
 THEMES = {
@@ -29,12 +31,108 @@ class AsyncTask:
             except Exception as e:
                 if callback:
                     tk.CallWrapper()._subst(None, lambda: _callback(e))
+            finally:
+                release_thread_connection()
 
         thread = threading.Thread(target=_run)
         thread.daemon = True
         thread.start()
         return thread
 
+class ProgressDialog:
+    """
+    Window that runs a long job on a worker thread with a progress bar.
+    The job receives (report, cancel_event) and may call report(done, total)
+    at any rate; updates go through a queue polled with after(), so widgets
+    are only touched on the Tk thread. on_done(dialog, result) and
+    on_error(dialog, exception) also run on the Tk thread.
+    """
+    def __init__(self, title, message, job, on_done=None, on_error=None, theme='light', poll_ms=100):
+        colors = THEME_COLORS[theme]
+        self.window = tk.Toplevel()
+        self.window.title(title)
+        self.window.configure(bg=colors['background'])
+        self.status = tk.Label(self.window, text=message, bg=colors['background'],
+                               fg=colors['text'], font=("Arial", 12))
+        self.status.pack(padx=20, pady=(20, 10))
+        self.bar = ttk.Progressbar(self.window, length=400, mode='determinate')
+        self.bar.pack(padx=20, pady=10)
+        # Extra widgets (e.g. an error list) can be packed here by the caller
+        self.body = tk.Frame(self.window, bg=colors['background'])
+        self.body.pack(fill='both', expand=True, padx=20)
+        self.buttons = tk.Frame(self.window, bg=colors['background'])
+        self.buttons.pack(pady=10)
+        self.cancel_button = ttk.Button(self.buttons, text="Cancelar", command=self.cancel)
+        self.cancel_button.pack(side='left', padx=5)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.cancel_event = threading.Event()
+        self._messages = queue.Queue()
+        self._on_done = on_done
+        self._on_error = on_error
+        self._poll_ms = poll_ms
+        self._job = job
+        threading.Thread(target=self._run, name=f"tarefa-{title}", daemon=True).start()
+        self.window.after(poll_ms, self._poll)
+
+    def _run(self):
+        try:
+            result = self._job(lambda done, total=None: self._messages.put(('progress', done, total)),
+                               self.cancel_event)
+            self._messages.put(('done', result, None))
+        except Exception as e:
+            self._messages.put(('error', e, None))
+        finally:
+            release_thread_connection()
+
+    def _poll(self):
+        if not self.window.winfo_exists():
+            return
+        try:
+            while True:
+                kind, value, total = self._messages.get_nowait()
+                if kind == 'progress':
+                    if total:
+                        self.bar.config(maximum=total, value=min(value, total))
+                    else:
+                        self.bar.config(mode='indeterminate')
+                        self.bar.step()
+                    self.set_status(f"{value} de {total}" if total else f"{value}")
+                elif kind == 'done':
+                    self.finish("Concluído")
+                    if self._on_done:
+                        self._on_done(self, value)
+                    return
+                else:
+                    self.finish("Falha")
+                    if self._on_error:
+                        self._on_error(self, value)
+                    else:
+                        from tkinter import messagebox
+                        messagebox.showerror("Erro", str(value), parent=self.window)
+                    return
+        except queue.Empty:
+            pass
+        self.window.after(self._poll_ms, self._poll)
+
+    def set_status(self, text):
+        self.status.config(text=text)
+
+    def finish(self, text):
+        """Fill the bar and turn the cancel button into a close button"""
+        self.bar.config(mode='determinate', maximum=1, value=1)
+        self.set_status(text)
+        self.cancel_button.config(text="Fechar", command=self.window.destroy)
+
+    def cancel(self):
+        """Ask the job to stop; it checks cancel_event between chunks"""
+        self.cancel_event.set()
+        self.set_status("Cancelando...")
+
+    def close(self):
+        self.cancel_event.set()
+        self.window.destroy()
+
 class ModernButton(ttk.Button):
     """Custom button with hover effect and modern styling"""
     def __init__(self, master, **kwargs):
@@ -291,17 +389,23 @@ class LoadingSpinner:
         self.angle = 0
         self.color = colors['primary']
         self.running = False
+        self._after_id = None
     
     def start(self):
+        if self.running:
+            return  # one animation loop at a time
         self.running = True
         self._animate()
     
     def stop(self):
         self.running = False
+        if self._after_id is not None:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None
         self.canvas.delete("all")
     
     def _animate(self):
-        if not self.running:
+        if not self.running or not self.canvas.winfo_exists():
             return
         
         self.canvas.delete("all")
@@ -320,7 +424,7 @@ class LoadingSpinner:
         )
         
         self.angle = (self.angle + 10) % 360
-        self.canvas.after(50, self._animate)
+        self._after_id = self.canvas.after(50, self._animate)
     
     def pack(self, **kwargs):
         self.canvas.pack(**kwargs)
@@ -1,97 +1,123 @@
-from database import get_connection, execute_query
+from database import DatabaseError, execute_query, transaction
+import queries
+from datas import agora, intervalo_dias
+from alertas_validade import motor_validade
+from lotes import alocador_fefo
+from sessao import Sessao, sessoes
+from estoque import registrar_movimento
+from exportacao import exportar, gui_exportar
+from dinheiro import Valor, para_centavos, para_reais, adicionar_reais, COLUNAS_MONETARIAS
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import tkinter as tk
 from tkinter import ttk, messagebox
 import produtos
 import clientes
-import pandas as pd
 from decimal import Decimal
+import logging
+import time
 
-def registrar_venda(produto_id: int, quantidade: int, preco_unitario: float, 
+logger = logging.getLogger(__name__)
+
+def registrar_venda(produto_id: int, quantidade: int, preco_unitario: Valor, 
                    cliente_id: Optional[int] = None, 
-                   forma_pagamento: str = "Dinheiro") -> str:
-    """Registra uma nova venda no sistema"""
+                   forma_pagamento: str = "Dinheiro",
+                   sessao: Optional[Sessao] = None) -> str:
+    """
+    Registra uma nova venda no sistema.
+    O total é calculado em centavos inteiros; a baixa de estoque, a
+    alocação FEFO dos lotes e o lançamento da venda acontecem na mesma
+    transação. Com 'sessao', a permissão 'vendas' é conferida em memória.
+    """
+    if sessao is not None and not sessoes.pode(sessao, 'vendas'):
+        return "Permissão negada: faça login com um usuário autorizado a vender."
+    inicio = time.perf_counter()
     try:
-        total = quantidade * preco_unitario
-        
-        # Verificar estoque
-        estoque_query = 'SELECT quantidade FROM produtos WHERE id = ?'
-        estoque_result = execute_query(estoque_query, (produto_id,), fetch=True)
-        
-        if not estoque_result or estoque_result[0]['quantidade'] < quantidade:
-            return "Estoque insuficiente."
-        
-        # Registrar venda
-        venda_query = '''
-            INSERT INTO vendas (produto_id, quantidade, preco_unitario, total, 
-                              data, cliente_id, forma_pagamento)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        '''
-        execute_query(venda_query, (
-            produto_id, quantidade, preco_unitario, total,
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-            cliente_id, forma_pagamento
-        ))
+        preco_centavos = para_centavos(preco_unitario)
+        momento = agora()
         
-        # Atualizar estoque
-        update_query = '''
-            UPDATE produtos 
-            SET quantidade = quantidade - ?,
-                ultima_atualizacao = ?
-            WHERE id = ?
-        '''
-        execute_query(update_query, (
-            quantidade, 
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-            produto_id
-        ))
+        with transaction() as conn:
+            venda_id = lancar_venda(conn, produto_id, quantidade, preco_centavos,
+                                    cliente_id, forma_pagamento, momento)
+            if venda_id is None:
+                # Nothing was written
+                return "Estoque insuficiente."
         
+        motor_validade.estoque_alterado(produto_id)
+        # Only enqueued here; the file is written by the logging thread
+        logger.info(f"Venda {venda_id} registrada", extra={
+            'venda_id': venda_id, 'produto_id': produto_id,
+            'latency_ms': round((time.perf_counter() - inicio) * 1000, 3)})
         return "Venda registrada com sucesso."
     except Exception as e:
+        # A rolled back sale leaves the in-memory lot heap ahead of the database
+        alocador_fefo.descartar(produto_id)
+        logger.exception(f"Erro ao registrar venda do produto {produto_id}", extra={'produto_id': produto_id})
         return f"Erro ao registrar venda: {str(e)}"
 
+def lancar_venda(conn, produto_id: int, quantidade: int, preco_centavos: int,
+                 cliente_id: Optional[int], forma_pagamento: str, momento: str) -> Optional[int]:
+    """
+    Escreve uma venda em 'conn', que deve estar em uma transação: baixa de
+    estoque, lançamento, movimento e alocação FEFO dos lotes.
+    Retorna o id da venda, ou None (sem escrever nada) se o estoque não
+    cobre a quantidade. Quem desfizer a transação deve chamar
+    alocador_fefo.descartar(produto_id).
+    """
+    # Baixa condicional: falha se o estoque não cobre a quantidade
+    cursor = conn.execute(queries.VENDAS_BAIXAR_ESTOQUE, (
+        quantidade, momento, produto_id, quantidade
+    ))
+    if cursor.rowcount == 0:
+        return None
+    
+    cursor = conn.execute(queries.VENDAS_INSERIR, (
+        produto_id, quantidade, preco_centavos, quantidade * preco_centavos,
+        momento, cliente_id, forma_pagamento
+    ))
+    venda_id = cursor.lastrowid
+    registrar_movimento(conn, produto_id, 'venda', -quantidade, referencia_id=venda_id, data=momento)
+    
+    # Lotes que vencem primeiro saem primeiro (produtos sem lote
+    # usam apenas o contador)
+    alocacao = alocador_fefo.alocar(conn, produto_id, quantidade)
+    if alocacao:
+        conn.executemany(queries.VENDAS_LOTES_INSERIR,
+                         [(venda_id, lote_id, qtd) for lote_id, qtd in alocacao])
+        conn.execute(queries.PRODUTOS_VALIDADE_DOS_LOTES, (produto_id,))
+    return venda_id
+
 def listar_vendas() -> List[Dict]:
     """Retorna lista de todas as vendas com detalhes"""
-    query = '''
-        SELECT v.id, p.nome, v.quantidade, v.preco_unitario, v.total, 
-               v.data, v.forma_pagamento, u.username as cliente
-        FROM vendas v
-        JOIN produtos p ON v.produto_id = p.id
-        LEFT JOIN usuarios u ON v.cliente_id = u.id
-        ORDER BY v.data DESC
-    '''
     try:
-        result = execute_query(query, fetch=True)
-        return result if result else []
-    except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao listar vendas: {str(e)}")
-        return []
+        result = execute_query(queries.VENDAS_LISTAR, fetch=True)
+        return adicionar_reais(result, COLUNAS_MONETARIAS) if result else []
+    except DatabaseError as e:
+        logger.error(f"Erro ao listar vendas: {str(e)}")
+        raise
+
+def pagina_vendas(apos: int = 0, limite: int = 100) -> List[Dict]:
+    """Até 'limite' vendas com id > 'apos', em ordem de id"""
+    result = execute_query(queries.VENDAS_PAGINA, (apos, limite), fetch=True)
+    return adicionar_reais(result, COLUNAS_MONETARIAS) if result else []
 
 def exportar_vendas_excel(caminho: str = 'relatorio_vendas.xlsx') -> None:
-    """Exporta todas as vendas para um arquivo Excel"""
-    vendas = listar_vendas()
-    if vendas:
-        df = pd.DataFrame(vendas)
-        df.to_excel(caminho, index=False)
+    """Exporta todas as vendas para um arquivo Excel, em páginas (sem carregar a tabela)"""
+    if exportar('vendas', caminho):
         messagebox.showinfo("Exportação", 
                           f"Vendas exportadas com sucesso para '{caminho}'")
     else:
         messagebox.showinfo("Exportação", 
                           "Nenhuma venda encontrada para exportar")
 
-def calcular_total_vendas_periodo(data_inicio: str, data_fim: str) -> float:
-    """Calcula o total de vendas em um período específico"""
-    query = '''
-        SELECT SUM(total) FROM vendas
-        WHERE data BETWEEN ? AND ?
-    '''
+def calcular_total_vendas_periodo(data_inicio: str, data_fim: str) -> Decimal:
+    """Calcula o total de vendas em um período específico (datas inclusivas)"""
     try:
-        result = execute_query(query, (data_inicio, data_fim), fetch=True)
-        return result[0]['SUM(total)'] if result and result[0]['SUM(total)'] else 0.0
-    except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao calcular vendas: {str(e)}")
-        return 0.0
+        result = execute_query(queries.VENDAS_TOTAL_PERIODO, intervalo_dias(data_inicio, data_fim), fetch=True)
+        return para_reais(result[0]['total_centavos'] if result else 0)
+    except DatabaseError as e:
+        logger.error(f"Erro ao calcular vendas: {str(e)}")
+        raise
 
 def gui_registrar_venda(tela_cheia: bool = False) -> None:
     """Modernized interface gráfica para registrar vendas com cálculo de total e troco"""
@@ -104,14 +130,14 @@ def gui_registrar_venda(tela_cheia: bool = False) -> None:
             
             # Buscar produto pelo nome para obter id e preço
             produtos_lista = produtos.listar_produtos()
-            produto = next((p for p in produtos_lista if p[1] == produto_nome), None)
+            produto = next((p for p in produtos_lista if p['nome'] == produto_nome), None)
             if not produto:
                 messagebox.showerror("Erro", "Produto não encontrado!")
                 return
             
-            produto_id = produto[0]
-            preco_unitario = produto[3]
-            estoque = produto[2]
+            produto_id = produto['id']
+            preco_unitario = produto['preco']
+            estoque = produto['quantidade']
             
             if estoque < quantidade:
                 messagebox.showerror("Erro", "Quantidade insuficiente em estoque!")
@@ -119,16 +145,16 @@ def gui_registrar_venda(tela_cheia: bool = False) -> None:
             
             # Buscar cliente pelo nome para obter id
             clientes_lista = clientes.listar_clientes()
-            cliente = next((c for c in clientes_lista if c[1] == cliente_nome), None)
-            cliente_id = cliente[0] if cliente else None
+            cliente = next((c for c in clientes_lista if c['nome'] == cliente_nome), None)
+            cliente_id = cliente['id'] if cliente else None
             
-            total = quantidade * preco_unitario
-            valor_pago = float(entry_valor_pago.get())
-            troco = valor_pago - total
+            total_centavos = quantidade * produto['preco_centavos']
+            troco_centavos = para_centavos(entry_valor_pago.get()) - total_centavos
             
-            if troco < 0:
+            if troco_centavos < 0:
                 messagebox.showerror("Erro", "Valor pago insuficiente!")
                 return
+            troco = para_reais(troco_centavos)
             
             resultado = registrar_venda(produto_id, quantidade, preco_unitario, 
                                        cliente_id, forma_pagamento)
@@ -153,7 +179,7 @@ def gui_registrar_venda(tela_cheia: bool = False) -> None:
 
     # Combobox de produtos
     produtos_lista = produtos.listar_produtos()
-    produtos_nomes = [p[1] for p in produtos_lista]
+    produtos_nomes = [p['nome'] for p in produtos_lista]
 
     tk.Label(frame, text="Produto:", bg="#34495e", fg="white", font=("Arial", 12)).pack(pady=5)
     combo_produto = ttk.Combobox(frame, values=produtos_nomes, font=("Arial", 12))
@@ -161,7 +187,7 @@ def gui_registrar_venda(tela_cheia: bool = False) -> None:
 
     # Combobox de clientes
     clientes_lista = clientes.listar_clientes()
-    clientes_nomes = [c[1] for c in clientes_lista]
+    clientes_nomes = [c['nome'] for c in clientes_lista]
 
     tk.Label(frame, text="Cliente (opcional):", bg="#34495e", fg="white", font=("Arial", 12)).pack(pady=5)
     combo_cliente = ttk.Combobox(frame, values=clientes_nomes, font=("Arial", 12))
@@ -203,7 +229,7 @@ def gui_listar_vendas(tela_cheia: bool = False) -> None:
 
     # Botões de exportação e filtros
     tk.Button(frame_superior, text="Exportar Excel", 
-              command=lambda: exportar_vendas_excel(),
+              command=lambda: gui_exportar('vendas'),
               bg="#27ae60", fg="white").pack(side='left', padx=5)
 
     # TreeView para vendas
@@ -224,7 +250,12 @@ def gui_listar_vendas(tela_cheia: bool = False) -> None:
     tree.pack(fill='both', expand=True, padx=10, pady=10)
 
     # Carregar vendas
-    for venda in listar_vendas():
+    try:
+        lista = listar_vendas()
+    except DatabaseError as e:
+        messagebox.showerror("Erro", f"Erro ao listar vendas: {str(e)}")
+        lista = []
+    for venda in lista:
         valores = (
             venda['id'],
             venda['produto'],
@@ -242,7 +273,7 @@ def gui_listar_vendas(tela_cheia: bool = False) -> None:
     frame_inferior.pack(fill='x')
 
     # Calcular e mostrar totais
-    total_vendas = sum(v['total'] for v in listar_vendas())
+    total_vendas = para_reais(sum(v['total_centavos'] for v in lista))
     tk.Label(frame_inferior, 
              text=f"Total de Vendas: R$ {total_vendas:.2f}", 
              bg="#34495e", fg="white", 